@@ -0,0 +1,380 @@
+"""
+Benchmarks for the GDAX trader
+
+Usage:
+
+    python benchmark.py soak --duration 3600 --frequency 0.1
+    python benchmark.py startup --repeat 10
+    python benchmark.py l3 --orders 300000 --messages 1000000
+    python benchmark.py decode --levels 20000 --depth 50 --repeat 20
+"""
+
+import argparse
+import json
+import logging
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from unittest.mock import patch
+
+from book_decoder import BookDecoder
+from gdax_trader import GDAXTrader
+from l3_book import L3Book
+from order_book import OrderBookSide
+from order_reconciler import OrderReconciler
+from simulated_client import SimulatedClient
+from strategies.order_book_imbalance import OBIStrategy
+from trade_feed import TradeFeed
+from utils import RateLimiter
+
+
+logger = logging.getLogger(__name__)
+
+
+def soak(duration, frequency, depth, volatility, latency, error_rate,
+        decode_error_rate, report_interval, fast):
+    """
+    Run the real trading loop against a :class:`SimulatedClient`
+
+    Reports iteration throughput and traced memory growth every
+    `report_interval` seconds.
+
+    :param duration: how long to run the trader in seconds
+    :param frequency: seconds between trader iterations
+    :param depth: number of generated book levels per side
+    :param volatility: standard deviation of the simulated mid price walk
+    :param latency: simulated request latency in seconds
+    :param error_rate: probability of a simulated `ConnectionError`
+    :param decode_error_rate: probability of a simulated `JSONDecodeError`
+    :param report_interval: seconds between progress reports
+    :param fast: do not pace requests to the exchange rate limit
+    :returns: dict of final throughput and memory statistics
+    """
+
+    client = SimulatedClient(depth=depth, volatility=volatility,
+            latency=latency, error_rate=error_rate,
+            decode_error_rate=decode_error_rate)
+
+    trader = GDAXTrader(client=client)
+    trader.FREQUENCY = frequency
+    trader.set_product('BTC-USD')
+    trader.set_reconciler(OrderReconciler(trader))
+    trader.set_trade_feed(TradeFeed())
+    trader.add_strategy(OBIStrategy())
+
+    iterations = [0]
+    run_iteration = trader._run_iteration
+
+    def counted_iteration():
+        iterations[0] += 1
+        return run_iteration()
+
+    trader._run_iteration = counted_iteration
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    start_time = time.time()
+
+    def report():
+        elapsed = time.time() - start_time
+        current, peak = tracemalloc.get_traced_memory()
+
+        stats = {
+            'elapsed': elapsed,
+            'iterations': iterations[0],
+            'iterations_per_second': iterations[0] / elapsed if elapsed else 0,
+            'requests': client.request_count,
+            'memory_growth': current - baseline,
+            'memory_peak': peak,
+        }
+
+        print('{elapsed:.0f}s: {iterations} iterations '
+                '({iterations_per_second:.2f}/s), {requests} requests, '
+                'memory growth {memory_growth} bytes, '
+                'peak {memory_peak} bytes'.format(**stats))
+
+        return stats
+
+    def monitor():
+        while True:
+            time.sleep(report_interval)
+
+            if time.time() - start_time >= duration:
+                return
+
+            report()
+
+    threading.Timer(duration, trader.stop).start()
+    threading.Thread(target=monitor, daemon=True).start()
+
+    if fast:
+        # Only requests are no longer paced, the loop still sleeps and failed
+        # requests still back off
+        unlimited = RateLimiter(rate=sys.maxsize, burst=sys.maxsize)
+
+        with patch('utils.rate_limiter', new=unlimited):
+            trader.run()
+    else:
+        trader.run()
+
+    stats = report()
+    tracemalloc.stop()
+
+    return stats
+
+
+# Modules imported by a trader process on startup
+STARTUP_MODULES = ('fleet', 'gdax_trader', 'strategies.order_book_imbalance')
+
+# Heavy optional dependencies that the trading core should not import
+HEAVY_MODULES = ('pandas', 'numpy', 'gdax')
+
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+elapsed = time.perf_counter() - start
+print(json.dumps({{'elapsed': elapsed,
+        'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def startup(repeat, modules=STARTUP_MODULES):
+    """
+    Measure the cold import time of the trading core
+
+    Every run imports `modules` in a fresh interpreter, so nothing is cached
+    in `sys.modules` between runs.
+
+    :param repeat: number of interpreters to start
+    :param modules: the modules to import
+    :returns: dict of import time statistics and the heavy modules loaded
+    """
+
+    script = STARTUP_SCRIPT.format(modules=tuple(modules), heavy=HEAVY_MODULES)
+    times = []
+    loaded = set()
+
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', script])
+        result = json.loads(output.decode().splitlines()[-1])
+
+        times.append(result['elapsed'])
+        loaded.update(result['loaded'])
+
+    stats = {
+        'runs': repeat,
+        'median': statistics.median(times),
+        'min': min(times),
+        'max': max(times),
+        'loaded': sorted(loaded),
+    }
+
+    print('{runs} runs: median {median:.3f}s, min {min:.3f}s, '
+            'max {max:.3f}s'.format(**stats))
+    print('Heavy modules loaded: {}'.format(
+            ', '.join(stats['loaded']) or 'none'))
+
+    return stats
+
+
+def l3(orders, messages, seed=0):
+    """
+    Measure the message throughput and memory of a level 3 book
+
+    The book is loaded with `orders` resting orders around a mid price, then
+    a mix of `open`, `match`, `change` and `done` messages is applied. The
+    messages are generated up front so only the book is measured.
+
+    :param orders: number of resting orders in the snapshot
+    :param messages: number of messages to apply
+    :param seed: the random seed
+    :returns: dict of throughput and memory statistics
+    """
+
+    rng = random.Random(seed)
+
+    def get_price(side):
+        offset = rng.randint(1, 1000) / 100
+        return repr(10000 - offset if side == 'buy' else 10000 + offset)
+
+    snapshot = {'sequence': 0, 'bids': [], 'asks': []}
+    resting = []
+
+    for index in range(orders):
+        side = 'buy' if index % 2 else 'sell'
+        order_id = 'snapshot-{}'.format(index)
+
+        snapshot['bids' if side == 'buy' else 'asks'].append(
+                [get_price(side), '1.0', order_id])
+        resting.append(order_id)
+
+    batch = []
+
+    for sequence in range(1, messages + 1):
+        kind = rng.random()
+
+        if kind < 0.4 or not resting:
+            side = rng.choice(['buy', 'sell'])
+            order_id = 'order-{}'.format(sequence)
+            batch.append({'type': 'open', 'sequence': sequence,
+                    'order_id': order_id, 'side': side,
+                    'price': get_price(side), 'remaining_size': '1.0'})
+            resting.append(order_id)
+        elif kind < 0.6:
+            batch.append({'type': 'match', 'sequence': sequence,
+                    'maker_order_id': rng.choice(resting), 'size': '0.1'})
+        elif kind < 0.7:
+            batch.append({'type': 'change', 'sequence': sequence,
+                    'order_id': rng.choice(resting), 'new_size': '0.5'})
+        else:
+            index = rng.randrange(len(resting))
+            resting[index], resting[-1] = resting[-1], resting[index]
+            batch.append({'type': 'done', 'sequence': sequence,
+                    'order_id': resting.pop()})
+
+    book = L3Book()
+
+    start_time = time.perf_counter()
+    book.load_snapshot(snapshot)
+    snapshot_time = time.perf_counter() - start_time
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    start_time = time.perf_counter()
+
+    for message in batch:
+        book.apply(message)
+
+    elapsed = time.perf_counter() - start_time
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = {
+        'snapshot_time': snapshot_time,
+        'messages_per_second': messages / elapsed if elapsed else 0,
+        'resting': len(book.orders),
+        'capacity': book.capacity,
+        'memory_growth': current - baseline,
+    }
+
+    print('Snapshot of {} orders loaded in {snapshot_time:.3f}s'.format(
+            orders, **stats))
+    print('{messages_per_second:.0f} messages/s, {resting} resting orders, '
+            '{capacity} slots, memory growth {memory_growth} bytes'.format(
+            **stats))
+
+    return stats
+
+
+def decode(levels, depth, repeat):
+    """
+    Measure the decode time of a level 2 order book response
+
+    A response of `levels` levels per side is decoded into order book sides
+    with their prices and sizes parsed, first with the standard library as
+    the GDAX client does, then in full and limited to `depth` levels with a
+    :class:`BookDecoder`.
+
+    :param levels: number of levels per side in the response
+    :param depth: number of levels per side kept by the limited decode
+    :param repeat: number of decodes timed for each method
+    :returns: dict of the median decode time in seconds by method
+    """
+
+    client = SimulatedClient(depth=levels)
+    content = client.get_product_order_book_content('BTC-USD', level=2)
+
+    def parse(order_book):
+        for key in ('bids', 'asks'):
+            side = OrderBookSide(order_book[key])
+            side.prices
+            side.sizes
+
+    full_decoder = BookDecoder(depth=None)
+    depth_decoder = BookDecoder(depth=depth)
+
+    methods = (
+        ('stdlib', lambda: parse(json.loads(content.decode()))),
+        (full_decoder.parser, lambda: parse(full_decoder.decode(content))),
+        ('depth {}'.format(depth),
+                lambda: parse(depth_decoder.decode(content))),
+    )
+
+    stats = {}
+
+    print('Response of {} bytes, {} levels per side'.format(len(content),
+            levels))
+
+    for name, method in methods:
+        times = []
+
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            method()
+            times.append(time.perf_counter() - start_time)
+
+        stats[name] = statistics.median(times)
+
+        print('{}: {:.3f}ms per snapshot'.format(name, stats[name] * 1000))
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+            formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark')
+    subparsers.required = True
+
+    soak_parser = subparsers.add_parser('soak',
+            help='run the trader against a simulated exchange')
+    soak_parser.add_argument('--duration', type=float, default=60)
+    soak_parser.add_argument('--frequency', type=float, default=0.1)
+    soak_parser.add_argument('--depth', type=int, default=50)
+    soak_parser.add_argument('--volatility', type=float, default=0.0005)
+    soak_parser.add_argument('--latency', type=float, default=0)
+    soak_parser.add_argument('--error-rate', type=float, default=0)
+    soak_parser.add_argument('--decode-error-rate', type=float, default=0)
+    soak_parser.add_argument('--report-interval', type=float, default=10)
+    soak_parser.add_argument('--fast', action='store_true',
+            help='do not pace requests to the exchange rate limit')
+
+    startup_parser = subparsers.add_parser('startup',
+            help='measure the import time of the trading core')
+    startup_parser.add_argument('--repeat', type=int, default=10)
+
+    l3_parser = subparsers.add_parser('l3',
+            help='measure level 3 book message throughput')
+    l3_parser.add_argument('--orders', type=int, default=300000)
+    l3_parser.add_argument('--messages', type=int, default=1000000)
+
+    decode_parser = subparsers.add_parser('decode',
+            help='measure level 2 order book decode time')
+    decode_parser.add_argument('--levels', type=int, default=20000)
+    decode_parser.add_argument('--depth', type=int, default=50)
+    decode_parser.add_argument('--repeat', type=int, default=20)
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.benchmark == 'soak':
+        soak(args.duration, args.frequency, args.depth, args.volatility,
+                args.latency, args.error_rate, args.decode_error_rate,
+                args.report_interval, args.fast)
+    elif args.benchmark == 'startup':
+        startup(args.repeat)
+    elif args.benchmark == 'l3':
+        l3(args.orders, args.messages)
+    elif args.benchmark == 'decode':
+        decode(args.levels, args.depth, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+from datetime import datetime, timezone
+import json
+import logging
+import os
+import time
+
+from book_decoder import BookDecoder
+
+
+logger = logging.getLogger(__name__)
+
+
+class BookArchive:
+    """
+    Record order book snapshots to local JSON lines files
+
+    Books are stored one per line in a file per product and UTC day,
+    `<directory>/<product>/<YYYY-MM-DD>.jsonl`, as
+    `{"time": ..., "book": ...}`.
+    Files are read backwards from their end, so reading the most recent
+    books does not load whole days.
+
+    Attributes:
+        directory: The root directory of the archive
+        depth: Number of levels per side recorded, `None` records every level
+    """
+
+    EXTENSION = '.jsonl'
+
+    # Levels per side recorded by default, as many as strategies are given
+    DEPTH = BookDecoder.DEPTH
+
+    # Bytes read at a time when reading a file backwards
+    BLOCK_SIZE = 64 * 1024
+
+    def __init__(self, directory, depth=DEPTH):
+        self.directory = directory
+        self.depth = depth
+
+        self._files = {}
+
+    def _get_path(self, product, timestamp):
+        day = datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+                '%Y-%m-%d')
+        return os.path.join(self.directory, product,
+                day + BookArchive.EXTENSION)
+
+    def _get_file(self, product, timestamp):
+        path = self._get_path(product, timestamp)
+
+        try:
+            return self._files[product, path]
+        except KeyError:
+            pass
+
+        # Close the previous day's file for this product
+        for key in [key for key in self._files if key[0] == product]:
+            self._files.pop(key).close()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        archive_file = open(path, 'a')
+        self._files[product, path] = archive_file
+
+        return archive_file
+
+    def append(self, product, order_book, timestamp=None):
+        """
+        Record an order book snapshot
+
+        :param product: the GDAX product
+        :param order_book: order book data
+        :param timestamp: the snapshot time in seconds since the epoch
+        """
+
+        if timestamp is None:
+            timestamp = time.time()
+
+        if self.depth is not None:
+            order_book = dict(order_book)
+            order_book['bids'] = order_book['bids'][:self.depth]
+            order_book['asks'] = order_book['asks'][:self.depth]
+
+        archive_file = self._get_file(product, timestamp)
+        archive_file.write(json.dumps({'time': timestamp, 'book': order_book}))
+        archive_file.write('\n')
+        archive_file.flush()
+
+    def read(self, product, since=None, limit=None):
+        """
+        Read recorded order book snapshots in the order they were recorded
+
+        :param product: the GDAX product
+        :param since: only return snapshots recorded after this time
+        :param limit: only return the most recent `limit` snapshots
+        :returns: list of tuple(timestamp, order_book)
+        """
+
+        product_directory = os.path.join(self.directory, product)
+
+        try:
+            names = os.listdir(product_directory)
+        except FileNotFoundError:
+            return []
+
+        names = sorted((name for name in names
+                if name.endswith(BookArchive.EXTENSION)), reverse=True)
+
+        books = []
+
+        # Walk backwards from the newest file until enough books are found
+        for name in names:
+            if limit is not None and len(books) >= limit:
+                break
+
+            path = os.path.join(product_directory, name)
+
+            for line in self._read_lines_reversed(path):
+                if limit is not None and len(books) >= limit:
+                    break
+
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A partially written line from an interrupted run
+                    logger.warning('Skipping corrupt archive line in {}'
+                            .format(name))
+                    continue
+
+                if since is not None and record['time'] <= since:
+                    return list(reversed(books))
+
+                books.append((record['time'], record['book']))
+
+        return list(reversed(books))
+
+    def _read_lines_reversed(self, path):
+        """
+        Read the lines of a file from the last to the first
+
+        :param path: the file path
+        :returns: generator of lines as bytes without their newline,
+            skipping empty lines
+        """
+
+        with open(path, 'rb') as archive_file:
+            position = archive_file.seek(0, os.SEEK_END)
+            remainder = b''
+
+            while position > 0:
+                size = min(self.BLOCK_SIZE, position)
+                position -= size
+
+                archive_file.seek(position)
+                lines = (archive_file.read(size) + remainder).split(b'\n')
+
+                # The first line may continue in the previous block
+                remainder = lines.pop(0)
+
+                for line in reversed(lines):
+                    if line:
+                        yield line
+
+            if remainder:
+                yield remainder
+
+    def close(self):
+        for archive_file in self._files.values():
+            archive_file.close()
+
+        self._files = {}
@@ -0,0 +1,206 @@
+from array import array
+import json
+from json.decoder import JSONDecodeError
+import logging
+import re
+
+# Faster JSON parsers are used when installed, in order of preference
+try:
+    import orjson as fast_json
+except ImportError:
+    try:
+        import ujson as fast_json
+    except ImportError:
+        fast_json = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class DecodedLevels(list):
+    """
+    Order book levels with their prices and sizes already parsed
+
+    A list of levels, so it can be used anywhere raw levels are, with the
+    numeric arrays :class:`OrderBookSide` would otherwise parse from them.
+
+    Attributes:
+        prices: :class:`array.array` of level prices
+        sizes: :class:`array.array` of level sizes
+    """
+
+    def __init__(self, levels=(), prices=None, sizes=None):
+        super().__init__(levels)
+
+        if prices is None:
+            prices = array('d', (float(level[0]) for level in self))
+
+        if sizes is None:
+            sizes = array('d', (float(level[1]) for level in self))
+
+        self.prices = prices
+        self.sizes = sizes
+
+
+class BookDecoder:
+    """
+    Decode order book responses directly into levels and numeric arrays
+
+    Level 2 books limited to `depth` levels per side are read with a scanner
+    that parses the first `depth` levels of each side and skips the rest
+    without decoding it. Other books, and responses the scanner cannot read
+    such as error messages, are decoded in full with the fastest JSON parser
+    installed, falling back to the standard library.
+
+    Attributes:
+        depth: Maximum number of level 2 levels decoded per side, `None` for
+            every level
+        parser: Name of the JSON parser used for full decodes
+    """
+
+    # Levels decoded per side of level 2 books
+    DEPTH = 50
+
+    _SEQUENCE = re.compile(rb'"sequence"\s*:\s*(\d+)')
+    _SIDE = {
+        'bids': re.compile(rb'"bids"\s*:\s*\['),
+        'asks': re.compile(rb'"asks"\s*:\s*\['),
+    }
+    _LEVEL = re.compile(rb'\s*\[\s*"([^"]*)"\s*,\s*"([^"]*)"\s*,\s*'
+            rb'(?:"([^"]*)"|(-?\d+))\s*\]\s*([,\]])')
+    _EMPTY = re.compile(rb'\s*\]')
+
+    def __init__(self, depth=DEPTH):
+        self.depth = depth
+        self.parser = 'json' if fast_json is None else fast_json.__name__
+
+    def decode(self, content, level=2):
+        """
+        Decode an order book response
+
+        :param content: the response body as bytes or a string
+        :param level: the level of the order book, only level 2 books are
+            limited to `depth`
+        :returns: order book data with the `bids` and `asks` levels as
+            :class:`DecodedLevels`, or the decoded response if it is not an
+            order book
+        :raises JSONDecodeError: the response is not valid JSON
+        """
+
+        if isinstance(content, str):
+            content = content.encode()
+
+        if level == 2 and self.depth is not None:
+            try:
+                return self._scan(content)
+            except ValueError as error:
+                logger.debug('Order book scan failed: {}'.format(error))
+
+        order_book = self._loads(content)
+
+        if not isinstance(order_book, dict):
+            return order_book
+
+        for key in ('bids', 'asks'):
+            if key in order_book:
+                levels = order_book[key]
+
+                if level == 2 and self.depth is not None:
+                    levels = levels[:self.depth]
+
+                order_book[key] = DecodedLevels(levels)
+
+        return order_book
+
+    def _loads(self, content):
+        """
+        Decode JSON with the fastest parser installed
+
+        :param content: the JSON bytes
+        :returns: the decoded value
+        :raises JSONDecodeError: the content is not valid JSON
+        """
+
+        if fast_json is None:
+            return json.loads(content.decode())
+
+        try:
+            return fast_json.loads(content)
+        except JSONDecodeError:
+            raise
+        except ValueError as error:
+            # ujson raises a plain ValueError
+            raise JSONDecodeError(str(error), content.decode(errors='replace'),
+                    0)
+
+    def _scan(self, content):
+        """
+        Read the sequence and the first `depth` levels of each side
+
+        :param content: the level 2 order book JSON bytes
+        :returns: order book data
+        :raises ValueError: the content is not a level 2 order book the
+            scanner can read
+        """
+
+        order_book = {}
+
+        match = BookDecoder._SEQUENCE.search(content)
+        if match is not None:
+            order_book['sequence'] = int(match.group(1))
+
+        for key, side in BookDecoder._SIDE.items():
+            match = side.search(content)
+
+            if match is None:
+                raise ValueError('Missing {}'.format(key))
+
+            order_book[key] = self._scan_levels(content, match.end())
+
+        return order_book
+
+    def _scan_levels(self, content, position):
+        """
+        Read levels from the start of a side's level list
+
+        :param content: the order book JSON bytes
+        :param position: the index just after the list's opening bracket
+        :returns: :class:`DecodedLevels` of at most `depth` levels
+        :raises ValueError: a level cannot be read
+        """
+
+        levels = []
+        prices = array('d')
+        sizes = array('d')
+
+        if BookDecoder._EMPTY.match(content, position) is not None:
+            return DecodedLevels(levels, prices, sizes)
+
+        level_pattern = BookDecoder._LEVEL
+
+        while len(levels) < self.depth:
+            match = level_pattern.match(content, position)
+
+            if match is None:
+                raise ValueError('Invalid level at {}'.format(position))
+
+            price, size, order_id, num_orders, end = match.groups()
+            price = price.decode()
+            size = size.decode()
+
+            if order_id is None:
+                levels.append([price, size, int(num_orders)])
+            else:
+                levels.append([price, size, order_id.decode()])
+
+            prices.append(float(price))
+            sizes.append(float(size))
+
+            if end == b']':
+                break
+
+            position = match.end()
+
+        # Levels beyond the depth are never read, each side is found by
+        # searching for its key
+        return DecodedLevels(levels, prices, sizes)
@@ -0,0 +1,322 @@
+"""
+Order book aggregation kernels
+
+Every kernel has a loop implementation and a vectorized NumPy
+implementation. The loops are compiled with Numba when it is installed, and
+the NumPy implementations are used otherwise. Running the loops uncompiled,
+the `python` backend, is only useful for checking the compiled kernels.
+
+Sides are passed as price and size sequences, such as the
+:class:`array.array` columns of :class:`OrderBookSide`, which are viewed as
+NumPy arrays without copying.
+
+This module imports NumPy, so strategies import it on first use to keep it
+out of the trader's startup.
+"""
+
+from array import array
+import math
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+NUMBA = 'numba'
+NUMPY = 'numpy'
+PYTHON = 'python'
+
+
+def _loop_best(prices, highest):
+    best = prices[0]
+
+    for i in range(1, len(prices)):
+        if (prices[i] > best) if highest else (prices[i] < best):
+            best = prices[i]
+
+    return best
+
+
+def _loop_weighted_quantity(prices, sizes, best, delta, beta):
+    quantity = 0.0
+
+    for i in range(len(prices)):
+        quantity += sizes[i] / (delta * abs(prices[i] - best) / best + beta)
+
+    return quantity
+
+
+def _loop_cumulative_depth(sizes):
+    depth = np.empty(len(sizes))
+    total = 0.0
+
+    for i in range(len(sizes)):
+        total += sizes[i]
+        depth[i] = total
+
+    return depth
+
+
+def _loop_depth_at_price(prices, sizes, price, bid):
+    depth = 0.0
+
+    for i in range(len(prices)):
+        if (prices[i] >= price) if bid else (prices[i] <= price):
+            depth += sizes[i]
+
+    return depth
+
+
+def _loop_price_at_depth(prices, sizes, depth):
+    total = 0.0
+
+    for i in range(len(prices)):
+        total += sizes[i]
+
+        if total >= depth:
+            return prices[i]
+
+    return math.nan
+
+
+def _loop_best_level(prices, sizes, highest):
+    best = 0
+
+    for i in range(1, len(prices)):
+        if ((prices[i] > prices[best]) if highest
+                else (prices[i] < prices[best])):
+            best = i
+
+    return prices[best], sizes[best]
+
+
+def _numpy_best(prices, highest):
+    return prices.max() if highest else prices.min()
+
+
+def _numpy_weighted_quantity(prices, sizes, best, delta, beta):
+    return float(np.sum(sizes / (delta * np.abs(prices - best) / best
+            + beta)))
+
+
+def _numpy_cumulative_depth(sizes):
+    return np.cumsum(sizes)
+
+
+def _numpy_depth_at_price(prices, sizes, price, bid):
+    mask = prices >= price if bid else prices <= price
+    return float(sizes[mask].sum())
+
+
+def _numpy_price_at_depth(prices, sizes, depth):
+    index = np.searchsorted(np.cumsum(sizes), depth)
+
+    if index >= len(prices):
+        return math.nan
+
+    return float(prices[index])
+
+
+def _numpy_best_level(prices, sizes, highest):
+    index = prices.argmax() if highest else prices.argmin()
+    return prices[index], sizes[index]
+
+
+LOOP_KERNELS = {
+    'best': _loop_best,
+    'weighted_quantity': _loop_weighted_quantity,
+    'cumulative_depth': _loop_cumulative_depth,
+    'depth_at_price': _loop_depth_at_price,
+    'price_at_depth': _loop_price_at_depth,
+    'best_level': _loop_best_level,
+}
+
+NUMPY_KERNELS = {
+    'best': _numpy_best,
+    'weighted_quantity': _numpy_weighted_quantity,
+    'cumulative_depth': _numpy_cumulative_depth,
+    'depth_at_price': _numpy_depth_at_price,
+    'price_at_depth': _numpy_price_at_depth,
+    'best_level': _numpy_best_level,
+}
+
+
+def get_backends():
+    """
+    Get the backends available in this environment
+
+    :returns: list of backend names, fastest first
+    """
+
+    backends = [NUMPY, PYTHON]
+
+    if numba is not None:
+        backends.insert(0, NUMBA)
+
+    return backends
+
+
+def _as_array(values):
+    """
+    View a sequence of floats as a NumPy array, without copying if possible
+
+    :param values: an :class:`array.array` of doubles, NumPy array or
+        sequence
+    :returns: a float64 :class:`numpy.ndarray`
+    """
+
+    if isinstance(values, array) and values.typecode == 'd':
+        return np.frombuffer(values, dtype=np.float64)
+
+    return np.asarray(values, dtype=np.float64)
+
+
+class BookKernels:
+    """
+    Order book aggregation routines on one backend
+
+    Attributes:
+        backend: The backend the kernels run on
+    """
+
+    def __init__(self, backend=None):
+        """
+        :param backend: `numba`, `numpy` or `python`, defaults to the fastest
+            available
+        :raises ValueError: the backend is not available
+        """
+
+        if backend is None:
+            backend = get_backends()[0]
+
+        if backend not in get_backends():
+            raise ValueError('Backend unavailable: {}'.format(backend))
+
+        self.backend = backend
+
+        if backend == NUMBA:
+            # Kernels are compiled on their first call
+            kernels = {name: numba.njit(cache=True)(kernel)
+                    for name, kernel in LOOP_KERNELS.items()}
+        elif backend == NUMPY:
+            kernels = NUMPY_KERNELS
+        else:
+            kernels = LOOP_KERNELS
+
+        self._kernels = kernels
+
+    def weighted_imbalance(self, bid_prices, bid_sizes, ask_prices, ask_sizes,
+            delta, beta):
+        """
+        Get the distance-weighted imbalance of an order book
+
+        Each level contributes `size / (delta * |price - best| / best + beta)`
+        to its side's quantity.
+
+        :param bid_prices: bid level prices
+        :param bid_sizes: bid level sizes
+        :param ask_prices: ask level prices
+        :param ask_sizes: ask level sizes
+        :param delta: weight given to the relative distance from the best
+            price
+        :param beta: base weight of a level at the best price
+        :returns: the imbalance between -1 and 1
+        :raises ValueError: a side is empty
+        :raises ZeroDivisionError: both sides have no size
+        """
+
+        bid_prices = _as_array(bid_prices)
+        ask_prices = _as_array(ask_prices)
+
+        if not len(bid_prices) or not len(ask_prices):
+            raise ValueError('Order book side is empty')
+
+        kernels = self._kernels
+
+        best_bid = kernels['best'](bid_prices, True)
+        best_ask = kernels['best'](ask_prices, False)
+
+        bid_qty = float(kernels['weighted_quantity'](bid_prices,
+                _as_array(bid_sizes), best_bid, float(delta), float(beta)))
+        ask_qty = float(kernels['weighted_quantity'](ask_prices,
+                _as_array(ask_sizes), best_ask, float(delta), float(beta)))
+
+        return (bid_qty - ask_qty) / (bid_qty + ask_qty)
+
+    def cumulative_depth(self, sizes):
+        """
+        Get the running total size of a side, best level first
+
+        :param sizes: level sizes in book order
+        :returns: :class:`numpy.ndarray` of cumulative sizes
+        """
+
+        return self._kernels['cumulative_depth'](_as_array(sizes))
+
+    def depth_at_price(self, prices, sizes, price, bid):
+        """
+        Get the total size at a price or better
+
+        :param prices: level prices
+        :param sizes: level sizes
+        :param price: the limit price
+        :param bid: `True` for a bid side, `False` for an ask side
+        :returns: the size of levels at or better than `price`
+        """
+
+        return float(self._kernels['depth_at_price'](_as_array(prices),
+                _as_array(sizes), float(price), bid))
+
+    def price_at_depth(self, prices, sizes, depth):
+        """
+        Get the price reached by taking a size from a side
+
+        :param prices: level prices in book order, best first
+        :param sizes: level sizes in book order
+        :param depth: the size to take
+        :returns: the price of the level the size is filled at, or NaN if the
+            side is not deep enough
+        """
+
+        return float(self._kernels['price_at_depth'](_as_array(prices),
+                _as_array(sizes), float(depth)))
+
+    def microprice(self, bid_prices, bid_sizes, ask_prices, ask_sizes):
+        """
+        Get the size-weighted mid price of the best levels
+
+        The best bid is weighted by the best ask size and the best ask by the
+        best bid size, so the price leans towards the side likely to trade
+        through next.
+
+        :param bid_prices: bid level prices
+        :param bid_sizes: bid level sizes
+        :param ask_prices: ask level prices
+        :param ask_sizes: ask level sizes
+        :returns: the microprice
+        :raises ValueError: a side is empty
+        :raises ZeroDivisionError: the best levels have no size
+        """
+
+        bid_prices = _as_array(bid_prices)
+        ask_prices = _as_array(ask_prices)
+
+        if not len(bid_prices) or not len(ask_prices):
+            raise ValueError('Order book side is empty')
+
+        best_level = self._kernels['best_level']
+
+        bid, bid_size = best_level(bid_prices, _as_array(bid_sizes), True)
+        ask, ask_size = best_level(ask_prices, _as_array(ask_sizes), False)
+
+        bid, bid_size, ask, ask_size = (float(bid), float(bid_size),
+                float(ask), float(ask_size))
+
+        return (bid * ask_size + ask * bid_size) / (bid_size + ask_size)
+
+
+# Kernels on the fastest available backend
+kernels = BookKernels()
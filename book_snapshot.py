@@ -0,0 +1,310 @@
+from bisect import bisect_left, insort
+from collections.abc import Sequence
+import logging
+import math
+
+from order_book import OrderBookSide
+
+
+logger = logging.getLogger(__name__)
+
+
+class LevelChunks(Sequence):
+    """
+    Read-only sequence of order book levels stored in chunks
+
+    Chunks are tuples of level tuples and are shared between snapshots, so
+    a new snapshot only builds the chunks that changed.
+
+    Attributes:
+        chunks: Tuple of chunks, each a tuple of levels in book order
+        keys: Tuple of the price bucket key of each chunk
+    """
+
+    def __init__(self, chunks, keys=()):
+        self.chunks = chunks
+        self.keys = keys
+        self._length = sum(len(chunk) for chunk in chunks)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            yield from chunk
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+
+        if index < 0:
+            index += self._length
+
+        if not 0 <= index < self._length:
+            raise IndexError('level index out of range')
+
+        for chunk in self.chunks:
+            if index < len(chunk):
+                return chunk[index]
+
+            index -= len(chunk)
+
+    def get_changes(self, previous):
+        """
+        Get the levels that changed since an earlier version of the side
+
+        Chunks shared with the earlier version are skipped without reading
+        their levels, so only the buckets rebuilt in between are compared.
+
+        :param previous: the :class:`LevelChunks` of an earlier snapshot of
+            the same side
+        :returns: list of `(price, size)` changes, with a size of zero for
+            removed levels
+        """
+
+        chunks = dict(zip(self.keys, self.chunks))
+        previous_chunks = dict(zip(previous.keys, previous.chunks))
+
+        changes = []
+
+        for key in chunks.keys() | previous_chunks.keys():
+            chunk = chunks.get(key, ())
+            previous_chunk = previous_chunks.get(key, ())
+
+            if chunk is previous_chunk:
+                continue
+
+            sizes = {float(level[0]): float(level[1]) for level in chunk}
+
+            for level in previous_chunk:
+                price = float(level[0])
+
+                if price not in sizes:
+                    changes.append((price, 0.0))
+                elif sizes[price] == float(level[1]):
+                    del sizes[price]
+
+            changes.extend(sizes.items())
+
+        return changes
+
+
+class BookSnapshot:
+    """
+    Immutable view of an order book at one version
+
+    Attributes:
+        version: Number of snapshots published before this one
+        sequence: Sequence number of the order book data, if known
+        bids: The bid side as an :class:`OrderBookSide`, best price first
+        asks: The ask side as an :class:`OrderBookSide`, best price first
+    """
+
+    __slots__ = ('version', 'sequence', 'bids', 'asks')
+
+    def __init__(self, version, sequence, bids, asks):
+        self.version = version
+        self.sequence = sequence
+        self.bids = bids
+        self.asks = asks
+
+
+class BookPublisher:
+    """
+    Publish copy-on-write order book snapshots from a writer thread
+
+    The writer updates levels with :meth:`load_snapshot` and
+    :meth:`apply_changes`, then calls :meth:`publish`. Levels are grouped into
+    price buckets of `bucket_size`, and publishing only rebuilds the buckets
+    that changed since the last snapshot, reusing the others, so its cost is
+    proportional to the levels changed. With a `depth`, snapshots only hold
+    the best `depth` levels of each side, and publishing only visits the
+    buckets holding them.
+
+    The new snapshot is published by replacing the `snapshot` attribute,
+    which is atomic, so readers on other threads take the latest snapshot
+    without a lock and keep a consistent view for as long as they hold it.
+
+    Only one thread may write to a publisher.
+
+    Attributes:
+        bucket_size: Width of the price buckets levels are grouped by
+        depth: Levels published per side, or `None` for every level
+        snapshot: The latest published :class:`BookSnapshot`, or `None`
+        sequence: Sequence number of the data written since the last publish
+    """
+
+    BUY = 'buy'
+    SELL = 'sell'
+
+    # Width of the price range of each bucket
+    BUCKET_SIZE = 1.0
+
+    def __init__(self, bucket_size=BUCKET_SIZE, depth=None):
+        self.bucket_size = bucket_size
+        self.depth = depth
+        self.snapshot = None
+        self.sequence = None
+
+        # Levels by price by bucket key, with the sorted bucket keys
+        self._buckets = {BookPublisher.BUY: {}, BookPublisher.SELL: {}}
+        self._keys = {BookPublisher.BUY: [], BookPublisher.SELL: []}
+
+        # Published chunk of each bucket and the buckets changed since
+        self._chunks = {BookPublisher.BUY: {}, BookPublisher.SELL: {}}
+        self._dirty = {BookPublisher.BUY: set(), BookPublisher.SELL: set()}
+
+        self._version = 0
+
+    def _get_key(self, price):
+        return math.floor(price / self.bucket_size)
+
+    def update(self, side, price, size, num_orders=None):
+        """
+        Set the size of a level, removing it when the size is zero
+
+        :param side: `buy` or `sell`
+        :param price: the level price as a string
+        :param size: the level size as a string
+        :param num_orders: the number of orders at the level, if known
+        """
+
+        price_value = float(price)
+        key = self._get_key(price_value)
+
+        buckets = self._buckets[side]
+        bucket = buckets.get(key)
+
+        if float(size) == 0:
+            if bucket is None or bucket.pop(price_value, None) is None:
+                return
+
+            if not bucket:
+                del buckets[key]
+                keys = self._keys[side]
+                del keys[bisect_left(keys, key)]
+
+        else:
+            level = (price, size, num_orders)
+
+            if bucket is None:
+                bucket = buckets[key] = {}
+                insort(self._keys[side], key)
+            elif bucket.get(price_value) == level:
+                return
+
+            bucket[price_value] = level
+
+        self._dirty[side].add(key)
+
+    def apply_changes(self, changes, sequence=None):
+        """
+        Apply level 2 changes
+
+        :param changes: changes in the websocket `l2update` format, each a
+            list of side, price and size
+        :param sequence: the sequence number after the changes
+        """
+
+        for side, price, size in changes:
+            self.update(side, price, size)
+
+        if sequence is not None:
+            self.sequence = sequence
+
+    def load_snapshot(self, order_book):
+        """
+        Replace every level with those of a level 2 order book
+
+        Only levels that differ from the current ones mark their buckets as
+        changed.
+
+        :param order_book: level 2 order book data
+        :raises KeyError: the order book is missing a side
+        """
+
+        for side, levels in ((BookPublisher.BUY, order_book['bids']),
+                (BookPublisher.SELL, order_book['asks'])):
+            seen = set()
+
+            for price, size, num_orders in levels:
+                seen.add(float(price))
+                self.update(side, price, size, num_orders)
+
+            for bucket in list(self._buckets[side].values()):
+                for price_value, level in list(bucket.items()):
+                    if price_value not in seen:
+                        self.update(side, level[0], '0')
+
+        self.sequence = order_book.get('sequence')
+
+    def _build_side(self, side):
+        """
+        Build the chunks of one side, reusing unchanged buckets
+
+        :param side: `buy` or `sell`
+        :returns: an :class:`OrderBookSide` over the chunks, best price first
+        """
+
+        buckets = self._buckets[side]
+        chunks = self._chunks[side]
+        reverse = side == BookPublisher.BUY
+
+        for key in self._dirty[side]:
+            bucket = buckets.get(key)
+
+            if bucket is None:
+                chunks.pop(key, None)
+            else:
+                chunks[key] = tuple(bucket[price]
+                        for price in sorted(bucket, reverse=reverse))
+
+        self._dirty[side].clear()
+
+        keys = reversed(self._keys[side]) if reverse else self._keys[side]
+
+        published_keys = []
+        published_chunks = []
+        remaining = self.depth
+
+        for key in keys:
+            chunk = chunks[key]
+
+            # Only the buckets holding the best `depth` levels are visited
+            if remaining is not None:
+                if remaining <= 0:
+                    break
+
+                chunk = chunk[:remaining]
+                remaining -= len(chunk)
+
+            published_keys.append(key)
+            published_chunks.append(chunk)
+
+        return OrderBookSide(LevelChunks(tuple(published_chunks),
+                tuple(published_keys)))
+
+    def publish(self):
+        """
+        Publish the levels written since the last snapshot
+
+        :returns: the new :class:`BookSnapshot`, or the current one if nothing
+            changed
+        """
+
+        if (self.snapshot is not None
+                and not self._dirty[BookPublisher.BUY]
+                and not self._dirty[BookPublisher.SELL]
+                and self.snapshot.sequence == self.sequence):
+            return self.snapshot
+
+        bids = self._build_side(BookPublisher.BUY)
+        asks = self._build_side(BookPublisher.SELL)
+
+        snapshot = BookSnapshot(self._version, self.sequence, bids, asks)
+        self._version += 1
+
+        # A single reference assignment publishes the snapshot atomically
+        self.snapshot = snapshot
+
+        return snapshot
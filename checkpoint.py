@@ -0,0 +1,152 @@
+import json
+import logging
+import os
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpointer:
+    """
+    Periodically persist trader state to a local append-only file
+
+    :meth:`submit` only swaps a reference, so it is cheap enough to call every
+    iteration. A background thread serializes the latest submitted state
+    every `interval` seconds and appends it to the checkpoint file as a JSON
+    line. Once the file grows past `max_bytes` it is atomically replaced with
+    a file holding only the latest checkpoint.
+
+    Submitted state must not be mutated afterwards, since it is serialized on
+    the background thread.
+
+    Attributes:
+        path: The checkpoint file
+        interval: Seconds between checkpoint writes
+        max_bytes: Size of the checkpoint file that triggers rotation
+    """
+
+    def __init__(self, path, interval=10, max_bytes=10 * 1024 * 1024):
+        self.path = path
+        self.interval = interval
+        self.max_bytes = max_bytes
+
+        self._pending = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start writing checkpoints from a background thread
+        """
+
+        if self._thread is not None:
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='checkpointer',
+                daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background thread and write any pending checkpoint
+        """
+
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        self.flush()
+
+    def submit(self, state):
+        """
+        Submit the latest state to be checkpointed
+
+        Only the most recent state submitted before a write is persisted.
+
+        :param state: JSON serializable state
+        """
+
+        with self._lock:
+            self._pending = state
+
+    def flush(self):
+        """
+        Write the pending checkpoint, if any
+
+        :returns: `True` if a checkpoint was written
+        """
+
+        with self._lock:
+            state = self._pending
+            self._pending = None
+
+        if state is None:
+            return False
+
+        try:
+            self._write(state)
+        except (OSError, TypeError, ValueError) as error:
+            logger.warning('Checkpoint failed: {}'.format(error))
+            return False
+
+        return True
+
+    def load(self):
+        """
+        Load the most recent checkpoint
+
+        Lines that fail to parse, such as one cut short by a crash, are
+        skipped.
+
+        :returns: tuple(timestamp, state), or `None` if there is no checkpoint
+        """
+
+        try:
+            with open(self.path) as checkpoint_file:
+                lines = checkpoint_file.readlines()
+        except FileNotFoundError:
+            return None
+
+        for line in reversed(lines):
+            try:
+                record = json.loads(line)
+                return record['time'], record['state']
+            except (ValueError, KeyError, TypeError):
+                logger.warning('Skipping corrupt checkpoint in {}'.format(
+                        self.path))
+
+        return None
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+    def _write(self, state):
+        line = json.dumps({'time': time.time(), 'state': state}, default=str)
+        line += '\n'
+
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+
+        if size + len(line) <= self.max_bytes:
+            with open(self.path, 'a') as checkpoint_file:
+                checkpoint_file.write(line)
+            return
+
+        # Rotate by atomically replacing the file with the latest checkpoint
+        temp_path = self.path + '.tmp'
+
+        with open(temp_path, 'w') as checkpoint_file:
+            checkpoint_file.write(line)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+
+        os.replace(temp_path, self.path)
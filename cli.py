@@ -1,16 +1,99 @@
 import logging
 logging.basicConfig(level=logging.INFO)
+import argparse
+import copy
+import os
 
-from gdax_trader import GDAXTrader
-from strategies.order_book_imbalance import OBIStrategy
+from fleet import Fleet, load_config
+from market_data import WebsocketSource
+from shared_book import DIRECTORY, SharedBookPublisher
+from strategies import get_strategy_modules
+
+
+# Trade BTC-USD with the order book imbalance strategy when no configuration
+# file is given
+DEFAULT_CONFIG = {
+    'traders': [
+        {
+            'product': 'BTC-USD',
+            'strategies': [
+                {'class': 'order_book_imbalance.OBIStrategy'},
+            ],
+        },
+    ],
+}
+
+
+def get_default_config():
+    # Environment settings must not leak into the shared default
+    config = copy.deepcopy(DEFAULT_CONFIG)
+
+    # Record order books so restarts can warm up from recent history
+    archive_directory = os.environ.get('GDAX_BOOK_ARCHIVE')
+    if archive_directory:
+        config['traders'][0]['book_archive'] = archive_directory
+
+    # Checkpoint strategy state so restarts resume open orders and history
+    checkpoint_path = os.environ.get('GDAX_CHECKPOINT')
+    if checkpoint_path:
+        config['traders'][0]['checkpoint'] = checkpoint_path
+
+    # Record signal and book statistics for offline research
+    stats_directory = os.environ.get('GDAX_STATS_DIR')
+    if stats_directory:
+        config['traders'][0]['stats'] = stats_directory
+
+    # Profile iterations slower than a second to find what slowed them
+    profile_directory = os.environ.get('GDAX_PROFILE_DIR')
+    if profile_directory:
+        config['profile'] = {'directory': profile_directory}
+
+    # Read books published by a book publisher process on this host
+    shared_books = os.environ.get('GDAX_SHARED_BOOKS')
+    if shared_books:
+        config['market_data'] = 'shared'
+        config['shared_books'] = shared_books
+
+    return config
 
 
 if __name__ == '__main__':
-    trader = GDAXTrader()
+    parser = argparse.ArgumentParser(description='Run GDAX trading strategies')
+    parser.add_argument('--config', help='path to a JSON fleet configuration')
+    parser.add_argument('--paper', action='store_true',
+            help='trade every product with simulated balances')
+    parser.add_argument('--backtest', metavar='DIRECTORY',
+            help='replay every product from an order book archive with '
+            'simulated balances')
+    parser.add_argument('--list-strategies', action='store_true',
+            help='list the available strategy modules and exit')
+    parser.add_argument('--publish', nargs='+', metavar='PRODUCT',
+            help='publish order books for traders in other processes')
+
+    args = parser.parse_args()
+
+    if args.list_strategies:
+        for module in get_strategy_modules():
+            print(module)
+    elif args.publish:
+        publisher = SharedBookPublisher(WebsocketSource(args.publish),
+                args.publish,
+                directory=os.environ.get('GDAX_SHARED_BOOKS', DIRECTORY))
+        publisher.run()
+    else:
+        if args.config:
+            config = load_config(args.config)
+        else:
+            config = get_default_config()
 
-    trader.set_product('BTC-USD')
+        if args.paper:
+            for trader_config in config['traders']:
+                trader_config['mode'] = 'paper'
 
-    strategy = OBIStrategy()
-    trader.add_strategy(strategy)
+        if args.backtest:
+            for trader_config in config['traders']:
+                trader_config['mode'] = 'backtest'
+                trader_config['replay'] = args.backtest
 
-    trader.run()
+        fleet = Fleet.from_config(config)
+        fleet.run()
@@ -0,0 +1,146 @@
+import logging
+import time
+
+from utils import parse_timestamp
+
+
+logger = logging.getLogger(__name__)
+
+
+class ExchangeClock:
+    """
+    Local estimate of the exchange's clock
+
+    The offset between the local clock and exchange time is measured from
+    the GDAX `/time` endpoint, assuming the exchange read its clock half way
+    through the request, and smoothed with an exponentially weighted moving
+    average.
+
+    Exchange timestamps are converted once to deadlines on the monotonic
+    clock and cached, so checking whether a period has passed since an order
+    was created is a single integer comparison that is unaffected by
+    adjustments to the local clock.
+
+    Attributes:
+        client: The GDAX API client used to read exchange time
+        smoothing: Weight of each new offset sample, between 0 and 1
+        sync_interval: Seconds between offset measurements
+        offset: Seconds the exchange clock is ahead of the local clock
+        round_trip: Duration in seconds of the last measurement request
+        synced_at: Monotonic time of the last measurement, `None` before
+    """
+
+    # Weight of each new offset sample
+    SMOOTHING = 0.2
+
+    # Seconds between offset measurements
+    SYNC_INTERVAL = 5 * 60
+
+    # Number of converted timestamps kept
+    CACHE_SIZE = 1024
+
+    def __init__(self, client, smoothing=SMOOTHING,
+            sync_interval=SYNC_INTERVAL):
+        self.client = client
+        self.smoothing = smoothing
+        self.sync_interval = sync_interval
+
+        self.offset = 0.0
+        self.round_trip = None
+        self.synced_at = None
+
+        self._deadlines = {}
+
+    def sync(self):
+        """
+        Measure the offset to exchange time and update the estimate
+
+        :returns: the smoothed offset in seconds
+        :raises ConnectionError: if the exchange cannot be reached
+        :raises JSONDecodeError: if the response cannot be decoded
+        :raises KeyError: the response is missing the exchange time
+        """
+
+        start = time.time()
+        response = self.client.get_time()
+        end = time.time()
+
+        sample = float(response['epoch']) - (start + end) / 2
+
+        if self.synced_at is None:
+            self.offset = sample
+        else:
+            self.offset += self.smoothing * (sample - self.offset)
+
+        self.round_trip = end - start
+        self.synced_at = time.monotonic()
+
+        # Cached deadlines were converted with the previous offset
+        self._deadlines.clear()
+
+        logger.info('Exchange clock offset: {:.3f}s (sample {:.3f}s, '
+                'round trip {:.3f}s)'.format(self.offset, sample,
+                self.round_trip))
+
+        return self.offset
+
+    def needs_sync(self):
+        """
+        Check if the offset is due to be measured
+
+        :returns: `True` if the offset was never measured or is older than
+            `sync_interval`
+        """
+
+        return (self.synced_at is None
+                or time.monotonic() - self.synced_at >= self.sync_interval)
+
+    def now(self):
+        """
+        Get the estimated exchange time
+
+        :returns: seconds since the epoch on the exchange clock
+        """
+
+        return time.time() + self.offset
+
+    def get_deadline(self, timestamp, seconds):
+        """
+        Get the monotonic deadline a period after an exchange timestamp
+
+        :param timestamp: the GDAX timestamp string, such as an order's
+            `created_at`
+        :param seconds: the period in seconds
+        :returns: the deadline in nanoseconds on :func:`time.monotonic_ns`
+        :raises ValueError: the timestamp is not in the GDAX format
+        """
+
+        key = (timestamp, seconds)
+
+        try:
+            return self._deadlines[key]
+        except KeyError:
+            pass
+
+        remaining = parse_timestamp(timestamp) + seconds - self.now()
+        deadline = time.monotonic_ns() + int(remaining * 1e9)
+
+        # Forget the oldest conversion when full
+        if len(self._deadlines) >= self.CACHE_SIZE:
+            del self._deadlines[next(iter(self._deadlines))]
+
+        self._deadlines[key] = deadline
+
+        return deadline
+
+    def has_elapsed(self, timestamp, seconds):
+        """
+        Check if a period has passed since an exchange timestamp
+
+        :param timestamp: the GDAX timestamp string
+        :param seconds: the period in seconds
+        :returns: `True` if the period has passed
+        :raises ValueError: the timestamp is not in the GDAX format
+        """
+
+        return time.monotonic_ns() >= self.get_deadline(timestamp, seconds)
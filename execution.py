@@ -0,0 +1,242 @@
+from json.decoder import JSONDecodeError
+import json
+import logging
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+
+
+logger = logging.getLogger(__name__)
+
+
+class Execution:
+    """
+    Base class for the venues a trader sends orders and account requests to
+
+    Implements the order and account methods of
+    :class:`gdax.AuthenticatedClient` by delegating to a client, so a trader
+    can route orders somewhere other than the client it gets market data
+    from. Simulated executions override every method, and are passed each
+    order book and the new trades to match their resting orders against.
+
+    Attributes:
+        client: The client requests are delegated to
+    """
+
+    # Seconds to wait for the exchange to respond to a signed request
+    TIMEOUT = 30
+
+    def __init__(self, client=None):
+        self.client = client
+
+    def update_book(self, product, order_book):
+        """
+        Override in child class to match resting orders against a new book
+
+        :param product: the GDAX product
+        :param order_book: level 2 order book data
+        """
+
+        pass
+
+    def update_trades(self, product, trades):
+        """
+        Override in child class to match resting orders against new trades
+
+        :param product: the GDAX product
+        :param trades: new trades, oldest first
+        """
+
+        pass
+
+    def get_queue_position(self, order_id):
+        """
+        Override in child class to report the size queued ahead of an order
+
+        :param order_id: the order ID
+        :returns: the size ahead, or `None` if it is not known
+        """
+
+        return None
+
+    def get_accounts(self):
+        return self.client.get_accounts()
+
+    def get_order(self, order_id):
+        return self.client.get_order(order_id)
+
+    def get_orders(self):
+        return self.client.get_orders()
+
+    def get_fills(self, order_id='', product_id='', before='', after='',
+            limit=''):
+        return self.client.get_fills(order_id=order_id,
+                product_id=product_id, before=before, after=after, limit=limit)
+
+    def get_fills_page(self, product_id='', before='', limit=''):
+        """
+        Get one page of fills without following older pages
+
+        The GDAX client follows every older page of fills, so the page is
+        requested directly with the client's credentials.
+
+        :param product_id: only get fills of this product
+        :param before: only get fills newer than this trade ID cursor,
+            closest to the cursor first if there are more than `limit`
+        :param limit: maximum number of fills
+        :returns: list of fills newest first, or an error message
+        """
+
+        query = {'product_id': product_id, 'before': before, 'limit': limit}
+
+        return self._request('get', '/fills', query={key: value
+                for key, value in query.items() if value != ''})
+
+    def _request(self, method, path, params=None, query=None):
+        """
+        Send a request signed with the client's credentials
+
+        :param method: the HTTP method
+        :param path: the API path
+        :param params: parameters sent as the JSON body
+        :param query: parameters sent in the query string
+        :returns: the decoded response
+        :raises ConnectionError: the request failed, or timed out when it is
+            safe to send again
+        :raises Timeout: a POST request timed out after it was sent
+        :raises JSONDecodeError: the response is not JSON
+        """
+
+        # The client's authentication signs the body as a string
+        data = None if params is None else json.dumps(params)
+
+        try:
+            response = self._send_request(method, self.client.url + path,
+                    params=query, data=data)
+        except Timeout as error:
+            # A POST that reached the exchange may have taken effect, so it
+            # is only retried if the connection was never made
+            if method == 'post' and not isinstance(error, ConnectionError):
+                raise
+
+            raise ConnectionError('Request timed out: {}'.format(error))
+
+        return response.json()
+
+    def _send_request(self, method, url, **kwargs):
+        """
+        Send a request signed with the client's credentials
+
+        :param method: the HTTP method
+        :param url: the request URL
+        :returns: the :class:`requests.Response`
+        """
+
+        return requests.request(method, url, auth=self.client.auth,
+                timeout=self.TIMEOUT, **kwargs)
+
+    def buy(self, **kwargs):
+        return self.client.buy(**kwargs)
+
+    def sell(self, **kwargs):
+        return self.client.sell(**kwargs)
+
+    def cancel_order(self, order_id):
+        return self.client.cancel_order(order_id)
+
+    def cancel_all(self, data=None, product=''):
+        return self.client.cancel_all(product=product)
+
+
+class LiveExecution(Execution):
+    """
+    Send orders and account requests to the exchange with a GDAX client
+
+    The GDAX client opens a new HTTPS connection for every request. With a
+    `pool_size`, orders and cancels are instead sent over a pool of up to
+    `pool_size` persistent connections, signed with the client's
+    credentials, so orders sent from several threads at once each skip the
+    connection handshake.
+
+    Attributes:
+        pool_size: Number of persistent connections, or `None` to send every
+            request with the client
+        session: The session holding the persistent connections
+    """
+
+    def __init__(self, client, pool_size=None):
+        super().__init__(client)
+
+        self.pool_size = pool_size
+        self.session = None
+
+        if pool_size is not None:
+            self.session = requests.Session()
+            self.session.mount('https://', HTTPAdapter(pool_connections=1,
+                    pool_maxsize=pool_size))
+
+    def buy(self, **kwargs):
+        if self.session is None:
+            return super().buy(**kwargs)
+
+        return self._place_order(dict(kwargs, side='buy'))
+
+    def sell(self, **kwargs):
+        if self.session is None:
+            return super().sell(**kwargs)
+
+        return self._place_order(dict(kwargs, side='sell'))
+
+    def cancel_order(self, order_id):
+        if self.session is None:
+            return super().cancel_order(order_id)
+
+        return self._request('delete', '/orders/{}'.format(order_id))
+
+    def cancel_all(self, data=None, product=''):
+        if self.session is None:
+            return super().cancel_all(product=product)
+
+        path = '/orders'
+        if product:
+            path += '?product_id={}'.format(product)
+
+        return self._request('delete', path)
+
+    def _place_order(self, params):
+        """
+        Place an order over the persistent connections
+
+        Orders are sent with a `client_oid`. An order whose request timed out
+        may still have been placed, so instead of being sent again it is
+        looked up by its `client_oid`.
+
+        :param params: the order parameters
+        :returns: the order data, or an error message if the order was not
+            placed or its status is unknown
+        :raises ConnectionError: the order could not be sent
+        """
+
+        params.setdefault('client_oid', str(uuid.uuid4()))
+
+        try:
+            return self._request('post', '/orders', params)
+        except Timeout as error:
+            logger.warning('Order {} timed out: {}'.format(
+                    params['client_oid'], error))
+
+        try:
+            return self._request('get', '/orders/client:{}'.format(
+                    params['client_oid']))
+        except (ConnectionError, JSONDecodeError) as error:
+            logger.warning(error)
+            return {'message': 'Order status unknown: {}'.format(error)}
+
+    def _send_request(self, method, url, **kwargs):
+        if self.session is None:
+            return super()._send_request(method, url, **kwargs)
+
+        return self.session.request(method, url, auth=self.client.auth,
+                timeout=self.TIMEOUT, **kwargs)
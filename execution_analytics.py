@@ -0,0 +1,354 @@
+from collections import deque
+from decimal import Decimal, InvalidOperation
+import logging
+import time
+
+from utils import parse_timestamp
+
+
+logger = logging.getLogger(__name__)
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate using the P-square algorithm
+
+    Keeps five markers regardless of how many values are added.
+
+    Attributes:
+        q: The quantile being estimated, between 0 and 1
+        count: Number of values added
+    """
+
+    def __init__(self, q):
+        self.q = q
+        self.count = 0
+
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * q, 1 + 4 * q, 3 + 2 * q, 5]
+        self._increments = [0, q / 2, q, (1 + q) / 2, 1]
+
+    def add(self, value):
+        self.count += 1
+        heights = self._heights
+
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        positions = self._positions
+
+        for index in range(cell + 1, 5):
+            positions[index] += 1
+
+        for index in range(5):
+            self._desired[index] += self._increments[index]
+
+        # Move the middle markers towards their desired positions
+        for index in range(1, 4):
+            offset = self._desired[index] - positions[index]
+
+            if ((offset >= 1 and positions[index + 1] - positions[index] > 1)
+                    or (offset <= -1
+                    and positions[index - 1] - positions[index] < -1)):
+                step = 1 if offset > 0 else -1
+
+                height = self._parabolic(index, step)
+
+                if not heights[index - 1] < height < heights[index + 1]:
+                    height = self._linear(index, step)
+
+                heights[index] = height
+                positions[index] += step
+
+    def _parabolic(self, index, step):
+        heights = self._heights
+        positions = self._positions
+
+        return heights[index] + step / (positions[index + 1]
+                - positions[index - 1]) * (
+                (positions[index] - positions[index - 1] + step)
+                * (heights[index + 1] - heights[index])
+                / (positions[index + 1] - positions[index])
+                + (positions[index + 1] - positions[index] - step)
+                * (heights[index] - heights[index - 1])
+                / (positions[index] - positions[index - 1]))
+
+    def _linear(self, index, step):
+        heights = self._heights
+        positions = self._positions
+
+        return heights[index] + step * (heights[index + step]
+                - heights[index]) / (positions[index + step]
+                - positions[index])
+
+    @property
+    def value(self):
+        """
+        The current quantile estimate
+
+        :returns: the estimate, or `None` if no values have been added
+        """
+
+        if not self._heights:
+            return None
+
+        if self.count < 5:
+            return self._heights[int(round(self.q * (self.count - 1)))]
+
+        return self._heights[2]
+
+
+class ExecutionStats:
+    """
+    Running execution aggregates for one strategy and product
+
+    Attributes:
+        ordered_size: Total size of orders placed
+        filled_size: Total size filled
+        filled_value: Total quote value filled
+        maker_size: Size filled as the maker
+        fees: Total fees paid
+        fill_count: Number of fills
+        filled_within_hold: Number of fills within the hold time of the order
+        time_to_fill: Streaming time to fill quantiles in seconds
+        markouts: Sum and count of signed price moves after fills by horizon
+    """
+
+    QUANTILES = (0.5, 0.9)
+
+    def __init__(self, horizons):
+        self.ordered_size = 0.0
+        self.filled_size = 0.0
+        self.filled_value = 0.0
+        self.maker_size = 0.0
+        self.fees = 0.0
+        self.fill_count = 0
+        self.filled_within_hold = 0
+
+        self.time_to_fill = {q: P2Quantile(q)
+                for q in ExecutionStats.QUANTILES}
+        self.markouts = {horizon: [0.0, 0] for horizon in horizons}
+
+    def get_summary(self):
+        """
+        Get the current aggregates
+
+        :returns: dict of execution metrics
+        """
+
+        def ratio(numerator, denominator):
+            return numerator / denominator if denominator else None
+
+        summary = {
+            'fill_count': self.fill_count,
+            'ordered_size': self.ordered_size,
+            'filled_size': self.filled_size,
+            'vwap': ratio(self.filled_value, self.filled_size),
+            'fill_ratio': ratio(self.filled_size, self.ordered_size),
+            'maker_ratio': ratio(self.maker_size, self.filled_size),
+            'fees': self.fees,
+            'filled_within_hold_ratio': ratio(self.filled_within_hold,
+                    self.fill_count),
+        }
+
+        for q, quantile in self.time_to_fill.items():
+            summary['time_to_fill_p{:.0f}'.format(q * 100)] = quantile.value
+
+        for horizon, (total, count) in self.markouts.items():
+            summary['markout_{}s'.format(horizon)] = ratio(total, count)
+
+        return summary
+
+
+class ExecutionAnalytics:
+    """
+    Aggregate fills incrementally into execution metrics
+
+    Orders and fills are ingested as they arrive and folded into running
+    aggregates per strategy and product, so memory does not grow with the
+    number of fills. Markouts measure the relative mid price move in the
+    fill's favour at each horizon after the fill, negative values indicate
+    adverse selection.
+
+    Attributes:
+        horizons: Seconds after a fill the mid price is marked at
+        hold_time: Seconds an order is expected to rest before it may be
+            cancelled, used to count fills within the hold time
+        stats: :class:`ExecutionStats` by tuple(strategy name, product)
+    """
+
+    HORIZONS = (1, 10)
+
+    def __init__(self, horizons=HORIZONS, hold_time=None):
+        self.horizons = horizons
+        self.hold_time = hold_time
+        self.stats = {}
+
+        self._orders = {}
+        self._pending_markouts = {}
+
+    def _get_stats(self, strategy_name, product):
+        key = (strategy_name, product)
+
+        try:
+            return self.stats[key]
+        except KeyError:
+            stats = self.stats[key] = ExecutionStats(self.horizons)
+            return stats
+
+    def add_order(self, strategy_name, order):
+        """
+        Record an order placed by a strategy
+
+        :param strategy_name: the name of the strategy placing the order
+        :param order: the order data
+        """
+
+        try:
+            order_id = order['id']
+            product = order['product_id']
+            size = float(order['size'])
+        except (KeyError, TypeError, ValueError) as error:
+            logger.warning('Order not recorded: {}'.format(error))
+            return
+
+        if order_id in self._orders:
+            return
+
+        try:
+            created_at = parse_timestamp(order['created_at'])
+        except (KeyError, ValueError):
+            created_at = time.time()
+
+        self._orders[order_id] = (strategy_name, created_at)
+        self._get_stats(strategy_name, product).ordered_size += size
+
+    def order_done(self, order_id):
+        """
+        Forget an order that can no longer be filled
+
+        :param order_id: the order ID
+        """
+
+        self._orders.pop(order_id, None)
+
+    def add_fill(self, fill, strategy_name=None):
+        """
+        Fold a fill into the aggregates
+
+        :param fill: the fill data
+        :param strategy_name: the strategy owning the order, looked up from
+            recorded orders when not given
+        """
+
+        try:
+            order_id = fill['order_id']
+            product = fill['product_id']
+            price = float(Decimal(fill['price']))
+            size = float(Decimal(fill['size']))
+            side = fill['side']
+        except (KeyError, TypeError, InvalidOperation) as error:
+            logger.warning('Fill not recorded: {}'.format(error))
+            return
+
+        order = self._orders.get(order_id)
+
+        if strategy_name is None:
+            strategy_name = order[0] if order is not None else None
+
+        try:
+            filled_at = parse_timestamp(fill['created_at'])
+        except (KeyError, ValueError):
+            filled_at = time.time()
+
+        stats = self._get_stats(strategy_name, product)
+
+        stats.fill_count += 1
+        stats.filled_size += size
+        stats.filled_value += price * size
+
+        if fill.get('liquidity') == 'M':
+            stats.maker_size += size
+
+        try:
+            stats.fees += float(Decimal(fill['fee']))
+        except (KeyError, TypeError, InvalidOperation):
+            pass
+
+        if order is not None:
+            time_to_fill = filled_at - order[1]
+
+            for quantile in stats.time_to_fill.values():
+                quantile.add(time_to_fill)
+
+            if self.hold_time is not None and time_to_fill <= self.hold_time:
+                stats.filled_within_hold += 1
+
+        direction = 1 if side == 'buy' else -1
+        pending = self._pending_markouts.setdefault(product,
+                {horizon: deque() for horizon in self.horizons})
+
+        for horizon in self.horizons:
+            pending[horizon].append((filled_at + horizon, direction, price,
+                    stats))
+
+    def add_mid(self, product, mid, timestamp=None):
+        """
+        Record the mid price, resolving markouts that reached their horizon
+
+        :param product: the GDAX product
+        :param mid: the mid price
+        :param timestamp: the time of the mid price, defaults to now
+        """
+
+        if timestamp is None:
+            timestamp = time.time()
+
+        pending = self._pending_markouts.get(product, {})
+
+        # Fills arrive in time order, so each horizon's markouts come due in
+        # order and only resolved markouts are visited
+        for horizon, markouts in pending.items():
+            while markouts and markouts[0][0] <= timestamp:
+                due, direction, price, stats = markouts.popleft()
+
+                total_count = stats.markouts[horizon]
+                total_count[0] += direction * (mid - price) / price
+                total_count[1] += 1
+
+    def get_summary(self, strategy_name, product):
+        """
+        Get the execution metrics for a strategy and product
+
+        :param strategy_name: the strategy name
+        :param product: the GDAX product
+        :returns: dict of execution metrics, or `None` if nothing is recorded
+        """
+
+        try:
+            return self.stats[strategy_name, product].get_summary()
+        except KeyError:
+            return None
+
+    def get_summaries(self):
+        """
+        Get the execution metrics for every strategy and product
+
+        :returns: dict of execution metrics by tuple(strategy name, product)
+        """
+
+        return {key: stats.get_summary() for key, stats in self.stats.items()}
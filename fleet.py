@@ -0,0 +1,639 @@
+import json
+import logging
+import time
+
+from json.decoder import JSONDecodeError
+from requests.exceptions import ConnectionError
+
+from book_archive import BookArchive
+from book_snapshot import BookPublisher
+from checkpoint import Checkpointer
+from clock import ExchangeClock
+from execution import LiveExecution
+from execution_analytics import ExecutionAnalytics
+from gdax_trader import GDAXTrader
+from l3_book import L3Book
+from market_data import ReplaySource, RestPollSource, WebsocketSource
+from order_batch import OrderBatch
+from order_reconciler import OrderReconciler
+from paper_execution import PaperExecution
+from profiler import SlowIterationProfiler
+from response_cache import ResponseCache
+from risk import RiskEngine
+from scheduler import AdaptiveScheduler
+from shared_book import SharedBookSource
+from stages import (BookArchiveStage, CheckpointStage, ResponseCacheStage,
+        StatsStage)
+from stats_store import StatsStore
+from strategies import get_strategy_class
+from trade_feed import TradeFeed
+
+
+logger = logging.getLogger(__name__)
+
+
+class Fleet:
+    """
+    Run many traders in one process with shared data fetching
+
+    Every iteration the accounts are fetched once and each product's order
+    book is fetched once, then passed to every trader of that product. With
+    an order batch, the traders of each product are then updated alongside
+    the other products' traders, and live traders send their order actions
+    through the batch.
+
+    Attributes:
+        client: The GDAX API client shared by the traders
+        clock: Exchange time estimate shared by the traders
+        traders: The traders being run
+        running: Whether the trading loop is running
+        profiler: Saves stack samples of iterations that run slowly
+        execution: Execution shared by live traders, when orders are sent
+            over persistent connections
+        order_batch: Sends the order actions of live traders and updates the
+            traders of different products at once
+        scheduler: Chooses the interval between iterations from the activity
+            of every product, when set instead of `FREQUENCY`
+    """
+
+    # Frequency of order book scrapes in seconds
+    FREQUENCY = 60
+
+    # Execution modes a trader can be configured with
+    LIVE_MODE = 'live'
+    PAPER_MODE = 'paper'
+    BACKTEST_MODE = 'backtest'
+    MODES = (LIVE_MODE, PAPER_MODE, BACKTEST_MODE)
+
+    # Sources order books and trades can be fetched from
+    REST_SOURCE = 'rest'
+    WEBSOCKET_SOURCE = 'websocket'
+    SHARED_SOURCE = 'shared'
+    SOURCES = (REST_SOURCE, WEBSOCKET_SOURCE, SHARED_SOURCE)
+
+    def __init__(self, client=None):
+        if client is None:
+            client = GDAXTrader._get_client()
+
+        self.client = client
+        self.clock = ExchangeClock(client)
+        self.traders = []
+        self.running = False
+        self.profiler = None
+        self.execution = None
+        self.order_batch = None
+        self.scheduler = None
+
+        # Order actions sent through the order batch, counted against the
+        # scheduler's request budget
+        self._orders_sent = 0
+
+        # Replay sources of backtest traders by archive directory
+        self._replay_sources = {}
+
+    def add_trader(self, trader):
+        self.traders.append(trader)
+
+    @classmethod
+    def from_config(cls, config, client=None):
+        """
+        Create a fleet from a configuration
+
+        The configuration has the form::
+
+            {
+                "frequency": 60,
+                "market_data": "rest",
+                "shared_books": "/dev/shm",
+                "order_connections": 4,
+                "profile": {"directory": "/path/to/profiles", "threshold": 1},
+                "schedule": {"min_interval": 1, "max_interval": 60},
+                "traders": [
+                    {
+                        "product": "BTC-USD",
+                        "mode": "live",
+                        "balances": {"USD": "10000.00"},
+                        "replay": "/path/to/archive",
+                        "book_archive": "/path/to/archive",
+                        "checkpoint": "/path/to/checkpoint",
+                        "stats": "/path/to/stats",
+                        "trades": true,
+                        "response_cache": true,
+                        "level": 3,
+                        "risk": {"max_position": 1, "max_notional": 10000,
+                                 "max_order_rate": 10, "max_loss": 500},
+                        "strategies": [
+                            {
+                                "class": "order_book_imbalance.OBIStrategy",
+                                "name": "obi",
+                                "parameters": {"PERIOD": 30}
+                            }
+                        ]
+                    }
+                ]
+            }
+
+        Only `product` and each strategy's `class` are required. Traders in
+        `paper` mode trade with simulated `balances` against live data, and
+        traders in `backtest` mode trade with simulated `balances` against
+        the order books archived in their `replay` directory, one per
+        iteration.
+        Traders with `trades` set poll trades for rolling trade statistics, and
+        traders with `level` 3 keep a level 3 book. Traders with `stats` record
+        signal and book statistics to that directory. Traders with
+        `response_cache` set skip the work that follows unchanged books and
+        accounts. Traders with `risk` limits check every order against them.
+        With `market_data` set to `websocket` every trader reads books and
+        trades from one shared websocket feed instead of polling them, with the
+        level 3 book of a product kept current from the feed and shared by its
+        traders, and the level 2 book of a product published to its other
+        traders by the feed thread, and set to `shared` every trader reads
+        level 2 books published to the `shared_books` directory by a
+        :class:`SharedBookPublisher` in another process. With `profile` set,
+        iterations slower than its `threshold` seconds are profiled to its
+        `directory`. Live traders send order actions through an
+        :class:`OrderBatch` of `order_connections` workers, over as many
+        persistent connections when set. Backtest traders always replay their
+        archive, whatever the `market_data`. With `schedule` set, the interval
+        between iterations is chosen by an :class:`AdaptiveScheduler` with
+        those arguments instead of being `frequency` seconds.
+
+        :param config: the configuration dict
+        :param client: the GDAX API client, created from the environment when
+            not given
+        :returns: a :class:`Fleet`
+        :raises ValueError: the configuration is invalid
+        """
+
+        fleet = cls(client=client)
+        fleet.FREQUENCY = config.get('frequency', cls.FREQUENCY)
+
+        if 'profile' in config:
+            try:
+                fleet.profiler = SlowIterationProfiler(**config['profile'])
+            except TypeError as error:
+                raise ValueError('Invalid profile configuration: {}'.format(
+                        error))
+
+        if 'schedule' in config:
+            try:
+                fleet.scheduler = AdaptiveScheduler(**config['schedule'])
+            except TypeError as error:
+                raise ValueError('Invalid schedule configuration: {}'.format(
+                        error))
+
+        if 'order_connections' in config:
+            fleet.execution = LiveExecution(fleet.client,
+                    pool_size=config['order_connections'])
+
+        fleet.order_batch = OrderBatch(workers=config.get('order_connections',
+                OrderBatch.WORKERS))
+
+        for trader_config in config.get('traders', []):
+            fleet.add_trader(fleet._create_trader(trader_config))
+
+        if not fleet.traders:
+            raise ValueError('No traders configured')
+
+        source = config.get('market_data', cls.REST_SOURCE)
+
+        if source not in cls.SOURCES:
+            raise ValueError('Unsupported market data: {}'.format(source))
+
+        if source == cls.REST_SOURCE:
+            return fleet
+
+        if source == cls.WEBSOCKET_SOURCE:
+            l3_books = {}
+            book_publishers = {}
+
+            # Backtest traders already replay their own books
+            traders = [trader for trader in fleet.traders
+                    if trader.market_data is None]
+
+            for trader in traders:
+                if trader.l3_book is not None:
+                    trader.set_l3_book(l3_books.setdefault(trader.product,
+                            trader.l3_book))
+                else:
+                    if trader.product not in book_publishers:
+                        book_publishers[trader.product] = BookPublisher(
+                                depth=WebsocketSource.DEPTH)
+
+                    trader.set_book_publisher(
+                            book_publishers[trader.product])
+
+            market_data = WebsocketSource(sorted({trader.product
+                    for trader in traders}), l3_books=l3_books,
+                    book_publishers=book_publishers)
+        else:
+            if any(trader.get_book_level() != 2 for trader in fleet.traders):
+                raise ValueError('Shared market data is level 2 only')
+
+            # Trades are not published, so they are still polled
+            market_data = SharedBookSource(
+                    trade_source=RestPollSource(fleet.client))
+
+            if 'shared_books' in config:
+                market_data.directory = config['shared_books']
+
+        for trader in fleet.traders:
+            if trader.market_data is None:
+                trader.set_market_data(market_data)
+
+        return fleet
+
+    def _create_trader(self, config):
+        """
+        Create a trader and its strategies from a trader configuration
+
+        :param config: the trader configuration dict
+        :returns: a :class:`GDAXTrader`
+        :raises ValueError: the configuration is invalid
+        """
+
+        try:
+            product = config['product']
+        except KeyError:
+            raise ValueError('Trader configuration is missing a product')
+
+        mode = config.get('mode', Fleet.LIVE_MODE)
+
+        if mode not in self.MODES:
+            raise ValueError('Unsupported mode for {}: {}'.format(product,
+                    mode))
+
+        trader = GDAXTrader(client=self.client)
+        trader.set_product(product)
+        trader.set_clock(self.clock)
+        trader.set_reconciler(OrderReconciler(trader))
+
+        if mode == Fleet.BACKTEST_MODE:
+            try:
+                directory = config['replay']
+            except KeyError:
+                raise ValueError('Backtest of {} is missing a replay '
+                        'archive'.format(product))
+
+            # Traders replaying the same archive advance through it together
+            if directory not in self._replay_sources:
+                self._replay_sources[directory] = ReplaySource(
+                        BookArchive(directory))
+
+            trader.set_market_data(self._replay_sources[directory])
+
+        if mode in (Fleet.PAPER_MODE, Fleet.BACKTEST_MODE):
+            trader.set_execution(PaperExecution(
+                    balances=config.get('balances')))
+        else:
+            trader.set_order_batch(self.order_batch)
+
+            if self.execution is not None:
+                trader.set_execution(self.execution)
+
+        if config.get('response_cache'):
+            trader.add_stage(ResponseCacheStage(ResponseCache()))
+
+        # Restored strategies are not warmed up from the archive
+        if 'checkpoint' in config:
+            trader.add_stage(CheckpointStage(
+                    Checkpointer(config['checkpoint'])))
+
+        if 'book_archive' in config:
+            trader.add_stage(BookArchiveStage(
+                    BookArchive(config['book_archive'])))
+
+        if 'stats' in config:
+            trader.add_stage(StatsStage(StatsStore(config['stats'])))
+
+        if config.get('trades'):
+            trader.set_trade_feed(TradeFeed())
+
+        if 'risk' in config:
+            try:
+                trader.set_risk(RiskEngine(product, **config['risk']))
+            except TypeError as error:
+                raise ValueError('Invalid risk limits for {}: {}'.format(
+                        product, error))
+
+        level = config.get('level', 2)
+
+        if level == 3:
+            trader.set_l3_book(L3Book())
+        elif level != 2:
+            raise ValueError('Unsupported book level for {}: {}'.format(
+                    product, level))
+
+        for strategy_config in config.get('strategies', []):
+            try:
+                strategy_class = get_strategy_class(strategy_config['class'])
+            except KeyError:
+                raise ValueError('Strategy configuration is missing a class')
+
+            strategy = strategy_class(name=strategy_config.get('name'),
+                    **strategy_config.get('parameters', {}))
+
+            trader.add_strategy(strategy)
+
+        hold_times = [strategy.MINIMUM_HOLD_TIME
+                for strategy in trader.strategies
+                if hasattr(strategy, 'MINIMUM_HOLD_TIME')]
+        trader.set_analytics(ExecutionAnalytics(
+                horizons=self._get_markout_horizons(),
+                hold_time=max(hold_times) if hold_times else None))
+
+        return trader
+
+    def _get_markout_horizons(self):
+        """
+        Get the markout horizons the interval between iterations can measure
+
+        Traders record the mid price once per iteration, so a markout comes
+        due at the first iteration after its horizon. Horizons shorter than
+        the longest interval would be marked at a later mid price than their
+        label, so only the longer ones are kept, or the longest interval when
+        none is.
+
+        :returns: tuple of horizons in seconds
+        """
+
+        if self.scheduler is not None:
+            interval = self.scheduler.max_interval
+        else:
+            interval = self.FREQUENCY
+
+        horizons = tuple(horizon for horizon in ExecutionAnalytics.HORIZONS
+                if horizon >= interval)
+
+        return horizons or (interval,)
+
+    def run(self):
+        """
+        Start every trader
+        """
+
+        self.running = True
+
+        logger.info('Starting {} traders...'.format(len(self.traders)))
+
+        for trader in self.traders:
+            trader._start()
+
+        if self.profiler is not None:
+            self.profiler.start()
+
+        start_time = time.time()
+        iteration = 0
+
+        while self.running:
+            iteration_start = time.time()
+
+            if self.profiler is not None:
+                self.profiler.begin()
+
+            self._run_iteration()
+
+            if self.profiler is not None:
+                self.profiler.end()
+
+            iteration += 1
+            if iteration % GDAXTrader.MEMORY_CHECK_INTERVAL == 0:
+                for trader in self.traders:
+                    trader._check_memory()
+
+            sources = self._get_market_data_sources()
+
+            if all(source.finished for source in sources):
+                logger.info('Market data finished')
+                break
+
+            # Fleets of sources that are not real time, such as backtests,
+            # are run as fast as the sources allow
+            if not any(source.REALTIME for source in sources):
+                continue
+
+            if self.scheduler is not None:
+                # Sleep for the rest of the interval chosen by the scheduler
+                logger.info('Polling interval: {:.2f} seconds'.format(
+                        self.scheduler.interval))
+
+                elapsed_time = time.time() - iteration_start
+                sleep_time = max(self.scheduler.interval - elapsed_time, 0)
+            else:
+                # Sleep to achieve the desired frequency
+                elapsed_time = (time.time() - start_time) % self.FREQUENCY
+                sleep_time = self.FREQUENCY - elapsed_time
+
+            logger.info('Sleeping for {:.2f} seconds'.format(sleep_time))
+
+            time.sleep(sleep_time)
+
+        if self.profiler is not None:
+            self.profiler.stop()
+
+        for trader in self.traders:
+            trader._finish()
+
+        if self.order_batch is not None:
+            logger.info('Order latencies: {}'.format(
+                    self.order_batch.get_summary()))
+            self.order_batch.close()
+
+    def stop(self):
+        """
+        Stop every trader after the current iteration
+        """
+
+        self.running = False
+
+    def _get_market_data_sources(self):
+        """
+        Get the distinct sources the traders fetch market data from
+
+        :returns: list of :class:`MarketDataSource`
+        """
+
+        sources = {}
+
+        for trader in self.traders:
+            source = trader._get_market_data()
+            sources[id(source)] = source
+
+        return list(sources.values())
+
+    def _run_iteration(self):
+        """
+        Fetch shared data once and update every trader
+
+        Order books are fetched once per source, product and level, and
+        trades are fetched once per source and product for the traders
+        polling them. The traders
+        of each product are then updated in order, alongside the traders of
+        other products when there is an order batch.
+
+        :returns: number of traders updated
+        """
+
+        # Accounts are shared by every trader using the same client, paper
+        # traders each have their own simulated accounts
+        accounts_by_client = {}
+        order_books = {}
+        trades_by_product = {}
+
+        # Data of each trader to update by product
+        updates = {}
+
+        # Traders sharing a clock only sync it once
+        for trader in self.traders:
+            trader._sync_clock()
+
+        for trader in self.traders:
+            product = trader.product
+            client_id = id(trader._get_execution_client())
+
+            if client_id not in accounts_by_client:
+                try:
+                    accounts_by_client[client_id] = trader._get_accounts()
+                except (ConnectionError, JSONDecodeError):
+                    accounts_by_client[client_id] = None
+
+            accounts = accounts_by_client[client_id]
+
+            if accounts is None:
+                logger.warning('Accounts unavailable, iteration skipped...')
+                continue
+
+            # Traders polling the same client share its books, while
+            # backtest traders of the product replay their own
+            source_id = id(trader.client if trader.market_data is None
+                    else trader.market_data)
+            book_key = (source_id, product, trader.get_book_level())
+
+            if book_key not in order_books:
+                try:
+                    order_books[book_key] = trader._get_order_book(product,
+                            level=book_key[2])
+                except (ConnectionError, JSONDecodeError):
+                    order_books[book_key] = None
+
+            if order_books[book_key] is None:
+                logger.warning('{} order book unavailable, iteration '
+                        'skipped...'.format(product))
+                continue
+
+            trades = None
+            if trader.trade_feed is not None:
+                trades_key = (source_id, product)
+
+                if trades_key not in trades_by_product:
+                    try:
+                        trades_by_product[trades_key] = trader._get_trades(
+                                product)
+                    except (ConnectionError, JSONDecodeError) as error:
+                        logger.warning(error)
+                        trades_by_product[trades_key] = None
+
+                trades = trades_by_product[trades_key]
+
+            updates.setdefault(product, []).append((trader, accounts,
+                    order_books[book_key], trades))
+
+        if self.order_batch is None:
+            updated = [self._process_updates(product_updates)
+                    for product_updates in updates.values()]
+        else:
+            updated = self.order_batch.map(self._process_updates,
+                    updates.values())
+
+        if self.scheduler is not None:
+            self._schedule(updates)
+
+        return sum(updated)
+
+    def _schedule(self, updates):
+        """
+        Choose the next interval from the order books of an iteration
+
+        The book of each product is measured once, and order actions sent
+        through the order batch since the previous iteration count against
+        the request budget.
+
+        :param updates: dict of the updates of each trader by product
+        """
+
+        active = False
+
+        for product, product_updates in updates.items():
+            trader = product_updates[0][0]
+
+            if trader._order_book is not None:
+                active = (self.scheduler.measure(*trader._order_book,
+                        key=product) or active)
+
+        if self.order_batch is not None:
+            sent = sum(len(latencies)
+                    for latencies in self.order_batch.latencies.values())
+
+            for _ in range(sent - self._orders_sent):
+                self.scheduler.record_order()
+
+            self._orders_sent = sent
+
+        self.scheduler.requests_per_iteration = (
+                self._get_requests_per_iteration())
+        self.scheduler.schedule(active)
+
+    def _get_requests_per_iteration(self):
+        """
+        Estimate the requests an iteration sends to the exchange
+
+        Accounts are fetched once, order books and trades once per product
+        polled from the REST API, and the reconciler of every live trader
+        polls its orders.
+
+        :returns: number of requests
+        """
+
+        requests = set()
+
+        for trader in self.traders:
+            if trader.execution is None or trader.execution is self.execution:
+                requests.add('accounts')
+                requests.add(('orders', id(trader)))
+
+            if trader.market_data is None:
+                requests.add(('book', trader.product,
+                        trader.get_book_level()))
+
+                if trader.trade_feed is not None:
+                    requests.add(('trades', trader.product))
+
+        return max(len(requests), 1)
+
+    def _process_updates(self, updates):
+        """
+        Update traders with their fetched data
+
+        :param updates: list of tuple(trader, accounts, order book, trades)
+        :returns: number of traders updated
+        """
+
+        updated = 0
+
+        for trader, accounts, order_book, trades in updates:
+            if trader._process_data(accounts, order_book, trades):
+                updated += 1
+
+        return updated
+
+
+def load_config(path):
+    """
+    Load a fleet configuration file
+
+    :param path: path to a JSON configuration file
+    :returns: the configuration dict
+    """
+
+    with open(path) as config_file:
+        return json.load(config_file)
@@ -4,12 +4,16 @@ import os
 import time
 
 from json.decoder import JSONDecodeError
-import pandas as pd
 from requests.exceptions import ConnectionError
 
-import gdax
-
-from utils import connection_retry
+from clock import ExchangeClock
+from execution import Execution
+from market_data import RestPollSource
+from order_batch import OrderBatch
+from order_book import OrderBookSide
+from queue_position import QueueEstimator
+from stages import Iteration
+from utils import connection_retry, get_rss
 
 
 logger = logging.getLogger(__name__)
@@ -23,6 +27,29 @@ class GDAXTrader:
         product: The product being tracked by the trader
         strategies: The strategies being run by the trader
         client: The GDAX API client
+        market_data: Source order books and trades are fetched from instead of
+            polling the client, such as :class:`WebsocketSource`
+        running: Whether the trading loop is running
+        reconciler: Tracks strategy orders with batched requests
+        analytics: Aggregates execution metrics from orders and fills
+        execution: Execution orders and accounts are sent to instead of the
+            client, such as :class:`PaperExecution`
+        queue: Estimates the queue position of tracked orders
+        trade_feed: Rolling trade statistics of the product, when trades are
+            polled
+        l3_book: Level 3 book of the product, when level 3 books are fetched
+        book_publisher: Publishes immutable order book snapshots to strategies
+        clock: Estimates exchange time for order age decisions
+        book_decoder: Decodes order book responses, when set instead of the
+            client's JSON decoding
+        risk: Checks orders against risk limits before they are sent
+        scheduler: Chooses the interval between iterations from market
+            activity, when set instead of `FREQUENCY`
+        profiler: Saves stack samples of iterations that run slowly
+        order_batch: Sends order actions paced by the shared rate limiter,
+            when set instead of the fixed pause after every request
+        stages: Steps run around every strategy update, such as
+            :class:`CheckpointStage`, in the order they were added
     """
 
     # Environment variables required for authenticating with GDAX
@@ -40,18 +67,398 @@ class GDAXTrader:
     # Maximum number of retry attempts after a connection error
     MAX_RETRIES = 5
 
-    def __init__(self):
+    # Number of iterations between memory checks
+    MEMORY_CHECK_INTERVAL = 100
+
+    # Bytes of retained state allowed per strategy before alerting
+    STRATEGY_MEMORY_BUDGET = 16 * 1024 * 1024
+
+    # Bytes of process RSS allowed before alerting, `None` to disable
+    RSS_BUDGET = None
+
+    # Fills requested per page by the order reconciler
+    FILL_PAGE_SIZE = 100
+
+    def __init__(self, client=None):
         self.product = None
         self.strategies = []
-        self.client = GDAXTrader._get_client()
+        self.running = False
+        self.reconciler = None
+        self.analytics = None
+        self.execution = None
+        self.queue = QueueEstimator()
+        self.trade_feed = None
+        self.l3_book = None
+        self.book_publisher = None
+        self.clock = None
+        self.book_decoder = None
+        self.market_data = None
+        self.risk = None
+        self.scheduler = None
+        self.profiler = None
+        self.order_batch = None
+        self.stages = []
+
+        # The latest parsed order book, used to queue newly tracked orders
+        self._order_book = None
+
+        if client is None:
+            client = GDAXTrader._get_client()
+
+        self.client = client
+        self.clock = ExchangeClock(client)
+
+        # Order books and trades are polled with the client by default
+        self._rest_source = RestPollSource(client)
 
     def set_product(self, product):
         self.product = product
 
     def add_strategy(self, strategy):
+        # Strategy state is saved by name, so names must be unique
+        names = [added.name for added in self.strategies]
+        if strategy.name in names:
+            strategy.name = '{}-{}'.format(strategy.name, len(self.strategies))
+
         strategy.add_trader(self)
+        strategy.orders_reconciled = self.reconciler is not None
+        strategy.trades = self.trade_feed
         self.strategies.append(strategy)
 
+    def add_stage(self, stage):
+        """
+        Run a stage around every strategy update, after the stages already
+        added
+
+        :param stage: an instance of :class:`Stage`
+        """
+
+        self.stages.append(stage)
+
+    def set_reconciler(self, reconciler):
+        """
+        Track strategy orders with a reconciler instead of per-order polling
+
+        :param reconciler: an instance of :class:`OrderReconciler`
+        """
+
+        self.reconciler = reconciler
+
+        for strategy in self.strategies:
+            strategy.orders_reconciled = reconciler is not None
+
+    def set_analytics(self, analytics):
+        self.analytics = analytics
+
+    def set_trade_feed(self, trade_feed):
+        """
+        Poll trades every iteration and make their statistics available to
+        strategies as `Strategy.trades`
+
+        :param trade_feed: an instance of :class:`TradeFeed`, or `None` to
+            stop polling trades
+        """
+
+        self.trade_feed = trade_feed
+
+        for strategy in self.strategies:
+            strategy.trades = trade_feed
+
+    def set_l3_book(self, l3_book):
+        """
+        Fetch level 3 order books and keep them in an order level book
+
+        Strategies still receive the level 2 aggregate of the book, and queue
+        positions of orders in the book are read from their queues. A book
+        the market data source keeps current from a feed, such as the one of
+        a :class:`WebsocketSource`, is only loaded from a REST snapshot when
+        it needs one, otherwise a snapshot is loaded every iteration.
+
+        :param l3_book: an instance of :class:`L3Book`, or `None` to fetch
+            level 2 order books
+        """
+
+        self.l3_book = l3_book
+
+    def set_book_publisher(self, book_publisher):
+        """
+        Pass strategies immutable order book snapshots
+
+        Strategies receive the sides of the publisher's latest snapshot. A
+        publisher the market data source writes from its feed, such as one
+        of a :class:`WebsocketSource`, is only read, otherwise fetched order
+        books are written to the publisher and the trader must be its only
+        writer.
+
+        :param book_publisher: an instance of :class:`BookPublisher`, or
+            `None` to pass strategies the fetched order book
+        """
+
+        self.book_publisher = book_publisher
+
+    def set_clock(self, clock):
+        """
+        Estimate exchange time with a clock, such as one shared by traders
+        using the same client
+
+        :param clock: an instance of :class:`ExchangeClock`
+        """
+
+        self.clock = clock
+
+    def set_book_decoder(self, book_decoder):
+        """
+        Fetch raw order book responses and decode them with a decoder
+
+        :param book_decoder: an instance of :class:`BookDecoder`, or `None`
+            to use the client's decoding
+        """
+
+        self.book_decoder = book_decoder
+        self._rest_source.book_decoder = book_decoder
+
+    def set_market_data(self, market_data):
+        """
+        Fetch order books and trades from a market data source
+
+        Sources that do not produce data in real time, such as
+        :class:`ReplaySource`, are run without sleeping between iterations,
+        and the trader stops once a source is finished.
+
+        :param market_data: an instance of :class:`MarketDataSource`, or
+            `None` to poll the client
+        """
+
+        self.market_data = market_data
+
+    def set_risk(self, risk):
+        """
+        Check orders against risk limits before they are sent
+
+        Rejected orders return an error message like the exchange does, and
+        every open order of the product is cancelled when the kill switch
+        trips.
+
+        :param risk: an instance of :class:`RiskEngine`, or `None` to send
+            every order
+        """
+
+        self.risk = risk
+
+    def set_scheduler(self, scheduler):
+        """
+        Poll faster when the market is active and back off when it is static
+
+        :param scheduler: an instance of :class:`AdaptiveScheduler`, or
+            `None` to iterate every `FREQUENCY` seconds
+        """
+
+        self.scheduler = scheduler
+
+    def set_profiler(self, profiler):
+        """
+        Save a stack sampled profile of every iteration that runs slowly
+
+        :param profiler: an instance of :class:`SlowIterationProfiler`, or
+            `None` to stop profiling
+        """
+
+        self.profiler = profiler
+
+    def set_order_batch(self, order_batch):
+        """
+        Send order actions through an order batch
+
+        Orders and cancels are paced by the batch's rate limiter instead of
+        the fixed pause after every request, so traders sharing the batch can
+        send them from several threads at once.
+
+        :param order_batch: an instance of :class:`OrderBatch`, or `None` to
+            send order actions directly
+        """
+
+        self.order_batch = order_batch
+
+    def _get_market_data(self):
+        """
+        Get the source order books and trades are fetched from
+
+        :returns: the market data source if set, otherwise the REST source
+            polling the client
+        """
+
+        if self.market_data is not None:
+            return self.market_data
+
+        return self._rest_source
+
+    def _is_l3_book_fed(self):
+        """
+        Check if the level 3 book is kept current by the market data source
+
+        :returns: `True` if the source applies feed messages to the book,
+            `False` if snapshots are loaded into it every iteration
+        """
+
+        return (self.l3_book is not None and self._get_market_data()
+                .get_l3_book(self.product) is self.l3_book)
+
+    def _is_book_published(self):
+        """
+        Check if the book publisher is written by the market data source
+
+        :returns: `True` if the source publishes the book from its feed,
+            `False` if fetched books are written to the publisher
+        """
+
+        return (self.book_publisher is not None and self._get_market_data()
+                .get_book_publisher(self.product) is self.book_publisher)
+
+    def get_book_level(self):
+        """
+        Get the level of the order books the trader fetches
+
+        :returns: 3 if the trader keeps a level 3 book, otherwise 2
+        """
+
+        return 2 if self.l3_book is None else 3
+
+    def set_execution(self, execution):
+        """
+        Send orders and account requests to an execution
+
+        Order books are still fetched from the market data source, and each
+        one is passed to the execution to match its resting orders.
+
+        :param execution: an instance of :class:`Execution`, such as
+            :class:`PaperExecution`, or `None` to trade with the client
+        """
+
+        self.execution = execution
+
+    def _get_execution_client(self):
+        """
+        Get the client orders and account requests are sent to
+
+        :returns: the execution if set, otherwise the client
+        """
+
+        if self.execution is not None:
+            return self.execution
+
+        return self.client
+
+    def track_order(self, order, strategy):
+        """
+        Track an order placed by a strategy
+
+        Orders are tracked by the reconciler and recorded by the execution
+        analytics, when they are set.
+
+        :param order: the order data
+        :param strategy: the strategy that owns the order
+        """
+
+        if self.reconciler is not None:
+            self.reconciler.track(order, strategy)
+
+        if self.analytics is not None:
+            self.analytics.add_order(strategy.name, order)
+
+        if self._order_book is not None:
+            try:
+                side = order['side']
+                price = float(order['price'])
+                size = (float(order['size'])
+                        - float(order.get('filled_size') or 0))
+            except (KeyError, TypeError, ValueError) as error:
+                logger.warning('Order cannot be queued: {}'.format(error))
+            else:
+                levels = self._get_level_sizes(side)
+                self.queue.add(order['id'], side, price, size,
+                        levels.get(price, size))
+
+    def get_queue_position(self, order_id):
+        """
+        Get the estimated size queued ahead of a tracked order
+
+        :param order_id: the order ID
+        :returns: the size ahead, or `None` if the order is not tracked
+        """
+
+        # Simulated executions estimate the queue of their own orders
+        if self.execution is not None:
+            queue_position = self.execution.get_queue_position(order_id)
+
+            if queue_position is not None:
+                return queue_position
+
+        # Live orders in a level 3 book have an exact queue position
+        if self._is_l3_book_fed():
+            queue_position = self._get_market_data().get_queue_position(
+                    self.product, order_id)
+        elif self.l3_book is not None:
+            queue_position = self.l3_book.get_queue_position(order_id)
+        else:
+            queue_position = None
+
+        if queue_position is not None:
+            return queue_position
+
+        return self.queue.get_position(order_id)
+
+    def _get_level_sizes(self, side):
+        """
+        Get the level sizes of one side of the latest order book
+
+        :param side: `buy` or `sell`
+        :returns: dict of float level size by float price
+        """
+
+        bid_orders, ask_orders = self._order_book
+        orders = bid_orders if side == QueueEstimator.BUY else ask_orders
+
+        return dict(zip(orders.prices, orders.sizes))
+
+    def _update_queue(self, bid_orders, ask_orders):
+        """
+        Update the queue position of tracked orders from a new order book
+
+        Orders the book quotes through can no longer be resting and are no
+        longer tracked.
+
+        :param bid_orders: the bid side of the order book
+        :param ask_orders: the ask side of the order book
+        """
+
+        self._order_book = (bid_orders, ask_orders)
+
+        if not self.queue.orders:
+            return
+
+        best_bid = max(bid_orders.prices, default=None)
+        best_ask = min(ask_orders.prices, default=None)
+
+        for order_id, position in list(self.queue.orders.items()):
+            if position['side'] == QueueEstimator.BUY:
+                crossed = (best_ask is not None
+                        and best_ask <= position['price'])
+            else:
+                crossed = (best_bid is not None
+                        and best_bid >= position['price'])
+
+            if crossed:
+                self.queue.remove(order_id)
+
+        for side in (QueueEstimator.BUY, QueueEstimator.SELL):
+            prices = self.queue.get_prices(side)
+
+            if prices:
+                levels = self._get_level_sizes(side)
+
+                for price in prices:
+                    self.queue.update_level(side, price, levels.get(price, 0))
+
     def run(self):
         """
         Start the GDAX trading algorithm
@@ -59,31 +466,102 @@ class GDAXTrader:
         Uses set product and strategies added to the `GDAXTrader`.
         """
 
-        running = True
+        self.running = True
 
         logger.info('Starting GDAX Trader...')
 
+        self._start()
+
+        market_data = self._get_market_data()
         start_time = time.time()
+        iteration = 0
+
+        while self.running:
+            iteration_start = time.time()
+
+            if self.profiler is not None:
+                self.profiler.begin()
 
-        while running:
             success = self._run_iteration()
 
+            if self.profiler is not None:
+                self.profiler.end()
+
             if not success:
                 logger.warning('Data unavailable, iteration skipped...')
 
-            # Sleep to achieve the desired frequency
-            elapsed_time = (time.time() - start_time) % GDAXTrader.FREQUENCY
-            sleep_time = GDAXTrader.FREQUENCY - elapsed_time
+            iteration += 1
+            if iteration % self.MEMORY_CHECK_INTERVAL == 0:
+                self._check_memory()
+
+            if market_data.finished:
+                logger.info('Market data finished')
+                break
+
+            # Sources that are not real time are run as fast as they allow
+            if not market_data.REALTIME:
+                continue
+
+            if self.scheduler is not None:
+                # Sleep for the rest of the interval chosen by the scheduler
+                logger.info('Polling interval: {:.2f} seconds'.format(
+                        self.scheduler.interval))
+
+                elapsed_time = time.time() - iteration_start
+                sleep_time = max(self.scheduler.interval - elapsed_time, 0)
+            else:
+                # Sleep to achieve the desired frequency
+                elapsed_time = (time.time() - start_time) % self.FREQUENCY
+                sleep_time = self.FREQUENCY - elapsed_time
 
             logger.info('Sleeping for {:.2f} seconds'.format(sleep_time))
 
             time.sleep(sleep_time)
 
+        self._finish()
+
+    def stop(self):
+        """
+        Stop the GDAX trading algorithm after the current iteration
+        """
+
+        self.running = False
+
+    def _start(self):
+        """
+        Prepare strategies and stages before the first iteration
+        """
+
+        self._get_market_data().start()
+
+        if self.profiler is not None:
+            self.profiler.start()
+
+        ready = []
+
+        for stage in self.stages:
+            stage.start(self, ready)
+
+    def _finish(self):
+        """
+        Clean up after the last iteration
+        """
+
+        self._get_market_data().stop()
+
+        if self.profiler is not None:
+            self.profiler.stop()
+
+        for stage in self.stages:
+            stage.stop(self)
+
     def _run_iteration(self):
         """
         Perform an iteration of the GDAX trading algorithm
         """
 
+        self._sync_clock()
+
         # Retrieve account data
         try:
             accounts = self._get_accounts()
@@ -93,26 +571,217 @@ class GDAXTrader:
 
         # Get order book data
         try:
-            order_book = self._get_order_book(self.product)
+            order_book = self._get_order_book(self.product,
+                    level=self.get_book_level())
 
         # Skip iteration if order book data is unavailable
         except (ConnectionError, JSONDecodeError):
             return False
 
+        # Trades are optional, the iteration continues without them
+        trades = None
+        if self.trade_feed is not None:
+            try:
+                trades = self._get_trades(self.product)
+            except (ConnectionError, JSONDecodeError) as error:
+                logger.warning(error)
+
+        return self._process_data(accounts, order_book, trades)
+
+    def _process_data(self, accounts, order_book, trades=None):
+        """
+        Update strategies with fetched account, order book and trade data
+
+        :param accounts: accounts data
+        :param order_book: order book data for the trader's product, level 3
+            if the trader keeps a level 3 book
+        :param trades: recent trades for the trader's product, if polled
+        :returns: `True` if strategies were updated, `False` otherwise
+        """
+
+        iteration = Iteration(accounts, order_book, trades)
+
+        for stage in self.stages:
+            stage.receive(self, iteration)
+
+        # The sides of an unchanged book are reused from the previous
+        # iteration
+        if self._order_book is None:
+            iteration.book_changed = True
+
+        book_changed = iteration.book_changed
+
+        # Books kept current by a feed arrive as their level 2 aggregate
+        if (self.l3_book is not None and book_changed
+                and not self._is_l3_book_fed()):
+            try:
+                self.l3_book.load_snapshot(order_book)
+            except (KeyError, TypeError, ValueError) as error:
+                logger.warning(error)
+                return False
+
+            order_book = iteration.order_book = self.l3_book.get_level2()
+
+        for stage in self.stages:
+            stage.process_book(self, iteration)
+
         try:
-            bid_orders, ask_orders = self._order_book_to_df(order_book)
-        except KeyError as error:
-            logger.warning(error)
-            return False
+            mid = (float(order_book['bids'][0][0])
+                    + float(order_book['asks'][0][0])) / 2
+        except (KeyError, IndexError, TypeError, ValueError):
+            mid = None
+
+        if self.analytics is not None and mid is not None:
+            self.analytics.add_mid(self.product, mid)
+
+        # Limits are checked against the data already fetched, the kill
+        # switch only costs a request when it trips
+        if self.risk is not None and self.risk.update(accounts, mid):
+            self._cancel_all_for_risk()
+
+        if trades:
+            self._add_trades(trades)
+
+        # Simulated orders are matched before strategies see their changes
+        if self.execution is not None and book_changed:
+            try:
+                self.execution.update_book(self.product, order_book)
+            except (KeyError, IndexError, TypeError, ArithmeticError) as error:
+                logger.warning(error)
+
+        if book_changed:
+            try:
+                if self._is_book_published():
+                    snapshot = self.book_publisher.snapshot
+                    bid_orders, ask_orders = snapshot.bids, snapshot.asks
+                elif self.book_publisher is not None:
+                    self.book_publisher.load_snapshot(order_book)
+                    snapshot = self.book_publisher.publish()
+                    bid_orders, ask_orders = snapshot.bids, snapshot.asks
+                else:
+                    bid_orders, ask_orders = self._parse_order_book(order_book)
+            except KeyError as error:
+                logger.warning(error)
+                return False
+        else:
+            bid_orders, ask_orders = self._order_book
+
+        # Dispatch order changes before strategies act on them
+        if self.reconciler is not None:
+            try:
+                updated, done = self.reconciler.reconcile()
+            except (ConnectionError, JSONDecodeError) as error:
+                logger.warning(error)
+            else:
+                for order_id in updated:
+                    order = self.reconciler.orders[order_id]
+                    try:
+                        self.queue.update_size(order_id, float(order['size'])
+                                - float(order.get('filled_size') or 0))
+                    except (KeyError, TypeError, ValueError):
+                        continue
+
+                for order_id in done:
+                    self.queue.remove(order_id)
+
+        if book_changed:
+            self._update_queue(bid_orders, ask_orders)
+
+        if self.scheduler is not None:
+            self.scheduler.update(bid_orders, ask_orders)
+
+        # Strategies only recompute when their data has changed
+        if book_changed or iteration.accounts_changed:
+            for strategy in self.strategies:
+                logger.info('Next iteration...')
+                strategy.next_data(accounts, bid_orders, ask_orders)
+                strategy.next()
+        else:
+            logger.info('Data unchanged')
 
-        # Update all strategies
-        for strategy in self.strategies:
-            logger.info('Next iteration...')
-            strategy.next_data(accounts, bid_orders, ask_orders)
-            strategy.next()
+            for strategy in self.strategies:
+                strategy.next_unchanged()
+
+        iteration.bid_orders = bid_orders
+        iteration.ask_orders = ask_orders
+
+        for stage in self.stages:
+            stage.finish_iteration(self, iteration)
 
         return True
 
+    def _sync_clock(self):
+        """
+        Measure the offset to exchange time when it is due
+
+        The previous offset is kept if the exchange time is unavailable.
+        """
+
+        if not self.clock.needs_sync():
+            return
+
+        try:
+            self.clock.sync()
+        except (ConnectionError, JSONDecodeError, KeyError, TypeError,
+                ValueError) as error:
+            logger.warning('Exchange time unavailable: {}'.format(error))
+
+    def _add_trades(self, trades):
+        """
+        Add new trades to the trade feed, queue positions and execution
+
+        :param trades: recent trades, newest first
+        :returns: list of new trades, oldest first
+        """
+
+        if self.trade_feed is not None:
+            trades = self.trade_feed.add_trades(trades)
+
+        for trade in trades:
+            try:
+                self.queue.add_trade(trade['side'], float(trade['price']),
+                        float(trade['size']))
+            except (KeyError, TypeError, ValueError) as error:
+                logger.warning('Invalid trade {}: {}'.format(trade, error))
+
+        if self.execution is not None:
+            self.execution.update_trades(self.product, trades)
+
+        return trades
+
+    def _check_memory(self):
+        """
+        Check process RSS and strategy retained state against their budgets
+
+        Logs a warning for every budget that is exceeded.
+
+        :returns: `True` if every budget is respected, `False` otherwise
+        """
+
+        within_budget = True
+
+        rss = get_rss()
+
+        if rss is not None:
+            logger.info('RSS: {} bytes'.format(rss))
+
+            if self.RSS_BUDGET is not None and rss > self.RSS_BUDGET:
+                logger.warning('RSS of {} bytes exceeds budget of {} bytes'
+                        .format(rss, self.RSS_BUDGET))
+                within_budget = False
+
+        for strategy in self.strategies:
+            report = strategy.memory_report()
+            retained = sum(report.values())
+
+            if retained > self.STRATEGY_MEMORY_BUDGET:
+                logger.warning('{} retains {} bytes, exceeding budget of {} '
+                        'bytes: {}'.format(type(strategy).__name__, retained,
+                        self.STRATEGY_MEMORY_BUDGET, report))
+                within_budget = False
+
+        return within_budget
+
     @classmethod
     def _get_client(cls):
         """
@@ -122,6 +791,9 @@ class GDAXTrader:
         :raises KeyError: Error raised if environment variables are not set
         """
 
+        # Imported here since the client pulls in websocket and bintrees
+        import gdax
+
         try:
             key = os.environ[GDAXTrader.GDAX_KEY_ENV]
             secret = os.environ[GDAXTrader.GDAX_SECRET_ENV]
@@ -139,33 +811,59 @@ class GDAXTrader:
 
         return client
 
-    def _order_book_to_df(self, order_book):
+    def _parse_order_book(self, order_book):
         """
-        Converts raw order book data to bid/ask dataframes
+        Converts raw order book data to bid/ask order book sides
 
         :param order_book: order book data
-        :returns: tuple(bid_orders, ask_orders)
+        :returns: tuple(bid_orders, ask_orders) of :class:`OrderBookSide`
         :raises KeyError: order book data missing attributes
         """
 
-        columns = ['price', 'size', 'num-orders']
-
-        bid_orders = pd.DataFrame(list(order_book['bids']), columns=columns)
+        bid_orders = OrderBookSide(order_book['bids'])
 
-        ask_orders = pd.DataFrame(list(order_book['asks']), columns=columns)
+        ask_orders = OrderBookSide(order_book['asks'])
 
         return bid_orders, ask_orders
 
-    @connection_retry(MAX_RETRIES, RATE_LIMIT)
-    def _get_order_book(self, product):
+    def _get_order_book(self, product, level=2):
         """
-        Get order book data for a product
+        Get order book data for a product from the market data source
+
+        A level 3 book kept current by the source is first loaded from a
+        REST snapshot if it needs one, and returned as its level 2 aggregate.
 
         :param product: the GDAX product
+        :param level: 2 for aggregated levels, 3 for every order
         :returns: order book data
         """
 
-        return self.client.get_product_order_book(product, level=2)
+        market_data = self._get_market_data()
+
+        if level == 3:
+            l3_book = market_data.get_l3_book(product)
+
+            if l3_book is not None and l3_book.needs_snapshot:
+                logger.info('Loading {} level 3 snapshot...'.format(product))
+
+                try:
+                    market_data.load_l3_snapshot(product,
+                            self._rest_source.get_order_book(product, level=3))
+                except (KeyError, TypeError, ValueError) as error:
+                    raise ConnectionError('Invalid level 3 snapshot: '
+                            '{}'.format(error))
+
+        return market_data.get_order_book(product, level=level)
+
+    def _get_trades(self, product):
+        """
+        Get the latest trades for a product from the market data source
+
+        :param product: the GDAX product
+        :returns: list of trades, newest first
+        """
+
+        return self._get_market_data().get_trades(product)
 
     @connection_retry(MAX_RETRIES, RATE_LIMIT)
     def _get_accounts(self):
@@ -175,7 +873,7 @@ class GDAXTrader:
         :returns: accounts data
         """
 
-        return self.client.get_accounts()
+        return self._get_execution_client().get_accounts()
 
     @connection_retry(MAX_RETRIES, RATE_LIMIT)
     def get_order(self, order_id):
@@ -186,20 +884,82 @@ class GDAXTrader:
         :returns: the order
         """
 
-        return self.client.get_order(order_id)
+        return self._get_execution_client().get_order(order_id)
 
     @connection_retry(MAX_RETRIES, RATE_LIMIT)
-    def get_fills(self, order_id):
+    def get_orders(self):
         """
-        Get fills for an order
+        Get every open order
 
-        :param order_id: the order ID
+        :returns: dict of open orders by order ID
+        :raises ConnectionError: a page is an error response, since missing
+            orders would otherwise look closed
+        """
+
+        orders = {}
+
+        for page in self._get_execution_client().get_orders():
+            # Error responses are returned as a message instead of a page
+            if not isinstance(page, list):
+                raise ConnectionError('Open orders unavailable: {}'.format(
+                        page))
+
+            for order in page:
+                orders[order['id']] = order
+
+        return orders
+
+    @connection_retry(MAX_RETRIES, RATE_LIMIT)
+    def get_fills(self, order_id='', before=''):
+        """
+        Get fills, newest first
+
+        :param order_id: only get fills for this order ID
+        :param before: only get fills newer than this pagination cursor
         :returns: list of fills
         """
 
-        return self.client.get_fills(order_id=order_id)
+        pages = self._get_execution_client().get_fills(order_id=order_id,
+                product_id=self.product or '', before=before)
+
+        fills = []
+
+        for page in pages or []:
+            # Error responses are returned as a message instead of a page
+            if not isinstance(page, list):
+                logger.warning('Fills unavailable: {}'.format(page))
+                continue
+
+            fills.extend(page)
+
+        return fills
 
     @connection_retry(MAX_RETRIES, RATE_LIMIT)
+    def get_fills_page(self, before=''):
+        """
+        Get one page of the product's fills, without following older pages
+
+        :param before: only get fills newer than this trade ID cursor
+        :returns: list of at most `FILL_PAGE_SIZE` fills, newest first
+        :raises ConnectionError: the response is an error
+        """
+
+        client = self._get_execution_client()
+
+        # The GDAX client follows every older page of fills, so the page is
+        # requested directly
+        if not hasattr(client, 'get_fills_page'):
+            client = Execution(client)
+
+        page = client.get_fills_page(product_id=self.product or '',
+                before=before, limit=self.FILL_PAGE_SIZE)
+
+        # Error responses are returned as a message instead of a page
+        if not isinstance(page, list):
+            raise ConnectionError('Fills unavailable: {}'.format(page))
+
+        return page
+
     def buy(self, price, size, product):
         """
         Place buy order for a product
@@ -210,6 +970,46 @@ class GDAXTrader:
         :returns: order data
         """
 
+        return self._send(OrderBatch.BUY, price, size, product)
+
+    def sell(self, price, size, product):
+        """
+        Place sell order for a product
+
+        :param price: the minimum price that will be accepted
+        :size: the amount to sell
+        :product: the product to place the sell order for
+        :returns: order data
+        """
+
+        return self._send(OrderBatch.SELL, price, size, product)
+
+    def cancel_order(self, order_id):
+        """
+        Cancel an order
+
+        :param order_id: the order ID
+        :returns: the API response
+        """
+
+        return self._send(OrderBatch.CANCEL, order_id)
+
+    def _send(self, action, *args):
+        """
+        Send an order action through the order batch if set
+
+        :param action: the name of the action, such as `buy`
+        :returns: the API response
+        :raises ConnectionError: every attempt failed
+        """
+
+        if self.order_batch is not None:
+            return self.order_batch.send(self, action, *args)
+
+        return getattr(self, '_' + action)(*args)
+
+    @connection_retry(MAX_RETRIES, RATE_LIMIT)
+    def _buy(self, price, size, product):
         logger.info('BUY: {} of {}, PRICE: {}'.format(size, product, price))
 
         try:
@@ -220,24 +1020,24 @@ class GDAXTrader:
             logger.warning(error)
             return None
 
-        order = self.client.buy(price=price_str, size=size_str, product_id=product,
-                post_only=True)
+        rejection = self._check_risk(QueueEstimator.BUY, price, size, product)
+        if rejection is not None:
+            return rejection
+
+        order = self._get_execution_client().buy(price=price_str,
+                size=size_str, product_id=product, post_only=True)
+        self._record_order_request()
 
         logger.info('ORDER: {}'.format(order))
 
+        if (self.risk is not None and self.risk.product == product
+                and 'message' not in order):
+            self.risk.record_order(QueueEstimator.BUY, price, size)
+
         return order
 
     @connection_retry(MAX_RETRIES, RATE_LIMIT)
-    def sell(self, price, size, product):
-        """
-        Place sell order for a product
-
-        :param price: the minimum price that will be accepted
-        :size: the amount to sell
-        :product: the product to place the sell order for
-        :returns: order data
-        """
-
+    def _sell(self, price, size, product):
         logger.info('SELL: {} of {}, PRICE: {}'.format(size, product, price))
 
         try:
@@ -248,21 +1048,98 @@ class GDAXTrader:
             logger.warning(error)
             return None
 
-        order = self.client.sell(price=price_str, size=size_str, product_id=product,
-                post_only=True)
+        rejection = self._check_risk(QueueEstimator.SELL, price, size, product)
+        if rejection is not None:
+            return rejection
+
+        order = self._get_execution_client().sell(price=price_str,
+                size=size_str, product_id=product, post_only=True)
+        self._record_order_request()
 
         logger.info('ORDER: {}'.format(order))
 
+        if (self.risk is not None and self.risk.product == product
+                and 'message' not in order):
+            self.risk.record_order(QueueEstimator.SELL, price, size)
+
         return order
 
     @connection_retry(MAX_RETRIES, RATE_LIMIT)
-    def cancel_order(self, order_id):
+    def _cancel_order(self, order_id):
+        logger.info('CANCEL: {}'.format(order_id))
+
+        self.queue.remove(order_id)
+        self._record_order_request()
+
+        return self._get_execution_client().cancel_order(order_id)
+
+    @connection_retry(MAX_RETRIES, RATE_LIMIT)
+    def cancel_all(self):
         """
-        Cancel an order
+        Cancel every open order of the product with a single request
 
-        :param order_id: the order ID
         :returns: the API response
         """
 
-        logger.info('CANCEL: {}'.format(order_id))
-        return self.client.cancel_order(order_id)
+        logger.info('CANCEL ALL: {}'.format(self.product))
+
+        for order_id in list(self.queue.orders):
+            self.queue.remove(order_id)
+
+        self._record_order_request()
+
+        return self._get_execution_client().cancel_all(
+                product=self.product or '')
+
+    def _cancel_all_for_risk(self):
+        """
+        Cancel every open order after the kill switch tripped
+
+        The kill switch is only latched once the cancel succeeds, so a failed
+        cancel is retried on the next iteration.
+        """
+
+        try:
+            response = self.cancel_all()
+        except (ConnectionError, JSONDecodeError) as error:
+            logger.warning('Kill switch cancel failed: {}'.format(error))
+            return
+
+        # Errors are returned as a message instead of the cancelled order IDs
+        if isinstance(response, dict) and 'message' in response:
+            logger.warning('Kill switch cancel failed: {}'.format(response))
+            return
+
+        self.risk.confirm_kill()
+
+    def _check_risk(self, side, price, size, product):
+        """
+        Check an order against the risk limits of its product
+
+        :param side: `buy` or `sell`
+        :param price: the order price
+        :param size: the order size
+        :param product: the product of the order
+        :returns: an error message response if the order is rejected,
+            otherwise `None`
+        """
+
+        if self.risk is None or self.risk.product != product:
+            return None
+
+        reason = self.risk.check_order(side, price, size)
+
+        if reason is None:
+            return None
+
+        logger.warning('Order rejected by risk limits: {}'.format(reason))
+
+        return {'message': 'Risk limit: {}'.format(reason)}
+
+    def _record_order_request(self):
+        """
+        Count an order request against the scheduler's request budget
+        """
+
+        if self.scheduler is not None:
+            self.scheduler.record_order()
@@ -0,0 +1,432 @@
+from array import array
+from bisect import bisect_left, insort
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class L3Book:
+    """
+    Level 3 order book with an order ID index and per price FIFO queues
+
+    Orders are stored in preallocated parallel arrays and linked into a
+    first-in first-out queue per price level. An index from order ID to slot
+    gives constant time lookups, and freed slots are reused, so applying a
+    message does not allocate once the book has reached its working size.
+    Level 2 sizes and order counts are kept up to date as orders change.
+
+    The book is loaded from a level 3 snapshot with :meth:`load_snapshot` and
+    kept current with GDAX `full` channel messages passed to :meth:`apply`.
+    Messages at or before the book's sequence are ignored, and a gap in the
+    sequence marks the book as needing a new snapshot.
+
+    Attributes:
+        capacity: Number of order slots allocated
+        sequence: Sequence number of the last snapshot or message applied
+        needs_snapshot: Whether messages were missed and the book is stale
+        orders: Slot of each resting order by order ID
+        levels: Level slot of each price by side
+        prices: Sorted prices of the levels of each side
+    """
+
+    BUY = 'buy'
+    SELL = 'sell'
+
+    # Order and level slots allocated up front, doubled when exhausted
+    CAPACITY = 1024
+
+    # Marks the end of a queue or of the free list
+    NONE = -1
+
+    # Sizes below the smallest GDAX increment are treated as empty
+    EPSILON = 1e-9
+
+    _SIDES = (BUY, SELL)
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = 0
+        self.sequence = None
+        self.needs_snapshot = True
+
+        self.orders = {}
+        self.levels = {L3Book.BUY: {}, L3Book.SELL: {}}
+        self.prices = {L3Book.BUY: [], L3Book.SELL: []}
+
+        # Order slots
+        self._order_sizes = array('d')
+        self._order_levels = array('l')
+        self._order_next = array('l')
+        self._order_prev = array('l')
+        self._free_order = L3Book.NONE
+
+        # Level slots
+        self._level_capacity = 0
+        self._level_prices = array('d')
+        self._level_sides = array('b')
+        self._level_sizes = array('d')
+        self._level_counts = array('l')
+        self._level_heads = array('l')
+        self._level_tails = array('l')
+        self._level_next_free = array('l')
+        self._free_level = L3Book.NONE
+
+        self._grow_orders(capacity)
+        self._grow_levels(max(capacity // 16, 16))
+
+    def _grow_orders(self, count):
+        start = self.capacity
+        self.capacity += count
+
+        self._order_sizes.extend([0.0] * count)
+        self._order_levels.extend([L3Book.NONE] * count)
+        self._order_prev.extend([L3Book.NONE] * count)
+
+        # New slots are chained onto the free list through `next`
+        self._order_next.extend(range(start + 1, self.capacity + 1))
+        self._order_next[self.capacity - 1] = self._free_order
+        self._free_order = start
+
+    def _grow_levels(self, count):
+        start = self._level_capacity
+        self._level_capacity += count
+
+        self._level_prices.extend([0.0] * count)
+        self._level_sides.extend([0] * count)
+        self._level_sizes.extend([0.0] * count)
+        self._level_counts.extend([0] * count)
+        self._level_heads.extend([L3Book.NONE] * count)
+        self._level_tails.extend([L3Book.NONE] * count)
+
+        self._level_next_free.extend(range(start + 1,
+                self._level_capacity + 1))
+        self._level_next_free[self._level_capacity - 1] = self._free_level
+        self._free_level = start
+
+    def _get_level(self, side, price):
+        """
+        Get the slot of a level, creating the level if it does not exist
+
+        :param side: `buy` or `sell`
+        :param price: the level price
+        :returns: the level slot
+        """
+
+        levels = self.levels[side]
+
+        try:
+            return levels[price]
+        except KeyError:
+            pass
+
+        if self._free_level == L3Book.NONE:
+            self._grow_levels(self._level_capacity)
+
+        level = self._free_level
+        self._free_level = self._level_next_free[level]
+
+        self._level_prices[level] = price
+        self._level_sides[level] = L3Book._SIDES.index(side)
+        self._level_sizes[level] = 0.0
+        self._level_counts[level] = 0
+        self._level_heads[level] = L3Book.NONE
+        self._level_tails[level] = L3Book.NONE
+
+        levels[price] = level
+        insort(self.prices[side], price)
+
+        return level
+
+    def _free_level_slot(self, side, level):
+        price = self._level_prices[level]
+
+        del self.levels[side][price]
+
+        prices = self.prices[side]
+        del prices[bisect_left(prices, price)]
+
+        self._level_next_free[level] = self._free_level
+        self._free_level = level
+
+    def _add_order(self, order_id, side, price, size):
+        """
+        Add an order to the back of the queue at its price
+
+        :param order_id: the order ID
+        :param side: `buy` or `sell`
+        :param price: the order price
+        :param size: the remaining order size
+        """
+
+        if order_id in self.orders:
+            self._remove_order(order_id)
+
+        if self._free_order == L3Book.NONE:
+            self._grow_orders(self.capacity)
+
+        slot = self._free_order
+        self._free_order = self._order_next[slot]
+
+        level = self._get_level(side, price)
+        tail = self._level_tails[level]
+
+        self._order_sizes[slot] = size
+        self._order_levels[slot] = level
+        self._order_next[slot] = L3Book.NONE
+        self._order_prev[slot] = tail
+
+        if tail == L3Book.NONE:
+            self._level_heads[level] = slot
+        else:
+            self._order_next[tail] = slot
+
+        self._level_tails[level] = slot
+        self._level_sizes[level] += size
+        self._level_counts[level] += 1
+
+        self.orders[order_id] = slot
+
+    def _remove_order(self, order_id):
+        """
+        Remove an order from its queue
+
+        :param order_id: the order ID
+        :returns: `True` if the order was in the book
+        """
+
+        slot = self.orders.pop(order_id, None)
+
+        if slot is None:
+            return False
+
+        level = self._order_levels[slot]
+        previous = self._order_prev[slot]
+        following = self._order_next[slot]
+
+        if previous == L3Book.NONE:
+            self._level_heads[level] = following
+        else:
+            self._order_next[previous] = following
+
+        if following == L3Book.NONE:
+            self._level_tails[level] = previous
+        else:
+            self._order_prev[following] = previous
+
+        self._level_counts[level] -= 1
+
+        if self._level_counts[level] == 0:
+            side = self._get_side(level)
+            self._free_level_slot(side, level)
+        else:
+            self._level_sizes[level] -= self._order_sizes[slot]
+
+        self._order_next[slot] = self._free_order
+        self._free_order = slot
+
+        return True
+
+    def _get_side(self, level):
+        return L3Book._SIDES[self._level_sides[level]]
+
+    def _resize_order(self, order_id, size):
+        """
+        Change the remaining size of an order, removing it once empty
+
+        :param order_id: the order ID
+        :param size: the new remaining size
+        """
+
+        slot = self.orders.get(order_id)
+
+        if slot is None:
+            return
+
+        if size <= L3Book.EPSILON:
+            self._remove_order(order_id)
+            return
+
+        level = self._order_levels[slot]
+        self._level_sizes[level] += size - self._order_sizes[slot]
+        self._order_sizes[slot] = size
+
+    def clear(self):
+        for order_id in list(self.orders):
+            self._remove_order(order_id)
+
+    def load_snapshot(self, order_book):
+        """
+        Replace the book with a level 3 snapshot
+
+        :param order_book: level 3 order book data with `sequence`, `bids`
+            and `asks`, each level a list of price, size and order ID
+        :raises KeyError: the snapshot is missing a side
+        """
+
+        bids = order_book['bids']
+        asks = order_book['asks']
+
+        self.clear()
+
+        for side, rows in ((L3Book.BUY, bids), (L3Book.SELL, asks)):
+            for price, size, order_id in rows:
+                self._add_order(order_id, side, float(price), float(size))
+
+        self.sequence = order_book.get('sequence')
+        self.needs_snapshot = False
+
+    def apply(self, message):
+        """
+        Apply a `full` channel message
+
+        `received` messages do not change the book, since an order only rests
+        once it is `open`. `open`, `done`, `match` and `change` messages add,
+        remove and resize resting orders.
+
+        :param message: the message data
+        :returns: `True` if the message was applied, `False` if it was stale,
+            out of sequence or invalid
+        """
+
+        sequence = message.get('sequence')
+
+        if sequence is not None and self.sequence is not None:
+            if sequence <= self.sequence:
+                return False
+
+            if sequence != self.sequence + 1:
+                logger.warning('Missed messages between sequence {} and {}'
+                        .format(self.sequence, sequence))
+                self.needs_snapshot = True
+                return False
+
+        if self.needs_snapshot:
+            return False
+
+        message_type = message.get('type')
+
+        try:
+            if message_type == 'open':
+                self._add_order(message['order_id'], message['side'],
+                        float(message['price']),
+                        float(message['remaining_size']))
+
+            elif message_type == 'done':
+                self._remove_order(message['order_id'])
+
+            elif message_type == 'match':
+                slot = self.orders.get(message['maker_order_id'])
+                if slot is not None:
+                    self._resize_order(message['maker_order_id'],
+                            self._order_sizes[slot] - float(message['size']))
+
+            elif message_type == 'change':
+                # Market orders change funds and never rest on the book
+                if 'new_size' in message:
+                    self._resize_order(message['order_id'],
+                            float(message['new_size']))
+
+        except (KeyError, TypeError, ValueError) as error:
+            logger.warning('Invalid {} message: {}'.format(message_type,
+                    error))
+            return False
+
+        if sequence is not None:
+            self.sequence = sequence
+
+        return True
+
+    def get_order(self, order_id):
+        """
+        Get a resting order
+
+        :param order_id: the order ID
+        :returns: tuple(side, price, size), or `None` if not in the book
+        """
+
+        slot = self.orders.get(order_id)
+
+        if slot is None:
+            return None
+
+        level = self._order_levels[slot]
+
+        return (self._get_side(level), self._level_prices[level],
+                self._order_sizes[slot])
+
+    def get_queue_position(self, order_id):
+        """
+        Get the size queued ahead of an order at its price level
+
+        :param order_id: the order ID
+        :returns: the size ahead, or `None` if the order is not in the book
+        """
+
+        slot = self.orders.get(order_id)
+
+        if slot is None:
+            return None
+
+        ahead = 0.0
+        previous = self._order_prev[slot]
+
+        while previous != L3Book.NONE:
+            ahead += self._order_sizes[previous]
+            previous = self._order_prev[previous]
+
+        return ahead
+
+    def get_level(self, side, price):
+        """
+        Get the level 2 aggregate of a price level
+
+        :param side: `buy` or `sell`
+        :param price: the level price
+        :returns: tuple(size, num_orders), zeros if the level is empty
+        """
+
+        level = self.levels[side].get(price)
+
+        if level is None:
+            return 0.0, 0
+
+        return self._level_sizes[level], self._level_counts[level]
+
+    def get_best(self, side):
+        """
+        Get the best price of a side
+
+        :param side: `buy` or `sell`
+        :returns: the best price, or `None` if the side is empty
+        """
+
+        prices = self.prices[side]
+
+        if not prices:
+            return None
+
+        return prices[-1] if side == L3Book.BUY else prices[0]
+
+    def get_level2(self, depth=50):
+        """
+        Get the aggregated book in the GDAX level 2 format
+
+        :param depth: maximum number of levels on each side
+        :returns: order book data with `sequence`, `bids` and `asks`, each
+            level a list of price, size and number of orders
+        """
+
+        bid_prices = self.prices[L3Book.BUY][-depth:][::-1]
+        ask_prices = self.prices[L3Book.SELL][:depth]
+
+        order_book = {'sequence': self.sequence}
+
+        for key, side, prices in (('bids', L3Book.BUY, bid_prices),
+                ('asks', L3Book.SELL, ask_prices)):
+            levels = self.levels[side]
+            order_book[key] = [[repr(price),
+                    '{:.8f}'.format(self._level_sizes[levels[price]]),
+                    self._level_counts[levels[price]]]
+                    for price in prices]
+
+        return order_book
@@ -0,0 +1,653 @@
+from collections import deque
+import heapq
+from itertools import islice
+import json
+import logging
+import threading
+import time
+
+import requests
+from requests.exceptions import ConnectionError, Timeout
+
+from book_decoder import BookDecoder
+from simulated_client import SimulatedClient
+from utils import connection_retry
+
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataSource:
+    """
+    Base class for the sources a trader gets order books and trades from
+
+    Sources return order books in the GDAX REST format and trades newest
+    first, so strategies run unchanged whichever source feeds them.
+
+    Attributes:
+        finished: Whether the source has no more data to return
+    """
+
+    # Whether data arrives in real time, so the trading loop waits between
+    # iterations instead of running as fast as the source returns data
+    REALTIME = True
+
+    def __init__(self):
+        self.finished = False
+
+    def start(self):
+        """
+        Override in child class to connect before the first iteration
+        """
+
+        pass
+
+    def stop(self):
+        """
+        Override in child class to disconnect after the last iteration
+        """
+
+        pass
+
+    def get_order_book(self, product, level=2):
+        """
+        Must be implemented by child class
+
+        :param product: the GDAX product
+        :param level: 2 for aggregated levels, 3 for every order
+        :returns: order book data
+        :raises ConnectionError: the order book is unavailable
+        """
+
+        raise NotImplementedError
+
+    def get_l3_book(self, product):
+        """
+        Override in child class to keep level 3 books current from a feed
+
+        :param product: the GDAX product
+        :returns: the :class:`L3Book` the source keeps current, or `None` if
+            level 3 books are fetched as snapshots
+        """
+
+        return None
+
+    def get_book_publisher(self, product):
+        """
+        Override in child class to publish level 2 books from a feed
+
+        :param product: the GDAX product
+        :returns: the :class:`BookPublisher` the source writes to, or `None`
+            if readers are given order book data to publish themselves
+        """
+
+        return None
+
+    def get_trades(self, product):
+        """
+        Must be implemented by child class
+
+        :param product: the GDAX product
+        :returns: list of trades, newest first
+        :raises ConnectionError: the trades are unavailable
+        """
+
+        raise NotImplementedError
+
+
+class RestPollSource(MarketDataSource):
+    """
+    Poll order books and trades from the GDAX REST API
+
+    Attributes:
+        client: The GDAX API client
+        book_decoder: Decodes order book responses, when set instead of the
+            client's JSON decoding
+    """
+
+    # GDAX rate limit of 3 requests per second with a little extra padding
+    RATE_LIMIT = 1.0 / 3.0 + 0.5
+
+    # Maximum number of retry attempts after a connection error
+    MAX_RETRIES = 5
+
+    def __init__(self, client, book_decoder=None):
+        super().__init__()
+
+        self.client = client
+        self.book_decoder = book_decoder
+
+    @connection_retry(MAX_RETRIES, RATE_LIMIT)
+    def get_order_book(self, product, level=2):
+        # Market data requests have no effect, so timeouts are retried like
+        # any other connection error
+        try:
+            if self.book_decoder is None:
+                return self.client.get_product_order_book(product,
+                        level=level)
+
+            content = self._get_order_book_content(product, level)
+        except Timeout as error:
+            raise ConnectionError('Request timed out: {}'.format(error))
+
+        return self.book_decoder.decode(content, level=level)
+
+    def _get_order_book_content(self, product, level):
+        """
+        Get the undecoded order book response for a product
+
+        :param product: the GDAX product
+        :param level: 2 for aggregated levels, 3 for every order
+        :returns: the response body as bytes
+        """
+
+        # Simulated clients produce the response body themselves
+        get_content = getattr(self.client, 'get_product_order_book_content',
+                None)
+        if get_content is not None:
+            return get_content(product, level=level)
+
+        # The GDAX client only returns decoded responses, so the public
+        # endpoint is requested directly
+        response = requests.get(
+                self.client.url + '/products/{}/book'.format(product),
+                params={'level': level}, timeout=30)
+
+        return response.content
+
+    @connection_retry(MAX_RETRIES, RATE_LIMIT)
+    def get_trades(self, product):
+        try:
+            trades = self.client.get_product_trades(product_id=product)
+        except Timeout as error:
+            raise ConnectionError('Request timed out: {}'.format(error))
+
+        # Error responses are returned as a message instead of a list
+        if not isinstance(trades, list):
+            logger.warning('Trades unavailable: {}'.format(trades))
+            return []
+
+        return trades
+
+
+class WebsocketSource(MarketDataSource):
+    """
+    Maintain level 2 order books and recent trades from the GDAX websocket feed
+
+    A background thread subscribes to the `level2` and `matches` channels of
+    every product and applies their messages as they arrive, so getting an
+    order book only copies the local levels and costs no request. The feed
+    reconnects after errors, and a fresh snapshot replaces the local book.
+
+    Products with a level 3 book are also subscribed to the `full` channel,
+    whose messages are applied to the book with :meth:`L3Book.apply`. The
+    feed does not send level 3 snapshots, so messages are buffered while a
+    book needs one until a REST snapshot is passed to
+    :meth:`load_l3_snapshot`, after which only missed messages require
+    another.
+
+    Products with a book publisher have their level 2 book written to the
+    publisher instead, from the feed thread: every update applies only its
+    changes and publishes a new snapshot, which readers take without the
+    lock.
+
+    Attributes:
+        products: The products subscribed to
+        url: The websocket feed URL
+        running: Whether the feed thread is running
+        l3_books: The :class:`L3Book` kept current by product
+        book_publishers: The :class:`BookPublisher` written by product
+        depth: Levels returned per side of a level 2 book, or `None` for
+            every level
+    """
+
+    URL = 'wss://ws-feed.gdax.com'
+
+    # Seconds to wait before reconnecting after the feed closes
+    RECONNECT_DELAY = 5
+
+    # Number of trades kept per product
+    MAX_TRADES = 100
+
+    DEPTH = BookDecoder.DEPTH
+
+    # Number of `full` channel messages buffered per product while its level
+    # 3 book waits for a snapshot
+    MAX_PENDING = 10000
+
+    # `full` channel messages that change a level 3 book, `match` messages
+    # also come from the `matches` channel
+    L3_MESSAGES = ('received', 'open', 'done', 'change')
+
+    BUY = 'buy'
+    SELL = 'sell'
+
+    def __init__(self, products, url=URL, l3_books=None, depth=DEPTH,
+            book_publishers=None):
+        """
+        :param products: the products to subscribe to
+        :param url: the websocket feed URL
+        :param l3_books: dict of :class:`L3Book` to keep current by product
+        :param depth: levels returned per side of a level 2 book
+        :param book_publishers: dict of :class:`BookPublisher` to write by
+            product
+        """
+
+        super().__init__()
+
+        self.products = list(products)
+        self.url = url
+        self.running = False
+        self.l3_books = dict(l3_books or {})
+        self.book_publishers = dict(book_publishers or {})
+        self.depth = depth
+
+        self._books = {}
+        self._sequences = {}
+        self._trades = {product: deque(maxlen=WebsocketSource.MAX_TRADES)
+                for product in self.products}
+        self._pending = {product: deque(maxlen=WebsocketSource.MAX_PENDING)
+                for product in self.l3_books}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._socket = None
+
+    def start(self):
+        if self.running:
+            return
+
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+
+        if self._socket is not None:
+            self._socket.close()
+
+    def _run(self):
+        # Imported here since only websocket traders need websocket-client
+        import websocket
+
+        while self.running:
+            self._socket = websocket.WebSocketApp(self.url,
+                    on_open=self._on_open, on_message=self._on_message,
+                    on_error=self._on_error)
+            self._socket.run_forever()
+
+            if self.running:
+                logger.warning('Websocket feed closed, reconnecting...')
+                time.sleep(self.RECONNECT_DELAY)
+
+    def _on_open(self, socket):
+        channels = ['level2', 'matches']
+
+        if self.l3_books:
+            channels.append({'name': 'full',
+                    'product_ids': sorted(self.l3_books)})
+
+        socket.send(json.dumps({
+            'type': 'subscribe',
+            'product_ids': self.products,
+            'channels': channels,
+        }))
+
+    def _on_error(self, socket, error):
+        logger.warning('Websocket feed error: {}'.format(error))
+
+    def _on_message(self, socket, message):
+        try:
+            self.handle_message(json.loads(message))
+        except (ValueError, KeyError, TypeError) as error:
+            logger.warning('Invalid websocket message {}: {}'.format(message,
+                    error))
+
+    def handle_message(self, message):
+        """
+        Apply a websocket feed message
+
+        :param message: the decoded message
+        :raises KeyError: the message is missing attributes
+        """
+
+        message_type = message.get('type')
+
+        if (message_type in ('snapshot', 'l2update')
+                and message['product_id'] in self.book_publishers):
+            self._publish(message)
+
+        elif message_type == 'snapshot':
+            book = {
+                WebsocketSource.BUY: {price: size
+                        for price, size in message['bids']},
+                WebsocketSource.SELL: {price: size
+                        for price, size in message['asks']},
+            }
+
+            product = message['product_id']
+
+            # The sequence keeps increasing across snapshots after a
+            # reconnect, so a new book is never mistaken for an old one
+            with self._lock:
+                self._books[product] = book
+                self._sequences[product] = self._sequences.get(product,
+                        0) + 1
+
+        elif message_type == 'l2update':
+            product = message['product_id']
+
+            with self._lock:
+                book = self._books.get(product)
+
+                # Updates before the snapshot are covered by the snapshot
+                if book is None:
+                    return
+
+                for side, price, size in message['changes']:
+                    if float(size) == 0:
+                        book[side].pop(price, None)
+                    else:
+                        book[side][price] = size
+
+                self._sequences[product] += 1
+
+        elif message_type == 'match':
+            product = message['product_id']
+            trade = {
+                'time': message['time'],
+                'trade_id': message['trade_id'],
+                'price': message['price'],
+                'size': message['size'],
+                'side': message['side'],
+            }
+
+            with self._lock:
+                trades = self._trades[product]
+
+                # Matches of products with a level 3 book arrive on both
+                # channels
+                if not trades or trades[-1]['trade_id'] < trade['trade_id']:
+                    trades.append(trade)
+
+                if product in self.l3_books:
+                    self._apply_l3(product, message)
+
+        elif message_type in WebsocketSource.L3_MESSAGES:
+            product = message['product_id']
+
+            if product in self.l3_books:
+                with self._lock:
+                    self._apply_l3(product, message)
+
+    def _publish(self, message):
+        """
+        Write a level 2 feed message to the product's book publisher and
+        publish the result
+
+        Only the feed thread writes to the publisher, so the lock is not
+        held.
+
+        :param message: the decoded `snapshot` or `l2update` message
+        """
+
+        product = message['product_id']
+        publisher = self.book_publishers[product]
+
+        if message['type'] == 'snapshot':
+            # The sequence keeps increasing across snapshots like the
+            # sequence of the local books
+            sequence = (0 if publisher.sequence is None
+                    else publisher.sequence) + 1
+
+            publisher.load_snapshot({
+                'sequence': sequence,
+                'bids': [[price, size, None] for price, size
+                        in message['bids']],
+                'asks': [[price, size, None] for price, size
+                        in message['asks']],
+            })
+
+        # Updates before the snapshot are covered by the snapshot
+        elif publisher.snapshot is None:
+            return
+
+        else:
+            publisher.apply_changes(message['changes'],
+                    sequence=publisher.sequence + 1)
+
+        publisher.publish()
+
+    def _apply_l3(self, product, message):
+        """
+        Apply a `full` channel message to a level 3 book, buffering it while
+        the book needs a snapshot
+
+        Must be called with the lock held.
+
+        :param product: the GDAX product
+        :param message: the decoded message
+        """
+
+        l3_book = self.l3_books[product]
+        pending = self._pending[product]
+
+        if not l3_book.needs_snapshot:
+            if l3_book.apply(message) or not l3_book.needs_snapshot:
+                return
+
+            # Messages before the gap are covered by the next snapshot
+            pending.clear()
+
+        pending.append(message)
+
+    def load_l3_snapshot(self, product, order_book):
+        """
+        Load a level 3 snapshot and apply the messages buffered since it
+
+        :param product: the GDAX product
+        :param order_book: level 3 order book data
+        :raises KeyError: the product has no level 3 book, or the snapshot
+            is missing a side
+        """
+
+        with self._lock:
+            l3_book = self.l3_books[product]
+            l3_book.load_snapshot(order_book)
+
+            # Messages at or before the snapshot are ignored by the book
+            pending = list(self._pending[product])
+            self._pending[product].clear()
+
+            for message in pending:
+                self._apply_l3(product, message)
+
+    def get_l3_book(self, product):
+        return self.l3_books.get(product)
+
+    def get_book_publisher(self, product):
+        return self.book_publishers.get(product)
+
+    def get_queue_position(self, product, order_id):
+        """
+        Get the size queued ahead of an order in a level 3 book
+
+        :param product: the GDAX product
+        :param order_id: the order ID
+        :returns: the size ahead, or `None` if the order is not in the book
+        """
+
+        with self._lock:
+            return self.l3_books[product].get_queue_position(order_id)
+
+    def get_order_book(self, product, level=2):
+        """
+        Get the best `depth` levels of the local level 2 order book of a
+        product
+
+        Levels have no order count, since the feed does not report one. At
+        level 3 the level 2 aggregate of the product's level 3 book is
+        returned, with order counts. Products with a book publisher are read
+        from its latest snapshot.
+
+        :param product: the GDAX product
+        :param level: 2, or 3 for a product with a level 3 book
+        :returns: order book data
+        :raises ValueError: the level is not maintained for the product
+        :raises ConnectionError: no snapshot has been received yet
+        """
+
+        if level == 3 and product in self.l3_books:
+            with self._lock:
+                l3_book = self.l3_books[product]
+
+                if l3_book.needs_snapshot:
+                    raise ConnectionError('{} level 3 book needs a '
+                            'snapshot'.format(product))
+
+                return l3_book.get_level2()
+
+        if level != 2:
+            raise ValueError('Websocket books are level 2 only')
+
+        publisher = self.book_publishers.get(product)
+
+        if publisher is not None:
+            # The latest snapshot is taken without the lock
+            snapshot = publisher.snapshot
+
+            if snapshot is None:
+                raise ConnectionError('No {} order book received yet'.format(
+                        product))
+
+            return {
+                'sequence': snapshot.sequence,
+                'bids': [list(level) for level
+                        in islice(snapshot.bids.levels, self.depth)],
+                'asks': [list(level) for level
+                        in islice(snapshot.asks.levels, self.depth)],
+            }
+
+        with self._lock:
+            try:
+                book = self._books[product]
+            except KeyError:
+                raise ConnectionError('No {} order book received yet'.format(
+                        product))
+
+            bids = self._get_best(book[WebsocketSource.BUY], heapq.nlargest)
+            asks = self._get_best(book[WebsocketSource.SELL], heapq.nsmallest)
+            sequence = self._sequences[product]
+
+        return {
+            'sequence': sequence,
+            'bids': [[price, size, None] for price, size in bids],
+            'asks': [[price, size, None] for price, size in asks],
+        }
+
+    def _get_best(self, side, select):
+        """
+        Get the best levels of a side, best first
+
+        :param side: dict of size by price of the side
+        :param select: :func:`heapq.nlargest` for bids or
+            :func:`heapq.nsmallest` for asks
+        :returns: list of tuple(price, size)
+        """
+
+        depth = len(side) if self.depth is None else self.depth
+
+        # Only the returned levels are ordered instead of the whole side
+        return select(depth, side.items(), key=lambda level: float(level[0]))
+
+    def get_trades(self, product):
+        with self._lock:
+            return list(reversed(self._trades.get(product, ())))
+
+
+class ReplaySource(MarketDataSource):
+    """
+    Replay archived order books one per iteration, as fast as they are used
+
+    Attributes:
+        book_archive: The :class:`BookArchive` books are replayed from
+        since: Only replay books recorded after this time
+        limit: Only replay the most recent `limit` books
+    """
+
+    REALTIME = False
+
+    def __init__(self, book_archive, since=None, limit=None):
+        super().__init__()
+
+        self.book_archive = book_archive
+        self.since = since
+        self.limit = limit
+
+        self._records = {}
+
+    def get_order_book(self, product, level=2):
+        """
+        Get the next archived order book of a product
+
+        The source is finished once the last book has been returned.
+
+        :param product: the GDAX product
+        :param level: the level of the archived books
+        :returns: order book data
+        :raises ConnectionError: every archived book has been replayed
+        """
+
+        records = self._records.get(product)
+
+        if records is None:
+            records = iter(self.book_archive.read(product, since=self.since,
+                    limit=self.limit))
+            self._records[product] = records
+
+        try:
+            timestamp, order_book = next(records)
+        except StopIteration:
+            self.finished = True
+            raise ConnectionError('Replay of {} finished'.format(product))
+
+        return order_book
+
+    def get_trades(self, product):
+        # Trades are not archived
+        return []
+
+
+class SyntheticSource(MarketDataSource):
+    """
+    Generate order books and trades with a :class:`SimulatedClient`
+
+    Books are generated as fast as they are used, without the retry pacing of
+    the REST source. Passing the same client to the trader simulates
+    execution against the generated books too.
+
+    Attributes:
+        client: The simulated client generating the data
+    """
+
+    REALTIME = False
+
+    def __init__(self, client=None, **parameters):
+        """
+        :param client: the :class:`SimulatedClient`, created from
+            `parameters` when not given
+        :param parameters: arguments of :class:`SimulatedClient`
+        """
+
+        super().__init__()
+
+        if client is None:
+            client = SimulatedClient(**parameters)
+
+        self.client = client
+
+    def get_order_book(self, product, level=2):
+        return self.client.get_product_order_book(product, level=level)
+
+    def get_trades(self, product):
+        return self.client.get_product_trades(product)
@@ -0,0 +1,224 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import time
+
+from json.decoder import JSONDecodeError
+from requests.exceptions import ConnectionError
+
+from utils import rate_limiter
+
+
+logger = logging.getLogger(__name__)
+
+
+class OrderBatch:
+    """
+    Submit independent order actions of one or more traders in parallel
+
+    Actions are queued with :meth:`buy`, :meth:`sell` and
+    :meth:`cancel_order`, then :meth:`submit` sends them at once from a pool
+    of `workers` threads, so every leg reaches the exchange within about one
+    round trip instead of one after another. Actions go through the trader's
+    own method, keeping its risk checks and order accounting, but without its
+    fixed retry pause. Instead every attempt waits for the rate limiter.
+
+    Actions in a batch must not depend on each other, such as orders for
+    different products. Traders with a :class:`LiveExecution` with a
+    `pool_size` of at least `workers` send each action over a persistent
+    connection.
+
+    Traders set with :meth:`GDAXTrader.set_order_batch` send each of their
+    order actions with :meth:`send` instead, and :meth:`map` runs the
+    iterations of independent traders on the same pool, so their actions are
+    sent at once.
+
+    Attributes:
+        workers: Number of actions sent at once
+        rate_limiter: The :class:`RateLimiter` every attempt waits for
+        latencies: Seconds each submitted action took by action name
+    """
+
+    BUY = 'buy'
+    SELL = 'sell'
+    CANCEL = 'cancel_order'
+
+    WORKERS = 4
+
+    # Maximum number of attempts of each action after a connection error
+    MAX_RETRIES = 5
+
+    def __init__(self, workers=WORKERS, rate_limiter=rate_limiter):
+        self.workers = workers
+        self.rate_limiter = rate_limiter
+        self.latencies = {
+            OrderBatch.BUY: [],
+            OrderBatch.SELL: [],
+            OrderBatch.CANCEL: [],
+        }
+
+        self._actions = []
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+
+    def __len__(self):
+        return len(self._actions)
+
+    def buy(self, trader, price, size, product):
+        """
+        Queue a buy order
+
+        :param trader: the :class:`GDAXTrader` placing the order
+        :param price: the maximum price that will be accepted
+        :param size: the amount to buy
+        :param product: the product to buy
+        :returns: the index of the action's result
+        """
+
+        return self._add(trader, OrderBatch.BUY, price, size, product)
+
+    def sell(self, trader, price, size, product):
+        """
+        Queue a sell order
+
+        :param trader: the :class:`GDAXTrader` placing the order
+        :param price: the minimum price that will be accepted
+        :param size: the amount to sell
+        :param product: the product to sell
+        :returns: the index of the action's result
+        """
+
+        return self._add(trader, OrderBatch.SELL, price, size, product)
+
+    def cancel_order(self, trader, order_id):
+        """
+        Queue an order cancel
+
+        :param trader: the :class:`GDAXTrader` that placed the order
+        :param order_id: the order ID
+        :returns: the index of the action's result
+        """
+
+        return self._add(trader, OrderBatch.CANCEL, order_id)
+
+    def _add(self, trader, action, *args):
+        self._actions.append((trader, action, args))
+
+        return len(self._actions) - 1
+
+    def submit(self):
+        """
+        Send every queued action in parallel and wait for their responses
+
+        Actions that still fail after `MAX_RETRIES` attempts have the error as
+        their response instead of raising it, so one failed leg does not hide
+        the responses of the others.
+
+        :returns: list of results in the order actions were queued, each a
+            dict with the `action`, its `response` and its `latency` in
+            seconds
+        """
+
+        actions = self._actions
+        self._actions = []
+
+        results = list(self._pool.map(self._run, actions))
+
+        for result in results:
+            self._record(result)
+
+        return results
+
+    def send(self, trader, name, *args):
+        """
+        Send one action from the calling thread and wait for its response
+
+        :param trader: the :class:`GDAXTrader` the action belongs to
+        :param name: the action name, such as :attr:`BUY`
+        :returns: the API response
+        :raises ConnectionError: the action still failed after `MAX_RETRIES`
+            attempts
+        """
+
+        result = self._run((trader, name, args))
+        self._record(result)
+
+        if isinstance(result['response'], (ConnectionError, JSONDecodeError)):
+            raise result['response']
+
+        return result['response']
+
+    def map(self, function, items):
+        """
+        Call a function with each item from the worker threads
+
+        :param function: the function, called with one item
+        :param items: the items, which must not depend on each other
+        :returns: list of results in the order of the items
+        """
+
+        return list(self._pool.map(function, items))
+
+    def _record(self, result):
+        self.latencies[result['action']].append(result['latency'])
+
+        logger.info('{} took {:.3f} seconds'.format(result['action'],
+                result['latency']))
+
+    def _run(self, action):
+        """
+        Send an action, retrying connection errors
+
+        :param action: tuple(trader, action name, arguments)
+        :returns: the action result
+        """
+
+        trader, name, args = action
+
+        # The trader's sending method without its retry decorator
+        send = getattr(trader, '_' + name).__wrapped__
+
+        start = time.perf_counter()
+
+        for _ in range(self.MAX_RETRIES):
+            self.rate_limiter.acquire()
+
+            try:
+                response = send(trader, *args)
+            except (ConnectionError, JSONDecodeError) as error:
+                logger.warning(error)
+                response = error
+            else:
+                break
+
+        return {
+            'action': name,
+            'response': response,
+            'latency': time.perf_counter() - start,
+        }
+
+    def get_summary(self):
+        """
+        Get latency statistics of the submitted actions
+
+        :returns: dict of `count`, `mean` and `max` latency by action name
+        """
+
+        summary = {}
+
+        for name, latencies in self.latencies.items():
+            if not latencies:
+                continue
+
+            summary[name] = {
+                'count': len(latencies),
+                'mean': sum(latencies) / len(latencies),
+                'max': max(latencies),
+            }
+
+        return summary
+
+    def close(self):
+        """
+        Stop the worker threads
+        """
+
+        self._pool.shutdown()
@@ -0,0 +1,84 @@
+from array import array
+
+
+class OrderBookSide:
+    """
+    One side of an order book
+
+    Holds the raw levels as returned by GDAX and parses numeric price and size
+    arrays on first use. Columns can be read by name like a DataFrame, and a
+    real DataFrame is only built, importing pandas, when :meth:`to_df` is
+    called.
+
+    Attributes:
+        levels: The raw levels, each a list of `columns` values
+        columns: The column names of each level
+    """
+
+    COLUMNS = ('price', 'size', 'num-orders')
+
+    def __init__(self, levels, columns=COLUMNS):
+        self.levels = levels
+        self.columns = columns
+
+        # Levels decoded by :class:`BookDecoder` carry their parsed arrays
+        self._prices = getattr(levels, 'prices', None)
+        self._sizes = getattr(levels, 'sizes', None)
+
+    def __len__(self):
+        return len(self.levels)
+
+    def __getitem__(self, column):
+        """
+        Get the raw values of a column
+
+        :param column: the column name
+        :returns: list of column values
+        :raises KeyError: the column does not exist
+        """
+
+        try:
+            index = self.columns.index(column)
+        except ValueError:
+            raise KeyError(column)
+
+        return [level[index] for level in self.levels]
+
+    @property
+    def prices(self):
+        """
+        Level prices as floats
+
+        :returns: :class:`array.array` of prices
+        """
+
+        if self._prices is None:
+            self._prices = array('d', (float(level[0])
+                    for level in self.levels))
+
+        return self._prices
+
+    @property
+    def sizes(self):
+        """
+        Level sizes as floats
+
+        :returns: :class:`array.array` of sizes
+        """
+
+        if self._sizes is None:
+            self._sizes = array('d', (float(level[1])
+                    for level in self.levels))
+
+        return self._sizes
+
+    def to_df(self):
+        """
+        Get the levels as a DataFrame
+
+        :returns: :class:`pandas.DataFrame` with a column per level value
+        """
+
+        import pandas as pd
+
+        return pd.DataFrame(list(self.levels), columns=list(self.columns))
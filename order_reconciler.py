@@ -0,0 +1,154 @@
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class OrderReconciler:
+    """
+    Track the open orders of every strategy with batched requests
+
+    Instead of polling each order with :meth:`GDAXTrader.get_order`, every
+    open order is listed in one paginated request and only the fills newer
+    than a cursor are fetched, so requests scale with the number of changes.
+    Nothing is requested while no orders are tracked. The result is diffed
+    against the last known state of each tracked order, and only changes are
+    dispatched to the owning strategies through
+    :meth:`Strategy.on_order_update` and :meth:`Strategy.on_order_done`. New
+    fills are also passed to the trader's execution analytics.
+
+    Attributes:
+        trader: An instance of :class:`GDAXTrader`
+        interval: Minimum seconds between reconciliations
+        orders: Last known state of tracked orders by order ID
+        owners: Strategies owning tracked orders by order ID
+        fill_cursor: Trade ID of the most recent fill seen
+    """
+
+    def __init__(self, trader, interval=0):
+        self.trader = trader
+        self.interval = interval
+
+        self.orders = {}
+        self.owners = {}
+        self.fill_cursor = None
+
+        self._last_reconciled = None
+        self._fills_initialized = False
+
+    def track(self, order, strategy):
+        """
+        Start tracking an order placed by a strategy
+
+        :param order: the order data
+        :param strategy: the strategy that owns the order
+        """
+
+        self.orders[order['id']] = order
+        self.owners[order['id']] = strategy
+
+    def untrack(self, order_id):
+        self.orders.pop(order_id, None)
+        self.owners.pop(order_id, None)
+
+    def reconcile(self):
+        """
+        Reconcile tracked orders with the exchange and dispatch changes
+
+        Does nothing if called again within `interval` seconds.
+
+        :returns: tuple(updated, done) lists of changed order IDs
+        :raises ConnectionError: if the exchange cannot be reached
+        :raises JSONDecodeError: if a response cannot be decoded
+        """
+
+        now = time.time()
+
+        if (self._last_reconciled is not None
+                and now - self._last_reconciled < self.interval):
+            return [], []
+
+        self._last_reconciled = now
+
+        if not self.owners:
+            return [], []
+
+        open_orders = self.trader.get_orders()
+        fills = self._get_new_fills()
+
+        analytics = self.trader.analytics
+
+        fills_by_order = {}
+        for fill in fills:
+            fills_by_order.setdefault(fill['order_id'], []).append(fill)
+
+            if analytics is not None:
+                owner = self.owners.get(fill['order_id'])
+                analytics.add_fill(fill,
+                        owner.name if owner is not None else None)
+
+        updated = []
+        done = []
+
+        for order_id, strategy in list(self.owners.items()):
+            order = open_orders.get(order_id)
+
+            if order is None:
+                logger.info('Order {} is no longer open'.format(order_id))
+
+                self.untrack(order_id)
+
+                if analytics is not None:
+                    analytics.order_done(order_id)
+
+                strategy.on_order_done(order_id,
+                        fills_by_order.get(order_id, []))
+                done.append(order_id)
+
+            elif order != self.orders[order_id] or order_id in fills_by_order:
+                self.orders[order_id] = order
+                strategy.on_order_update(order,
+                        fills_by_order.get(order_id, []))
+                updated.append(order_id)
+
+        return updated, done
+
+    def _get_new_fills(self):
+        """
+        Get fills newer than the fill cursor and advance the cursor
+
+        Pages are requested until one is not full, each starting after the
+        previous one.
+
+        :returns: list of fills, oldest first
+        """
+
+        fills = []
+
+        while True:
+            page = self.trader.get_fills_page(before=self.fill_cursor or '')
+
+            page = [fill for fill in page
+                    if self.fill_cursor is None
+                    or fill['trade_id'] > self.fill_cursor]
+
+            if page:
+                self.fill_cursor = max(fill['trade_id'] for fill in page)
+
+            fills.extend(page)
+
+            # The first request only establishes the cursor from the newest
+            # fills
+            if (not self._fills_initialized
+                    or len(page) < self.trader.FILL_PAGE_SIZE):
+                break
+
+        # Nothing is requested until an order is tracked, so only the first
+        # fills of tracked orders are new to their owners
+        if not self._fills_initialized:
+            self._fills_initialized = True
+            fills = [fill for fill in fills
+                    if fill.get('order_id') in self.owners]
+
+        return sorted(fills, key=lambda fill: fill['trade_id'])
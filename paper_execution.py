@@ -0,0 +1,467 @@
+from collections import deque
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+import logging
+import uuid
+
+from execution import Execution
+from queue_position import QueueEstimator
+
+
+logger = logging.getLogger(__name__)
+
+
+class PaperExecution(Execution):
+    """
+    Simulated order execution against live market data
+
+    Implements the order and account methods of
+    :class:`gdax.AuthenticatedClient`, so a trader can keep fetching real order
+    books while its orders and balances are simulated. Post-only limit orders
+    rest locally and are matched against every order book and trade passed to
+    :meth:`update_book` and :meth:`update_trades`.
+
+    The queue position of each resting order is estimated by a
+    :class:`QueueEstimator`, and trades only fill an order once they have
+    consumed the size queued ahead of it. An order is filled in full when the
+    book quotes through its price.
+
+    Attributes:
+        fee_rate: Fee charged on the value of each fill
+        balances: Simulated balances by currency, including held funds
+        holds: Funds held by open orders by currency
+        orders: Simulated orders by order ID
+        fills: Simulated fills in the order they occurred
+        queues: Queue position estimators of open orders by product
+        order_books: Latest order book by product
+    """
+
+    DEFAULT_BALANCES = {
+        'USD': '10000.00',
+    }
+
+    # Number of completed orders and fills kept for lookups
+    MAX_HISTORY = 1000
+
+    BUY = 'buy'
+    SELL = 'sell'
+
+    def __init__(self, balances=None, fee_rate=0):
+        super().__init__()
+
+        if balances is None:
+            balances = PaperExecution.DEFAULT_BALANCES
+
+        self.fee_rate = Decimal(str(fee_rate))
+
+        self.balances = {currency: Decimal(balance)
+                for currency, balance in balances.items()}
+        self.holds = {}
+
+        self.orders = {}
+        self.fills = deque(maxlen=PaperExecution.MAX_HISTORY)
+        self.queues = {}
+        self.order_books = {}
+
+        self._trade_id = 0
+        self._done_order_ids = deque()
+
+    @staticmethod
+    def _timestamp():
+        """
+        Get the current time in the GDAX timestamp format
+
+        :returns: the timestamp string
+        """
+
+        return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+    @staticmethod
+    def _split_product(product):
+        base, quote = product.split('-')
+        return base, quote
+
+    @staticmethod
+    def _get_level_size(levels, price):
+        """
+        Get the size at a price level of one side of an order book
+
+        :param levels: the raw levels of the side
+        :param price: the level price
+        :returns: the level size, zero if the level is not in the book
+        """
+
+        for level in levels:
+            if Decimal(level[0]) == price:
+                return Decimal(level[1])
+
+        return Decimal(0)
+
+    def _get_best_prices(self, product):
+        """
+        Get the best bid and ask of the latest order book for a product
+
+        :param product: the GDAX product
+        :returns: tuple(best_bid, best_ask), either `None` if unknown
+        """
+
+        order_book = self.order_books.get(product)
+
+        best_bid = best_ask = None
+
+        if order_book is not None:
+            if order_book['bids']:
+                best_bid = max(Decimal(level[0])
+                        for level in order_book['bids'])
+            if order_book['asks']:
+                best_ask = min(Decimal(level[0])
+                        for level in order_book['asks'])
+
+        return best_bid, best_ask
+
+    def _get_queue(self, product):
+        try:
+            return self.queues[product]
+        except KeyError:
+            queue = self.queues[product] = QueueEstimator(own_in_book=False)
+            return queue
+
+    def get_queue_position(self, order_id):
+        """
+        Get the estimated size queued ahead of an open order
+
+        :param order_id: the order ID
+        :returns: the size ahead, or `None` if the order is not open
+        """
+
+        try:
+            product = self.orders[order_id]['product_id']
+        except KeyError:
+            return None
+
+        return self._get_queue(product).get_position(order_id)
+
+    def _get_hold(self, order, size):
+        """
+        Get the currency and amount held for part of an order
+
+        :param order: the simulated order
+        :param size: the part of the order size
+        :returns: tuple(currency, amount)
+        """
+
+        base, quote = self._split_product(order['product_id'])
+
+        if order['side'] == PaperExecution.BUY:
+            return quote, Decimal(order['price']) * size
+
+        return base, size
+
+    def _release(self, order, size):
+        currency, amount = self._get_hold(order, size)
+        self.holds[currency] -= amount
+
+    def _finish_order(self, order, done_reason):
+        """
+        Mark an order done and forget the oldest completed orders
+
+        :param order: the simulated order
+        :param done_reason: why the order is done
+        """
+
+        order['status'] = 'done'
+        order['done_reason'] = done_reason
+        order['settled'] = True
+
+        self._get_queue(order['product_id']).remove(order['id'])
+
+        # Only a bounded number of completed orders are kept for lookups
+        self._done_order_ids.append(order['id'])
+        while len(self._done_order_ids) > PaperExecution.MAX_HISTORY:
+            self.orders.pop(self._done_order_ids.popleft(), None)
+
+    def _fill(self, order, size):
+        """
+        Fill part of an open order and settle the balances
+
+        :param order: the simulated order
+        :param size: the size to fill, capped at the unfilled size
+        :returns: the size filled
+        """
+
+        remaining = Decimal(order['size']) - Decimal(order['filled_size'])
+        size = min(size, remaining)
+
+        if size <= 0:
+            return Decimal(0)
+
+        price = Decimal(order['price'])
+        value = price * size
+        fee = value * self.fee_rate
+        base, quote = self._split_product(order['product_id'])
+
+        self._release(order, size)
+
+        if order['side'] == PaperExecution.BUY:
+            self.balances[quote] -= value + fee
+            self.balances[base] = self.balances.get(base, Decimal(0)) + size
+        else:
+            self.balances[base] -= size
+            self.balances[quote] = (self.balances.get(quote, Decimal(0))
+                    + value - fee)
+
+        filled_size = Decimal(order['filled_size']) + size
+        order['filled_size'] = str(filled_size)
+        order['fill_fees'] = str(Decimal(order['fill_fees']) + fee)
+        order['executed_value'] = str(Decimal(order['executed_value']) + value)
+
+        self._trade_id += 1
+
+        self.fills.append({
+            'trade_id': self._trade_id,
+            'order_id': order['id'],
+            'product_id': order['product_id'],
+            'price': order['price'],
+            'size': str(size),
+            'side': order['side'],
+            'liquidity': 'M',
+            'fee': str(fee),
+            'settled': True,
+            'created_at': PaperExecution._timestamp(),
+        })
+
+        logger.info('Paper fill of {} for order {}'.format(size, order['id']))
+
+        if filled_size >= Decimal(order['size']):
+            self._finish_order(order, 'filled')
+
+        return size
+
+    def _get_open_orders(self, product):
+        return [order for order in self.orders.values()
+                if order['status'] == 'open'
+                and order['product_id'] == product]
+
+    def update_book(self, product, order_book):
+        """
+        Match resting orders against a new order book
+
+        Orders the book quotes through are filled in full, and the queue
+        position of every other order is updated from the size of its level.
+
+        :param product: the GDAX product
+        :param order_book: the level 2 order book data
+        :returns: number of orders that were filled
+        """
+
+        self.order_books[product] = order_book
+
+        best_bid, best_ask = self._get_best_prices(product)
+        filled = 0
+
+        for order in self._get_open_orders(product):
+            price = Decimal(order['price'])
+
+            if order['side'] == PaperExecution.BUY:
+                crossed = best_ask is not None and best_ask <= price
+            else:
+                crossed = best_bid is not None and best_bid >= price
+
+            if crossed:
+                self._fill(order, Decimal(order['size']))
+                filled += 1
+
+        queue = self._get_queue(product)
+
+        for side, levels in ((PaperExecution.BUY, order_book['bids']),
+                (PaperExecution.SELL, order_book['asks'])):
+            for price in queue.get_prices(side):
+                queue.update_level(side, price,
+                        PaperExecution._get_level_size(levels, price))
+
+        return filled
+
+    def update_trades(self, product, trades):
+        """
+        Match resting orders against trade prints
+
+        The side of a GDAX trade is the side of the maker order. A trade at an
+        order's price consumes the queue ahead of the order before filling it,
+        and a trade through the order's price fills it up to the trade size.
+        Fills are estimated by :meth:`QueueEstimator.add_trade`.
+
+        :param product: the GDAX product
+        :param trades: trades, oldest first
+        :returns: total size filled
+        """
+
+        queue = self._get_queue(product)
+        filled = Decimal(0)
+
+        for trade in trades:
+            try:
+                side = trade['side']
+                trade_price = Decimal(trade['price'])
+                trade_size = Decimal(trade['size'])
+            except (KeyError, TypeError, InvalidOperation) as error:
+                logger.warning('Invalid trade {}: {}'.format(trade, error))
+                continue
+
+            fills = queue.add_trade(side, trade_price, trade_size)
+
+            for order_id, size in fills.items():
+                filled += self._fill(self.orders[order_id], size)
+
+        return filled
+
+    def get_accounts(self):
+        accounts = []
+
+        for currency, balance in sorted(self.balances.items()):
+            hold = self.holds.get(currency, Decimal(0))
+
+            accounts.append({
+                'id': currency,
+                'currency': currency,
+                'balance': str(balance),
+                'available': str(balance - hold),
+                'hold': str(hold),
+                'profile_id': 'paper',
+            })
+
+        return accounts
+
+    def get_order(self, order_id):
+        try:
+            return dict(self.orders[order_id])
+        except KeyError:
+            return {'message': 'NotFound'}
+
+    def get_orders(self):
+        return [[dict(order) for order in self.orders.values()
+                if order['status'] == 'open']]
+
+    def get_fills(self, order_id='', product_id='', before='', after='',
+            limit=''):
+        fills = [fill for fill in self.fills
+                if (not order_id or fill['order_id'] == order_id)
+                and (not product_id or fill['product_id'] == product_id)
+                and (not before or fill['trade_id'] > int(before))]
+
+        return [list(reversed(fills))]
+
+    def get_fills_page(self, product_id='', before='', limit=''):
+        fills = self.get_fills(product_id=product_id, before=before)[0]
+
+        # Pages after a cursor hold the fills closest to it
+        if limit and before:
+            return fills[-int(limit):]
+
+        return fills[:int(limit)] if limit else fills
+
+    def _place_order(self, side, price, size, product_id, post_only=False):
+        """
+        Place a simulated limit order
+
+        :returns: the order, or a message if the order could not be placed
+        """
+
+        try:
+            price = Decimal(price)
+            size = Decimal(size)
+            base, quote = self._split_product(product_id)
+        except (InvalidOperation, ValueError):
+            return {'message': 'Invalid order'}
+
+        best_bid, best_ask = self._get_best_prices(product_id)
+
+        if side == PaperExecution.BUY:
+            crosses = best_ask is not None and price >= best_ask
+        else:
+            crosses = best_bid is not None and price <= best_bid
+
+        order = {
+            'id': str(uuid.uuid4()),
+            'price': str(price),
+            'size': str(size),
+            'product_id': product_id,
+            'side': side,
+            'type': 'limit',
+            'post_only': post_only,
+            'created_at': PaperExecution._timestamp(),
+            'fill_fees': '0',
+            'filled_size': '0',
+            'executed_value': '0',
+            'status': 'open',
+            'settled': False,
+        }
+
+        currency, amount = self._get_hold(order, size)
+        available = (self.balances.get(currency, Decimal(0))
+                - self.holds.get(currency, Decimal(0)))
+
+        if amount > available:
+            return {'message': 'Insufficient funds'}
+
+        if post_only and crosses:
+            order['status'] = 'rejected'
+            order['reject_reason'] = 'post only'
+            return order
+
+        self.holds[currency] = self.holds.get(currency, Decimal(0)) + amount
+        self.orders[order['id']] = order
+
+        # The order joins the back of the queue at its price level
+        order_book = self.order_books.get(product_id)
+        if order_book is None:
+            level_size = Decimal(0)
+        else:
+            levels = order_book['bids' if side == PaperExecution.BUY
+                    else 'asks']
+            level_size = PaperExecution._get_level_size(levels, price)
+
+        self._get_queue(product_id).add(order['id'], side, price, size,
+                level_size)
+
+        return dict(order)
+
+    def buy(self, **kwargs):
+        return self._place_order(PaperExecution.BUY, kwargs['price'],
+                kwargs['size'], kwargs['product_id'],
+                kwargs.get('post_only', False))
+
+    def sell(self, **kwargs):
+        return self._place_order(PaperExecution.SELL, kwargs['price'],
+                kwargs['size'], kwargs['product_id'],
+                kwargs.get('post_only', False))
+
+    def cancel_order(self, order_id):
+        try:
+            order = self.orders[order_id]
+        except KeyError:
+            return {'message': 'order not found'}
+
+        if order['status'] != 'open':
+            return {'message': 'Order already done'}
+
+        remaining = Decimal(order['size']) - Decimal(order['filled_size'])
+        self._release(order, remaining)
+
+        # GDAX forgets unfilled cancelled orders
+        if Decimal(order['filled_size']) > 0:
+            self._finish_order(order, 'canceled')
+        else:
+            del self.orders[order_id]
+            self._get_queue(order['product_id']).remove(order_id)
+
+        return [order_id]
+
+    def cancel_all(self, data=None, product=''):
+        order_ids = [order_id for order_id, order in self.orders.items()
+                if order['status'] == 'open'
+                and (not product or order['product_id'] == product)]
+
+        for order_id in order_ids:
+            self.cancel_order(order_id)
+
+        return order_ids
@@ -0,0 +1,171 @@
+from collections import Counter
+import logging
+import os
+import sys
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class SlowIterationProfiler:
+    """
+    Sample the stack of slow iterations and save them as flamegraph input
+
+    A background thread samples the stack of every other thread every
+    `interval` seconds while an iteration runs, so work handed to pool
+    workers is profiled with the trading thread. Each stack starts with the
+    name of its thread. Iterations that finish within
+    `threshold` seconds discard their samples, so normal iterations only pay
+    for the sampling thread waking up. Slower iterations are written to
+    `directory` in the collapsed stack format read by `flamegraph.pl` and
+    speedscope, one `frame;frame;frame count` line per distinct stack, and
+    only the newest `max_profiles` files are kept.
+
+    Attributes:
+        directory: Directory profiles are written to
+        threshold: Iteration duration in seconds above which it is saved
+        interval: Seconds between stack samples
+        max_profiles: Number of profiles kept in the directory
+        running: Whether the sampling thread is running
+        profiles_written: Number of profiles written
+    """
+
+    EXTENSION = '.collapsed'
+
+    def __init__(self, directory, threshold=1.0, interval=0.005,
+            max_profiles=20):
+        self.directory = directory
+        self.threshold = threshold
+        self.interval = interval
+        self.max_profiles = max_profiles
+        self.running = False
+        self.profiles_written = 0
+
+        self._thread = None
+        self._active = False
+        self._started_at = None
+        self._samples = Counter()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Start sampling the threads of each iteration
+        """
+
+        if self.running:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def begin(self):
+        """
+        Mark the start of an iteration
+        """
+
+        with self._lock:
+            self._samples.clear()
+            self._active = True
+
+        self._started_at = time.perf_counter()
+
+    def end(self):
+        """
+        Mark the end of an iteration and save its profile if it was slow
+
+        :returns: the path of the saved profile, or `None` if the iteration
+            was not slow
+        """
+
+        duration = time.perf_counter() - self._started_at
+
+        with self._lock:
+            self._active = False
+            samples = self._samples
+            self._samples = Counter()
+
+        if duration < self.threshold:
+            return None
+
+        logger.warning('Slow iteration took {:.3f} seconds'.format(duration))
+
+        try:
+            return self._write(samples, duration)
+        except OSError as error:
+            logger.warning('Profile not saved: {}'.format(error))
+            return None
+
+    def _run(self):
+        while self.running:
+            time.sleep(self.interval)
+
+            if not self._active:
+                continue
+
+            names = {thread.ident: thread.name
+                    for thread in threading.enumerate()}
+            sampler = threading.get_ident()
+            stacks = []
+
+            for ident, frame in sys._current_frames().items():
+                if ident == sampler:
+                    continue
+
+                stack = []
+
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append('{}:{}'.format(
+                            os.path.basename(code.co_filename),
+                            code.co_name))
+                    frame = frame.f_back
+
+                stack.append(names.get(ident, str(ident)))
+
+                # Stacks are collapsed from the outermost frame
+                stacks.append(';'.join(reversed(stack)))
+
+            with self._lock:
+                if self._active:
+                    self._samples.update(stacks)
+
+    def _write(self, samples, duration):
+        """
+        Write a profile and remove the oldest profiles beyond `max_profiles`
+
+        :param samples: sample counts by collapsed stack
+        :param duration: the iteration duration in seconds
+        :returns: the path of the profile
+        """
+
+        # Names sort in the order profiles were written
+        name = '{}-{:06d}-{:.0f}ms{}'.format(time.strftime('%Y%m%dT%H%M%S'),
+                self.profiles_written, duration * 1000,
+                SlowIterationProfiler.EXTENSION)
+        path = os.path.join(self.directory, name)
+
+        with open(path, 'w') as profile:
+            for stack, count in samples.most_common():
+                profile.write('{} {}\n'.format(stack, count))
+
+        self.profiles_written += 1
+
+        profiles = sorted(entry for entry in os.listdir(self.directory)
+                if entry.endswith(SlowIterationProfiler.EXTENSION))
+
+        for old_profile in profiles[:-self.max_profiles]:
+            os.remove(os.path.join(self.directory, old_profile))
+
+        return path
@@ -0,0 +1,255 @@
+class QueueEstimator:
+    """
+    Estimate the queue position of resting limit orders
+
+    Every tracked order has an estimate of the size other orders have queued
+    ahead of it at its price level. The estimate starts at the size of the
+    level when the order is placed and is updated from level 2 size changes
+    and trade prints:
+
+    - Trades at the order's price consume the queue from the front, and any
+      size left when the trade reaches the order fills it.
+    - Trades through the order's price empty the queue and fill the order.
+    - Decreases in the level size that are not explained by trades are
+      cancellations, which are assumed to be spread evenly through the queue,
+      so the size ahead shrinks by its share of the level.
+    - Increases in the level size join the back of the queue.
+
+    Updates only touch the orders at the changed level, so the estimator is
+    cheap enough to update on every book change. Sizes can be floats or
+    Decimals, but the two must not be mixed.
+
+    Attributes:
+        own_in_book: Whether the order book levels include the tracked orders
+        orders: Position of each tracked order by order ID, a dict of `side`,
+            `price`, unfilled `size` and the size of other orders `ahead`
+        levels: Tracked order IDs by (side, price), front of the queue first
+        level_sizes: Size of other orders at each tracked level by
+            (side, price) as of the last update
+    """
+
+    BUY = 'buy'
+    SELL = 'sell'
+
+    def __init__(self, own_in_book=True):
+        self.own_in_book = own_in_book
+
+        self.orders = {}
+        self.levels = {}
+        self.level_sizes = {}
+
+        # Size of other orders traded at each level since its last update
+        self._traded = {}
+
+    def _get_others_size(self, key, level_size):
+        """
+        Get the size of other orders at a level from its size in the book
+
+        :param key: the level as (side, price)
+        :param level_size: the size of the level in the book
+        :returns: the size of orders that are not tracked
+        """
+
+        if not self.own_in_book:
+            return level_size
+
+        own_size = sum(self.orders[order_id]['size']
+                for order_id in self.levels.get(key, []))
+
+        return max(level_size - own_size, 0)
+
+    def add(self, order_id, side, price, size, level_size):
+        """
+        Start tracking an order at the back of the queue of its level
+
+        :param order_id: the order ID
+        :param side: `buy` or `sell`
+        :param price: the order price
+        :param size: the unfilled order size
+        :param level_size: the size of the order's level in the book, which
+            includes the order itself when `own_in_book` is set
+        """
+
+        key = (side, price)
+
+        if self.own_in_book:
+            level_size -= size
+
+        others_size = self._get_others_size(key, level_size)
+
+        self.orders[order_id] = {
+            'side': side,
+            'price': price,
+            'size': size,
+            'ahead': others_size,
+        }
+
+        self.levels.setdefault(key, []).append(order_id)
+        self.level_sizes[key] = others_size
+
+    def remove(self, order_id):
+        """
+        Stop tracking an order
+
+        :param order_id: the order ID
+        """
+
+        position = self.orders.pop(order_id, None)
+
+        if position is None:
+            return
+
+        key = (position['side'], position['price'])
+        order_ids = self.levels[key]
+        order_ids.remove(order_id)
+
+        if not order_ids:
+            del self.levels[key]
+            del self.level_sizes[key]
+            self._traded.pop(key, None)
+
+    def update_size(self, order_id, size):
+        """
+        Update the unfilled size of a tracked order after a fill
+
+        :param order_id: the order ID
+        :param size: the unfilled order size
+        """
+
+        if size <= 0:
+            self.remove(order_id)
+        elif order_id in self.orders:
+            self.orders[order_id]['size'] = size
+
+    def get_position(self, order_id):
+        """
+        Get the estimated size queued ahead of an order
+
+        Includes tracked orders placed earlier at the same level.
+
+        :param order_id: the order ID
+        :returns: the size ahead, or `None` if the order is not tracked
+        """
+
+        try:
+            position = self.orders[order_id]
+        except KeyError:
+            return None
+
+        ahead = position['ahead']
+
+        for queued in self.levels[(position['side'], position['price'])]:
+            if queued == order_id:
+                break
+
+            ahead += self.orders[queued]['size']
+
+        return ahead
+
+    def get_prices(self, side):
+        """
+        Get the prices of the tracked levels on one side of the book
+
+        :param side: `buy` or `sell`
+        :returns: list of prices
+        """
+
+        return [price for level_side, price in self.levels
+                if level_side == side]
+
+    def update_level(self, side, price, size):
+        """
+        Update the queue ahead of orders at a level from its new size
+
+        :param side: `buy` or `sell`
+        :param price: the level price
+        :param size: the new size of the level, zero if it left the book
+        """
+
+        key = (side, price)
+
+        if key not in self.levels:
+            return
+
+        others_size = self._get_others_size(key, size)
+        previous_size = self.level_sizes[key]
+        self.level_sizes[key] = others_size
+
+        cancelled = previous_size - others_size - self._traded.pop(key, 0)
+
+        for order_id in self.levels[key]:
+            position = self.orders[order_id]
+            ahead = position['ahead']
+
+            if cancelled > 0 and previous_size > 0:
+                ahead -= cancelled * ahead / previous_size
+
+            # No more can be ahead than the rest of the level
+            position['ahead'] = max(min(ahead, others_size), 0)
+
+    def add_trade(self, side, price, size):
+        """
+        Update the queue ahead of orders from a trade print
+
+        The side of a GDAX trade is the side of the maker order, so only
+        tracked orders on that side are affected.
+
+        :param side: the maker side of the trade
+        :param price: the trade price
+        :param size: the trade size
+        :returns: dict of estimated size filled by order ID
+        """
+
+        fills = {}
+
+        for key, order_ids in list(self.levels.items()):
+            level_side, level_price = key
+
+            if level_side != side:
+                continue
+
+            if side == QueueEstimator.BUY:
+                traded_through = price < level_price
+            else:
+                traded_through = price > level_price
+
+            if not traded_through and price != level_price:
+                continue
+
+            remaining = size
+            previous_ahead = 0
+            traded_ahead = 0
+
+            # Walk the queue from the front, consuming other orders between
+            # each tracked order before filling it
+            for order_id in list(order_ids):
+                position = self.orders[order_id]
+
+                if traded_through:
+                    position['ahead'] = 0
+                else:
+                    gap = position['ahead'] - previous_ahead
+                    consumed = min(gap, remaining)
+                    remaining -= consumed
+                    traded_ahead += consumed
+
+                    previous_ahead = position['ahead']
+                    position['ahead'] = max(position['ahead'] - traded_ahead,
+                            0)
+
+                filled = min(position['size'], remaining)
+
+                if filled > 0:
+                    remaining -= filled
+                    position['size'] -= filled
+                    fills[order_id] = filled
+
+                if position['size'] <= 0:
+                    self.remove(order_id)
+
+            # Size left over was traded by other orders behind the queue
+            if not traded_through and key in self.level_sizes:
+                self._traded[key] = (self._traded.get(key, 0) + traded_ahead
+                        + remaining)
+
+        return fills
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Detect fetched data that has not changed since the previous iteration
+
+    Order books are compared by their sequence number, which the exchange
+    increments with every change to the book, and accounts by a hash of
+    their content. The GDAX client cannot send conditional requests, so
+    payloads are still downloaded, but the work that follows can be skipped.
+
+    Attributes:
+        sequences: Sequence number of the latest order book by product
+        accounts_hash: Content hash of the latest accounts
+        skipped: Number of times each kind of work was skipped
+    """
+
+    # Kinds of work skipped when data is unchanged
+    BOOKS = 'books'
+    ACCOUNTS = 'accounts'
+    ITERATIONS = 'iterations'
+
+    def __init__(self):
+        self.sequences = {}
+        self.accounts_hash = None
+        self.skipped = {
+            ResponseCache.BOOKS: 0,
+            ResponseCache.ACCOUNTS: 0,
+            ResponseCache.ITERATIONS: 0,
+        }
+
+    def book_changed(self, product, order_book):
+        """
+        Check whether an order book differs from the previous one
+
+        Books without a sequence number are always treated as changed.
+
+        :param product: the GDAX product
+        :param order_book: order book data
+        :returns: `True` if the book changed, `False` otherwise
+        """
+
+        try:
+            sequence = order_book['sequence']
+        except (KeyError, TypeError):
+            sequence = None
+
+        previous = self.sequences.get(product)
+        self.sequences[product] = sequence
+
+        if sequence is None or sequence != previous:
+            return True
+
+        self.skipped[ResponseCache.BOOKS] += 1
+
+        return False
+
+    def accounts_changed(self, accounts):
+        """
+        Check whether accounts differ from the previous ones
+
+        :param accounts: accounts data
+        :returns: `True` if the accounts changed, `False` otherwise
+        """
+
+        content = json.dumps(accounts, sort_keys=True, default=str)
+        accounts_hash = hashlib.sha1(content.encode()).digest()
+
+        if accounts_hash != self.accounts_hash:
+            self.accounts_hash = accounts_hash
+            return True
+
+        self.skipped[ResponseCache.ACCOUNTS] += 1
+
+        return False
+
+    def skip_iteration(self):
+        """
+        Count an iteration whose strategy recompute was skipped
+        """
+
+        self.skipped[ResponseCache.ITERATIONS] += 1
+
+    def get_summary(self):
+        """
+        Get the skipped work counters
+
+        :returns: dict of skipped counts by kind
+        """
+
+        return dict(self.skipped)
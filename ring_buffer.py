@@ -0,0 +1,83 @@
+from array import array
+
+
+class RingBuffer:
+    """
+    Fixed capacity history of numeric values
+
+    Values are stored in a typed :class:`array.array`, so memory use is fixed
+    at `capacity` items regardless of how many values are appended. Once the
+    buffer is full the oldest value is overwritten.
+
+    Indexing and slicing follow list semantics, oldest value first.
+
+    Attributes:
+        capacity: Maximum number of values retained
+        typecode: The :mod:`array` typecode of the stored values
+    """
+
+    def __init__(self, capacity, typecode='d'):
+        if capacity < 1:
+            raise ValueError('RingBuffer capacity must be positive')
+
+        self.capacity = capacity
+        self.typecode = typecode
+
+        self._values = array(typecode, [0]) * capacity
+        self._start = 0
+        self._length = 0
+
+    def append(self, value):
+        """
+        Append a value, overwriting the oldest value when full
+
+        :param value: the value to append
+        """
+
+        end = (self._start + self._length) % self.capacity
+        self._values[end] = value
+
+        if self._length < self.capacity:
+            self._length += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def extend(self, values):
+        for value in values:
+            self.append(value)
+
+    def clear(self):
+        self._start = 0
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield self._values[(self._start + index) % self.capacity]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+
+        if index < 0:
+            index += self._length
+
+        if not 0 <= index < self._length:
+            raise IndexError('RingBuffer index out of range')
+
+        return self._values[(self._start + index) % self.capacity]
+
+    def __repr__(self):
+        return 'RingBuffer({}, capacity={})'.format(list(self), self.capacity)
+
+    @property
+    def nbytes(self):
+        """
+        Number of bytes used by the value storage
+
+        :returns: the storage size in bytes
+        """
+
+        return self._values.itemsize * self.capacity
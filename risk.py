@@ -0,0 +1,211 @@
+from collections import deque
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class RiskEngine:
+    """
+    Check orders against risk limits using only locally held state
+
+    Balances and the mid price are taken from the data the trader already
+    fetches every iteration, and orders placed since then are added as
+    pending exposure, so checking an order costs no request. A limit that is
+    set to `None` is not checked.
+
+    Orders that would exceed the notional, position or order rate limit are
+    rejected. Losing more than the loss limit from the first equity seen, or
+    holding a position beyond the position limit, trips the kill switch:
+    every later order is rejected until :meth:`reset` is called. The switch
+    only latches once :meth:`confirm_kill` reports the open orders were
+    cancelled, until then :meth:`update` keeps reporting it as tripped so a
+    failed cancel is retried.
+
+    Attributes:
+        product: The GDAX product being checked
+        max_position: Maximum base currency position, including open buys
+        max_notional: Maximum quote currency value of a single order
+        max_order_rate: Maximum number of orders placed per `RATE_WINDOW`
+        max_loss: Maximum quote currency equity lost before trading stops
+        killed: Whether the kill switch has tripped and the open orders were
+            cancelled
+        kill_reason: Why the kill switch tripped, set as soon as it trips
+        starting_equity: Quote currency equity when checking started
+        equity: Quote currency equity at the latest mid price
+    """
+
+    # Seconds over which the order rate is measured
+    RATE_WINDOW = 60
+
+    BUY = 'buy'
+    SELL = 'sell'
+
+    def __init__(self, product, max_position=None, max_notional=None,
+            max_order_rate=None, max_loss=None):
+        self.product = product
+        self.max_position = max_position
+        self.max_notional = max_notional
+        self.max_order_rate = max_order_rate
+        self.max_loss = max_loss
+
+        self.killed = False
+        self.kill_reason = None
+        self.starting_equity = None
+        self.equity = None
+
+        self._base, self._quote = product.split('-')
+        self._position = 0.0
+        self._held_notional = 0.0
+        self._pending_position = 0.0
+        self._order_times = deque()
+
+    def update(self, accounts, mid):
+        """
+        Update balances and equity from an iteration's data
+
+        :param accounts: accounts data
+        :param mid: the mid price of the product, or `None` if unknown
+        :returns: `True` if the kill switch tripped and its cancel has not
+            been confirmed, `False` otherwise
+        """
+
+        balances = {}
+
+        for account in accounts:
+            try:
+                balances[account['currency']] = (float(account['balance']),
+                        float(account.get('hold') or 0))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        base_balance, base_hold = balances.get(self._base, (0.0, 0.0))
+        quote_balance, quote_hold = balances.get(self._quote, (0.0, 0.0))
+
+        self._position = base_balance
+        self._held_notional = quote_hold
+
+        # Fetched balances include the orders placed before this iteration
+        self._pending_position = 0.0
+
+        if self.killed:
+            return False
+
+        # Tripped, but the open orders have not been cancelled yet
+        if self.kill_reason is not None:
+            return True
+
+        if (self.max_position is not None
+                and abs(self._position) > self.max_position):
+            self.kill('position {} exceeds {}'.format(self._position,
+                    self.max_position))
+            return True
+
+        if mid is None:
+            return False
+
+        self.equity = quote_balance + base_balance * mid
+
+        if self.starting_equity is None:
+            self.starting_equity = self.equity
+
+        loss = self.starting_equity - self.equity
+
+        if self.max_loss is not None and loss > self.max_loss:
+            self.kill('loss {:.2f} exceeds {}'.format(loss, self.max_loss))
+            return True
+
+        return False
+
+    def check_order(self, side, price, size, now=None):
+        """
+        Check an order against every limit
+
+        :param side: `buy` or `sell`
+        :param price: the order price
+        :param size: the order size
+        :param now: the current time, defaults to `time.time()`
+        :returns: the reason the order is rejected, or `None` if it is allowed
+        """
+
+        if self.kill_reason is not None:
+            return 'kill switch tripped: {}'.format(self.kill_reason)
+
+        price = float(price)
+        size = float(size)
+
+        if self.max_notional is not None and price * size > self.max_notional:
+            return 'notional {:.2f} exceeds {}'.format(price * size,
+                    self.max_notional)
+
+        if self.max_position is not None and side == RiskEngine.BUY:
+            # Held quote funds are open buys that may still fill
+            open_buys = self._held_notional / price if price else 0.0
+            position = (self._position + open_buys + self._pending_position
+                    + size)
+
+            if position > self.max_position:
+                return 'position {} exceeds {}'.format(position,
+                        self.max_position)
+
+        if self.max_order_rate is not None:
+            if now is None:
+                now = time.time()
+
+            while (self._order_times
+                    and self._order_times[0] <= now - self.RATE_WINDOW):
+                self._order_times.popleft()
+
+            if len(self._order_times) >= self.max_order_rate:
+                return 'order rate exceeds {} per {} seconds'.format(
+                        self.max_order_rate, self.RATE_WINDOW)
+
+        return None
+
+    def record_order(self, side, price, size, now=None):
+        """
+        Record a placed order until the next balances include it
+
+        :param side: `buy` or `sell`
+        :param price: the order price
+        :param size: the order size
+        :param now: the current time, defaults to `time.time()`
+        """
+
+        if now is None:
+            now = time.time()
+
+        self._order_times.append(now)
+
+        if side == RiskEngine.BUY:
+            self._pending_position += float(size)
+
+    def kill(self, reason):
+        """
+        Trip the kill switch
+
+        :param reason: why trading is stopped
+        """
+
+        logger.warning('Kill switch tripped for {}: {}'.format(self.product,
+                reason))
+
+        self.kill_reason = reason
+
+    def confirm_kill(self):
+        """
+        Latch the tripped kill switch once the open orders were cancelled
+        """
+
+        if self.kill_reason is not None:
+            self.killed = True
+
+    def reset(self):
+        """
+        Reset the kill switch and measure losses from the next equity
+        """
+
+        self.killed = False
+        self.kill_reason = None
+        self.starting_equity = None
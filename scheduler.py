@@ -0,0 +1,210 @@
+from collections import deque
+import logging
+import time
+
+from utils import rate_limiter
+
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveScheduler:
+    """
+    Choose the interval between iterations from market activity
+
+    Each order book is compared with the previous one. When the mid price or
+    the book imbalance moved by more than its threshold the interval is cut
+    by `SPEEDUP`, otherwise it backs off by `BACKOFF`, so busy markets are
+    sampled quickly and static ones cost few requests. Iterations over
+    several products :meth:`measure` each product's book, then
+    :meth:`schedule` once.
+
+    The interval never drops below what the request budget allows: the data
+    requests of an iteration, plus the order requests recently recorded,
+    must stay within `utilisation` of the rate of the process-wide
+    :data:`utils.rate_limiter`.
+
+    Attributes:
+        min_interval: Shortest interval in seconds
+        max_interval: Longest interval in seconds
+        request_rate: Requests per second allowed by the rate limiter
+        requests_per_iteration: Data requests made by each iteration
+        utilisation: Share of the request rate the trader may use
+        interval: The current interval in seconds
+        activity: Whether the latest book changed by more than a threshold
+        mid: Mid price of the latest book
+        imbalance: Size imbalance of the latest book, between -1 and 1
+    """
+
+    # Accounts, order book and open orders
+    REQUESTS_PER_ITERATION = 3
+
+    # Relative mid price change and absolute imbalance change counted as
+    # market activity
+    MID_THRESHOLD = 0.0005
+    IMBALANCE_THRESHOLD = 0.1
+
+    # Interval multipliers after an active and a quiet iteration
+    SPEEDUP = 0.5
+    BACKOFF = 1.25
+
+    # Seconds over which the order request rate is measured
+    RATE_WINDOW = 60
+
+    def __init__(self, min_interval=1, max_interval=60, request_rate=None,
+            requests_per_iteration=REQUESTS_PER_ITERATION, utilisation=0.8):
+        # Every request of the process waits for the shared rate limiter
+        if request_rate is None:
+            request_rate = rate_limiter.rate
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.request_rate = request_rate
+        self.requests_per_iteration = requests_per_iteration
+        self.utilisation = utilisation
+
+        self.interval = max_interval
+        self.activity = False
+        self.mid = None
+        self.imbalance = None
+
+        # Mid price and imbalance of the previous book by key
+        self._books = {}
+        self._order_times = deque()
+
+    def record_order(self, now=None):
+        """
+        Record an order request sharing the request budget
+
+        :param now: the current time, defaults to `time.time()`
+        """
+
+        if now is None:
+            now = time.time()
+
+        self._order_times.append(now)
+
+    def get_order_rate(self, now=None):
+        """
+        Get the recent rate of order requests
+
+        :param now: the current time, defaults to `time.time()`
+        :returns: order requests per second
+        """
+
+        if now is None:
+            now = time.time()
+
+        while (self._order_times
+                and self._order_times[0] <= now - self.RATE_WINDOW):
+            self._order_times.popleft()
+
+        return len(self._order_times) / self.RATE_WINDOW
+
+    def get_budget_interval(self, now=None):
+        """
+        Get the shortest interval the request budget allows
+
+        :param now: the current time, defaults to `time.time()`
+        :returns: the interval in seconds
+        """
+
+        available = (self.request_rate * self.utilisation
+                - self.get_order_rate(now))
+
+        if available <= 0:
+            return self.max_interval
+
+        return self.requests_per_iteration / available
+
+    def update(self, bid_orders, ask_orders, now=None):
+        """
+        Measure the activity of a new order book and choose the next interval
+
+        :param bid_orders: the bid side of the order book
+        :param ask_orders: the ask side of the order book
+        :param now: the current time, defaults to `time.time()`
+        :returns: the interval in seconds
+        """
+
+        return self.schedule(self.measure(bid_orders, ask_orders), now=now)
+
+    def measure(self, bid_orders, ask_orders, key=None):
+        """
+        Check if an order book moved since the previous book of the same key
+
+        :param bid_orders: the bid side of the order book
+        :param ask_orders: the ask side of the order book
+        :param key: the key of the book, such as its product
+        :returns: `True` if the mid price or the imbalance moved by more than
+            its threshold
+        """
+
+        best_bid = max(bid_orders.prices, default=None)
+        best_ask = min(ask_orders.prices, default=None)
+
+        if best_bid is None or best_ask is None:
+            mid = None
+        else:
+            mid = (best_bid + best_ask) / 2
+
+        bid_size = sum(bid_orders.sizes)
+        ask_size = sum(ask_orders.sizes)
+        total_size = bid_size + ask_size
+
+        imbalance = (bid_size - ask_size) / total_size if total_size else 0.0
+
+        previous_mid, previous_imbalance = self._books.get(key, (None, None))
+
+        active = False
+
+        if mid is not None and previous_mid:
+            active = (abs(mid - previous_mid) / previous_mid
+                    > self.MID_THRESHOLD)
+
+        if previous_imbalance is not None:
+            active = active or (abs(imbalance - previous_imbalance)
+                    > self.IMBALANCE_THRESHOLD)
+
+        self._books[key] = (mid, imbalance)
+        self.mid = mid
+        self.imbalance = imbalance
+
+        return active
+
+    def schedule(self, active, now=None):
+        """
+        Choose the next interval after an iteration
+
+        :param active: whether any order book of the iteration moved
+        :param now: the current time, defaults to `time.time()`
+        :returns: the interval in seconds
+        """
+
+        self.activity = active
+
+        if self.activity:
+            interval = self.interval * self.SPEEDUP
+        else:
+            interval = self.interval * self.BACKOFF
+
+        lowest = max(self.min_interval, self.get_budget_interval(now))
+
+        self.interval = min(max(interval, lowest), self.max_interval)
+
+        return self.interval
+
+    def get_summary(self, now=None):
+        """
+        Get the scheduler metrics
+
+        :param now: the current time, defaults to `time.time()`
+        :returns: dict of metrics
+        """
+
+        return {
+            'interval': self.interval,
+            'activity': self.activity,
+            'order_rate': self.get_order_rate(now),
+            'budget_interval': self.get_budget_interval(now),
+        }
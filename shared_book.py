@@ -0,0 +1,414 @@
+"""
+Share level 2 order books between trader processes on one host
+
+One publisher process maintains each product's book and writes its best
+levels into a memory-mapped file, and traders in other processes read them
+with :class:`SharedBookSource` instead of fetching their own.
+
+Each file holds a fixed layout: a header followed by the bid prices, bid
+sizes, ask prices and ask sizes of `depth` levels as float64 columns. The
+header starts with a seqlock version, which the publisher makes odd before
+writing and even again after, so a reader that sees the same even version
+before and after copying the levels read a consistent book without taking
+a lock.
+"""
+
+from array import array
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+from requests.exceptions import ConnectionError
+
+from book_decoder import BookDecoder, DecodedLevels
+from market_data import MarketDataSource
+from order_book import OrderBookSide
+
+
+logger = logging.getLogger(__name__)
+
+
+# Seqlock version, book sequence, publish time, depth, bid count, ask count
+HEADER = struct.Struct('<QqdIII4x')
+VERSION = struct.Struct('<Q')
+
+# Shared memory is backed by files in tmpfs where available
+DIRECTORY = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+
+DEPTH = BookDecoder.DEPTH
+
+
+def get_path(directory, product):
+    """
+    Get the path of a product's shared book
+
+    :param directory: the directory shared books are kept in
+    :param product: the GDAX product
+    :returns: the file path
+    """
+
+    return os.path.join(directory, 'gdax-book-{}'.format(product))
+
+
+def get_size(depth):
+    """
+    Get the size of a shared book
+
+    :param depth: levels per side
+    :returns: the size in bytes
+    """
+
+    return HEADER.size + 4 * depth * 8
+
+
+class SharedBookWriter:
+    """
+    Write a product's order book into its shared book file
+
+    There must only be one writer per file.
+
+    Attributes:
+        path: The shared book file
+        depth: Levels written per side
+    """
+
+    def __init__(self, path, depth=DEPTH):
+        self.path = path
+        self.depth = depth
+
+        size = get_size(depth)
+        descriptor = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        try:
+            # Files are never shrunk under readers still mapping them
+            if os.fstat(descriptor).st_size < size:
+                os.ftruncate(descriptor, size)
+
+            self._map = mmap.mmap(descriptor, size)
+        finally:
+            os.close(descriptor)
+
+        self._columns = memoryview(self._map)[HEADER.size:].cast('d')
+
+        # Continue the version of a previous writer, so readers still mapping
+        # the file never see it go backwards
+        version, = VERSION.unpack_from(self._map)
+        self._version = version + (version & 1)
+
+    def write(self, order_book, timestamp=None):
+        """
+        Write an order book, keeping its best `depth` levels per side
+
+        :param order_book: order book data with levels best first
+        :param timestamp: the publish time, defaults to now
+        """
+
+        if timestamp is None:
+            timestamp = time.time()
+
+        bids = OrderBookSide(order_book['bids'])
+        asks = OrderBookSide(order_book['asks'])
+
+        bid_count = min(len(bids), self.depth)
+        ask_count = min(len(asks), self.depth)
+
+        try:
+            sequence = int(order_book.get('sequence') or 0)
+        except (TypeError, ValueError):
+            sequence = 0
+
+        depth = self.depth
+        columns = self._columns
+
+        self._version += 1
+        VERSION.pack_into(self._map, 0, self._version)
+
+        columns[:bid_count] = bids.prices[:bid_count]
+        columns[depth:depth + bid_count] = bids.sizes[:bid_count]
+        columns[2 * depth:2 * depth + ask_count] = asks.prices[:ask_count]
+        columns[3 * depth:3 * depth + ask_count] = asks.sizes[:ask_count]
+
+        HEADER.pack_into(self._map, 0, self._version, sequence, timestamp,
+                depth, bid_count, ask_count)
+
+        self._version += 1
+        VERSION.pack_into(self._map, 0, self._version)
+
+    def close(self):
+        self._columns.release()
+        self._map.close()
+
+
+class SharedBookReader:
+    """
+    Read a product's order book from its shared book file
+
+    Attributes:
+        path: The shared book file
+    """
+
+    # Attempts to read a consistent book before giving up
+    MAX_ATTEMPTS = 1000
+
+    def __init__(self, path):
+        """
+        :raises ConnectionError: the file has not been published
+        """
+
+        self.path = path
+
+        try:
+            with open(path, 'rb') as shared_file:
+                self._map = mmap.mmap(shared_file.fileno(), 0,
+                        access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as error:
+            raise ConnectionError('Shared book unavailable: {}'.format(error))
+
+        if len(self._map) < HEADER.size:
+            self._map.close()
+            raise ConnectionError('Shared book unavailable: {}'.format(path))
+
+        self._view = memoryview(self._map)
+
+    def read(self):
+        """
+        Copy the latest book out of the file
+
+        :returns: tuple(sequence, timestamp, bid_prices, bid_sizes,
+            ask_prices, ask_sizes) with :class:`array.array` columns, or
+            `None` if no book has been published
+        :raises ConnectionError: no consistent book could be read while the
+            publisher was writing
+        """
+
+        for _ in range(self.MAX_ATTEMPTS):
+            version, = VERSION.unpack_from(self._map)
+
+            if version == 0:
+                return None
+
+            # Odd versions are being written
+            if version & 1:
+                time.sleep(0)
+                continue
+
+            (_, sequence, timestamp, depth, bid_count,
+                    ask_count) = HEADER.unpack_from(self._map)
+
+            resized = len(self._map) < get_size(depth)
+
+            if not resized:
+                columns = [
+                    self._copy(0, bid_count),
+                    self._copy(depth, bid_count),
+                    self._copy(2 * depth, ask_count),
+                    self._copy(3 * depth, ask_count),
+                ]
+
+            # A changed version means the header or levels may be torn
+            if VERSION.unpack_from(self._map)[0] != version:
+                continue
+
+            if resized:
+                raise ConnectionError('Shared book {} was resized'.format(
+                        self.path))
+
+            return (sequence, timestamp, *columns)
+
+        raise ConnectionError('Shared book {} is busy'.format(self.path))
+
+    def _copy(self, offset, count):
+        start = HEADER.size + offset * 8
+
+        column = array('d')
+        column.frombytes(self._view[start:start + count * 8])
+
+        return column
+
+    def close(self):
+        self._view.release()
+        self._map.close()
+
+
+class SharedBookSource(MarketDataSource):
+    """
+    Read level 2 order books published by a
+    :class:`SharedBookPublisher`
+
+    Reading a book copies its levels out of shared memory without a request
+    or any decoding. Trades are not shared, so they are fetched from
+    `trade_source` when one is given.
+
+    Attributes:
+        directory: The directory shared books are kept in
+        max_age: Seconds after which a book is stale, as if its publisher
+            stopped, or `None` to accept any age
+        trade_source: The :class:`MarketDataSource` trades are fetched from
+    """
+
+    MAX_AGE = 60
+
+    def __init__(self, directory=DIRECTORY, max_age=MAX_AGE,
+            trade_source=None):
+        super().__init__()
+
+        self.directory = directory
+        self.max_age = max_age
+        self.trade_source = trade_source
+
+        self._readers = {}
+
+    def stop(self):
+        for reader in self._readers.values():
+            reader.close()
+
+        self._readers = {}
+
+    def get_order_book(self, product, level=2):
+        """
+        Get the latest published order book of a product
+
+        Levels have no order count, since only prices and sizes are shared.
+
+        :param product: the GDAX product
+        :param level: must be 2, only level 2 books are shared
+        :returns: order book data
+        :raises ValueError: a level other than 2 was requested
+        :raises ConnectionError: no current book has been published
+        """
+
+        if level != 2:
+            raise ValueError('Shared books are level 2 only')
+
+        reader = self._readers.get(product)
+
+        if reader is None:
+            reader = SharedBookReader(get_path(self.directory, product))
+            self._readers[product] = reader
+
+        try:
+            book = reader.read()
+        except ConnectionError:
+            # A resized file is mapped again on the next attempt
+            reader.close()
+            del self._readers[product]
+            raise
+
+        if book is None:
+            raise ConnectionError('No {} order book published yet'.format(
+                    product))
+
+        (sequence, timestamp, bid_prices, bid_sizes, ask_prices,
+                ask_sizes) = book
+
+        age = time.time() - timestamp
+
+        if self.max_age is not None and age > self.max_age:
+            raise ConnectionError('Shared {} order book is {:.0f} seconds '
+                    'old'.format(product, age))
+
+        return {
+            'sequence': sequence,
+            'bids': self._get_levels(bid_prices, bid_sizes),
+            'asks': self._get_levels(ask_prices, ask_sizes),
+        }
+
+    def _get_levels(self, prices, sizes):
+        # The shortest repr of a float is the decimal it was parsed from
+        return DecodedLevels([[repr(price), repr(size), None]
+                for price, size in zip(prices, sizes)], prices, sizes)
+
+    def get_trades(self, product):
+        if self.trade_source is None:
+            return []
+
+        return self.trade_source.get_trades(product)
+
+
+class SharedBookPublisher:
+    """
+    Maintain order books from a source and publish them to shared books
+
+    Attributes:
+        source: The :class:`MarketDataSource` books are read from
+        products: The products published
+        directory: The directory shared books are written to
+        depth: Levels published per side
+        interval: Seconds between publishing every product
+        running: Whether the publisher is running
+    """
+
+    INTERVAL = 0.25
+
+    def __init__(self, source, products, directory=DIRECTORY, depth=DEPTH,
+            interval=INTERVAL):
+        self.source = source
+        self.products = list(products)
+        self.directory = directory
+        self.depth = depth
+        self.interval = interval
+        self.running = False
+
+        self._writers = {}
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+
+        for product in self.products:
+            self._writers[product] = SharedBookWriter(
+                    get_path(self.directory, product), depth=self.depth)
+
+        self.source.start()
+
+    def stop(self):
+        self.running = False
+
+        self.source.stop()
+
+        for writer in self._writers.values():
+            writer.close()
+
+        self._writers = {}
+
+    def publish(self):
+        """
+        Publish the latest book of every product
+
+        :returns: number of books published
+        """
+
+        published = 0
+
+        for product, writer in self._writers.items():
+            try:
+                order_book = self.source.get_order_book(product)
+            except ConnectionError as error:
+                logger.warning(error)
+                continue
+
+            writer.write(order_book)
+            published += 1
+
+        return published
+
+    def run(self):
+        """
+        Publish books every `interval` seconds until stopped
+        """
+
+        self.running = True
+
+        logger.info('Publishing {} order books to {}...'.format(
+                ', '.join(self.products), self.directory))
+
+        self.start()
+
+        try:
+            while self.running:
+                self.publish()
+                time.sleep(self.interval)
+        finally:
+            self.stop()
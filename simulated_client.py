@@ -0,0 +1,427 @@
+from collections import deque
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_FLOOR
+import json
+import logging
+import random
+import time
+import uuid
+
+from json.decoder import JSONDecodeError
+from requests.exceptions import ConnectionError
+
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatedClient:
+    """
+    Deterministic stand-in for :class:`gdax.AuthenticatedClient`
+
+    Generates a synthetic order book that follows a seeded random walk and
+    matches resting post-only orders against it, so the real
+    :meth:`GDAXTrader.run` loop can be driven at high cadence without touching
+    the exchange. Latency, connection errors and malformed responses can be
+    injected to exercise the retry and skip paths.
+
+    Attributes:
+        depth: Number of price levels generated on each side of the book
+        volatility: Standard deviation of the mid price random walk per book
+        tick_size: Price increment between generated levels
+        latency: Seconds slept before every request
+        error_rate: Probability of a request raising `ConnectionError`
+        decode_error_rate: Probability of a request raising `JSONDecodeError`
+        mid_price: The current mid price of the synthetic book
+        sequence: The sequence number of the current synthetic book
+        balances: Simulated account balances by currency
+        orders: Simulated orders by order ID
+        fills: Simulated fills in the order they occurred
+        trades: Synthetic market trades in the order they occurred
+        request_count: Number of requests served
+    """
+
+    DEFAULT_BALANCES = {
+        'USD': '10000.00',
+        'BTC': '1.00000000',
+    }
+
+    # Number of completed orders and fills kept for lookups
+    MAX_HISTORY = 1000
+
+    # Number of market trades returned by the trades endpoint
+    MAX_TRADES = 100
+
+    # Maximum number of market trades generated per book update
+    MAX_TRADES_PER_STEP = 5
+
+    def __init__(self, seed=0, depth=50, volatility=0.0005, mid_price=10000,
+            tick_size='0.01', latency=0, error_rate=0, decode_error_rate=0,
+            balances=None):
+        self.depth = depth
+        self.volatility = volatility
+        self.tick_size = Decimal(tick_size)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.decode_error_rate = decode_error_rate
+
+        self.mid_price = Decimal(mid_price)
+        self.sequence = 0
+
+        if balances is None:
+            balances = SimulatedClient.DEFAULT_BALANCES
+
+        self.balances = {currency: Decimal(balance)
+                for currency, balance in balances.items()}
+
+        self.orders = {}
+        self.fills = deque(maxlen=SimulatedClient.MAX_HISTORY)
+        self.trades = deque(maxlen=SimulatedClient.MAX_TRADES)
+        self.request_count = 0
+
+        self._trade_id = 0
+        self._done_order_ids = deque()
+
+        self._random = random.Random(seed)
+
+        # Trades are generated separately so books do not depend on them
+        self._trade_random = random.Random(seed + 1)
+        self._market_trade_id = 0
+
+    def _request(self):
+        """
+        Account for a request and inject latency and errors
+
+        :raises ConnectionError: randomly, based on `error_rate`
+        :raises JSONDecodeError: randomly, based on `decode_error_rate`
+        """
+
+        self.request_count += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self._random.random() < self.error_rate:
+            raise ConnectionError('Simulated connection error')
+
+        if self._random.random() < self.decode_error_rate:
+            raise JSONDecodeError('Simulated decode error', '', 0)
+
+    @staticmethod
+    def _timestamp():
+        """
+        Get the current time in the GDAX timestamp format
+
+        :returns: the timestamp string
+        """
+
+        return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+    def _quantize(self, price):
+        return price.quantize(self.tick_size, rounding=ROUND_FLOOR)
+
+    def _step(self):
+        """
+        Advance the synthetic market by one book update
+
+        Moves the mid price and fills any resting orders the new book crosses.
+        """
+
+        change = Decimal(repr(self._random.gauss(0, self.volatility)))
+        self.mid_price = self._quantize(self.mid_price * (1 + change))
+        self.sequence += 1
+
+        best_bid, best_ask = self._best_prices()
+
+        for _ in range(self._trade_random.randint(0,
+                SimulatedClient.MAX_TRADES_PER_STEP)):
+            # The side of a trade is the side of the maker order
+            side = self._trade_random.choice(['buy', 'sell'])
+            size = Decimal(self._trade_random.randint(1, 100)) / 100
+
+            self._market_trade_id += 1
+            self.trades.append({
+                'time': SimulatedClient._timestamp(),
+                'trade_id': self._market_trade_id,
+                'price': str(best_bid if side == 'buy' else best_ask),
+                'size': str(size),
+                'side': side,
+            })
+
+        for order in list(self.orders.values()):
+            if order['status'] != 'open':
+                continue
+
+            price = Decimal(order['price'])
+
+            if order['side'] == 'buy' and best_ask <= price:
+                self._fill_order(order)
+            elif order['side'] == 'sell' and best_bid >= price:
+                self._fill_order(order)
+
+    def _best_prices(self):
+        best_bid = self._quantize(self.mid_price - self.tick_size)
+        best_ask = best_bid + 2 * self.tick_size
+
+        return best_bid, best_ask
+
+    def _generate_side(self, best_price, direction):
+        levels = []
+
+        for level in range(self.depth):
+            price = best_price + direction * level * self.tick_size
+            size = Decimal(self._random.randint(1, 1000)) / 100
+            num_orders = self._random.randint(1, 20)
+
+            levels.append([str(price), str(size), num_orders])
+
+        return levels
+
+    def _split_levels(self, levels):
+        """
+        Split generated levels into level 3 orders
+
+        :param levels: level 2 levels of price, size and number of orders
+        :returns: level 3 levels of price, size and order ID
+        """
+
+        orders = []
+
+        for price, size, num_orders in levels:
+            order_size = Decimal(size) / num_orders
+
+            for _ in range(num_orders):
+                order_id = str(uuid.UUID(int=self._random.getrandbits(128)))
+                orders.append([price, str(order_size), order_id])
+
+        return orders
+
+    def _split_product(self, product):
+        base, quote = product.split('-')
+        return base, quote
+
+    def _fill_order(self, order):
+        """
+        Fill the remainder of an open order and settle the balances
+
+        :param order: the simulated order
+        """
+
+        price = Decimal(order['price'])
+        size = Decimal(order['size']) - Decimal(order['filled_size'])
+        base, quote = self._split_product(order['product_id'])
+
+        if order['side'] == 'buy':
+            self.balances[base] = self.balances.get(base, Decimal(0)) + size
+        else:
+            self.balances[quote] = (self.balances.get(quote, Decimal(0))
+                    + price * size)
+
+        order['filled_size'] = order['size']
+        order['status'] = 'done'
+        order['done_reason'] = 'filled'
+        order['settled'] = True
+
+        # Forget the oldest completed orders so soak runs stay bounded
+        self._done_order_ids.append(order['id'])
+        while len(self._done_order_ids) > SimulatedClient.MAX_HISTORY:
+            self.orders.pop(self._done_order_ids.popleft(), None)
+
+        self._trade_id += 1
+
+        self.fills.append({
+            'trade_id': self._trade_id,
+            'order_id': order['id'],
+            'product_id': order['product_id'],
+            'price': order['price'],
+            'size': str(size),
+            'side': order['side'],
+            'liquidity': 'M',
+            'fee': '0.0000000000000000',
+            'settled': True,
+            'created_at': SimulatedClient._timestamp(),
+        })
+
+    def _place_order(self, side, price, size, product_id, post_only=False):
+        price = Decimal(price)
+        size = Decimal(size)
+        base, quote = self._split_product(product_id)
+        best_bid, best_ask = self._best_prices()
+
+        if side == 'buy':
+            currency, amount = quote, price * size
+            crosses = price >= best_ask
+        else:
+            currency, amount = base, size
+            crosses = price <= best_bid
+
+        if self.balances.get(currency, Decimal(0)) < amount:
+            return {'message': 'Insufficient funds'}
+
+        order = {
+            'id': str(uuid.UUID(int=self._random.getrandbits(128))),
+            'price': str(price),
+            'size': str(size),
+            'product_id': product_id,
+            'side': side,
+            'type': 'limit',
+            'post_only': post_only,
+            'created_at': SimulatedClient._timestamp(),
+            'filled_size': '0.00000000',
+            'status': 'open',
+            'settled': False,
+        }
+
+        if post_only and crosses:
+            order['status'] = 'rejected'
+            order['reject_reason'] = 'post only'
+            return order
+
+        self.balances[currency] -= amount
+        self.orders[order['id']] = order
+
+        return dict(order)
+
+    def get_accounts(self):
+        self._request()
+
+        return [{
+            'id': currency,
+            'currency': currency,
+            'balance': str(balance),
+            'available': str(balance),
+            'hold': '0',
+            'profile_id': 'simulated',
+        } for currency, balance in sorted(self.balances.items())]
+
+    def get_product_order_book(self, product_id, level=1):
+        self._request()
+        self._step()
+
+        best_bid, best_ask = self._best_prices()
+        depth = 1 if level == 1 else self.depth
+
+        bids = self._generate_side(best_bid, -1)[:depth]
+        asks = self._generate_side(best_ask, 1)[:depth]
+
+        if level == 3:
+            bids = self._split_levels(bids)
+            asks = self._split_levels(asks)
+
+        return {
+            'sequence': self.sequence,
+            'bids': bids,
+            'asks': asks,
+        }
+
+    def get_product_order_book_content(self, product_id, level=1):
+        """
+        Get an order book as an undecoded response body
+
+        :returns: the order book JSON as bytes
+        """
+
+        return json.dumps(self.get_product_order_book(product_id,
+                level=level)).encode()
+
+    def get_time(self):
+        self._request()
+
+        return {
+            'iso': SimulatedClient._timestamp(),
+            'epoch': time.time(),
+        }
+
+    def get_product_trades(self, product_id):
+        self._request()
+
+        return list(reversed(self.trades))
+
+    def get_order(self, order_id):
+        self._request()
+
+        try:
+            return dict(self.orders[order_id])
+        except KeyError:
+            return {'message': 'NotFound'}
+
+    def get_orders(self):
+        self._request()
+
+        return [[dict(order) for order in self.orders.values()
+                if order['status'] == 'open']]
+
+    def get_fills(self, order_id='', product_id='', before='', after='',
+            limit=''):
+        self._request()
+
+        fills = [fill for fill in self.fills
+                if (not order_id or fill['order_id'] == order_id)
+                and (not product_id or fill['product_id'] == product_id)]
+
+        return [list(reversed(fills))]
+
+    def get_fills_page(self, product_id='', before='', limit=''):
+        self._request()
+
+        fills = [fill for fill in self.fills
+                if (not product_id or fill['product_id'] == product_id)
+                and (not before or fill['trade_id'] > int(before))]
+
+        # Pages after a cursor hold the fills closest to it
+        if limit:
+            fills = fills[:int(limit)] if before else fills[-int(limit):]
+
+        return list(reversed(fills))
+
+    def buy(self, **kwargs):
+        self._request()
+
+        return self._place_order('buy', kwargs['price'], kwargs['size'],
+                kwargs['product_id'], kwargs.get('post_only', False))
+
+    def sell(self, **kwargs):
+        self._request()
+
+        return self._place_order('sell', kwargs['price'], kwargs['size'],
+                kwargs['product_id'], kwargs.get('post_only', False))
+
+    def cancel_order(self, order_id):
+        self._request()
+
+        return self._cancel_order(order_id)
+
+    def cancel_all(self, data=None, product=''):
+        self._request()
+
+        order_ids = [order_id for order_id, order in self.orders.items()
+                if order['status'] == 'open'
+                and (not product or order['product_id'] == product)]
+
+        for order_id in order_ids:
+            self._cancel_order(order_id)
+
+        return order_ids
+
+    def _cancel_order(self, order_id):
+        try:
+            order = self.orders[order_id]
+        except KeyError:
+            return {'message': 'order not found'}
+
+        if order['status'] != 'open':
+            return {'message': 'Order already done'}
+
+        # Release the held funds and forget the order like GDAX does for
+        # unfilled cancelled orders
+        price = Decimal(order['price'])
+        size = Decimal(order['size'])
+        base, quote = self._split_product(order['product_id'])
+
+        if order['side'] == 'buy':
+            self.balances[quote] += price * size
+        else:
+            self.balances[base] += size
+
+        del self.orders[order_id]
+
+        return [order_id]
@@ -0,0 +1,373 @@
+import logging
+import time
+
+from json.decoder import JSONDecodeError
+from requests.exceptions import ConnectionError
+
+
+logger = logging.getLogger(__name__)
+
+
+class Iteration:
+    """
+    Data of one trader iteration, passed through the trader's stages
+
+    Attributes:
+        accounts: Accounts data
+        order_book: Order book data, the level 2 aggregate once the book is
+            processed
+        trades: Recent trades of the product, if polled
+        book_changed: Whether the order book changed since the previous
+            iteration
+        accounts_changed: Whether the accounts changed since the previous
+            iteration
+        bid_orders: The parsed bid side, once strategies are updated
+        ask_orders: The parsed ask side, once strategies are updated
+    """
+
+    def __init__(self, accounts, order_book, trades=None):
+        self.accounts = accounts
+        self.order_book = order_book
+        self.trades = trades
+        self.book_changed = True
+        self.accounts_changed = True
+        self.bid_orders = None
+        self.ask_orders = None
+
+
+class Stage:
+    """
+    Base class for the steps a trader runs around every strategy update
+
+    Stages are run in the order they are added to a :class:`GDAXTrader`,
+    and every step does nothing unless it is overridden.
+    """
+
+    def start(self, trader, ready):
+        """
+        Prepare before the first iteration
+
+        :param trader: the :class:`GDAXTrader` running the stage
+        :param ready: list of strategies whose state is already prepared,
+            extended with the strategies the stage prepares
+        """
+
+        pass
+
+    def receive(self, trader, iteration):
+        """
+        Inspect fetched data before the order book is processed
+
+        :param trader: the :class:`GDAXTrader` running the stage
+        :param iteration: the :class:`Iteration` being run
+        """
+
+        pass
+
+    def process_book(self, trader, iteration):
+        """
+        Handle the level 2 order book before strategies are updated
+
+        :param trader: the :class:`GDAXTrader` running the stage
+        :param iteration: the :class:`Iteration` being run
+        """
+
+        pass
+
+    def finish_iteration(self, trader, iteration):
+        """
+        Handle an iteration after strategies are updated
+
+        :param trader: the :class:`GDAXTrader` running the stage
+        :param iteration: the :class:`Iteration` being run
+        """
+
+        pass
+
+    def stop(self, trader):
+        """
+        Clean up after the last iteration
+
+        :param trader: the :class:`GDAXTrader` running the stage
+        """
+
+        pass
+
+
+class ResponseCacheStage(Stage):
+    """
+    Skip work for data that has not changed since the previous iteration
+
+    Unchanged order books are not parsed again, and when neither the
+    accounts nor the order book changed strategies are called with
+    :meth:`Strategy.next_unchanged` instead of recomputing.
+
+    Attributes:
+        response_cache: An instance of :class:`ResponseCache`
+    """
+
+    def __init__(self, response_cache):
+        self.response_cache = response_cache
+
+    def receive(self, trader, iteration):
+        iteration.accounts_changed = self.response_cache.accounts_changed(
+                iteration.accounts)
+        iteration.book_changed = self.response_cache.book_changed(
+                trader.product, iteration.order_book)
+
+    def finish_iteration(self, trader, iteration):
+        if not iteration.book_changed and not iteration.accounts_changed:
+            self.response_cache.skip_iteration()
+
+
+class CheckpointStage(Stage):
+    """
+    Persist strategy state for restoring after a restart
+
+    On start the latest checkpoint is restored, and open orders from it are
+    reconciled with the exchange using a single request for all open
+    orders. The state is then submitted after every iteration.
+
+    Attributes:
+        checkpointer: An instance of :class:`Checkpointer`
+    """
+
+    # Maximum age in seconds of a checkpoint that is restored on startup
+    MAX_AGE = 24 * 60 * 60
+
+    def __init__(self, checkpointer):
+        self.checkpointer = checkpointer
+
+    def start(self, trader, ready):
+        ready.extend(self._restore(trader))
+
+        self.checkpointer.start()
+
+    def finish_iteration(self, trader, iteration):
+        self.checkpointer.submit(self._get_state(trader))
+
+    def stop(self, trader):
+        self.checkpointer.submit(self._get_state(trader))
+        self.checkpointer.stop()
+
+    def _get_state(self, trader):
+        """
+        Get the state of every strategy for checkpointing
+
+        :param trader: the :class:`GDAXTrader` running the stage
+        :returns: dict of strategy state by strategy name
+        """
+
+        return {
+            'product': trader.product,
+            'strategies': {strategy.name: strategy.get_state()
+                    for strategy in trader.strategies},
+        }
+
+    def _restore(self, trader):
+        """
+        Restore strategy state from the latest checkpoint
+
+        :param trader: the :class:`GDAXTrader` running the stage
+        :returns: list of restored strategies
+        """
+
+        checkpoint = self.checkpointer.load()
+
+        if checkpoint is None:
+            return []
+
+        timestamp, state = checkpoint
+
+        if time.time() - timestamp > self.MAX_AGE:
+            logger.info('Checkpoint is too old to restore')
+            return []
+
+        if state.get('product') != trader.product:
+            logger.info('Checkpoint is for a different product')
+            return []
+
+        restored = []
+        strategy_states = state.get('strategies', {})
+
+        for strategy in trader.strategies:
+            try:
+                strategy_state = strategy_states[strategy.name]
+            except KeyError:
+                continue
+
+            strategy.set_state(strategy_state)
+            restored.append(strategy)
+
+        logger.info('Restored {} strategies from checkpoint'.format(
+                len(restored)))
+
+        if restored:
+            try:
+                open_orders = trader.get_orders()
+            except (ConnectionError, JSONDecodeError) as error:
+                logger.warning(error)
+            else:
+                for strategy in restored:
+                    strategy.reconcile_orders(open_orders)
+
+        return restored
+
+
+class BookArchiveStage(Stage):
+    """
+    Record order books to an archive and warm up strategies from it
+
+    Strategies already prepared by an earlier stage, such as a
+    :class:`CheckpointStage`, are not warmed up.
+
+    Attributes:
+        book_archive: An instance of :class:`BookArchive`
+    """
+
+    # Maximum number and age in seconds of archived order books used to warm
+    # up strategies on startup
+    WARM_UP_BOOKS = 100
+    WARM_UP_WINDOW = 60 * 60
+
+    def __init__(self, book_archive):
+        self.book_archive = book_archive
+
+    def start(self, trader, ready):
+        strategies = [strategy for strategy in trader.strategies
+                if strategy not in ready]
+
+        self._warm_up(trader, strategies)
+
+        ready.extend(strategies)
+
+    def process_book(self, trader, iteration):
+        if not iteration.book_changed:
+            return
+
+        try:
+            self.book_archive.append(trader.product, iteration.order_book)
+        except (OSError, TypeError, KeyError) as error:
+            logger.warning(error)
+
+    def _warm_up(self, trader, strategies):
+        """
+        Warm up strategies with recently archived order books
+
+        :param trader: the :class:`GDAXTrader` running the stage
+        :param strategies: the strategies to warm up
+        :returns: number of order books the strategies were warmed up with
+        """
+
+        if not strategies:
+            return 0
+
+        since = time.time() - self.WARM_UP_WINDOW
+        records = self.book_archive.read(trader.product, since=since,
+                limit=self.WARM_UP_BOOKS)
+
+        order_books = []
+
+        for timestamp, order_book in records:
+            try:
+                order_books.append(trader._parse_order_book(order_book))
+            except KeyError as error:
+                logger.warning(error)
+
+        logger.info('Warming up with {} archived order books'.format(
+                len(order_books)))
+
+        for strategy in strategies:
+            strategy.warm_up(order_books)
+
+        return len(order_books)
+
+
+class StatsStage(Stage):
+    """
+    Record book statistics and each strategy's statistics every iteration
+
+    Attributes:
+        stats_store: An instance of :class:`StatsStore`
+    """
+
+    # Distance from the mid price, as a fraction of it, within which book
+    # depth statistics are measured
+    DEPTH_BAND = 0.001
+
+    def __init__(self, stats_store):
+        self.stats_store = stats_store
+
+    def finish_iteration(self, trader, iteration):
+        self._record_stats(trader, iteration.bid_orders,
+                iteration.ask_orders)
+
+    def stop(self, trader):
+        try:
+            self.stats_store.close()
+        except OSError as error:
+            logger.warning(error)
+
+    def _record_stats(self, trader, bid_orders, ask_orders, timestamp=None):
+        """
+        Record the book statistics and each strategy's statistics
+
+        :param trader: the :class:`GDAXTrader` running the stage
+        :param bid_orders: the parsed bid side
+        :param ask_orders: the parsed ask side
+        :param timestamp: the row time, defaults to now
+        """
+
+        try:
+            stats = self._get_book_stats(bid_orders, ask_orders)
+        except (ArithmeticError, ValueError) as error:
+            logger.warning(error)
+            stats = {}
+
+        if timestamp is None:
+            timestamp = time.time()
+
+        for strategy in trader.strategies:
+            try:
+                self.stats_store.append(trader.product, strategy.name,
+                        dict(stats, **strategy.get_stats()),
+                        timestamp=timestamp)
+            except OSError as error:
+                logger.warning(error)
+
+    def _get_book_stats(self, bid_orders, ask_orders):
+        """
+        Get the best prices, spread and depth of an order book
+
+        Depth is the size within `DEPTH_BAND` of the mid price on each side.
+
+        :param bid_orders: the parsed bid side
+        :param ask_orders: the parsed ask side
+        :returns: dict of statistics by column
+        :raises ValueError: a side is empty
+        :raises ZeroDivisionError: the best levels have no size
+        """
+
+        # Imported on first use since the kernels import NumPy
+        from book_kernels import kernels
+
+        if not len(bid_orders) or not len(ask_orders):
+            raise ValueError('Order book side is empty')
+
+        best_bid = max(bid_orders.prices)
+        best_ask = min(ask_orders.prices)
+        mid = (best_bid + best_ask) / 2
+        band = mid * self.DEPTH_BAND
+
+        return {
+            'best_bid': best_bid,
+            'best_ask': best_ask,
+            'spread': best_ask - best_bid,
+            'mid': mid,
+            'microprice': kernels.microprice(bid_orders.prices,
+                    bid_orders.sizes, ask_orders.prices, ask_orders.sizes),
+            'bid_depth': kernels.depth_at_price(bid_orders.prices,
+                    bid_orders.sizes, mid - band, True),
+            'ask_depth': kernels.depth_at_price(ask_orders.prices,
+                    ask_orders.sizes, mid + band, False),
+        }
@@ -0,0 +1,263 @@
+from array import array
+from datetime import datetime, timezone
+import logging
+import math
+import os
+import sys
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class StatsStore:
+    """
+    Record per-iteration signal and book statistics to local columnar files
+
+    Each strategy of a product is a series of rows with a fixed set of
+    numeric columns. Rows are buffered and written in chunks of
+    `chunk_size`, appending each column as raw little-endian float64 values
+    to its own file per UTC day,
+    `<directory>/<product>/<name>/<YYYY-MM-DD>/<column>.f8`. A date range of a
+    series is read back with :meth:`query` as NumPy arrays without parsing.
+
+    Missing values are stored as NaN, and signals as 1 for buy, -1 for sell
+    and 0 for none. A chunk interrupted while being written leaves some
+    columns longer than others, so the columns of a day are cut to the rows
+    every column has before the store first appends to them.
+
+    Attributes:
+        directory: The root directory of the store
+        columns: The columns of every row, starting with `time`
+        chunk_size: Number of rows buffered before they are written
+    """
+
+    EXTENSION = '.f8'
+
+    TIME = 'time'
+
+    COLUMNS = (TIME, 'obi', 'buy_threshold', 'sell_threshold', 'signal',
+            'best_bid', 'best_ask', 'spread', 'mid', 'microprice',
+            'bid_depth', 'ask_depth')
+
+    CHUNK_SIZE = 10
+
+    def __init__(self, directory, columns=COLUMNS, chunk_size=CHUNK_SIZE):
+        if columns[0] != StatsStore.TIME:
+            raise ValueError('The first column must be {}'.format(
+                    StatsStore.TIME))
+
+        self.directory = directory
+        self.columns = tuple(columns)
+        self.chunk_size = chunk_size
+
+        # Buffered rows by (product, name, day) as a column of values each
+        self._chunks = {}
+
+        # Day directories whose columns have been aligned
+        self._opened = set()
+
+    def _get_day(self, timestamp):
+        return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+                '%Y-%m-%d')
+
+    def _get_series_directory(self, product, name):
+        return os.path.join(self.directory, product, name)
+
+    def append(self, product, name, values, timestamp=None):
+        """
+        Record a row of statistics
+
+        :param product: the GDAX product
+        :param name: the name of the series, such as the strategy name
+        :param values: dict of values by column, other columns are NaN and
+            unknown columns are ignored
+        :param timestamp: the row time in seconds since the epoch
+        """
+
+        if timestamp is None:
+            timestamp = time.time()
+
+        key = (product, name, self._get_day(timestamp))
+
+        # A new day starts a new chunk
+        for other in [other for other in self._chunks
+                if other[:2] == key[:2] and other != key]:
+            self._write(other)
+
+        chunk = self._chunks.get(key)
+
+        if chunk is None:
+            chunk = [array('d') for _ in self.columns]
+            self._chunks[key] = chunk
+
+        chunk[0].append(timestamp)
+
+        for column, column_values in zip(self.columns[1:], chunk[1:]):
+            value = values.get(column)
+
+            try:
+                column_values.append(math.nan if value is None
+                        else float(value))
+            except (TypeError, ValueError):
+                column_values.append(math.nan)
+
+        if len(chunk[0]) >= self.chunk_size:
+            self._write(key)
+
+    def _write(self, key):
+        """
+        Append a buffered chunk to its column files
+
+        :param key: tuple(product, name, day) of the chunk
+        """
+
+        chunk = self._chunks.pop(key)
+        product, name, day = key
+
+        day_directory = os.path.join(self._get_series_directory(product,
+                name), day)
+        os.makedirs(day_directory, exist_ok=True)
+
+        if day_directory not in self._opened:
+            self._truncate(day_directory)
+            self._opened.add(day_directory)
+
+        for column, column_values in zip(self.columns, chunk):
+            if sys.byteorder != 'little':
+                column_values.byteswap()
+
+            path = os.path.join(day_directory, column + StatsStore.EXTENSION)
+
+            with open(path, 'ab') as column_file:
+                column_values.tofile(column_file)
+
+    def _truncate(self, day_directory):
+        """
+        Cut the columns of a day to the rows every column has
+
+        :param day_directory: the directory of the day's column files
+        """
+
+        paths = [os.path.join(day_directory, column + StatsStore.EXTENSION)
+                for column in self.columns]
+        sizes = []
+
+        for path in paths:
+            try:
+                sizes.append(os.path.getsize(path))
+            except FileNotFoundError:
+                sizes.append(0)
+
+        # Partially written values are cut too
+        size = min(sizes) // 8 * 8
+
+        for path, column_size in zip(paths, sizes):
+            if column_size > size:
+                logger.warning('Truncating torn column {} from {} to {} '
+                        'bytes'.format(path, column_size, size))
+                os.truncate(path, size)
+
+    def flush(self):
+        """
+        Write every buffered row
+        """
+
+        for key in list(self._chunks):
+            self._write(key)
+
+    def close(self):
+        self.flush()
+
+    def get_names(self, product):
+        """
+        Get the series recorded for a product
+
+        :param product: the GDAX product
+        :returns: sorted list of series names
+        """
+
+        try:
+            return sorted(os.listdir(os.path.join(self.directory, product)))
+        except FileNotFoundError:
+            return []
+
+    def query(self, product, name, start=None, end=None, columns=None):
+        """
+        Load the rows of a series recorded in a time range
+
+        Buffered rows are written first so they are included.
+
+        :param product: the GDAX product
+        :param name: the name of the series
+        :param start: only return rows at or after this time
+        :param end: only return rows before this time
+        :param columns: the columns to load, defaults to every column
+        :returns: dict of :class:`numpy.ndarray` by column, including `time`,
+            in the order rows were recorded
+        :raises KeyError: a column is not recorded by the store
+        """
+
+        # Imported here since only research queries need NumPy
+        import numpy as np
+
+        if columns is None:
+            columns = self.columns
+
+        columns = [StatsStore.TIME] + [column for column in columns
+                if column != StatsStore.TIME]
+
+        for column in columns:
+            if column not in self.columns:
+                raise KeyError(column)
+
+        self.flush()
+
+        series_directory = self._get_series_directory(product, name)
+
+        try:
+            days = sorted(os.listdir(series_directory))
+        except FileNotFoundError:
+            days = []
+
+        # Days are named so they sort and compare in time order
+        if start is not None:
+            days = [day for day in days if day >= self._get_day(start)]
+        if end is not None:
+            days = [day for day in days if day <= self._get_day(end)]
+
+        parts = {column: [] for column in columns}
+
+        for day in days:
+            day_values = []
+
+            for column in columns:
+                path = os.path.join(series_directory, day,
+                        column + StatsStore.EXTENSION)
+
+                try:
+                    day_values.append(np.fromfile(path, dtype='<f8'))
+                except (FileNotFoundError, ValueError):
+                    day_values.append(np.empty(0))
+
+            # Columns of a chunk interrupted while being written are cut to
+            # the rows every column has
+            rows = min(len(values) for values in day_values)
+
+            for column, values in zip(columns, day_values):
+                parts[column].append(values[:rows])
+
+        result = {column: np.concatenate(values) if values else np.empty(0)
+                for column, values in parts.items()}
+
+        mask = np.ones(len(result[StatsStore.TIME]), dtype=bool)
+
+        if start is not None:
+            mask &= result[StatsStore.TIME] >= start
+        if end is not None:
+            mask &= result[StatsStore.TIME] < end
+
+        if mask.all():
+            return result
+
+        return {column: values[mask] for column, values in result.items()}
@@ -0,0 +1,45 @@
+"""
+Trading strategy implementations
+
+Strategy modules are discovered without being imported, and a module is only
+imported when one of its strategies is requested, so startup cost does not
+grow with the number of strategies.
+"""
+
+import importlib
+import pkgutil
+
+
+def get_strategy_modules():
+    """
+    Get the names of the strategy modules in this package
+
+    :returns: sorted list of module names
+    """
+
+    return sorted(name
+            for _, name, is_package in pkgutil.iter_modules(__path__)
+            if not is_package and not name.startswith('test_'))
+
+
+def get_strategy_class(path):
+    """
+    Get a strategy class, importing its module on first use
+
+    :param path: the strategy as `<module>.<class>`, such as
+        `order_book_imbalance.OBIStrategy`
+    :returns: the strategy class
+    :raises ValueError: the strategy does not exist
+    """
+
+    module_name, _, class_name = path.rpartition('.')
+
+    if module_name not in get_strategy_modules():
+        raise ValueError('Unknown strategy module: {}'.format(module_name))
+
+    module = importlib.import_module('{}.{}'.format(__name__, module_name))
+
+    try:
+        return getattr(module, class_name)
+    except AttributeError:
+        raise ValueError('Unknown strategy: {}'.format(path))
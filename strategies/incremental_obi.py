@@ -0,0 +1,178 @@
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalOBI:
+    """
+    Maintain the distance-weighted order book imbalance from book deltas
+
+    Each level contributes `size / (delta * |price - best| / best + beta)` to
+    its side's quantity, matching
+    :meth:`OBIStrategy._get_order_book_imbalance`.
+    Changing a level that is not the best price adjusts the side's quantity
+    in O(1). When the best price moves every weight changes, so the side is
+    recomputed over its levels. A full recompute is also forced every
+    `recompute_interval` updates to bound floating point drift.
+
+    Sides use the GDAX feed naming, `buy` for bids and `sell` for asks.
+
+    Attributes:
+        delta: Weight given to the relative distance from the best price
+        beta: Base weight of a level at the best price
+        recompute_interval: Number of updates between full recomputes
+        levels: Level sizes by price for each side
+        best: The best price of each side
+        qty: The weighted quantity of each side
+    """
+
+    BUY = 'buy'
+    SELL = 'sell'
+
+    def __init__(self, delta, beta, recompute_interval=1000):
+        self.delta = delta
+        self.beta = beta
+        self.recompute_interval = recompute_interval
+
+        self.levels = {IncrementalOBI.BUY: {}, IncrementalOBI.SELL: {}}
+        self.best = {IncrementalOBI.BUY: None, IncrementalOBI.SELL: None}
+        self.qty = {IncrementalOBI.BUY: 0.0, IncrementalOBI.SELL: 0.0}
+
+        self._updates = 0
+
+    def reset(self, bids, asks):
+        """
+        Replace the book with a snapshot
+
+        :param bids: iterable of bid levels, each starting with price and size
+        :param asks: iterable of ask levels, each starting with price and size
+        """
+
+        for side, levels in ((IncrementalOBI.BUY, bids),
+                (IncrementalOBI.SELL, asks)):
+            self.levels[side] = {float(level[0]): float(level[1])
+                    for level in levels if float(level[1]) > 0}
+
+        self.recompute()
+
+    def update(self, side, price, size):
+        """
+        Apply a single level change
+
+        :param side: `buy` or `sell`
+        :param price: the level price
+        :param size: the new total size at the level, zero removes the level
+        """
+
+        if self._apply(side, float(price), float(size)):
+            self._recompute_side(side)
+
+        self._count_update()
+
+    def apply(self, changes):
+        """
+        Apply a batch of level changes, such as a GDAX `l2update` message
+
+        Sides whose best price moved are recomputed once for the batch.
+
+        :param changes: iterable of `(side, price, size)` changes
+        """
+
+        moved = set()
+
+        for side, price, size in changes:
+            if self._apply(side, float(price), float(size)):
+                moved.add(side)
+
+        for side in moved:
+            self._recompute_side(side)
+
+        self._count_update()
+
+    def recompute(self):
+        """
+        Recompute both sides from their levels
+        """
+
+        self._recompute_side(IncrementalOBI.BUY)
+        self._recompute_side(IncrementalOBI.SELL)
+        self._updates = 0
+
+    @property
+    def imbalance(self):
+        """
+        The current order book imbalance
+
+        :returns: the imbalance between -1 and 1, `None` for an empty book
+        """
+
+        bid_qty = self.qty[IncrementalOBI.BUY]
+        ask_qty = self.qty[IncrementalOBI.SELL]
+
+        try:
+            return (bid_qty - ask_qty) / (bid_qty + ask_qty)
+        except ZeroDivisionError:
+            return None
+
+    def _apply(self, side, price, size):
+        """
+        Apply a level change, adjusting the side's quantity when possible
+
+        :returns: `True` if the best price moved and the side must be
+            recomputed
+        """
+
+        levels = self.levels[side]
+        old_size = levels.pop(price, 0.0)
+
+        if size > 0:
+            levels[price] = size
+
+        best = self.best[side]
+
+        if best is None:
+            return True
+
+        # Removing the best level moves the best price
+        if price == best and size <= 0:
+            return True
+
+        if side == IncrementalOBI.BUY:
+            improves = price > best
+        else:
+            improves = price < best
+
+        if improves and size > 0:
+            return True
+
+        self.qty[side] += (size - old_size) * self._weight(price, best)
+
+        return False
+
+    def _weight(self, price, best):
+        return 1 / (self.delta * abs(price - best) / best + self.beta)
+
+    def _recompute_side(self, side):
+        levels = self.levels[side]
+
+        if not levels:
+            self.best[side] = None
+            self.qty[side] = 0.0
+            return
+
+        if side == IncrementalOBI.BUY:
+            best = max(levels)
+        else:
+            best = min(levels)
+
+        self.best[side] = best
+        self.qty[side] = sum(size * self._weight(price, best)
+                for price, size in levels.items())
+
+    def _count_update(self):
+        self._updates += 1
+
+        if self._updates >= self.recompute_interval:
+            logger.debug('Recomputing order book imbalance to bound drift')
+            self.recompute()
@@ -1,10 +1,11 @@
-from datetime import datetime, timedelta, timezone
 from decimal import Decimal, InvalidOperation
 from json.decoder import JSONDecodeError
 
 import logging
-import pandas as pd
+import statistics
 
+from book_snapshot import LevelChunks
+from strategies.incremental_obi import IncrementalOBI
 from strategy import Strategy
 
 
@@ -17,24 +18,125 @@ class OBIStrategy(Strategy):
 
     Attributes:
         order: The currently open order
+        order_book_imbalance: Recent order book imbalance values
+        signal: The trade signal of the latest order book
+        buy_threshold: The imbalance above which the latest signal was buy
+        sell_threshold: The imbalance below which the latest signal was sell
+        incremental_obi: The imbalance of the published order book, kept
+            current from the levels that change between snapshots
     """
 
     BUY_SIGNAL = 'buy'
     SELL_SIGNAL = 'sell'
 
+    # Signals as recorded statistics
+    SIGNAL_VALUES = {BUY_SIGNAL: 1, SELL_SIGNAL: -1, None: 0}
+
     PERIOD = 30
 
     MINIMUM_HOLD_TIME = 20 # seconds to hold a limit order before cancelling
 
     LIMIT_PADDING = Decimal('0.01') # Amount to pad limit order prices
 
+    # Orders with at most this multiple of their unfilled size queued ahead
+    # are likely to fill soon, so they are kept instead of repriced
+    QUEUE_PRIORITY = 1
+
+    # Order book imbalance level weighting, `size / (DELTA * distance + BETA)`
+    DELTA = 2
+    BETA = 1
+
     def set_up(self):
         self.order = None
-        self.order_book_imbalance = []
+        self.signal = None
+        self.buy_threshold = None
+        self.sell_threshold = None
+        # Only the values in the threshold period are needed
+        self.order_book_imbalance = self.history('order_book_imbalance',
+                self.PERIOD + 1)
+
+        self.incremental_obi = IncrementalOBI(self.DELTA, self.BETA)
+        # The bid and ask levels the incremental imbalance was computed from
+        self._imbalance_levels = None
+
+    def warm_up(self, order_books):
+        for bid_orders, ask_orders in order_books:
+            self.bid_orders = bid_orders
+            self.ask_orders = ask_orders
+
+            try:
+                order_book_imbalance = self._get_order_book_imbalance()
+            except (ArithmeticError, KeyError, ValueError) as error:
+                logger.warning(error)
+                continue
+
+            self.order_book_imbalance.append(float(order_book_imbalance))
+
+        self.bid_orders = None
+        self.ask_orders = None
+
+        logger.info('Warmed up with {} order book imbalance values'.format(
+                len(self.order_book_imbalance)))
+
+    def get_state(self):
+        return {
+            'order': self.order,
+            'order_book_imbalance': list(self.order_book_imbalance),
+        }
+
+    def set_state(self, state):
+        self.order = state.get('order')
+
+        self.order_book_imbalance.clear()
+        self.order_book_imbalance.extend(state.get('order_book_imbalance', []))
+
+    def get_stats(self):
+        try:
+            order_book_imbalance = self.order_book_imbalance[-1]
+        except IndexError:
+            order_book_imbalance = None
+
+        return {
+            'obi': order_book_imbalance,
+            'buy_threshold': self.buy_threshold,
+            'sell_threshold': self.sell_threshold,
+            'signal': self.SIGNAL_VALUES.get(self.signal),
+        }
+
+    def reconcile_orders(self, open_orders):
+        try:
+            order_id = self.order['id']
+        except (KeyError, TypeError):
+            return
+
+        # An order missing from the open orders was filled or cancelled while
+        # the strategy was not running
+        self.order = open_orders.get(order_id)
+
+        logger.info('Reconciled order {}: {}'.format(order_id, self.order))
+
+        if self.order is not None:
+            self.trader.track_order(self.order, self)
+
+    def on_order_update(self, order, fills):
+        try:
+            if self.order['id'] == order['id']:
+                self.order = order
+        except (KeyError, TypeError):
+            pass
+
+    def on_order_done(self, order_id, fills):
+        try:
+            if self.order['id'] == order_id:
+                logger.info('Order {} done'.format(order_id))
+                self.order = None
+        except (KeyError, TypeError):
+            pass
 
     def next(self):
         # Get the trade signal for the current node
         signal = self._get_trade_signal()
+        self.signal = signal
 
         logger.info('Next trade signal: {}'.format(signal))
 
@@ -49,6 +151,13 @@ class OBIStrategy(Strategy):
         logger.info('Place new order...')
         self._place_order(signal)
 
+    def next_unchanged(self):
+        # The signal cannot change without new data, but a pending order may
+        # have outlived its hold time
+        if self._track_order():
+            logger.info('Update pending order...')
+            self._update_pending_order(self.signal)
+
     def _track_order(self):
         """
         Track the order if it is available
@@ -64,6 +173,10 @@ class OBIStrategy(Strategy):
         except (KeyError, TypeError):
             return False
 
+        # Order changes are pushed by the trader's reconciler
+        if self.orders_reconciled:
+            return True
+
         try:
             order = self.trader.get_order(order_id)
         except (ConnectionError, JSONDecodeError) as error:
@@ -117,45 +230,22 @@ class OBIStrategy(Strategy):
 
         signal = None
 
-        delta = 2
-        beta = 1
-
-        best_bid = self._get_market_price(OBIStrategy.BUY_SIGNAL)
-        best_ask = self._get_market_price(OBIStrategy.SELL_SIGNAL)
-
-        bid_qty = 0
-        for index, row in self.bid_orders.iterrows():
-            price = Decimal(row['price'])
-            price_diff = abs(price - best_bid)
-            price_pct_diff = price_diff / best_bid
-
-            size = Decimal(row['size'])
-
-            bid_qty += size / (delta * price_pct_diff + beta)
-
-        ask_qty = 0
-        for index, row in self.ask_orders.iterrows():
-            price = Decimal(row['price'])
-            price_diff = abs(price - best_ask)
-            price_pct_diff = price_diff / best_ask
-
-            size = Decimal(row['size'])
-
-            ask_qty += size / (delta * price_pct_diff + beta)
-
-        order_book_imbalance = (bid_qty - ask_qty) / (bid_qty + ask_qty)
+        order_book_imbalance = self._get_order_book_imbalance()
 
         logger.info('OBI: {:.8f}'.format(order_book_imbalance))
 
-        self.order_book_imbalance.append(order_book_imbalance)
+        self.order_book_imbalance.append(float(order_book_imbalance))
 
-        if len(self.order_book_imbalance) > OBIStrategy.PERIOD:
-            last_period_obi = self.order_book_imbalance[-OBIStrategy.PERIOD:]
+        if len(self.order_book_imbalance) > self.PERIOD:
+            last_period_obi = self.order_book_imbalance[-self.PERIOD:]
 
-            threshold = pd.DataFrame(last_period_obi, dtype='float64').std()[0]
+            threshold = statistics.stdev(last_period_obi)
             buy_threshold = threshold * 2
             sell_threshold = -threshold * 2
 
+            self.buy_threshold = buy_threshold
+            self.sell_threshold = sell_threshold
+
             logger.info('Threshold: {:.8f}:{:.8f}'.format(buy_threshold,
                     sell_threshold))
 
@@ -168,6 +258,63 @@ class OBIStrategy(Strategy):
 
         return signal
 
+    def _get_order_book_imbalance(self):
+        """
+        Get the distance-weighted imbalance of the current order book
+
+        Sides of snapshots published by a :class:`BookPublisher` only apply
+        the levels that changed since the previous snapshot to
+        `incremental_obi`, other order books are computed in full.
+
+        :returns: the order book imbalance between -1 and 1
+        :raises ValueError: a side is empty
+        """
+
+        bid_levels = self.bid_orders.levels
+        ask_levels = self.ask_orders.levels
+
+        if (isinstance(bid_levels, LevelChunks)
+                and isinstance(ask_levels, LevelChunks)):
+            if not len(bid_levels) or not len(ask_levels):
+                raise ValueError('Order book side is empty')
+
+            self._update_incremental_obi(bid_levels, ask_levels)
+
+            return self.incremental_obi.imbalance
+
+        # The next published snapshot cannot be applied as changes
+        self._imbalance_levels = None
+
+        # Imported on first use since the kernels import NumPy
+        from book_kernels import kernels
+
+        return kernels.weighted_imbalance(self.bid_orders.prices,
+                self.bid_orders.sizes, self.ask_orders.prices,
+                self.ask_orders.sizes, self.DELTA, self.BETA)
+
+    def _update_incremental_obi(self, bid_levels, ask_levels):
+        """
+        Bring the incremental imbalance up to date with published levels
+
+        :param bid_levels: the :class:`LevelChunks` of the bid side
+        :param ask_levels: the :class:`LevelChunks` of the ask side
+        """
+
+        if self._imbalance_levels is None:
+            self.incremental_obi.reset(bid_levels, ask_levels)
+        else:
+            previous_bids, previous_asks = self._imbalance_levels
+
+            changes = [(IncrementalOBI.BUY, price, size) for price, size
+                    in bid_levels.get_changes(previous_bids)]
+            changes.extend((IncrementalOBI.SELL, price, size) for price, size
+                    in ask_levels.get_changes(previous_asks))
+
+            if changes:
+                self.incremental_obi.apply(changes)
+
+        self._imbalance_levels = (bid_levels, ask_levels)
+
     def _get_market_price(self, signal):
         """
         Get the market price based on the trade signal for a product
@@ -183,11 +330,12 @@ class OBIStrategy(Strategy):
         except (KeyError, TypeError, InvalidOperation):
             market_price = None
 
+        # Prices are compared numerically, the raw book holds strings
         if signal == OBIStrategy.BUY_SIGNAL:
-            market_price = Decimal(self.bid_orders['price'].max())
+            market_price = Decimal(max(self.bid_orders['price'], key=Decimal))
 
         elif signal == OBIStrategy.SELL_SIGNAL:
-            market_price = Decimal(self.ask_orders['price'].min())
+            market_price = Decimal(min(self.ask_orders['price'], key=Decimal))
 
         return market_price
 
@@ -211,12 +359,38 @@ class OBIStrategy(Strategy):
 
         return True
 
+    def _is_near_front(self):
+        """
+        Check if the current order is near the front of its price level queue
+
+        :returns: `True` if at most `QUEUE_PRIORITY` times the unfilled size
+            of the order is queued ahead of it, `False` otherwise or if the
+            queue position is unknown
+        """
+
+        try:
+            order_id = self.order['id']
+            remaining = (float(self.order['size'])
+                    - float(self.order.get('filled_size') or 0))
+        except (KeyError, TypeError, ValueError):
+            return False
+
+        queue_position = self.trader.get_queue_position(order_id)
+
+        if queue_position is None:
+            return False
+
+        logger.info('Queued ahead of order: {}'.format(queue_position))
+
+        return float(queue_position) <= self.QUEUE_PRIORITY * remaining
+
     def _update_pending_order(self, signal):
         """
         Make adjustments to a pending order based on new data
 
         Reprice the order if market conditions change and cancel the order if
-        the trade signal changes.
+        the trade signal changes. Orders near the front of their queue are not
+        repriced.
 
         :param signal: the trade signal
         :returns: `True` on success, `False` when there is no pending order
@@ -230,28 +404,31 @@ class OBIStrategy(Strategy):
 
         market_price = self._get_market_price(signal)
 
-        timeframe = timedelta(seconds=OBIStrategy.MINIMUM_HOLD_TIME)
-        created_at_dt = datetime.strptime(created_at, '%Y-%m-%dT%H:%M:%S.%fZ')
-        created_at_dt = created_at_dt.replace(tzinfo=timezone.utc)
-        current_time = datetime.now(timezone.utc)
-        elapsed_time = current_time - created_at_dt
-
-        logger.info('Time elapsed since order creation: {}'.format(elapsed_time))
+        # Order age is measured against exchange time, since the creation
+        # time is set by the exchange
+        can_be_cancelled = self.trader.clock.has_elapsed(created_at,
+                self.MINIMUM_HOLD_TIME)
 
-        can_be_cancelled = elapsed_time > timeframe
+        logger.info('Minimum hold time elapsed: {}'.format(can_be_cancelled))
 
         if signal == OBIStrategy.BUY_SIGNAL:
-            price_changed = price != (market_price + OBIStrategy.LIMIT_PADDING)
+            price_changed = price != (market_price + self.LIMIT_PADDING)
 
         elif signal == OBIStrategy.SELL_SIGNAL:
-            price_changed = price != (market_price - OBIStrategy.LIMIT_PADDING)
+            price_changed = price != (market_price - self.LIMIT_PADDING)
 
         else:
             price_changed = False
 
-        if not signal or (can_be_cancelled and price_changed):
+        if not signal:
             logger.info('Cancel pending order')
             self._cancel_order()
+        elif can_be_cancelled and price_changed:
+            if self._is_near_front():
+                logger.info('Pending order kept near the front of the queue')
+            else:
+                logger.info('Cancel pending order')
+                self._cancel_order()
         else:
             logger.info('Pending order unchanged')
 
@@ -320,6 +497,7 @@ class OBIStrategy(Strategy):
 
                 if 'message' not in order:
                     self.order = order
+                    self.trader.track_order(order, self)
 
                 return True
 
@@ -340,6 +518,7 @@ class OBIStrategy(Strategy):
 
                 if 'message' not in order:
                     self.order = order
+                    self.trader.track_order(order, self)
 
                 return True
 
@@ -0,0 +1,134 @@
+import random
+import unittest
+
+from order_book import OrderBookSide
+from strategies.incremental_obi import IncrementalOBI
+from strategies.order_book_imbalance import OBIStrategy
+
+
+class IncrementalOBITestCase(unittest.TestCase):
+    """
+    Test :class:`IncrementalOBI`
+
+    Methods:
+        - :meth:`IncrementalOBI.reset`
+        - :meth:`IncrementalOBI.update`
+        - :meth:`IncrementalOBI.apply`
+    """
+
+    def _get_book(self, rng):
+        bids = [['{:.2f}'.format(1000 - level * 0.5),
+                '{:.2f}'.format(rng.uniform(0.1, 10)), 1]
+                for level in range(20)]
+        asks = [['{:.2f}'.format(1001 + level * 0.5),
+                '{:.2f}'.format(rng.uniform(0.1, 10)), 1]
+                for level in range(20)]
+
+        return bids, asks
+
+    def _get_snapshot_obi(self, calculator):
+        """
+        Compute the imbalance of the calculator's book with
+        :meth:`OBIStrategy._get_order_book_imbalance`
+        """
+
+        bids = sorted(calculator.levels[IncrementalOBI.BUY].items(),
+                reverse=True)
+        asks = sorted(calculator.levels[IncrementalOBI.SELL].items())
+
+        obi = OBIStrategy()
+        obi.bid_orders = OrderBookSide([['{:.2f}'.format(price), repr(size),
+                1] for price, size in bids])
+        obi.ask_orders = OrderBookSide([['{:.2f}'.format(price), repr(size),
+                1] for price, size in asks])
+
+        return obi._get_order_book_imbalance()
+
+    def test_reset(self):
+        """
+        Test :meth:`IncrementalOBI.reset`
+
+        Assert the imbalance matches
+        :meth:`OBIStrategy._get_order_book_imbalance`.
+        """
+
+        bids, asks = self._get_book(random.Random(0))
+
+        calculator = IncrementalOBI(OBIStrategy.DELTA, OBIStrategy.BETA)
+        calculator.reset(bids, asks)
+
+        self.assertAlmostEqual(calculator.imbalance,
+                self._get_snapshot_obi(calculator), places=9)
+
+    def test_update(self):
+        """
+        Test :meth:`IncrementalOBI.update`
+
+        Assert the imbalance stays consistent with
+        :meth:`OBIStrategy._get_order_book_imbalance` through level changes,
+        removals and best price moves.
+        """
+
+        rng = random.Random(1)
+        bids, asks = self._get_book(rng)
+
+        calculator = IncrementalOBI(OBIStrategy.DELTA, OBIStrategy.BETA)
+        calculator.reset(bids, asks)
+
+        for _ in range(200):
+            side = rng.choice([IncrementalOBI.BUY, IncrementalOBI.SELL])
+
+            if side == IncrementalOBI.BUY:
+                price = 1000.5 - rng.randint(0, 22) * 0.5
+            else:
+                price = 1000.5 + rng.randint(0, 22) * 0.5
+
+            size = rng.choice([0, rng.uniform(0.1, 10)])
+
+            calculator.update(side, price, size)
+
+        self.assertAlmostEqual(calculator.imbalance,
+                self._get_snapshot_obi(calculator), places=9)
+
+    def test_update_best_price_removed(self):
+        """
+        Test :meth:`IncrementalOBI.update`
+
+        Assert removing the best bid moves the best price to the next level.
+        """
+
+        calculator = IncrementalOBI(OBIStrategy.DELTA, OBIStrategy.BETA)
+        calculator.reset([['10', '1'], ['9', '1']], [['11', '1']])
+
+        calculator.update(IncrementalOBI.BUY, '10', '0')
+
+        self.assertEqual(calculator.best[IncrementalOBI.BUY], 9.0)
+        self.assertAlmostEqual(calculator.imbalance, 0)
+
+    def test_apply(self):
+        """
+        Test :meth:`IncrementalOBI.apply`
+
+        Assert a batch of changes gives the same imbalance as applying each
+        change individually.
+        """
+
+        bids, asks = self._get_book(random.Random(2))
+
+        changes = [
+            ('buy', '1000.50', '3.0'),
+            ('sell', '1001.00', '0'),
+            ('buy', '995.00', '1.5'),
+            ('sell', '1003.50', '2.5'),
+        ]
+
+        batched = IncrementalOBI(OBIStrategy.DELTA, OBIStrategy.BETA)
+        batched.reset(bids, asks)
+        batched.apply(changes)
+
+        single = IncrementalOBI(OBIStrategy.DELTA, OBIStrategy.BETA)
+        single.reset(bids, asks)
+        for change in changes:
+            single.update(*change)
+
+        self.assertAlmostEqual(batched.imbalance, single.imbalance, places=12)
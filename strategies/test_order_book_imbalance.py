@@ -1,10 +1,11 @@
-from datetime import datetime, timedelta
 from decimal import Decimal
 import unittest
-from unittest.mock import MagicMock, patch, call
+from unittest.mock import MagicMock
 
 import pandas as pd
 
+from book_snapshot import BookPublisher
+from order_book import OrderBookSide
 from strategies.order_book_imbalance import OBIStrategy
 
 class OBIStrategyTestCase(unittest.TestCase):
@@ -13,7 +14,15 @@ class OBIStrategyTestCase(unittest.TestCase):
 
     Methods:
         - :meth:`OBIStrategy.next`
+        - :meth:`OBIStrategy.next_unchanged`
+        - :meth:`OBIStrategy.warm_up`
+        - :meth:`OBIStrategy.get_state`
+        - :meth:`OBIStrategy.set_state`
+        - :meth:`OBIStrategy.reconcile_orders`
+        - :meth:`OBIStrategy.on_order_update`
+        - :meth:`OBIStrategy.on_order_done`
         - :meth:`OBIStrategy._track_order`
+        - :meth:`OBIStrategy._get_order_book_imbalance`
         - :meth:`OBIStrategy._get_market_price`
         - :meth:`OBIStrategy._cancel_order`
         - :meth:`OBIStrategy._update_pending_order`
@@ -78,6 +87,216 @@ class OBIStrategyTestCase(unittest.TestCase):
         self.assertEqual(obi._update_pending_order.called, 1)
         self.assertEqual(obi._place_order.called, 0)
 
+    def test_next_unchanged(self):
+        """
+        Test :meth:`OBIStrategy.next_unchanged`
+
+        Assert a pending order is updated with the previous signal without
+        recomputing the signal, and no new order is placed.
+        """
+
+        obi = OBIStrategy()
+        obi.signal = OBIStrategy.SELL_SIGNAL
+
+        obi._get_trade_signal = MagicMock()
+        obi._track_order = MagicMock(return_value=True)
+        obi._update_pending_order = MagicMock()
+        obi._place_order = MagicMock()
+
+        obi.next_unchanged()
+
+        obi._update_pending_order.assert_called_once_with(
+                OBIStrategy.SELL_SIGNAL)
+
+        obi._track_order.return_value = False
+        obi.next_unchanged()
+
+        self.assertEqual(obi._get_trade_signal.call_count, 0)
+        self.assertEqual(obi._update_pending_order.call_count, 1)
+        self.assertEqual(obi._place_order.call_count, 0)
+
+    def test_warm_up(self):
+        """
+        Test :meth:`OBIStrategy.warm_up`
+
+        Assert an imbalance value is recorded for every order book so a
+        signal is available on the first iteration.
+        """
+
+        obi = OBIStrategy()
+
+        order_books = []
+        for size in range(OBIStrategy.PERIOD + 1):
+            bid_orders = OrderBookSide([['10.00', str(size + 1), 1]])
+            ask_orders = OrderBookSide([['11.00', '1.0', 1]])
+            order_books.append((bid_orders, ask_orders))
+
+        obi.warm_up(order_books)
+
+        self.assertEqual(len(obi.order_book_imbalance),
+                OBIStrategy.PERIOD + 1)
+        self.assertEqual(obi.order_book_imbalance[0], 0)
+        self.assertIsNone(obi.bid_orders)
+
+    def test__get_order_book_imbalance_with_published_snapshots(self):
+        """
+        Test :meth:`OBIStrategy._get_order_book_imbalance`
+
+        Assert published snapshots update the incremental imbalance with
+        their changed levels and match the imbalance of the full book.
+        """
+
+        obi = OBIStrategy()
+
+        publisher = BookPublisher()
+        publisher.load_snapshot({
+            'bids': [['100.00', '2', 1], ['95.00', '4', 1]],
+            'asks': [['101.00', '1', 1], ['110.00', '3', 1]],
+        })
+
+        snapshot = publisher.publish()
+        obi.bid_orders, obi.ask_orders = snapshot.bids, snapshot.asks
+
+        obi._get_order_book_imbalance()
+
+        publisher.apply_changes([['buy', '95.00', '0'],
+                ['sell', '110.00', '5']])
+
+        snapshot = publisher.publish()
+        obi.bid_orders, obi.ask_orders = snapshot.bids, snapshot.asks
+
+        obi.incremental_obi.reset = MagicMock()
+
+        order_book_imbalance = obi._get_order_book_imbalance()
+
+        obi.incremental_obi.reset.assert_not_called()
+        self.assertEqual(obi.incremental_obi.levels['buy'], {100.0: 2.0})
+
+        obi.bid_orders = OrderBookSide(list(snapshot.bids.levels))
+        obi.ask_orders = OrderBookSide(list(snapshot.asks.levels))
+
+        self.assertAlmostEqual(order_book_imbalance,
+                obi._get_order_book_imbalance())
+
+    def test_get_state_and_set_state(self):
+        """
+        Test :meth:`OBIStrategy.get_state` and :meth:`OBIStrategy.set_state`
+
+        Assert the order and imbalance history are restored.
+        """
+
+        obi = OBIStrategy()
+        obi.order = {'id': '1'}
+        obi.order_book_imbalance.extend([0.1, 0.2])
+
+        restored = OBIStrategy()
+        restored.set_state(obi.get_state())
+
+        self.assertEqual(restored.order, {'id': '1'})
+        self.assertEqual(list(restored.order_book_imbalance), [0.1, 0.2])
+
+    def test_get_stats(self):
+        """
+        Test :meth:`OBIStrategy.get_stats`
+
+        Assert the latest imbalance, thresholds and signal are reported.
+        """
+
+        obi = OBIStrategy()
+
+        self.assertEqual(obi.get_stats(), {'obi': None, 'buy_threshold': None,
+                'sell_threshold': None, 'signal': 0})
+
+        obi.order_book_imbalance.extend([0.1, 0.2])
+        obi.buy_threshold = 0.3
+        obi.sell_threshold = -0.3
+        obi.signal = OBIStrategy.SELL_SIGNAL
+
+        self.assertEqual(obi.get_stats(), {'obi': 0.2, 'buy_threshold': 0.3,
+                'sell_threshold': -0.3, 'signal': -1})
+
+    def test_reconcile_orders_with_open_order(self):
+        """
+        Test :meth:`OBIStrategy.reconcile_orders`
+
+        Assert the restored order is replaced with the exchange's open order
+        and tracked by the trader.
+        """
+
+        obi = OBIStrategy()
+        obi.trader = MagicMock()
+        obi.order = {'id': '1', 'filled_size': '0'}
+
+        OPEN_ORDER = {'id': '1', 'filled_size': '0.5'}
+        obi.reconcile_orders({'1': OPEN_ORDER})
+
+        self.assertEqual(obi.order, OPEN_ORDER)
+        obi.trader.track_order.assert_called_with(OPEN_ORDER, obi)
+
+    def test_reconcile_orders_with_closed_order(self):
+        """
+        Test :meth:`OBIStrategy.reconcile_orders`
+
+        Assert the restored order is cleared when it is no longer open.
+        """
+
+        obi = OBIStrategy()
+        obi.order = {'id': '1'}
+
+        obi.reconcile_orders({'2': {'id': '2'}})
+
+        self.assertIsNone(obi.order)
+
+    def test_on_order_update(self):
+        """
+        Test :meth:`OBIStrategy.on_order_update`
+
+        Assert the current order is replaced with the updated order.
+        """
+
+        obi = OBIStrategy()
+        obi.order = {'id': '1', 'filled_size': '0'}
+
+        UPDATED_ORDER = {'id': '1', 'filled_size': '0.5'}
+        obi.on_order_update(UPDATED_ORDER, [])
+
+        self.assertEqual(obi.order, UPDATED_ORDER)
+
+    def test_on_order_done(self):
+        """
+        Test :meth:`OBIStrategy.on_order_done`
+
+        Assert the current order is cleared only when it is the done order.
+        """
+
+        obi = OBIStrategy()
+        obi.order = {'id': '1'}
+
+        obi.on_order_done('2', [])
+        self.assertEqual(obi.order, {'id': '1'})
+
+        obi.on_order_done('1', [])
+        self.assertIsNone(obi.order)
+
+    def test__track_order_with_reconciled_orders(self):
+        """
+        Test :meth:`OBIStrategy._track_order`
+
+        Assert the order is not polled when the trader reconciles orders.
+        """
+
+        obi = OBIStrategy()
+        obi.orders_reconciled = True
+        obi.order = {'id': '1'}
+
+        trader = MagicMock()
+        obi.trader = trader
+
+        success = obi._track_order()
+
+        self.assertTrue(success)
+        self.assertEqual(trader.get_order.call_count, 0)
+
     def test__track_order_success(self):
         """
         Test :meth:`OBIStrategy._track_order`
@@ -348,6 +567,33 @@ class OBIStrategyTestCase(unittest.TestCase):
 
         self.assertEqual(market_price, TEST_ASK)
 
+    def test__get_market_price_compares_prices_numerically(self):
+        """
+        Test :meth:`OBIStrategy._get_market_price`
+
+        Assert the best bid is found numerically when price strings differ in
+        length.
+        """
+
+        obi = OBIStrategy()
+
+        columns = ['price', 'size', 'num-orders']
+
+        bid_orders = [
+            ['1000.00', '1.0', 1],
+            ['999.50', '1.0', 1],
+        ]
+        obi.bid_orders = pd.DataFrame(bid_orders, columns=columns)
+
+        ask_orders = [
+            ['1000.50', '1.0', 1],
+        ]
+        obi.ask_orders = pd.DataFrame(ask_orders, columns=columns)
+
+        market_price = obi._get_market_price(OBIStrategy.BUY_SIGNAL)
+
+        self.assertEqual(market_price, Decimal('1000.00'))
+
     def test__cancel_order_with_valid_order(self):
         """
         Test :meth:`OBIStrategy._cancel_order`
@@ -398,8 +644,10 @@ class OBIStrategyTestCase(unittest.TestCase):
         """
 
         obi = OBIStrategy()
+        obi.trader = MagicMock()
+        obi.trader.clock.has_elapsed.return_value = True
 
-        TEST_PRICE = 1.0
+        TEST_PRICE = Decimal('1.0')
         TEST_CREATED = '2017-01-01T01:00:00.000000Z'
         obi.order = {
             'price': TEST_PRICE,
@@ -440,8 +688,7 @@ class OBIStrategyTestCase(unittest.TestCase):
         self.assertEqual(cancel_order.called, 0)
         self.assertFalse(success)
 
-    @patch('strategies.order_book_imbalance.datetime')
-    def test__update_pending_order_with_change(self, datetime):
+    def test__update_pending_order_with_change(self):
         """
         Test :meth:`OBIStrategy._update_pending_order`
 
@@ -449,22 +696,19 @@ class OBIStrategyTestCase(unittest.TestCase):
         is returned.
         """
 
-        TEST_NOW = '2017-01-01T01:00:00.000000Z'
-        now = datetime.strptime(TEST_NOW)
-        timeframe = timedelta(seconds=OBIStrategy.MINIMUM_HOLD_TIME + 1)
-        now.__sub__ = MagicMock(return_value=timeframe)
-        datetime.now.return_value = now
-
         obi = OBIStrategy()
+        obi.trader = MagicMock()
+        obi.trader.clock.has_elapsed.return_value = True
+        obi.trader.get_queue_position.return_value = None
 
-        test_created = now + timeframe
+        TEST_CREATED = '2017-01-01T01:00:00.000000Z'
         TEST_PRICE = 1.0
         obi.order = {
             'price': TEST_PRICE,
-            'created_at': test_created,
+            'created_at': TEST_CREATED,
         }
 
-        NEW_PRICE = 2.0
+        NEW_PRICE = Decimal('2.0')
         obi._get_market_price = MagicMock(return_value=NEW_PRICE)
 
         cancel_order = MagicMock()
@@ -474,6 +718,66 @@ class OBIStrategyTestCase(unittest.TestCase):
 
         self.assertEqual(cancel_order.called, 1)
         self.assertTrue(success)
+        obi.trader.clock.has_elapsed.assert_called_with(TEST_CREATED,
+                OBIStrategy.MINIMUM_HOLD_TIME)
+
+    def test__update_pending_order_within_hold_time(self):
+        """
+        Test :meth:`OBIStrategy._update_pending_order`
+
+        Assert :meth:`OBIStrategy._cancel_order` is not called before the
+        minimum hold time has elapsed on the exchange clock.
+        """
+
+        obi = OBIStrategy()
+        obi.trader = MagicMock()
+        obi.trader.clock.has_elapsed.return_value = False
+
+        obi.order = {
+            'price': '1.00',
+            'created_at': '2017-01-01T01:00:00.000000Z',
+        }
+
+        obi._get_market_price = MagicMock(return_value=Decimal('2.00'))
+        obi._cancel_order = MagicMock()
+
+        self.assertTrue(obi._update_pending_order(OBIStrategy.BUY_SIGNAL))
+        self.assertEqual(obi._cancel_order.call_count, 0)
+
+    def test__update_pending_order_near_front_of_queue(self):
+        """
+        Test :meth:`OBIStrategy._update_pending_order`
+
+        Assert an order that could be repriced is kept while little is queued
+        ahead of it, and cancelled once the queue ahead is too large.
+        """
+
+        obi = OBIStrategy()
+        obi.trader = MagicMock()
+        obi.trader.clock.has_elapsed.return_value = True
+
+        obi.order = {
+            'id': 'test-id',
+            'price': '1.00',
+            'size': '2',
+            'filled_size': '0',
+            'created_at': '2017-01-01T01:00:00.000000Z',
+        }
+
+        obi._get_market_price = MagicMock(return_value=Decimal('2.00'))
+        obi._cancel_order = MagicMock()
+
+        obi.trader.get_queue_position.return_value = 1.5
+        self.assertTrue(obi._update_pending_order(OBIStrategy.BUY_SIGNAL))
+        self.assertEqual(obi._cancel_order.call_count, 0)
+
+        obi.trader.get_queue_position.return_value = 2.5
+        self.assertTrue(obi._update_pending_order(OBIStrategy.BUY_SIGNAL))
+        self.assertEqual(obi._cancel_order.call_count, 1)
+
+        obi.trader.get_queue_position.return_value = None
+        self.assertTrue(obi._update_pending_order(OBIStrategy.BUY_SIGNAL))
+        self.assertEqual(obi._cancel_order.call_count, 2)
 
     def test__place_order_with_current_order(self):
         """
@@ -0,0 +1,49 @@
+import unittest
+
+from strategies import get_strategy_class, get_strategy_modules
+from strategies.order_book_imbalance import OBIStrategy
+
+
+class RegistryTestCase(unittest.TestCase):
+    """
+    Test the strategy registry
+
+    Functions:
+        - :func:`get_strategy_modules`
+        - :func:`get_strategy_class`
+    """
+
+    def test_get_strategy_modules(self):
+        """
+        Test :func:`get_strategy_modules`
+
+        Assert strategy modules are listed and test modules are not.
+        """
+
+        modules = get_strategy_modules()
+
+        self.assertIn('order_book_imbalance', modules)
+        self.assertFalse(any(module.startswith('test_') for module in modules))
+
+    def test_get_strategy_class(self):
+        """
+        Test :func:`get_strategy_class`
+
+        Assert the strategy class is returned.
+        """
+
+        self.assertIs(get_strategy_class('order_book_imbalance.OBIStrategy'),
+                OBIStrategy)
+
+    def test_get_strategy_class_with_unknown_strategy(self):
+        """
+        Test :func:`get_strategy_class`
+
+        Assert a `ValueError` is raised.
+        """
+
+        with self.assertRaises(ValueError):
+            get_strategy_class('missing.Strategy')
+
+        with self.assertRaises(ValueError):
+            get_strategy_class('order_book_imbalance.Missing')
@@ -1,6 +1,9 @@
 from decimal import Decimal, InvalidOperation
 
 import logging
+import sys
+
+from ring_buffer import RingBuffer
 
 
 logger = logging.getLogger(__name__)
@@ -11,17 +14,49 @@ class Strategy:
     Base class for trading strategy implementations
 
     Attributes:
+        name: The name identifying the strategy's saved state
         trader: An instance of :class:`GDAXTrader`.
         accounts: GDAX account data
         bid_orders: GDAX order book bid data
         ask_orders: GDAX order book ask data
+        histories: Bounded history containers created with :meth:`history`
+        orders_reconciled: Whether order changes are dispatched by the trader
+        trades: Rolling trade statistics of the product, a :class:`TradeFeed`,
+            or `None` if the trader does not poll trades
     """
 
-    def __init__(self):
+    # Attributes holding the current iteration's data, not retained state
+    TRANSIENT_ATTRIBUTES = ('name', 'trader', 'accounts', 'bid_orders',
+            'ask_orders', 'histories', 'orders_reconciled', 'trades')
+
+    def __init__(self, name=None, **parameters):
+        """
+        :param name: the strategy name, defaults to the class name
+        :param parameters: overrides of the strategy's class constants
+        :raises ValueError: a parameter is not a constant of the strategy
+        """
+
+        for parameter, value in parameters.items():
+            try:
+                default = getattr(type(self), parameter)
+            except AttributeError:
+                raise ValueError('Unknown parameter for {}: {}'.format(
+                        type(self).__name__, parameter))
+
+            # Prices and sizes are configured as strings to stay exact
+            if isinstance(default, Decimal):
+                value = Decimal(str(value))
+
+            setattr(self, parameter, value)
+
+        self.name = name or type(self).__name__
         self.trader = None
         self.accounts = []
         self.bid_orders = None
         self.ask_orders = None
+        self.histories = {}
+        self.orders_reconciled = False
+        self.trades = None
 
         self.set_up()
 
@@ -55,6 +90,17 @@ class Strategy:
 
         raise NotImplementedError
 
+    def next_unchanged(self):
+        """
+        Override in child class to act on an iteration without new data
+
+        Called instead of :meth:`next` when neither the accounts nor the
+        order book changed since the previous iteration, so signals do not
+        need recomputing. The previous data is still set.
+        """
+
+        pass
+
     def next_data(self, accounts, bid_orders, ask_orders):
         """
         Set data to be used for the current strategy iteration
@@ -68,6 +114,85 @@ class Strategy:
         self.bid_orders = bid_orders
         self.ask_orders = ask_orders
 
+    def warm_up(self, order_books):
+        """
+        Override in child class to seed state from historical order books
+
+        Called before the first iteration so strategies that need a window of
+        history can trade immediately after a restart.
+
+        :param order_books: list of tuple(bid_orders, ask_orders), oldest first
+        """
+
+        pass
+
+    def get_state(self):
+        """
+        Override in child class to return state that survives a restart
+
+        The state must be JSON serializable.
+
+        :returns: dict of strategy state
+        """
+
+        return {}
+
+    def set_state(self, state):
+        """
+        Override in child class to restore state from :meth:`get_state`
+
+        :param state: dict of strategy state
+        """
+
+        pass
+
+    def get_stats(self):
+        """
+        Override in child class to report values recorded every iteration
+
+        Values are recorded with the book statistics when the trader has a
+        :class:`StatsStore`, for studying signals offline.
+
+        :returns: dict of numeric values by column
+        """
+
+        return {}
+
+    def reconcile_orders(self, open_orders):
+        """
+        Override in child class to reconcile restored orders with the exchange
+
+        Called after :meth:`set_state` with every open order on the exchange.
+
+        :param open_orders: dict of open orders by order ID
+        """
+
+        pass
+
+    def on_order_update(self, order, fills):
+        """
+        Override in child class to handle a change to an open order
+
+        Only called for orders tracked with :meth:`GDAXTrader.track_order`.
+
+        :param order: the updated order data
+        :param fills: new fills for the order
+        """
+
+        pass
+
+    def on_order_done(self, order_id, fills):
+        """
+        Override in child class to handle an order that is no longer open
+
+        Only called for orders tracked with :meth:`GDAXTrader.track_order`.
+
+        :param order_id: the order ID
+        :param fills: new fills for the order
+        """
+
+        pass
+
     def get_currency_balance(self, currency):
         """
         Get the current account balance for a currency
@@ -84,3 +209,71 @@ class Strategy:
                 continue
 
         return Decimal(0)
+
+    def history(self, name, capacity, typecode='d'):
+        """
+        Create a bounded history container owned by the strategy
+
+        Strategies should keep per-tick values in these containers instead of
+        growing lists, so retained memory stays fixed over long uptimes.
+
+        :param name: the name the history is reported under
+        :param capacity: maximum number of values retained
+        :param typecode: the :mod:`array` typecode of the stored values
+        :returns: a :class:`RingBuffer`
+        """
+
+        buffer = RingBuffer(capacity, typecode)
+        self.histories[name] = buffer
+
+        return buffer
+
+    def memory_report(self):
+        """
+        Report the memory retained by the strategy between iterations
+
+        Data replaced every iteration (accounts and order book) is excluded.
+
+        :returns: dict of retained bytes by attribute name
+        """
+
+        report = {}
+
+        for name, value in vars(self).items():
+            if name in Strategy.TRANSIENT_ATTRIBUTES:
+                continue
+
+            report[name] = _get_size(value)
+
+        return report
+
+
+def _get_size(value, seen=None):
+    """
+    Approximate the memory used by a value and the containers it references
+
+    :param value: the value to measure
+    :param seen: IDs of values already measured
+    :returns: the size in bytes
+    """
+
+    if seen is None:
+        seen = set()
+
+    if id(value) in seen:
+        return 0
+
+    seen.add(id(value))
+
+    if isinstance(value, RingBuffer):
+        return sys.getsizeof(value) + value.nbytes
+
+    size = sys.getsizeof(value)
+
+    if isinstance(value, dict):
+        size += sum(_get_size(key, seen) + _get_size(item, seen)
+                for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(_get_size(item, seen) for item in value)
+
+    return size
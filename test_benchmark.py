@@ -0,0 +1,34 @@
+import contextlib
+import io
+import unittest
+
+import utils
+from benchmark import soak
+
+
+class BenchmarkTestCase(unittest.TestCase):
+    """
+    Test benchmark module
+
+    Functions:
+        - :func:`soak`
+    """
+
+    def test_soak_fast(self):
+        """
+        Test :func:`soak`
+
+        Assert a short soak run without request pacing iterates the trader
+        and restores the shared rate limiter.
+        """
+
+        rate_limiter = utils.rate_limiter
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = soak(duration=0.5, frequency=0.05, depth=5,
+                    volatility=0.0005, latency=0, error_rate=0,
+                    decode_error_rate=0, report_interval=10, fast=True)
+
+        self.assertGreater(stats['iterations'], 0)
+        self.assertGreater(stats['requests'], 0)
+        self.assertIs(utils.rate_limiter, rate_limiter)
@@ -0,0 +1,151 @@
+import os
+import tempfile
+import unittest
+
+from book_archive import BookArchive
+
+
+class BookArchiveTestCase(unittest.TestCase):
+    """
+    Test :class:`BookArchive`
+
+    Methods:
+        - :meth:`BookArchive.append`
+        - :meth:`BookArchive.read`
+    """
+
+    PRODUCT = 'BTC-USD'
+
+    DAY = 24 * 60 * 60
+
+    def _get_order_book(self, sequence):
+        return {
+            'sequence': sequence,
+            'bids': [['10.00', '1.0', 1], ['9.00', '1.0', 1]],
+            'asks': [['11.00', '1.0', 1], ['12.00', '1.0', 1]],
+        }
+
+    def test_read_across_days(self):
+        """
+        Test :meth:`BookArchive.read`
+
+        Assert books recorded across days are read back oldest first.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            archive = BookArchive(directory)
+
+            for sequence in range(4):
+                archive.append(BookArchiveTestCase.PRODUCT,
+                        self._get_order_book(sequence),
+                        timestamp=sequence * BookArchiveTestCase.DAY / 2)
+
+            archive.close()
+
+            books = archive.read(BookArchiveTestCase.PRODUCT)
+
+        self.assertEqual([book['sequence'] for timestamp, book in books],
+                [0, 1, 2, 3])
+
+    def test_read_with_since_and_limit(self):
+        """
+        Test :meth:`BookArchive.read`
+
+        Assert only the most recent books after `since` are returned.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            archive = BookArchive(directory)
+
+            for sequence in range(10):
+                archive.append(BookArchiveTestCase.PRODUCT,
+                        self._get_order_book(sequence), timestamp=sequence)
+
+            recent = archive.read(BookArchiveTestCase.PRODUCT, since=6)
+            limited = archive.read(BookArchiveTestCase.PRODUCT, limit=2)
+
+            archive.close()
+
+        self.assertEqual([book['sequence'] for timestamp, book in recent],
+                [7, 8, 9])
+        self.assertEqual([book['sequence'] for timestamp, book in limited],
+                [8, 9])
+
+    def test_append_with_depth(self):
+        """
+        Test :meth:`BookArchive.append`
+
+        Assert only `depth` levels per side are recorded.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            archive = BookArchive(directory, depth=1)
+            archive.append(BookArchiveTestCase.PRODUCT,
+                    self._get_order_book(0))
+
+            (timestamp, book), = archive.read(BookArchiveTestCase.PRODUCT)
+
+            archive.close()
+
+        self.assertEqual(book['bids'], [['10.00', '1.0', 1]])
+        self.assertEqual(book['asks'], [['11.00', '1.0', 1]])
+
+    def test_read_across_blocks(self):
+        """
+        Test :meth:`BookArchive.read`
+
+        Assert lines spanning the blocks a file is read backwards in are
+        read whole, and books are recorded to the default depth.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            archive = BookArchive(directory)
+            archive.BLOCK_SIZE = 7
+
+            for sequence in range(5):
+                order_book = self._get_order_book(sequence)
+                order_book['bids'] = order_book['bids'] * 100
+                archive.append(BookArchiveTestCase.PRODUCT, order_book,
+                        timestamp=sequence)
+
+            books = archive.read(BookArchiveTestCase.PRODUCT, limit=3)
+
+            archive.close()
+
+        self.assertEqual([book['sequence'] for timestamp, book in books],
+                [2, 3, 4])
+        self.assertEqual(len(books[0][1]['bids']), BookArchive.DEPTH)
+
+    def test_read_with_corrupt_line(self):
+        """
+        Test :meth:`BookArchive.read`
+
+        Assert a partially written line is skipped with a warning.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            archive = BookArchive(directory)
+            archive.append(BookArchiveTestCase.PRODUCT,
+                    self._get_order_book(0), timestamp=0)
+            archive.close()
+
+            path = archive._get_path(BookArchiveTestCase.PRODUCT, 0)
+            with open(path, 'a') as archive_file:
+                archive_file.write('{"time": 1, "bo')
+
+            with self.assertLogs(level='WARNING'):
+                books = archive.read(BookArchiveTestCase.PRODUCT)
+
+        self.assertEqual(len(books), 1)
+
+    def test_read_without_archive(self):
+        """
+        Test :meth:`BookArchive.read`
+
+        Assert an empty list is returned for a product with no records.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            archive = BookArchive(os.path.join(directory, 'missing'))
+
+            self.assertEqual(archive.read(BookArchiveTestCase.PRODUCT), [])
@@ -0,0 +1,107 @@
+from json.decoder import JSONDecodeError
+import json
+import unittest
+from unittest.mock import patch
+
+import book_decoder
+from book_decoder import BookDecoder, DecodedLevels
+from order_book import OrderBookSide
+
+
+class BookDecoderTestCase(unittest.TestCase):
+    """
+    Test :class:`BookDecoder`
+
+    Methods:
+        - :meth:`BookDecoder.decode`
+    """
+
+    TEST_BOOK = {
+        'sequence': 3,
+        'bids': [['100.00', '1.5', 2], ['99.99', '2.0', 1], ['99.98', '3', 4]],
+        'asks': [['100.01', '0.5', 1], ['100.02', '4.25', 3]],
+    }
+
+    def test_decode_with_depth(self):
+        """
+        Test :meth:`BookDecoder.decode`
+
+        Assert the scanner decodes the first `depth` levels of each side with
+        their parsed prices and sizes.
+        """
+
+        decoder = BookDecoder(depth=2)
+        content = json.dumps(self.TEST_BOOK).encode()
+
+        order_book = decoder.decode(content)
+
+        self.assertEqual(order_book['sequence'], 3)
+        self.assertEqual(order_book['bids'], self.TEST_BOOK['bids'][:2])
+        self.assertEqual(order_book['asks'], self.TEST_BOOK['asks'])
+        self.assertIsInstance(order_book['bids'], DecodedLevels)
+        self.assertEqual(list(order_book['bids'].prices), [100.0, 99.99])
+        self.assertEqual(list(order_book['asks'].sizes), [0.5, 4.25])
+
+        # Whitespace and key order do not matter to the scanner
+        content = json.dumps({'asks': [], 'bids': self.TEST_BOOK['bids'],
+                'sequence': 4}, indent=2).encode()
+
+        order_book = decoder.decode(content)
+
+        self.assertEqual(order_book['sequence'], 4)
+        self.assertEqual(order_book['bids'], self.TEST_BOOK['bids'][:2])
+        self.assertEqual(order_book['asks'], [])
+
+    def test_decode_without_depth(self):
+        """
+        Test :meth:`BookDecoder.decode`
+
+        Assert every level is decoded for unlimited decoders and level 3
+        books, with and without a fast JSON parser.
+        """
+
+        content = json.dumps(self.TEST_BOOK)
+
+        for fast_json in (book_decoder.fast_json, None):
+            with patch('book_decoder.fast_json', fast_json):
+                order_book = BookDecoder(depth=None).decode(content)
+
+            self.assertEqual(order_book, self.TEST_BOOK)
+            self.assertEqual(list(order_book['bids'].prices),
+                    [100.0, 99.99, 99.98])
+
+        order_book = BookDecoder(depth=1).decode(content, level=3)
+        self.assertEqual(order_book, self.TEST_BOOK)
+
+    def test_decode_with_message(self):
+        """
+        Test :meth:`BookDecoder.decode`
+
+        Assert error responses are returned decoded and invalid JSON raises
+        :class:`JSONDecodeError`.
+        """
+
+        decoder = BookDecoder()
+
+        self.assertEqual(decoder.decode(b'{"message": "NotFound"}'),
+                {'message': 'NotFound'})
+
+        with self.assertRaises(JSONDecodeError):
+            decoder.decode(b'{"bids": [["1", ')
+
+    def test_order_book_side(self):
+        """
+        Test :class:`OrderBookSide` with :class:`DecodedLevels`
+
+        Assert the side uses the decoded arrays instead of parsing the levels.
+        """
+
+        levels = DecodedLevels([['1.0', '2.0', 1]])
+        side = OrderBookSide(levels)
+
+        self.assertIs(side.prices, levels.prices)
+        self.assertIs(side.sizes, levels.sizes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+from array import array
+import math
+import random
+import unittest
+
+from book_kernels import BookKernels, get_backends, NUMPY, PYTHON
+
+
+class BookKernelsTestCase(unittest.TestCase):
+    """
+    Test :class:`BookKernels`
+
+    Every available backend is checked against the uncompiled loops.
+
+    Methods:
+        - :meth:`BookKernels.weighted_imbalance`
+        - :meth:`BookKernels.cumulative_depth`
+        - :meth:`BookKernels.depth_at_price`
+        - :meth:`BookKernels.price_at_depth`
+        - :meth:`BookKernels.microprice`
+    """
+
+    def _get_books(self, count=20, depth=50):
+        rng = random.Random(0)
+        books = []
+
+        for _ in range(count):
+            mid = rng.uniform(100, 10000)
+
+            bid_prices = array('d', (mid - 0.01 * (level + 1)
+                    for level in range(depth)))
+            ask_prices = array('d', (mid + 0.01 * (level + 1)
+                    for level in range(depth)))
+            bid_sizes = array('d', (rng.uniform(0.001, 10)
+                    for _ in range(depth)))
+            ask_sizes = array('d', (rng.uniform(0.001, 10)
+                    for _ in range(depth)))
+
+            books.append((bid_prices, bid_sizes, ask_prices, ask_sizes))
+
+        return books
+
+    def _assert_equivalent(self, compute):
+        """
+        Assert a computation gives the same result on every backend
+
+        :param compute: function of :class:`BookKernels` and a book
+        """
+
+        reference = BookKernels(PYTHON)
+
+        for backend in get_backends():
+            kernels = BookKernels(backend)
+
+            for book in self._get_books():
+                with self.subTest(backend=backend):
+                    expected = compute(reference, book)
+                    result = compute(kernels, book)
+
+                    if isinstance(expected, float):
+                        if math.isnan(expected):
+                            self.assertTrue(math.isnan(result))
+                        else:
+                            self.assertAlmostEqual(result, expected, places=9)
+                    else:
+                        self.assertEqual(len(result), len(expected))
+
+                        for value, expected_value in zip(result, expected):
+                            self.assertAlmostEqual(value, expected_value,
+                                    places=9)
+
+    def test_backends(self):
+        """
+        Test :func:`get_backends`
+
+        Assert the NumPy and loop backends are always available and an
+        unknown backend is rejected.
+        """
+
+        self.assertIn(NUMPY, get_backends())
+        self.assertIn(PYTHON, get_backends())
+
+        with self.assertRaises(ValueError):
+            BookKernels('missing')
+
+    def test_weighted_imbalance(self):
+        """
+        Test :meth:`BookKernels.weighted_imbalance`
+
+        Assert the imbalance matches the per-level definition and every
+        backend agrees.
+        """
+
+        kernels = BookKernels()
+
+        imbalance = kernels.weighted_imbalance([10.0, 9.0], [1.0, 2.0],
+                [11.0, 12.0], [1.0, 1.0], 2, 1)
+
+        bid_qty = 1.0 + 2.0 / (2 * 1.0 / 10.0 + 1)
+        ask_qty = 1.0 + 1.0 / (2 * 1.0 / 11.0 + 1)
+
+        self.assertAlmostEqual(imbalance,
+                (bid_qty - ask_qty) / (bid_qty + ask_qty))
+
+        self._assert_equivalent(lambda kernels, book:
+                kernels.weighted_imbalance(*book, delta=2, beta=1))
+
+        with self.assertRaises(ValueError):
+            kernels.weighted_imbalance([], [], [11.0], [1.0], 2, 1)
+
+    def test_cumulative_depth(self):
+        """
+        Test :meth:`BookKernels.cumulative_depth`
+
+        Assert sizes are accumulated from the best level.
+        """
+
+        self.assertEqual(list(BookKernels().cumulative_depth([1.0, 2.0, 3.0])),
+                [1.0, 3.0, 6.0])
+
+        self._assert_equivalent(lambda kernels, book:
+                kernels.cumulative_depth(book[1]))
+
+    def test_depth_at_price(self):
+        """
+        Test :meth:`BookKernels.depth_at_price`
+
+        Assert only levels at or better than the price are counted.
+        """
+
+        kernels = BookKernels()
+
+        self.assertEqual(kernels.depth_at_price([10.0, 9.0, 8.0],
+                [1.0, 2.0, 3.0], 9.0, True), 3.0)
+        self.assertEqual(kernels.depth_at_price([11.0, 12.0, 13.0],
+                [1.0, 2.0, 3.0], 12.0, False), 3.0)
+
+        self._assert_equivalent(lambda kernels, book:
+                kernels.depth_at_price(book[0], book[1], book[0][10], True))
+        self._assert_equivalent(lambda kernels, book:
+                kernels.depth_at_price(book[2], book[3], book[2][10], False))
+
+    def test_price_at_depth(self):
+        """
+        Test :meth:`BookKernels.price_at_depth`
+
+        Assert the price of the level filling the size is returned, or NaN
+        if the side is too shallow.
+        """
+
+        kernels = BookKernels()
+
+        self.assertEqual(kernels.price_at_depth([11.0, 12.0, 13.0],
+                [1.0, 2.0, 3.0], 3.0), 12.0)
+        self.assertTrue(math.isnan(kernels.price_at_depth([11.0], [1.0],
+                2.0)))
+
+        for depth in (5.0, 50.0, 1000.0):
+            self._assert_equivalent(lambda kernels, book:
+                    kernels.price_at_depth(book[2], book[3], depth))
+
+    def test_microprice(self):
+        """
+        Test :meth:`BookKernels.microprice`
+
+        Assert the best prices are weighted by the opposite sizes.
+        """
+
+        kernels = BookKernels()
+
+        self.assertAlmostEqual(kernels.microprice([9.0, 10.0], [5.0, 3.0],
+                [11.0, 12.0], [1.0, 5.0]), (10.0 * 1.0 + 11.0 * 3.0) / 4.0)
+
+        self._assert_equivalent(lambda kernels, book:
+                kernels.microprice(*book))
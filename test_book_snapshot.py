@@ -0,0 +1,212 @@
+import threading
+import unittest
+
+from book_snapshot import BookPublisher, LevelChunks
+
+
+class BookPublisherTestCase(unittest.TestCase):
+    """
+    Test :class:`BookPublisher`
+
+    Methods:
+        - :meth:`BookPublisher.load_snapshot`
+        - :meth:`BookPublisher.apply_changes`
+        - :meth:`BookPublisher.publish`
+    """
+
+    ORDER_BOOK = {
+        'sequence': 1,
+        'bids': [['100.50', '1', 1], ['100.00', '2', 1], ['98.00', '3', 2]],
+        'asks': [['101.00', '4', 1], ['102.50', '5', 3]],
+    }
+
+    def test_publish(self):
+        """
+        Test :meth:`BookPublisher.publish`
+
+        Assert the snapshot holds every level, best price first.
+        """
+
+        publisher = BookPublisher()
+        publisher.load_snapshot(BookPublisherTestCase.ORDER_BOOK)
+
+        snapshot = publisher.publish()
+
+        self.assertIs(publisher.snapshot, snapshot)
+        self.assertEqual(snapshot.sequence, 1)
+        self.assertEqual(list(snapshot.bids.levels), [tuple(level)
+                for level in BookPublisherTestCase.ORDER_BOOK['bids']])
+        self.assertEqual(snapshot.asks['price'], ['101.00', '102.50'])
+        self.assertEqual(list(snapshot.bids.prices), [100.5, 100.0, 98.0])
+        self.assertIs(publisher.publish(), snapshot)
+
+    def test_publish_reuses_unchanged_buckets(self):
+        """
+        Test :meth:`BookPublisher.publish`
+
+        Assert only changed buckets are rebuilt and earlier snapshots are
+        unaffected by later changes.
+        """
+
+        publisher = BookPublisher()
+        publisher.load_snapshot(BookPublisherTestCase.ORDER_BOOK)
+
+        first = publisher.publish()
+
+        publisher.apply_changes([
+            ['buy', '100.00', '0'],
+            ['buy', '99.00', '7'],
+        ], sequence=2)
+
+        second = publisher.publish()
+
+        first_chunks = first.bids.levels.chunks
+        second_chunks = second.bids.levels.chunks
+
+        self.assertEqual(second.version, first.version + 1)
+        self.assertEqual(second.sequence, 2)
+        # 100.00 shares a bucket with 100.50, and 99.00 is a new bucket
+        self.assertEqual(len(second_chunks), 3)
+        self.assertIsNot(second_chunks[0], first_chunks[0])
+        self.assertIs(second_chunks[-1], first_chunks[-1])
+        self.assertIs(second.asks.levels.chunks[0],
+                first.asks.levels.chunks[0])
+
+        self.assertEqual(first.bids['price'], ['100.50', '100.00', '98.00'])
+        self.assertEqual(second.bids['price'], ['100.50', '99.00', '98.00'])
+
+    def test_publish_with_depth(self):
+        """
+        Test :meth:`BookPublisher.publish`
+
+        Assert snapshots only hold the best `depth` levels of each side, and
+        levels pushed out of the depth are reported as removed.
+        """
+
+        publisher = BookPublisher(depth=2)
+        publisher.load_snapshot(BookPublisherTestCase.ORDER_BOOK)
+
+        first = publisher.publish()
+
+        self.assertEqual(first.bids['price'], ['100.50', '100.00'])
+        self.assertEqual(first.asks['price'], ['101.00', '102.50'])
+
+        publisher.apply_changes([['buy', '100.75', '1']])
+
+        second = publisher.publish()
+
+        self.assertEqual(second.bids['price'], ['100.75', '100.50'])
+        self.assertEqual(sorted(second.bids.levels.get_changes(
+                first.bids.levels)), [(100.0, 0.0), (100.75, 1.0)])
+        self.assertIs(second.asks.levels.chunks[0],
+                first.asks.levels.chunks[0])
+
+    def test_load_snapshot_removes_missing_levels(self):
+        """
+        Test :meth:`BookPublisher.load_snapshot`
+
+        Assert levels missing from a new order book are removed.
+        """
+
+        publisher = BookPublisher()
+        publisher.load_snapshot(BookPublisherTestCase.ORDER_BOOK)
+        publisher.publish()
+
+        publisher.load_snapshot({'sequence': 3, 'bids': [['98.00', '3', 2]],
+                'asks': []})
+
+        snapshot = publisher.publish()
+
+        self.assertEqual(snapshot.bids['price'], ['98.00'])
+        self.assertEqual(len(snapshot.asks), 0)
+
+    def test_publish_with_concurrent_reader(self):
+        """
+        Test :meth:`BookPublisher.publish`
+
+        Assert a reader thread always sees complete, ordered snapshots while
+        a writer publishes.
+        """
+
+        publisher = BookPublisher(bucket_size=0.5)
+        publisher.load_snapshot(BookPublisherTestCase.ORDER_BOOK)
+        publisher.publish()
+
+        errors = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                snapshot = publisher.snapshot
+                prices = list(snapshot.bids.prices)
+
+                if prices != sorted(prices, reverse=True):
+                    errors.append(prices)
+
+                if len(prices) != len(snapshot.bids):
+                    errors.append(prices)
+
+        reader = threading.Thread(target=read)
+        reader.start()
+
+        for index in range(2000):
+            price = '{:.2f}'.format(90 + index % 10)
+            publisher.apply_changes([['buy', price, str(index % 3)]])
+            publisher.publish()
+
+        done.set()
+        reader.join()
+
+        self.assertEqual(errors, [])
+
+
+class LevelChunksTestCase(unittest.TestCase):
+    """
+    Test :class:`LevelChunks`
+
+    Methods:
+        - :meth:`LevelChunks.__getitem__`
+        - :meth:`LevelChunks.get_changes`
+    """
+
+    def test___getitem__(self):
+        """
+        Test :meth:`LevelChunks.__getitem__`
+
+        Assert levels are indexed across chunks like a list.
+        """
+
+        levels = LevelChunks(((1, 2), (), (3,)))
+
+        self.assertEqual(len(levels), 3)
+        self.assertEqual(levels[2], 3)
+        self.assertEqual(levels[-3], 1)
+        self.assertEqual(levels[1:], [2, 3])
+
+        with self.assertRaises(IndexError):
+            levels[3]
+
+    def test_get_changes(self):
+        """
+        Test :meth:`LevelChunks.get_changes`
+
+        Assert changed, added and removed levels of rebuilt buckets are
+        returned and shared buckets are skipped.
+        """
+
+        publisher = BookPublisher()
+        publisher.load_snapshot(BookPublisherTestCase.ORDER_BOOK)
+
+        first = publisher.publish().bids.levels
+
+        publisher.apply_changes([
+            ['buy', '100.00', '0'],
+            ['buy', '100.50', '6'],
+            ['buy', '99.00', '7'],
+        ])
+
+        second = publisher.publish().bids.levels
+
+        self.assertEqual(sorted(second.get_changes(first)),
+                [(99.0, 7.0), (100.0, 0.0), (100.5, 6.0)])
+        self.assertEqual(second.get_changes(second), [])
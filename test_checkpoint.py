@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+
+from checkpoint import Checkpointer
+
+
+class CheckpointerTestCase(unittest.TestCase):
+    """
+    Test :class:`Checkpointer`
+
+    Methods:
+        - :meth:`Checkpointer.submit`
+        - :meth:`Checkpointer.flush`
+        - :meth:`Checkpointer.load`
+        - :meth:`Checkpointer.stop`
+    """
+
+    def test_flush_and_load(self):
+        """
+        Test :meth:`Checkpointer.flush` and :meth:`Checkpointer.load`
+
+        Assert only the latest submitted state is written and loaded.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            checkpointer = Checkpointer(os.path.join(directory, 'state'))
+
+            checkpointer.submit({'value': 1})
+            checkpointer.submit({'value': 2})
+
+            self.assertTrue(checkpointer.flush())
+            self.assertFalse(checkpointer.flush())
+
+            timestamp, state = checkpointer.load()
+
+        self.assertEqual(state, {'value': 2})
+
+    def test_load_without_checkpoint(self):
+        """
+        Test :meth:`Checkpointer.load`
+
+        Assert `None` is returned when no checkpoint has been written.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            checkpointer = Checkpointer(os.path.join(directory, 'state'))
+
+            self.assertIsNone(checkpointer.load())
+
+    def test_load_with_truncated_checkpoint(self):
+        """
+        Test :meth:`Checkpointer.load`
+
+        Assert a checkpoint cut short by a crash is skipped in favour of the
+        previous one.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state')
+            checkpointer = Checkpointer(path)
+
+            checkpointer.submit({'value': 1})
+            checkpointer.flush()
+
+            with open(path, 'a') as checkpoint_file:
+                checkpoint_file.write('{"time": 1, "sta')
+
+            with self.assertLogs(level='WARNING'):
+                timestamp, state = checkpointer.load()
+
+        self.assertEqual(state, {'value': 1})
+
+    def test_flush_rotates_file(self):
+        """
+        Test :meth:`Checkpointer.flush`
+
+        Assert the file is replaced with the latest checkpoint once it grows
+        past `max_bytes`.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state')
+            checkpointer = Checkpointer(path, max_bytes=200)
+
+            for value in range(20):
+                checkpointer.submit({'value': value})
+                checkpointer.flush()
+
+            self.assertLessEqual(os.path.getsize(path), 200)
+            self.assertFalse(os.path.exists(path + '.tmp'))
+
+            timestamp, state = checkpointer.load()
+
+        self.assertEqual(state, {'value': 19})
+
+    def test_stop(self):
+        """
+        Test :meth:`Checkpointer.stop`
+
+        Assert the background thread stops and the pending state is written.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            checkpointer = Checkpointer(os.path.join(directory, 'state'),
+                    interval=60)
+            checkpointer.start()
+
+            checkpointer.submit({'value': 1})
+            checkpointer.stop()
+
+            timestamp, state = checkpointer.load()
+
+        self.assertEqual(state, {'value': 1})
@@ -0,0 +1,151 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from clock import ExchangeClock
+from utils import parse_timestamp
+
+
+class ExchangeClockTestCase(unittest.TestCase):
+    """
+    Test :class:`ExchangeClock`
+
+    Methods:
+        - :meth:`ExchangeClock.sync`
+        - :meth:`ExchangeClock.needs_sync`
+        - :meth:`ExchangeClock.get_deadline`
+        - :meth:`ExchangeClock.has_elapsed`
+    """
+
+    TEST_CREATED = '2017-01-01T01:00:00.000000Z'
+
+    @patch('clock.time')
+    def test_sync(self, time):
+        """
+        Test :meth:`ExchangeClock.sync`
+
+        Assert the first sample sets the offset, later samples are smoothed,
+        and the local time is taken half way through the request.
+        """
+
+        client = MagicMock()
+        clock = ExchangeClock(client, smoothing=0.5)
+
+        time.time.side_effect = [100.0, 100.2]
+        client.get_time.return_value = {'epoch': 102.1}
+
+        self.assertAlmostEqual(clock.sync(), 2.0)
+        self.assertAlmostEqual(clock.round_trip, 0.2)
+
+        time.time.side_effect = [200.0, 200.0]
+        client.get_time.return_value = {'epoch': 203.0}
+
+        self.assertAlmostEqual(clock.sync(), 2.5)
+
+    @patch('clock.time')
+    def test_needs_sync(self, time):
+        """
+        Test :meth:`ExchangeClock.needs_sync`
+
+        Assert a sync is needed before the first measurement and once the
+        sync interval has passed.
+        """
+
+        client = MagicMock()
+        client.get_time.return_value = {'epoch': 0}
+        time.time.return_value = 0.0
+        time.monotonic.return_value = 10.0
+
+        clock = ExchangeClock(client, sync_interval=60)
+        self.assertTrue(clock.needs_sync())
+
+        clock.sync()
+        self.assertFalse(clock.needs_sync())
+
+        time.monotonic.return_value = 70.0
+        self.assertTrue(clock.needs_sync())
+
+    @patch('clock.time')
+    def test_get_deadline(self, time):
+        """
+        Test :meth:`ExchangeClock.get_deadline`
+
+        Assert the deadline is on the monotonic clock, adjusted by the
+        offset, and is converted once until the clock is synced again.
+        """
+
+        created = parse_timestamp(self.TEST_CREATED)
+
+        client = MagicMock()
+        client.get_time.return_value = {'epoch': created + 5.0}
+        time.time.return_value = created
+        time.monotonic.return_value = 0.0
+        time.monotonic_ns.return_value = 1000
+
+        clock = ExchangeClock(client)
+        clock.sync()
+
+        # The exchange is 5 seconds ahead, so 15 of the 20 seconds remain
+        deadline = clock.get_deadline(self.TEST_CREATED, 20)
+        self.assertEqual(deadline, 1000 + 15 * 10 ** 9)
+
+        time.monotonic_ns.return_value = 2000
+        self.assertEqual(clock.get_deadline(self.TEST_CREATED, 20), deadline)
+
+        client.get_time.return_value = {'epoch': created}
+        clock.offset = 0.0
+        clock.synced_at = None
+        clock.sync()
+
+        self.assertEqual(clock.get_deadline(self.TEST_CREATED, 20),
+                2000 + 20 * 10 ** 9)
+
+        with self.assertRaises(ValueError):
+            clock.get_deadline('invalid', 20)
+
+    @patch('clock.time')
+    def test_has_elapsed(self, time):
+        """
+        Test :meth:`ExchangeClock.has_elapsed`
+
+        Assert the period has elapsed once the monotonic clock reaches the
+        deadline.
+        """
+
+        time.time.return_value = parse_timestamp(self.TEST_CREATED)
+        time.monotonic_ns.return_value = 0
+
+        clock = ExchangeClock(MagicMock())
+
+        self.assertFalse(clock.has_elapsed(self.TEST_CREATED, 20))
+
+        time.monotonic_ns.return_value = 20 * 10 ** 9 - 1
+        self.assertFalse(clock.has_elapsed(self.TEST_CREATED, 20))
+
+        time.monotonic_ns.return_value = 20 * 10 ** 9
+        self.assertTrue(clock.has_elapsed(self.TEST_CREATED, 20))
+
+        # Order ages are unaffected by later changes to the local clock
+        time.time.return_value += 60
+        time.monotonic_ns.return_value = 0
+        self.assertFalse(clock.has_elapsed(self.TEST_CREATED, 20))
+
+    def test_cache_size(self):
+        """
+        Test :meth:`ExchangeClock.get_deadline`
+
+        Assert the oldest conversion is forgotten once the cache is full.
+        """
+
+        clock = ExchangeClock(MagicMock())
+        clock.CACHE_SIZE = 2
+
+        clock.get_deadline(self.TEST_CREATED, 1)
+        clock.get_deadline(self.TEST_CREATED, 2)
+        clock.get_deadline(self.TEST_CREATED, 3)
+
+        self.assertEqual(list(clock._deadlines), [(self.TEST_CREATED, 2),
+                (self.TEST_CREATED, 3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from requests.exceptions import ConnectionError, ReadTimeout
+
+from execution import LiveExecution
+
+
+class LiveExecutionTestCase(unittest.TestCase):
+    """
+    Test :class:`LiveExecution`
+
+    Methods:
+        - :meth:`LiveExecution.buy`
+        - :meth:`LiveExecution.cancel_all`
+        - :meth:`LiveExecution._place_order`
+        - :meth:`LiveExecution.get_queue_position`
+        - :meth:`LiveExecution._request`
+    """
+
+    def test_buy(self):
+        """
+        Test :meth:`LiveExecution.buy`
+
+        Assert orders are sent to the client unchanged.
+        """
+
+        client = MagicMock()
+        execution = LiveExecution(client)
+
+        order = execution.buy(price='1.00', size='1', product_id='BTC-USD',
+                post_only=True)
+
+        client.buy.assert_called_once_with(price='1.00', size='1',
+                product_id='BTC-USD', post_only=True)
+        self.assertEqual(order, client.buy.return_value)
+
+    def test_buy_with_pool(self):
+        """
+        Test :meth:`LiveExecution.buy`
+
+        Assert pooled orders are sent with the session and signed with the
+        client's credentials.
+        """
+
+        client = MagicMock(url='https://api.gdax.com')
+        execution = LiveExecution(client, pool_size=2)
+        execution.session = MagicMock()
+
+        order = execution.buy(price='1.00', size='1', product_id='BTC-USD')
+
+        method, url = execution.session.request.call_args[0]
+        kwargs = execution.session.request.call_args[1]
+
+        data = json.loads(kwargs['data'])
+
+        self.assertEqual((method, url),
+                ('post', 'https://api.gdax.com/orders'))
+        self.assertTrue(data.pop('client_oid'))
+        self.assertEqual(data, {'price': '1.00', 'size': '1',
+                'product_id': 'BTC-USD', 'side': 'buy'})
+        self.assertEqual(kwargs['auth'], client.auth)
+        self.assertEqual(order,
+                execution.session.request.return_value.json.return_value)
+        client.buy.assert_not_called()
+
+    def test__place_order_with_timeout(self):
+        """
+        Test :meth:`LiveExecution._place_order`
+
+        Assert an order that timed out is looked up by its client order ID
+        instead of being sent again.
+        """
+
+        client = MagicMock(url='https://api.gdax.com')
+        execution = LiveExecution(client, pool_size=2)
+        execution.session = MagicMock()
+
+        response = MagicMock()
+        response.json.return_value = {'id': 'order'}
+        execution.session.request.side_effect = [ReadTimeout('read'),
+                response]
+
+        with self.assertLogs('execution', level='WARNING'):
+            order = execution.sell(price='1.00', size='1',
+                    product_id='BTC-USD', client_oid='oid')
+
+        self.assertEqual(order, {'id': 'order'})
+        self.assertEqual([call[0] for call
+                in execution.session.request.call_args_list], [
+            ('post', 'https://api.gdax.com/orders'),
+            ('get', 'https://api.gdax.com/orders/client:oid'),
+        ])
+
+    def test__place_order_with_failed_lookup(self):
+        """
+        Test :meth:`LiveExecution._place_order`
+
+        Assert an order whose status cannot be looked up returns an error
+        message instead of raising an error that would resend it.
+        """
+
+        client = MagicMock(url='https://api.gdax.com')
+        execution = LiveExecution(client, pool_size=2)
+        execution.session = MagicMock()
+        execution.session.request.side_effect = [ReadTimeout('read'),
+                ReadTimeout('read')]
+
+        with self.assertLogs('execution', level='WARNING'):
+            order = execution.buy(price='1.00', size='1',
+                    product_id='BTC-USD')
+
+        self.assertIn('message', order)
+        self.assertEqual(execution.session.request.call_count, 2)
+
+    @patch('execution.requests.request', side_effect=ReadTimeout('read'))
+    def test__request_with_timeout(self, request):
+        """
+        Test :meth:`LiveExecution._request`
+
+        Assert timeouts of requests that can be sent again, pooled or not,
+        are raised as connection errors so they are retried.
+        """
+
+        client = MagicMock(url='https://api.gdax.com')
+
+        with self.assertRaises(ConnectionError):
+            LiveExecution(client).get_fills_page(product_id='BTC-USD')
+
+        execution = LiveExecution(client, pool_size=2)
+        execution.session = MagicMock()
+        execution.session.request.side_effect = ReadTimeout('read')
+
+        with self.assertRaises(ConnectionError):
+            execution.cancel_order('order')
+
+    def test_cancel_all(self):
+        """
+        Test :meth:`LiveExecution.cancel_all`
+
+        Assert cancels are sent with the GDAX client's `product` argument.
+        """
+
+        client = MagicMock()
+        execution = LiveExecution(client)
+
+        execution.cancel_all(product='BTC-USD')
+
+        client.cancel_all.assert_called_once_with(product='BTC-USD')
+
+    def test_cancel_all_with_pool(self):
+        """
+        Test :meth:`LiveExecution.cancel_all`
+
+        Assert pooled cancels are sent for the product.
+        """
+
+        client = MagicMock(url='https://api.gdax.com')
+        execution = LiveExecution(client, pool_size=2)
+        execution.session = MagicMock()
+
+        execution.cancel_all(product='BTC-USD')
+
+        execution.session.request.assert_called_once_with('delete',
+                'https://api.gdax.com/orders?product_id=BTC-USD', params=None,
+                data=None, auth=client.auth, timeout=30)
+
+    def test_get_queue_position(self):
+        """
+        Test :meth:`LiveExecution.get_queue_position`
+
+        Assert live orders have no queue position estimate of their own.
+        """
+
+        execution = LiveExecution(MagicMock())
+        execution.update_book('BTC-USD', {'bids': [], 'asks': []})
+
+        self.assertIsNone(execution.get_queue_position('order'))
@@ -0,0 +1,147 @@
+import random
+import unittest
+
+from execution_analytics import ExecutionAnalytics, P2Quantile
+
+
+class P2QuantileTestCase(unittest.TestCase):
+    """
+    Test :class:`P2Quantile`
+
+    Methods:
+        - :meth:`P2Quantile.add`
+        - :meth:`P2Quantile.value`
+    """
+
+    def test_value_with_few_values(self):
+        """
+        Test :meth:`P2Quantile.value`
+
+        Assert the exact quantile is returned before five values are added.
+        """
+
+        quantile = P2Quantile(0.5)
+
+        self.assertIsNone(quantile.value)
+
+        for value in [3, 1, 2]:
+            quantile.add(value)
+
+        self.assertEqual(quantile.value, 2)
+
+    def test_value_approximates_quantile(self):
+        """
+        Test :meth:`P2Quantile.value`
+
+        Assert the estimate is close to the exact quantile of a large sample.
+        """
+
+        rng = random.Random(0)
+        values = [rng.uniform(0, 100) for _ in range(10000)]
+
+        for q in [0.5, 0.9]:
+            quantile = P2Quantile(q)
+
+            for value in values:
+                quantile.add(value)
+
+            exact = sorted(values)[int(q * len(values))]
+
+            self.assertAlmostEqual(quantile.value, exact, delta=2)
+
+
+class ExecutionAnalyticsTestCase(unittest.TestCase):
+    """
+    Test :class:`ExecutionAnalytics`
+
+    Methods:
+        - :meth:`ExecutionAnalytics.add_order`
+        - :meth:`ExecutionAnalytics.add_fill`
+        - :meth:`ExecutionAnalytics.add_mid`
+        - :meth:`ExecutionAnalytics.get_summary`
+    """
+
+    ORDER = {
+        'id': '1',
+        'product_id': 'BTC-USD',
+        'size': '2.0',
+        'created_at': '2017-01-01T00:00:00.000000Z',
+    }
+
+    def _get_fill(self, price, size, created_at, liquidity='M'):
+        return {
+            'order_id': '1',
+            'product_id': 'BTC-USD',
+            'price': price,
+            'size': size,
+            'side': 'buy',
+            'fee': '0.01',
+            'liquidity': liquidity,
+            'created_at': created_at,
+        }
+
+    def test_get_summary(self):
+        """
+        Test :meth:`ExecutionAnalytics.get_summary`
+
+        Assert VWAP, fill ratio, maker ratio, fees and time to fill are
+        aggregated from the fills.
+        """
+
+        analytics = ExecutionAnalytics(hold_time=20)
+        analytics.add_order('obi', ExecutionAnalyticsTestCase.ORDER)
+
+        analytics.add_fill(self._get_fill('100', '0.5',
+                '2017-01-01T00:00:10.000000Z'))
+        analytics.add_fill(self._get_fill('200', '0.5',
+                '2017-01-01T00:00:30.000000Z', liquidity='T'))
+
+        summary = analytics.get_summary('obi', 'BTC-USD')
+
+        self.assertEqual(summary['fill_count'], 2)
+        self.assertAlmostEqual(summary['vwap'], 150)
+        self.assertAlmostEqual(summary['fill_ratio'], 0.5)
+        self.assertAlmostEqual(summary['maker_ratio'], 0.5)
+        self.assertAlmostEqual(summary['fees'], 0.02)
+        self.assertAlmostEqual(summary['filled_within_hold_ratio'], 0.5)
+        self.assertEqual(summary['time_to_fill_p50'], 10)
+
+    def test_add_mid_resolves_markouts(self):
+        """
+        Test :meth:`ExecutionAnalytics.add_mid`
+
+        Assert markouts are only resolved once their horizon has passed.
+        """
+
+        analytics = ExecutionAnalytics(horizons=(1, 10))
+        analytics.add_order('obi', ExecutionAnalyticsTestCase.ORDER)
+
+        fill = self._get_fill('100', '1.0', '2017-01-01T00:00:00.000000Z')
+        analytics.add_fill(fill)
+
+        filled_at = 1483228800
+
+        analytics.add_mid('BTC-USD', 99, timestamp=filled_at + 0.5)
+        analytics.add_mid('BTC-USD', 101, timestamp=filled_at + 2)
+
+        summary = analytics.get_summary('obi', 'BTC-USD')
+
+        self.assertAlmostEqual(summary['markout_1s'], 0.01)
+        self.assertIsNone(summary['markout_10s'])
+
+        analytics.add_mid('BTC-USD', 98, timestamp=filled_at + 10)
+
+        summary = analytics.get_summary('obi', 'BTC-USD')
+
+        self.assertAlmostEqual(summary['markout_10s'], -0.02)
+
+    def test_get_summary_without_fills(self):
+        """
+        Test :meth:`ExecutionAnalytics.get_summary`
+
+        Assert `None` is returned for an unknown strategy and product.
+        """
+
+        analytics = ExecutionAnalytics()
+
+        self.assertIsNone(analytics.get_summary('obi', 'BTC-USD'))
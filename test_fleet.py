@@ -0,0 +1,546 @@
+from decimal import Decimal
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+from book_archive import BookArchive
+from fleet import Fleet
+from market_data import ReplaySource
+from paper_execution import PaperExecution
+from response_cache import ResponseCache
+from shared_book import SharedBookSource
+from simulated_client import SimulatedClient
+from stages import (BookArchiveStage, CheckpointStage, ResponseCacheStage,
+        StatsStage)
+from strategies.order_book_imbalance import OBIStrategy
+
+
+class FleetTestCase(unittest.TestCase):
+    """
+    Test :class:`Fleet`
+
+    Methods:
+        - :meth:`Fleet.from_config`
+        - :meth:`Fleet.run`
+        - :meth:`Fleet._run_iteration`
+    """
+
+    CONFIG = {
+        'frequency': 1,
+        'traders': [
+            {
+                'product': 'BTC-USD',
+                'strategies': [
+                    {
+                        'class': 'order_book_imbalance.OBIStrategy',
+                        'name': 'slow',
+                    },
+                    {
+                        'class': 'order_book_imbalance.OBIStrategy',
+                        'name': 'fast',
+                        'parameters': {'PERIOD': 10, 'LIMIT_PADDING': '0.05'},
+                    },
+                ],
+            },
+            {
+                'product': 'BTC-USD',
+                'mode': 'live',
+                'strategies': [],
+            },
+            {
+                'product': 'ETH-USD',
+                'strategies': [],
+            },
+        ],
+    }
+
+    def test_from_config(self):
+        """
+        Test :meth:`Fleet.from_config`
+
+        Assert traders and strategies are created with their parameters.
+        """
+
+        fleet = Fleet.from_config(FleetTestCase.CONFIG,
+                client=SimulatedClient())
+
+        self.assertEqual(fleet.FREQUENCY, 1)
+        self.assertEqual([trader.product for trader in fleet.traders],
+                ['BTC-USD', 'BTC-USD', 'ETH-USD'])
+
+        slow, fast = fleet.traders[0].strategies
+
+        self.assertIsInstance(slow, OBIStrategy)
+        self.assertEqual(slow.name, 'slow')
+        self.assertEqual(slow.PERIOD, OBIStrategy.PERIOD)
+        self.assertEqual(fast.PERIOD, 10)
+        self.assertEqual(str(fast.LIMIT_PADDING), '0.05')
+        self.assertEqual(fast.order_book_imbalance.capacity, 11)
+
+    def test_from_config_with_websocket(self):
+        """
+        Test :meth:`Fleet.from_config`
+
+        Assert every trader shares one websocket feed of every product.
+        """
+
+        config = dict(FleetTestCase.CONFIG, market_data='websocket')
+        fleet = Fleet.from_config(config, client=SimulatedClient())
+
+        sources = {id(trader.market_data) for trader in fleet.traders}
+
+        self.assertEqual(len(sources), 1)
+        self.assertEqual(fleet.traders[0].market_data.products,
+                ['BTC-USD', 'ETH-USD'])
+
+    def test_from_config_with_websocket_l3_books(self):
+        """
+        Test :meth:`Fleet.from_config`
+
+        Assert the websocket feed keeps one level 3 book per product, shared
+        by the product's level 3 traders.
+        """
+
+        fleet = Fleet.from_config({'market_data': 'websocket', 'traders': [
+            {'product': 'BTC-USD', 'level': 3},
+            {'product': 'BTC-USD', 'level': 3},
+            {'product': 'ETH-USD'},
+        ]}, client=SimulatedClient())
+
+        market_data = fleet.traders[0].market_data
+
+        self.assertIs(fleet.traders[0].l3_book, fleet.traders[1].l3_book)
+        self.assertEqual(market_data.l3_books,
+                {'BTC-USD': fleet.traders[0].l3_book})
+        self.assertIsNone(market_data.get_l3_book('ETH-USD'))
+
+    def test_from_config_with_websocket_book_publishers(self):
+        """
+        Test :meth:`Fleet.from_config`
+
+        Assert the websocket feed publishes one level 2 book per product,
+        shared by the product's level 2 traders.
+        """
+
+        fleet = Fleet.from_config({'market_data': 'websocket', 'traders': [
+            {'product': 'BTC-USD'},
+            {'product': 'BTC-USD'},
+            {'product': 'BTC-USD', 'level': 3},
+            {'product': 'ETH-USD'},
+        ]}, client=SimulatedClient())
+
+        first, second, l3_trader, other = fleet.traders
+        market_data = first.market_data
+
+        self.assertIsNotNone(first.book_publisher)
+        self.assertIs(second.book_publisher, first.book_publisher)
+        self.assertIsNone(l3_trader.book_publisher)
+        self.assertEqual(market_data.book_publishers, {
+            'BTC-USD': first.book_publisher,
+            'ETH-USD': other.book_publisher,
+        })
+        self.assertTrue(first._is_book_published())
+
+    def test_from_config_with_shared_books(self):
+        """
+        Test :meth:`Fleet.from_config`
+
+        Assert every trader reads one directory of shared books.
+        """
+
+        config = dict(FleetTestCase.CONFIG, market_data='shared',
+                shared_books='/tmp/books')
+        fleet = Fleet.from_config(config, client=SimulatedClient())
+
+        sources = {id(trader.market_data) for trader in fleet.traders}
+
+        self.assertEqual(len(sources), 1)
+        self.assertIsInstance(fleet.traders[0].market_data, SharedBookSource)
+        self.assertEqual(fleet.traders[0].market_data.directory, '/tmp/books')
+
+    def test_from_config_with_order_connections(self):
+        """
+        Test :meth:`Fleet.from_config`
+
+        Assert live traders share one pooled execution and paper traders
+        keep their own.
+        """
+
+        config = dict(FleetTestCase.CONFIG, order_connections=2)
+        config['traders'] = config['traders'] + [
+                {'product': 'ETH-USD', 'mode': 'paper'}]
+
+        fleet = Fleet.from_config(config, client=SimulatedClient())
+
+        self.assertEqual(fleet.execution.pool_size, 2)
+        self.assertIs(fleet.traders[0].execution, fleet.execution)
+        self.assertIs(fleet.traders[1].execution, fleet.execution)
+        self.assertIsNot(fleet.traders[3].execution, fleet.execution)
+
+        self.assertEqual(fleet.order_batch.workers, 2)
+        self.assertIs(fleet.traders[0].order_batch, fleet.order_batch)
+        self.assertIsNone(fleet.traders[3].order_batch)
+
+    def test_from_config_with_stats(self):
+        """
+        Test :meth:`Fleet.from_config`
+
+        Assert traders with `stats` record to a store in that directory.
+        """
+
+        config = {'traders': [{'product': 'BTC-USD', 'stats': '/tmp/stats'},
+                {'product': 'ETH-USD'}]}
+        fleet = Fleet.from_config(config, client=SimulatedClient())
+
+        stage, = fleet.traders[0].stages
+
+        self.assertIsInstance(stage, StatsStage)
+        self.assertEqual(stage.stats_store.directory, '/tmp/stats')
+        self.assertEqual(fleet.traders[1].stages, [])
+
+    def test_from_config_with_stages(self):
+        """
+        Test :meth:`Fleet.from_config`
+
+        Assert trader stages are added in the order they must run, with the
+        checkpoint restored before strategies are warmed up from the archive.
+        """
+
+        fleet = Fleet.from_config({'traders': [{'product': 'BTC-USD',
+                'stats': '/tmp/stats', 'book_archive': '/tmp/archive',
+                'checkpoint': '/tmp/checkpoint', 'response_cache': True}]},
+                client=SimulatedClient())
+
+        self.assertEqual([type(stage) for stage in fleet.traders[0].stages],
+                [ResponseCacheStage, CheckpointStage, BookArchiveStage,
+                StatsStage])
+
+    def test_from_config_with_markout_horizons(self):
+        """
+        Test :meth:`Fleet.from_config`
+
+        Assert markout horizons shorter than the longest interval between
+        iterations are dropped.
+        """
+
+        def get_horizons(**config):
+            fleet = Fleet.from_config(dict(config,
+                    traders=[{'product': 'BTC-USD'}]),
+                    client=SimulatedClient())
+
+            return fleet.traders[0].analytics.horizons
+
+        self.assertEqual(get_horizons(frequency=1), (1, 10))
+        self.assertEqual(get_horizons(frequency=5), (10,))
+        self.assertEqual(get_horizons(), (Fleet.FREQUENCY,))
+        self.assertEqual(get_horizons(frequency=1, schedule={
+                'max_interval': 30}), (30,))
+
+    def test_from_config_with_invalid_config(self):
+        """
+        Test :meth:`Fleet.from_config`
+
+        Assert a `ValueError` is raised for unsupported modes, unknown
+        strategies, unknown parameters and missing traders.
+        """
+
+        client = SimulatedClient()
+
+        configs = [
+            {'traders': [{'product': 'BTC-USD', 'mode': 'unknown'}]},
+            {'traders': [{'product': 'BTC-USD', 'level': 1}]},
+            {'traders': [{'product': 'BTC-USD', 'mode': 'backtest'}]},
+            {'traders': [{'product': 'BTC-USD',
+                'strategies': [{'class': 'missing.Strategy'}]}]},
+            {'traders': [{'product': 'BTC-USD',
+                'strategies': [{'class': 'order_book_imbalance.Missing'}]}]},
+            {'traders': [{'product': 'BTC-USD',
+                'strategies': [{'class': 'order_book_imbalance.OBIStrategy',
+                    'parameters': {'MISSING': 1}}]}]},
+            {'traders': []},
+            {'traders': [{'product': 'BTC-USD',
+                'risk': {'max_leverage': 1}}]},
+            {'profile': {'path': '/tmp'},
+                'traders': [{'product': 'BTC-USD'}]},
+            {'schedule': {'interval': 1},
+                'traders': [{'product': 'BTC-USD'}]},
+            {'market_data': 'unknown',
+                'traders': [{'product': 'BTC-USD'}]},
+            {'market_data': 'shared',
+                'traders': [{'product': 'BTC-USD', 'level': 3}]},
+        ]
+
+        for config in configs:
+            with self.assertRaises(ValueError):
+                Fleet.from_config(config, client=client)
+
+    def test_from_config_with_backtest(self):
+        """
+        Test :meth:`Fleet.from_config`
+
+        Assert backtest traders replay their archive with simulated
+        balances, sharing the replay of the same archive, whatever the
+        market data of the other traders.
+        """
+
+        fleet = Fleet.from_config({'market_data': 'websocket', 'traders': [
+            {'product': 'BTC-USD', 'mode': 'backtest', 'replay': '/tmp/a',
+                    'balances': {'USD': '50'}},
+            {'product': 'BTC-USD', 'mode': 'backtest', 'replay': '/tmp/a'},
+            {'product': 'BTC-USD', 'mode': 'backtest', 'replay': '/tmp/b'},
+            {'product': 'BTC-USD'},
+        ]}, client=SimulatedClient())
+
+        first, second, other, live = fleet.traders
+
+        self.assertIsInstance(first.market_data, ReplaySource)
+        self.assertEqual(first.market_data.book_archive.directory, '/tmp/a')
+        self.assertIs(second.market_data, first.market_data)
+        self.assertIsNot(other.market_data, first.market_data)
+        self.assertIsNot(live.market_data, first.market_data)
+
+        self.assertIsInstance(first.execution, PaperExecution)
+        self.assertEqual([account['balance'] for account
+                in first.execution.get_accounts()], ['50'])
+        self.assertIsNone(first.order_batch)
+
+    @patch('utils.rate_limiter')
+    @patch('fleet.time.sleep')
+    def test_run_with_backtest(self, sleep, rate_limiter):
+        """
+        Test :meth:`Fleet.run`
+
+        Assert a backtest replays every archived order book without
+        sleeping and stops once the archive is replayed.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            archive = BookArchive(directory)
+
+            for price in (100, 101, 102):
+                archive.append('BTC-USD', {
+                    'sequence': price,
+                    'bids': [[str(price - 1), '1', 1]],
+                    'asks': [[str(price + 1), '1', 1]],
+                }, timestamp=price)
+
+            archive.close()
+
+            fleet = Fleet.from_config({'traders': [
+                {'product': 'BTC-USD', 'mode': 'backtest',
+                        'replay': directory, 'strategies': [
+                    {'class': 'order_book_imbalance.OBIStrategy'},
+                ]},
+            ]}, client=SimulatedClient())
+
+            trader = fleet.traders[0]
+            trader._process_data = MagicMock(wraps=trader._process_data)
+
+            with self.assertLogs(level='WARNING'):
+                fleet.run()
+
+        self.assertEqual(trader._process_data.call_count, 3)
+        self.assertEqual(trader.strategies[0].order_book_imbalance[-1], 0)
+        sleep.assert_not_called()
+
+    @patch('utils.time.sleep')
+    def test__run_iteration_shares_data(self, sleep):
+        """
+        Test :meth:`Fleet._run_iteration`
+
+        Assert accounts are fetched once and each product's order book is
+        fetched once for every trader.
+        """
+
+        client = SimulatedClient()
+        fleet = Fleet.from_config(FleetTestCase.CONFIG, client=client)
+
+        for trader in fleet.traders:
+            trader._process_data = MagicMock(return_value=True)
+
+        client.get_accounts = MagicMock(wraps=client.get_accounts)
+        client.get_product_order_book = MagicMock(
+                wraps=client.get_product_order_book)
+
+        updated = fleet._run_iteration()
+
+        self.assertEqual(updated, 3)
+        self.assertEqual(client.get_accounts.call_count, 1)
+        self.assertEqual(client.get_product_order_book.call_count, 2)
+
+    @patch('utils.time.sleep')
+    def test__run_iteration_updates_products_at_once(self, sleep):
+        """
+        Test :meth:`Fleet._run_iteration`
+
+        Assert the traders of different products are updated at once, and
+        the traders of one product in order.
+        """
+
+        fleet = Fleet.from_config(FleetTestCase.CONFIG,
+                client=SimulatedClient())
+
+        calls = []
+
+        def process_data(trader):
+            def process(*args):
+                calls.append((trader.product, threading.get_ident()))
+                return True
+
+            return process
+
+        for trader in fleet.traders:
+            trader._process_data = process_data(trader)
+
+        self.assertEqual(fleet._run_iteration(), 3)
+        self.assertEqual(sorted(product for product, _ in calls),
+                ['BTC-USD', 'BTC-USD', 'ETH-USD'])
+
+        threads = {product: {thread for other, thread in calls
+                if other == product} for product, _ in calls}
+
+        self.assertEqual(len(threads['BTC-USD']), 1)
+        self.assertNotIn(threading.get_ident(), threads['ETH-USD'])
+
+        fleet.order_batch.close()
+
+    @patch('utils.time.sleep')
+    def test__run_iteration_with_paper_trader(self, sleep):
+        """
+        Test :meth:`Fleet._run_iteration`
+
+        Assert paper traders get their own simulated accounts while sharing
+        order books with live traders.
+        """
+
+        client = SimulatedClient()
+        fleet = Fleet.from_config({'traders': [
+            {'product': 'BTC-USD', 'strategies': []},
+            {'product': 'BTC-USD', 'mode': 'paper',
+                    'balances': {'USD': '50'}, 'strategies': []},
+        ]}, client=client)
+
+        live, paper = fleet.traders
+
+        self.assertIsNone(live.execution)
+        self.assertIsNotNone(paper.execution)
+
+        live._process_data = MagicMock(return_value=True)
+        paper._process_data = MagicMock(return_value=True)
+
+        client.get_product_order_book = MagicMock(
+                wraps=client.get_product_order_book)
+
+        self.assertEqual(fleet._run_iteration(), 2)
+        self.assertEqual(client.get_product_order_book.call_count, 1)
+
+        live_accounts = live._process_data.call_args[0][0]
+        paper_accounts = paper._process_data.call_args[0][0]
+
+        self.assertEqual(len(live_accounts), 2)
+        self.assertEqual([account['balance'] for account in paper_accounts],
+                ['50'])
+
+    @patch('utils.rate_limiter')
+    @patch('utils.time.sleep')
+    def test__run_iteration_with_schedule(self, sleep, rate_limiter):
+        """
+        Test :meth:`Fleet._run_iteration`
+
+        Assert the scheduler measures the book of every product once and
+        counts the order actions sent through the order batch, with a
+        request budget of the shared rate limiter.
+        """
+
+        fleet = Fleet.from_config(dict(FleetTestCase.CONFIG,
+                schedule={'min_interval': 0, 'max_interval': 60}),
+                client=SimulatedClient(depth=5))
+
+        scheduler = fleet.scheduler
+        scheduler.measure = MagicMock(wraps=scheduler.measure)
+        scheduler.interval = 1
+
+        self.assertEqual(fleet._run_iteration(), 3)
+
+        self.assertEqual(sorted(call[1]['key'] for call
+                in scheduler.measure.call_args_list), ['BTC-USD', 'ETH-USD'])
+        # Accounts, one book per product and the orders of each trader
+        self.assertEqual(scheduler.requests_per_iteration, 6)
+        # The static books back off, but no further than the budget allows
+        self.assertEqual(scheduler.interval, 6 / (scheduler.request_rate
+                * scheduler.utilisation))
+
+        fleet.traders[0].buy(Decimal('1.00'), Decimal('1'), 'BTC-USD')
+
+        fleet._run_iteration()
+
+        self.assertGreater(scheduler.get_order_rate(), 0)
+
+        fleet.order_batch.close()
+
+    @patch('utils.rate_limiter')
+    @patch('utils.time.sleep')
+    def test__run_iteration_with_response_cache(self, sleep, rate_limiter):
+        """
+        Test :meth:`Fleet._run_iteration`
+
+        Assert traders with `response_cache` set skip the strategy update
+        when the shared book and accounts are unchanged, while other traders
+        of the product still update.
+        """
+
+        client = SimulatedClient()
+        fleet = Fleet.from_config({'traders': [
+            {'product': 'BTC-USD', 'response_cache': True, 'strategies': [
+                {'class': 'order_book_imbalance.OBIStrategy'}]},
+            {'product': 'BTC-USD', 'strategies': [
+                {'class': 'order_book_imbalance.OBIStrategy'}]},
+        ]}, client=client)
+
+        cached, uncached = fleet.traders
+
+        stage, = cached.stages
+
+        self.assertIsInstance(stage, ResponseCacheStage)
+        self.assertEqual(uncached.stages, [])
+
+        # The same book is fetched every iteration
+        client.get_product_order_book = MagicMock(
+                return_value=client.get_product_order_book('BTC-USD', level=2))
+
+        cached.strategies[0].next = MagicMock()
+        uncached.strategies[0].next = MagicMock()
+
+        fleet._run_iteration()
+        fleet._run_iteration()
+
+        self.assertEqual(cached.strategies[0].next.call_count, 1)
+        self.assertEqual(uncached.strategies[0].next.call_count, 2)
+        self.assertEqual(stage.response_cache.get_summary()[
+                ResponseCache.ITERATIONS], 1)
+
+        fleet.order_batch.close()
+
+    @patch('utils.time.sleep')
+    def test__run_iteration_shares_trades(self, sleep):
+        """
+        Test :meth:`Fleet._run_iteration`
+
+        Assert trades are fetched once per product for the traders polling
+        them.
+        """
+
+        client = SimulatedClient()
+        fleet = Fleet.from_config({'traders': [
+            {'product': 'BTC-USD', 'trades': True, 'strategies': []},
+            {'product': 'BTC-USD', 'trades': True, 'strategies': []},
+            {'product': 'BTC-USD', 'strategies': []},
+        ]}, client=client)
+
+        client.get_product_trades = MagicMock(
+                wraps=client.get_product_trades)
+
+        self.assertEqual(fleet._run_iteration(), 3)
+        self.assertEqual(client.get_product_trades.call_count, 1)
+        self.assertIsNone(fleet.traders[2].trade_feed)
@@ -1,8 +1,20 @@
+from decimal import Decimal
 from requests.exceptions import ConnectionError
 import unittest
 from unittest.mock import patch, MagicMock
 
+from book_decoder import BookDecoder
+from book_snapshot import BookPublisher
 from gdax_trader import GDAXTrader
+from l3_book import L3Book
+from market_data import ReplaySource, WebsocketSource
+from paper_execution import PaperExecution
+from risk import RiskEngine
+from scheduler import AdaptiveScheduler
+from simulated_client import SimulatedClient
+from stages import Stage
+from trade_feed import TradeFeed
+from utils import RateLimiter
 
 
 class GDAXTraderTestCase(unittest.TestCase):
@@ -12,6 +24,20 @@ class GDAXTraderTestCase(unittest.TestCase):
     Methods:
         - :meth:`GDAXTrader._run_iteration`
         - :meth:`GDAXTrader._get_client`
+        - :meth:`GDAXTrader._check_memory`
+        - :meth:`GDAXTrader.add_strategy`
+        - :meth:`GDAXTrader.get_fills`
+        - :meth:`GDAXTrader.set_execution`
+        - :meth:`GDAXTrader.get_queue_position`
+        - :meth:`GDAXTrader.set_trade_feed`
+        - :meth:`GDAXTrader.set_l3_book`
+        - :meth:`GDAXTrader.set_book_publisher`
+        - :meth:`GDAXTrader._sync_clock`
+        - :meth:`GDAXTrader.set_book_decoder`
+        - :meth:`GDAXTrader.set_market_data`
+        - :meth:`GDAXTrader.set_risk`
+        - :meth:`GDAXTrader.set_scheduler`
+        - :meth:`GDAXTrader.add_stage`
     """
 
     @patch('gdax_trader.GDAXTrader._get_client')
@@ -38,6 +64,35 @@ class GDAXTraderTestCase(unittest.TestCase):
         self.assertEqual(strategy.next.call_count, 1)
         self.assertTrue(result)
 
+    @patch('gdax_trader.GDAXTrader._get_client')
+    def test__run_iteration_with_reconciler(self, client):
+        """
+        Test :meth:`GDAXTrader._run_iteration`
+
+        Assert orders are reconciled before strategies are updated.
+        """
+
+        trader = GDAXTrader()
+
+        strategy = MagicMock()
+        trader.add_strategy(strategy)
+
+        calls = MagicMock()
+        reconciler = calls.reconciler
+        reconciler.reconcile.return_value = ([], [])
+        strategy.next = calls.next
+        trader.set_reconciler(reconciler)
+
+        trader._get_accounts = MagicMock()
+        trader._get_order_book = MagicMock()
+
+        result = trader._run_iteration()
+
+        self.assertTrue(result)
+        self.assertTrue(strategy.orders_reconciled)
+        self.assertEqual([name for name, args, kwargs in calls.mock_calls],
+                ['reconciler.reconcile', 'next'])
+
     @patch('gdax_trader.GDAXTrader._get_client')
     def test__run_iteration_with_account_error(self, client):
         """
@@ -83,6 +138,674 @@ class GDAXTraderTestCase(unittest.TestCase):
         self.assertEqual(strategy.next.call_count, 0)
         self.assertFalse(result)
 
+    @patch('utils.time.sleep')
+    def test__run_iteration_with_simulated_client(self, sleep):
+        """
+        Test :meth:`GDAXTrader._run_iteration`
+
+        Assert account and order book data from the client reach every
+        strategy and `True` is returned.
+        """
+
+        trader = GDAXTrader(client=SimulatedClient(depth=5))
+        trader.set_product('BTC-USD')
+
+        strategy = MagicMock()
+        trader.add_strategy(strategy)
+
+        result = trader._run_iteration()
+
+        accounts, bid_orders, ask_orders = strategy.next_data.call_args[0]
+
+        self.assertTrue(result)
+        self.assertEqual(len(accounts), 2)
+        self.assertEqual(len(bid_orders), 5)
+        self.assertEqual(len(ask_orders), 5)
+        self.assertEqual(strategy.next.call_count, 1)
+
+    @patch('gdax_trader.get_rss', return_value=1000)
+    @patch('gdax_trader.GDAXTrader._get_client')
+    def test__check_memory_within_budget(self, client, get_rss):
+        """
+        Test :meth:`GDAXTrader._check_memory`
+
+        Assert `True` is returned when every budget is respected.
+        """
+
+        trader = GDAXTrader()
+        trader.RSS_BUDGET = 2000
+
+        strategy = MagicMock()
+        strategy.memory_report.return_value = {'history': 10}
+        trader.add_strategy(strategy)
+
+        self.assertTrue(trader._check_memory())
+
+    @patch('gdax_trader.get_rss', return_value=1000)
+    @patch('gdax_trader.GDAXTrader._get_client')
+    def test__check_memory_over_budget(self, client, get_rss):
+        """
+        Test :meth:`GDAXTrader._check_memory`
+
+        Assert a warning is logged and `False` is returned when a strategy
+        exceeds its memory budget.
+        """
+
+        trader = GDAXTrader()
+
+        strategy = MagicMock()
+        strategy.memory_report.return_value = {
+            'history': GDAXTrader.STRATEGY_MEMORY_BUDGET + 1,
+        }
+        trader.add_strategy(strategy)
+
+        with self.assertLogs(level='WARNING'):
+            self.assertFalse(trader._check_memory())
+
+    @patch('gdax_trader.GDAXTrader._get_client')
+    def test_add_strategy_with_duplicate_name(self, client):
+        """
+        Test :meth:`GDAXTrader.add_strategy`
+
+        Assert strategies with the same name are renamed to keep their saved
+        state apart.
+        """
+
+        trader = GDAXTrader()
+
+        first = MagicMock()
+        first.name = 'strategy'
+        second = MagicMock()
+        second.name = 'strategy'
+        trader.add_strategy(first)
+        trader.add_strategy(second)
+
+        self.assertEqual(first.name, 'strategy')
+        self.assertEqual(second.name, 'strategy-1')
+
+    @patch('utils.time.sleep')
+    def test_get_fills(self, sleep):
+        """
+        Test :meth:`GDAXTrader.get_fills`
+
+        Assert fill pages are flattened and error pages are skipped.
+        """
+
+        client = MagicMock()
+        client.get_fills.return_value = [
+            [{'trade_id': 2}],
+            {'message': 'error'},
+            [{'trade_id': 1}],
+        ]
+
+        trader = GDAXTrader(client=client)
+
+        with self.assertLogs(level='WARNING'):
+            fills = trader.get_fills(before=1)
+
+        self.assertEqual(fills, [{'trade_id': 2}, {'trade_id': 1}])
+
+    @patch('utils.time.sleep')
+    def test_get_orders_with_error_page(self, sleep):
+        """
+        Test :meth:`GDAXTrader.get_orders`
+
+        Assert an error page raises instead of returning too few orders.
+        """
+
+        client = MagicMock()
+        client.get_orders.return_value = [[{'id': '1'}],
+                {'message': 'rate limit exceeded'}]
+
+        trader = GDAXTrader(client=client)
+
+        with self.assertLogs(level='WARNING'):
+            with self.assertRaises(ConnectionError):
+                trader.get_orders()
+
+    @patch('utils.time.sleep')
+    def test_get_fills_page(self, sleep):
+        """
+        Test :meth:`GDAXTrader.get_fills_page`
+
+        Assert one page of the product's fills newer than the cursor is
+        returned, and an error response raises.
+        """
+
+        client = SimulatedClient(depth=5,
+                balances={'USD': '100000', 'BTC': '10'})
+        trader = GDAXTrader(client=client)
+        trader.set_product('BTC-USD')
+
+        for trade_id in range(1, 5):
+            client.fills.append({'trade_id': trade_id, 'order_id': '1',
+                    'product_id': 'BTC-USD'})
+
+        trader.FILL_PAGE_SIZE = 2
+
+        self.assertEqual([fill['trade_id']
+                for fill in trader.get_fills_page()], [4, 3])
+        self.assertEqual([fill['trade_id']
+                for fill in trader.get_fills_page(before=1)], [3, 2])
+
+        trader.set_execution(MagicMock())
+        trader.execution.get_fills_page.return_value = {'message': 'error'}
+
+        with self.assertLogs(level='WARNING'):
+            with self.assertRaises(ConnectionError):
+                trader.get_fills_page()
+
+    @patch('utils.time.sleep')
+    def test_set_execution(self, sleep):
+        """
+        Test :meth:`GDAXTrader.set_execution`
+
+        Assert orders and accounts use the execution while order books still
+        come from the client and are matched by the execution.
+        """
+
+        client = SimulatedClient(depth=5)
+        client.buy = MagicMock()
+
+        trader = GDAXTrader(client=client)
+        trader.set_product('BTC-USD')
+        trader.set_execution(PaperExecution(balances={'USD': '100'}))
+
+        strategy = MagicMock()
+        trader.add_strategy(strategy)
+
+        self.assertTrue(trader._run_iteration())
+
+        accounts = strategy.next_data.call_args[0][0]
+
+        self.assertEqual([account['currency'] for account in accounts],
+                ['USD'])
+        self.assertIn('BTC-USD', trader.execution.order_books)
+
+        order = trader.buy(Decimal('1.00'), Decimal('1'), 'BTC-USD')
+
+        self.assertEqual(order['status'], 'open')
+        self.assertEqual(list(trader.get_orders()), [order['id']])
+        self.assertEqual(client.buy.call_count, 0)
+
+    @patch('gdax_trader.GDAXTrader._get_client')
+    def test_get_queue_position(self, client):
+        """
+        Test :meth:`GDAXTrader.get_queue_position`
+
+        Assert tracked orders are queued from the order book, updated by new
+        books and forgotten once the book quotes through them.
+        """
+
+        trader = GDAXTrader()
+        trader.set_product('BTC-USD')
+
+        trader._update_queue(*trader._parse_order_book({
+            'bids': [['100.00', '5', 2], ['99.00', '3', 1]],
+            'asks': [['101.00', '4', 1]],
+        }))
+
+        trader.track_order({'id': 'a', 'side': 'buy', 'price': '100.00',
+                'size': '1', 'filled_size': '0'}, MagicMock())
+
+        self.assertEqual(trader.get_queue_position('a'), 4.0)
+
+        trader._update_queue(*trader._parse_order_book({
+            'bids': [['100.00', '3', 2]],
+            'asks': [['101.00', '4', 1]],
+        }))
+
+        self.assertEqual(trader.get_queue_position('a'), 2.0)
+
+        trader._update_queue(*trader._parse_order_book({
+            'bids': [['99.00', '3', 1]],
+            'asks': [['100.00', '4', 1]],
+        }))
+
+        self.assertIsNone(trader.get_queue_position('a'))
+
+    @patch('utils.time.sleep')
+    def test_set_trade_feed(self, sleep):
+        """
+        Test :meth:`GDAXTrader.set_trade_feed`
+
+        Assert trades are polled every iteration, added to the feed once and
+        passed to the paper execution, and the feed is shared with
+        strategies.
+        """
+
+        client = SimulatedClient(depth=5)
+
+        trader = GDAXTrader(client=client)
+        trader.set_product('BTC-USD')
+
+        strategy = MagicMock()
+        trader.add_strategy(strategy)
+
+        execution = PaperExecution()
+        execution.update_trades = MagicMock(wraps=execution.update_trades)
+        trader.set_execution(execution)
+        trader.set_trade_feed(TradeFeed())
+
+        self.assertIs(strategy.trades, trader.trade_feed)
+
+        for _ in range(5):
+            self.assertTrue(trader._run_iteration())
+
+        trade_ids = [trade['trade_id']
+                for call in execution.update_trades.call_args_list
+                for trade in call[0][1]]
+
+        self.assertEqual(trade_ids, sorted(set(trade_ids)))
+        self.assertEqual(trader.trade_feed.last_trade_id,
+                client.trades[-1]['trade_id'])
+
+    @patch('utils.time.sleep')
+    def test__run_iteration_with_trade_error(self, sleep):
+        """
+        Test :meth:`GDAXTrader._run_iteration`
+
+        Assert strategies are still updated when trades are unavailable.
+        """
+
+        client = SimulatedClient(depth=5)
+        client.get_product_trades = MagicMock(side_effect=ConnectionError)
+
+        trader = GDAXTrader(client=client)
+        trader.set_product('BTC-USD')
+        trader.set_trade_feed(TradeFeed())
+
+        strategy = MagicMock()
+        trader.add_strategy(strategy)
+
+        with self.assertLogs(level='WARNING'):
+            self.assertTrue(trader._run_iteration())
+
+        self.assertEqual(strategy.next.call_count, 1)
+
+    @patch('utils.time.sleep')
+    def test_set_l3_book(self, sleep):
+        """
+        Test :meth:`GDAXTrader.set_l3_book`
+
+        Assert level 3 books are fetched into the book and strategies receive
+        its level 2 aggregate.
+        """
+
+        client = SimulatedClient(depth=5)
+        client.get_product_order_book = MagicMock(
+                wraps=client.get_product_order_book)
+
+        trader = GDAXTrader(client=client)
+        trader.set_product('BTC-USD')
+        trader.set_l3_book(L3Book())
+
+        strategy = MagicMock()
+        trader.add_strategy(strategy)
+
+        self.assertTrue(trader._run_iteration())
+
+        client.get_product_order_book.assert_called_with('BTC-USD', level=3)
+
+        accounts, bid_orders, ask_orders = strategy.next_data.call_args[0]
+
+        self.assertEqual(len(bid_orders), 5)
+        self.assertEqual(len(ask_orders), 5)
+        self.assertEqual(sum(bid_orders['num-orders']),
+                len(trader.l3_book.orders) - sum(ask_orders['num-orders']))
+
+    @patch('utils.time.sleep')
+    def test_set_l3_book_with_feed(self, sleep):
+        """
+        Test :meth:`GDAXTrader.set_l3_book`
+
+        Assert a book kept current by a feed is loaded from one snapshot,
+        then from the feed's messages, until it needs another snapshot.
+        """
+
+        client = SimulatedClient(depth=5)
+        client.get_product_order_book = MagicMock(
+                wraps=client.get_product_order_book)
+
+        l3_book = L3Book()
+
+        trader = GDAXTrader(client=client)
+        trader.set_product('BTC-USD')
+        trader.set_l3_book(l3_book)
+        trader.set_market_data(WebsocketSource(['BTC-USD'],
+                l3_books={'BTC-USD': l3_book}))
+
+        strategy = MagicMock()
+        trader.add_strategy(strategy)
+
+        self.assertTrue(trader._run_iteration())
+
+        client.get_product_order_book.assert_called_once_with('BTC-USD',
+                level=3)
+
+        order_id = next(iter(l3_book.orders))
+
+        trader.market_data.handle_message({
+            'type': 'done',
+            'product_id': 'BTC-USD',
+            'sequence': l3_book.sequence + 1,
+            'order_id': order_id,
+        })
+
+        self.assertTrue(trader._run_iteration())
+
+        self.assertEqual(client.get_product_order_book.call_count, 1)
+        self.assertNotIn(order_id, l3_book.orders)
+
+        l3_book.needs_snapshot = True
+
+        self.assertTrue(trader._run_iteration())
+
+        self.assertEqual(client.get_product_order_book.call_count, 2)
+        self.assertFalse(l3_book.needs_snapshot)
+
+    @patch('utils.time.sleep')
+    def test_set_book_publisher(self, sleep):
+        """
+        Test :meth:`GDAXTrader.set_book_publisher`
+
+        Assert strategies receive the sides of the published snapshot.
+        """
+
+        trader = GDAXTrader(client=SimulatedClient(depth=5))
+        trader.set_product('BTC-USD')
+        trader.set_book_publisher(BookPublisher())
+
+        strategy = MagicMock()
+        trader.add_strategy(strategy)
+
+        self.assertTrue(trader._run_iteration())
+
+        accounts, bid_orders, ask_orders = strategy.next_data.call_args[0]
+        snapshot = trader.book_publisher.snapshot
+
+        self.assertIs(bid_orders, snapshot.bids)
+        self.assertIs(ask_orders, snapshot.asks)
+        self.assertEqual(len(bid_orders), 5)
+
+    @patch('utils.time.sleep')
+    def test_set_book_publisher_with_feed(self, sleep):
+        """
+        Test :meth:`GDAXTrader.set_book_publisher`
+
+        Assert a publisher written by the market data source is only read,
+        and strategies receive the sides of its latest snapshot.
+        """
+
+        publisher = BookPublisher()
+        market_data = WebsocketSource(['BTC-USD'],
+                book_publishers={'BTC-USD': publisher})
+        market_data.handle_message({
+            'type': 'snapshot',
+            'product_id': 'BTC-USD',
+            'bids': [['9.00', '1.0']],
+            'asks': [['11.00', '2.0']],
+        })
+
+        trader = GDAXTrader(client=SimulatedClient())
+        trader.set_product('BTC-USD')
+        trader.set_market_data(market_data)
+        trader.set_book_publisher(publisher)
+
+        strategy = MagicMock()
+        trader.add_strategy(strategy)
+
+        publisher.load_snapshot = MagicMock()
+
+        self.assertTrue(trader._run_iteration())
+
+        accounts, bid_orders, ask_orders = strategy.next_data.call_args[0]
+
+        publisher.load_snapshot.assert_not_called()
+        self.assertIs(bid_orders, publisher.snapshot.bids)
+        self.assertIs(ask_orders, publisher.snapshot.asks)
+
+    @patch('utils.time.sleep')
+    def test__sync_clock(self, sleep):
+        """
+        Test :meth:`GDAXTrader._sync_clock`
+
+        Assert the clock is synced on the first iteration only, and an
+        unavailable exchange time does not skip the iteration.
+        """
+
+        client = SimulatedClient(depth=5)
+        client.get_time = MagicMock(wraps=client.get_time)
+
+        trader = GDAXTrader(client=client)
+        trader.set_product('BTC-USD')
+
+        self.assertTrue(trader._run_iteration())
+        self.assertTrue(trader._run_iteration())
+
+        self.assertEqual(client.get_time.call_count, 1)
+        self.assertIsNotNone(trader.clock.synced_at)
+
+        trader.clock.synced_at = None
+        client.get_time.side_effect = ConnectionError
+
+        self.assertTrue(trader._run_iteration())
+        self.assertIsNone(trader.clock.synced_at)
+
+    @patch('utils.time.sleep')
+    def test_set_book_decoder(self, sleep):
+        """
+        Test :meth:`GDAXTrader.set_book_decoder`
+
+        Assert order book responses are decoded to the decoder's depth.
+        """
+
+        trader = GDAXTrader(client=SimulatedClient(depth=10))
+        trader.set_product('BTC-USD')
+        trader.set_book_decoder(BookDecoder(depth=5))
+
+        strategy = MagicMock()
+        trader.add_strategy(strategy)
+
+        self.assertTrue(trader._run_iteration())
+
+        accounts, bid_orders, ask_orders = strategy.next_data.call_args[0]
+
+        self.assertEqual(len(bid_orders), 5)
+        self.assertEqual(len(ask_orders), 5)
+        self.assertEqual(list(bid_orders.prices),
+                [float(price) for price in bid_orders['price']])
+
+    @patch('utils.rate_limiter', RateLimiter(rate=5, burst=10))
+    @patch('gdax_trader.time.sleep')
+    def test_set_market_data(self, sleep):
+        """
+        Test :meth:`GDAXTrader.set_market_data`
+
+        Assert a replay runs every archived book through the strategies
+        without sleeping between iterations, and the trader stops once it is
+        finished.
+        """
+
+        archive = MagicMock()
+        archive.read.return_value = [(sequence, {
+            'sequence': sequence,
+            'bids': [['10.00', '1.0', 1]],
+            'asks': [['11.00', '1.0', 1]],
+        }) for sequence in range(3)]
+
+        trader = GDAXTrader(client=SimulatedClient(depth=5))
+        trader.set_product('BTC-USD')
+        trader.set_market_data(ReplaySource(archive))
+
+        strategy = MagicMock()
+        trader.add_strategy(strategy)
+
+        trader.run()
+
+        self.assertEqual(strategy.next.call_count, 3)
+
+        # Only account requests are paced
+        for call in sleep.call_args_list:
+            self.assertEqual(call[0][0], GDAXTrader.RATE_LIMIT)
+
+    @patch('utils.time.sleep')
+    def test_set_risk(self, sleep):
+        """
+        Test :meth:`GDAXTrader.set_risk`
+
+        Assert orders beyond the limits are rejected without reaching the
+        execution, and tripping the kill switch cancels every open order.
+        """
+
+        trader = GDAXTrader(client=SimulatedClient(depth=5))
+        trader.set_product('BTC-USD')
+        trader.set_execution(PaperExecution(balances={'USD': '1000'}))
+        trader.set_risk(RiskEngine('BTC-USD', max_notional=100))
+
+        self.assertTrue(trader._run_iteration())
+
+        with self.assertLogs(level='WARNING'):
+            rejected = trader.buy(Decimal('1.00'), Decimal('200'), 'BTC-USD')
+
+        self.assertIn('message', rejected)
+        self.assertEqual(trader.get_orders(), {})
+
+        order = trader.buy(Decimal('1.00'), Decimal('50'), 'BTC-USD')
+
+        self.assertEqual(list(trader.get_orders()), [order['id']])
+
+        trader.risk.max_loss = 0
+        trader.risk.starting_equity = 2000
+
+        with self.assertLogs(level='WARNING'):
+            self.assertTrue(trader._run_iteration())
+
+        self.assertTrue(trader.risk.killed)
+        self.assertEqual(trader.get_orders(), {})
+
+    @patch('utils.time.sleep')
+    def test_set_risk_with_failed_cancel(self, sleep):
+        """
+        Test :meth:`GDAXTrader.set_risk`
+
+        Assert the kill switch is only latched once its cancel succeeds, and
+        a failed cancel is retried on the next iteration.
+        """
+
+        trader = GDAXTrader(client=SimulatedClient(depth=5))
+        trader.set_product('BTC-USD')
+        trader.set_execution(PaperExecution(balances={'USD': '1000'}))
+        trader.set_risk(RiskEngine('BTC-USD', max_loss=0))
+        trader.risk.starting_equity = 2000
+
+        cancel_all = trader.execution.cancel_all
+        trader.execution.cancel_all = MagicMock(
+                return_value={'message': 'rate limit exceeded'})
+
+        with self.assertLogs(level='WARNING'):
+            self.assertTrue(trader._run_iteration())
+
+        self.assertFalse(trader.risk.killed)
+        trader.execution.cancel_all.assert_called_once_with(product='BTC-USD')
+
+        trader.execution.cancel_all = MagicMock(wraps=cancel_all)
+
+        self.assertTrue(trader._run_iteration())
+
+        self.assertTrue(trader.risk.killed)
+        trader.execution.cancel_all.assert_called_once_with(product='BTC-USD')
+
+        # A latched kill switch does not cancel again
+        self.assertTrue(trader._run_iteration())
+        trader.execution.cancel_all.assert_called_once_with(product='BTC-USD')
+
+    @patch('utils.time.sleep')
+    def test_set_scheduler(self, sleep):
+        """
+        Test :meth:`GDAXTrader.set_scheduler`
+
+        Assert every order book updates the interval and order requests count
+        against the request budget.
+        """
+
+        trader = GDAXTrader(client=SimulatedClient(depth=5))
+        trader.set_product('BTC-USD')
+        trader.set_scheduler(AdaptiveScheduler(min_interval=0,
+                max_interval=60))
+        trader.scheduler.interval = 1
+
+        self.assertTrue(trader._run_iteration())
+        self.assertIsNotNone(trader.scheduler.mid)
+        self.assertNotEqual(trader.scheduler.interval, 1)
+
+        order = trader.buy(Decimal('1.00'), Decimal('1'), 'BTC-USD')
+        trader.cancel_order(order['id'])
+
+        self.assertGreater(trader.scheduler.get_summary()['order_rate'], 0)
+
+    @patch('utils.time.sleep')
+    def test_add_stage(self, sleep):
+        """
+        Test :meth:`GDAXTrader.add_stage`
+
+        Assert stages are run in the order they were added, around the
+        strategy update, with the level 2 book and the parsed sides.
+        """
+
+        trader = GDAXTrader(client=SimulatedClient(depth=5))
+        trader.set_product('BTC-USD')
+        trader.set_l3_book(L3Book())
+
+        calls = []
+
+        class RecordingStage(Stage):
+            def __init__(self, name):
+                self.name = name
+
+            def start(self, trader, ready):
+                calls.append((self.name, 'start'))
+
+            def receive(self, trader, iteration):
+                calls.append((self.name, 'receive'))
+
+            def process_book(self, trader, iteration):
+                calls.append((self.name, 'process_book'))
+                self.level = len(iteration.order_book['bids'][0])
+
+            def finish_iteration(self, trader, iteration):
+                calls.append((self.name, 'finish_iteration'))
+                self.sides = (iteration.bid_orders, iteration.ask_orders)
+
+            def stop(self, trader):
+                calls.append((self.name, 'stop'))
+
+        first = RecordingStage('first')
+        second = RecordingStage('second')
+        trader.add_stage(first)
+        trader.add_stage(second)
+
+        strategy = MagicMock()
+        strategy.next.side_effect = lambda: calls.append(('strategy',
+                'next'))
+        trader.add_strategy(strategy)
+
+        trader._start()
+        self.assertTrue(trader._run_iteration())
+        trader._finish()
+
+        self.assertEqual(calls, [
+            ('first', 'start'), ('second', 'start'),
+            ('first', 'receive'), ('second', 'receive'),
+            ('first', 'process_book'), ('second', 'process_book'),
+            ('strategy', 'next'),
+            ('first', 'finish_iteration'), ('second', 'finish_iteration'),
+            ('first', 'stop'), ('second', 'stop'),
+        ])
+        # Stages see the level 2 aggregate of the level 3 book
+        self.assertEqual(first.level, 3)
+        self.assertEqual(first.sides, trader._order_book)
+
     def test__get_client_with_env_and_api_url(self):
         """
         Test :meth:`GDAXTrader._get_client`
@@ -0,0 +1,135 @@
+import unittest
+
+from l3_book import L3Book
+
+
+class L3BookTestCase(unittest.TestCase):
+    """
+    Test :class:`L3Book`
+
+    Methods:
+        - :meth:`L3Book.load_snapshot`
+        - :meth:`L3Book.apply`
+        - :meth:`L3Book.get_queue_position`
+        - :meth:`L3Book.get_level2`
+    """
+
+    SNAPSHOT = {
+        'sequence': 10,
+        'bids': [
+            ['100.00', '1.0', 'a'],
+            ['100.00', '2.0', 'b'],
+            ['99.50', '3.0', 'c'],
+        ],
+        'asks': [
+            ['101.00', '1.5', 'd'],
+        ],
+    }
+
+    def _get_book(self):
+        book = L3Book(capacity=2)
+        book.load_snapshot(L3BookTestCase.SNAPSHOT)
+
+        return book
+
+    def test_load_snapshot(self):
+        """
+        Test :meth:`L3Book.load_snapshot`
+
+        Assert orders are indexed, queued in order and aggregated into level
+        2 levels, growing past the initial capacity.
+        """
+
+        book = self._get_book()
+
+        self.assertEqual(book.sequence, 10)
+        self.assertFalse(book.needs_snapshot)
+        self.assertGreaterEqual(book.capacity, 4)
+        self.assertEqual(book.get_order('b'), ('buy', 100.0, 2.0))
+        self.assertEqual(book.get_level('buy', 100.0), (3.0, 2))
+        self.assertEqual(book.get_best('buy'), 100.0)
+        self.assertEqual(book.get_best('sell'), 101.0)
+        self.assertEqual(book.get_level2(), {
+            'sequence': 10,
+            'bids': [['100.0', '3.00000000', 2], ['99.5', '3.00000000', 1]],
+            'asks': [['101.0', '1.50000000', 1]],
+        })
+
+    def test_apply(self):
+        """
+        Test :meth:`L3Book.apply`
+
+        Assert open, match, change and done messages update orders and
+        levels, and received messages leave the book unchanged.
+        """
+
+        book = self._get_book()
+
+        messages = [
+            {'type': 'received', 'sequence': 11, 'order_id': 'e'},
+            {'type': 'open', 'sequence': 12, 'order_id': 'e', 'side': 'buy',
+                    'price': '100.00', 'remaining_size': '4.0'},
+            {'type': 'match', 'sequence': 13, 'maker_order_id': 'a',
+                    'size': '0.25'},
+            {'type': 'change', 'sequence': 14, 'order_id': 'b',
+                    'new_size': '1.0'},
+            {'type': 'done', 'sequence': 15, 'order_id': 'c'},
+        ]
+
+        for message in messages:
+            self.assertTrue(book.apply(message))
+
+        self.assertEqual(book.sequence, 15)
+        self.assertEqual(book.get_level('buy', 100.0), (5.75, 3))
+        self.assertEqual(book.get_level('buy', 99.5), (0.0, 0))
+        self.assertEqual(book.prices['buy'], [100.0])
+        self.assertEqual(book.get_queue_position('e'), 1.75)
+
+    def test_apply_out_of_sequence(self):
+        """
+        Test :meth:`L3Book.apply`
+
+        Assert stale messages are ignored and a gap marks the book as needing
+        a snapshot until one is loaded.
+        """
+
+        book = self._get_book()
+
+        self.assertFalse(book.apply({'type': 'done', 'sequence': 10,
+                'order_id': 'a'}))
+        self.assertIsNotNone(book.get_order('a'))
+
+        with self.assertLogs(level='WARNING'):
+            self.assertFalse(book.apply({'type': 'done', 'sequence': 12,
+                    'order_id': 'a'}))
+
+        self.assertTrue(book.needs_snapshot)
+
+        book.load_snapshot(L3BookTestCase.SNAPSHOT)
+
+        self.assertTrue(book.apply({'type': 'done', 'sequence': 11,
+                'order_id': 'a'}))
+        self.assertIsNone(book.get_order('a'))
+
+    def test_slots_are_reused(self):
+        """
+        Test :meth:`L3Book.apply`
+
+        Assert removed orders free their slots for new orders.
+        """
+
+        book = L3Book(capacity=4)
+        book.load_snapshot({'sequence': 0, 'bids': [], 'asks': []})
+
+        for sequence in range(1, 1001):
+            order_id = str(sequence)
+
+            book.apply({'type': 'open', 'sequence': sequence * 2 - 1,
+                    'order_id': order_id, 'side': 'sell',
+                    'price': str(100 + sequence % 7), 'remaining_size': '1'})
+            book.apply({'type': 'done', 'sequence': sequence * 2,
+                    'order_id': order_id})
+
+        self.assertEqual(book.capacity, 4)
+        self.assertEqual(book.orders, {})
+        self.assertEqual(book.get_level2()['asks'], [])
@@ -0,0 +1,412 @@
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+from requests.exceptions import ConnectionError, ReadTimeout
+
+from book_archive import BookArchive
+from book_decoder import BookDecoder
+from book_snapshot import BookPublisher
+from l3_book import L3Book
+from market_data import (RestPollSource, WebsocketSource, ReplaySource,
+        SyntheticSource)
+from simulated_client import SimulatedClient
+
+
+class RestPollSourceTestCase(unittest.TestCase):
+    """
+    Test :class:`RestPollSource`
+
+    Methods:
+        - :meth:`RestPollSource.get_order_book`
+        - :meth:`RestPollSource.get_trades`
+    """
+
+    @patch('utils.time.sleep')
+    def test_get_order_book_with_decoder(self, sleep):
+        """
+        Test :meth:`RestPollSource.get_order_book`
+
+        Assert order book responses are decoded to the decoder's depth.
+        """
+
+        source = RestPollSource(SimulatedClient(depth=10),
+                book_decoder=BookDecoder(depth=5))
+
+        order_book = source.get_order_book('BTC-USD')
+
+        self.assertEqual(len(order_book['bids']), 5)
+        self.assertEqual(len(order_book['asks']), 5)
+
+    @patch('utils.rate_limiter')
+    @patch('utils.time.sleep')
+    @patch('market_data.requests.get', side_effect=ReadTimeout('read'))
+    def test_get_order_book_with_timeout(self, get, sleep, rate_limiter):
+        """
+        Test :meth:`RestPollSource.get_order_book`
+
+        Assert timed out order book requests are retried and raised as a
+        connection error once every attempt failed.
+        """
+
+        client = MagicMock(spec=['url'], url='https://api.gdax.com')
+        source = RestPollSource(client, book_decoder=BookDecoder())
+
+        with self.assertLogs(level='WARNING'):
+            with self.assertRaises(ConnectionError):
+                source.get_order_book('BTC-USD')
+
+        self.assertEqual(get.call_count, RestPollSource.MAX_RETRIES)
+
+    @patch('utils.rate_limiter')
+    @patch('utils.time.sleep')
+    def test_get_trades_with_timeout(self, sleep, rate_limiter):
+        """
+        Test :meth:`RestPollSource.get_trades`
+
+        Assert timed out trade requests are raised as a connection error.
+        """
+
+        client = MagicMock()
+        client.get_product_trades.side_effect = ReadTimeout('read')
+
+        source = RestPollSource(client)
+
+        with self.assertLogs(level='WARNING'):
+            with self.assertRaises(ConnectionError):
+                source.get_trades('BTC-USD')
+
+    @patch('utils.time.sleep')
+    def test_get_trades_with_error_response(self, sleep):
+        """
+        Test :meth:`RestPollSource.get_trades`
+
+        Assert an error message is returned as no trades.
+        """
+
+        client = MagicMock()
+        client.get_product_trades.return_value = {'message': 'error'}
+
+        source = RestPollSource(client)
+
+        with self.assertLogs(level='WARNING'):
+            self.assertEqual(source.get_trades('BTC-USD'), [])
+
+
+class WebsocketSourceTestCase(unittest.TestCase):
+    """
+    Test :class:`WebsocketSource`
+
+    Methods:
+        - :meth:`WebsocketSource.handle_message`
+        - :meth:`WebsocketSource.get_order_book`
+        - :meth:`WebsocketSource.get_trades`
+        - :meth:`WebsocketSource.load_l3_snapshot`
+    """
+
+    PRODUCT = 'BTC-USD'
+
+    L3_SNAPSHOT = {
+        'sequence': 10,
+        'bids': [['10.00', '1.0', 'a']],
+        'asks': [['11.00', '2.0', 'b']],
+    }
+
+    def _get_source(self):
+        source = WebsocketSource([WebsocketSourceTestCase.PRODUCT])
+        source.handle_message({
+            'type': 'snapshot',
+            'product_id': WebsocketSourceTestCase.PRODUCT,
+            'bids': [['9.00', '1.0'], ['10.00', '2.0']],
+            'asks': [['12.00', '1.0'], ['11.00', '2.0']],
+        })
+
+        return source
+
+    def test_get_order_book_without_snapshot(self):
+        """
+        Test :meth:`WebsocketSource.get_order_book`
+
+        Assert the book is unavailable until a snapshot is received.
+        """
+
+        source = WebsocketSource([WebsocketSourceTestCase.PRODUCT])
+
+        with self.assertRaises(ConnectionError):
+            source.get_order_book(WebsocketSourceTestCase.PRODUCT)
+
+    def test_handle_message_updates(self):
+        """
+        Test :meth:`WebsocketSource.handle_message`
+
+        Assert updates change and remove levels, and books are sorted best
+        price first.
+        """
+
+        source = self._get_source()
+        source.handle_message({
+            'type': 'l2update',
+            'product_id': WebsocketSourceTestCase.PRODUCT,
+            'changes': [['buy', '10.00', '0'], ['sell', '11.50', '3.0']],
+        })
+
+        order_book = source.get_order_book(WebsocketSourceTestCase.PRODUCT)
+
+        self.assertEqual(order_book['sequence'], 2)
+        self.assertEqual(order_book['bids'], [['9.00', '1.0', None]])
+        self.assertEqual(order_book['asks'], [['11.00', '2.0', None],
+                ['11.50', '3.0', None], ['12.00', '1.0', None]])
+
+    def test_handle_message_snapshot(self):
+        """
+        Test :meth:`WebsocketSource.handle_message`
+
+        Assert the sequence keeps increasing when a snapshot replaces the
+        book, and only the best `depth` levels are returned.
+        """
+
+        source = self._get_source()
+        source.depth = 1
+
+        sequence = source.get_order_book(
+                WebsocketSourceTestCase.PRODUCT)['sequence']
+
+        source.handle_message({
+            'type': 'snapshot',
+            'product_id': WebsocketSourceTestCase.PRODUCT,
+            'bids': [['8.00', '1.0'], ['9.50', '2.0']],
+            'asks': [['13.00', '1.0'], ['12.50', '2.0']],
+        })
+
+        order_book = source.get_order_book(WebsocketSourceTestCase.PRODUCT)
+
+        self.assertGreater(order_book['sequence'], sequence)
+        self.assertEqual(order_book['bids'], [['9.50', '2.0', None]])
+        self.assertEqual(order_book['asks'], [['12.50', '2.0', None]])
+
+    def test_handle_message_matches(self):
+        """
+        Test :meth:`WebsocketSource.handle_message`
+
+        Assert matches are returned as trades, newest first.
+        """
+
+        source = self._get_source()
+
+        for trade_id in range(3):
+            source.handle_message({
+                'type': 'match',
+                'product_id': WebsocketSourceTestCase.PRODUCT,
+                'trade_id': trade_id,
+                'time': '2017-01-01T00:00:00.000000Z',
+                'price': '10.00',
+                'size': '1.0',
+                'side': 'buy',
+            })
+
+        trades = source.get_trades(WebsocketSourceTestCase.PRODUCT)
+
+        self.assertEqual([trade['trade_id'] for trade in trades], [2, 1, 0])
+
+    def _open(self, sequence, order_id, price='10.00'):
+        return {
+            'type': 'open',
+            'product_id': WebsocketSourceTestCase.PRODUCT,
+            'sequence': sequence,
+            'order_id': order_id,
+            'side': 'buy',
+            'price': price,
+            'remaining_size': '1.0',
+        }
+
+    def test_load_l3_snapshot(self):
+        """
+        Test :meth:`WebsocketSource.load_l3_snapshot`
+
+        Assert `full` channel messages are buffered until a snapshot is
+        loaded, only those after the snapshot are applied, and later
+        messages are applied as they arrive.
+        """
+
+        l3_book = L3Book()
+        source = WebsocketSource([WebsocketSourceTestCase.PRODUCT],
+                l3_books={WebsocketSourceTestCase.PRODUCT: l3_book})
+
+        source.handle_message(self._open(10, 'early'))
+        source.handle_message(self._open(11, 'c'))
+
+        with self.assertRaises(ConnectionError):
+            source.get_order_book(WebsocketSourceTestCase.PRODUCT, level=3)
+
+        source.load_l3_snapshot(WebsocketSourceTestCase.PRODUCT,
+                WebsocketSourceTestCase.L3_SNAPSHOT)
+
+        self.assertEqual(sorted(l3_book.orders), ['a', 'b', 'c'])
+
+        source.handle_message({
+            'type': 'done',
+            'product_id': WebsocketSourceTestCase.PRODUCT,
+            'sequence': 12,
+            'order_id': 'a',
+        })
+
+        order_book = source.get_order_book(WebsocketSourceTestCase.PRODUCT,
+                level=3)
+
+        self.assertEqual(order_book['sequence'], 12)
+        self.assertEqual(order_book['bids'], [['10.0', '1.00000000', 1]])
+        self.assertEqual(source.get_queue_position(
+                WebsocketSourceTestCase.PRODUCT, 'c'), 0)
+
+    def test_handle_message_with_book_publisher(self):
+        """
+        Test :meth:`WebsocketSource.handle_message`
+
+        Assert level 2 messages of a product with a book publisher are
+        published as they arrive, updates only rebuild the changed levels,
+        and order books are read from the latest snapshot.
+        """
+
+        publisher = BookPublisher()
+        source = WebsocketSource([WebsocketSourceTestCase.PRODUCT], depth=2,
+                book_publishers={WebsocketSourceTestCase.PRODUCT: publisher})
+
+        self.assertIs(source.get_book_publisher(
+                WebsocketSourceTestCase.PRODUCT), publisher)
+
+        update = {
+            'type': 'l2update',
+            'product_id': WebsocketSourceTestCase.PRODUCT,
+            'changes': [['buy', '10.00', '0'], ['sell', '11.50', '3.0']],
+        }
+
+        # Updates before the snapshot are ignored
+        source.handle_message(update)
+
+        self.assertIsNone(publisher.snapshot)
+
+        with self.assertRaises(ConnectionError):
+            source.get_order_book(WebsocketSourceTestCase.PRODUCT)
+
+        source.handle_message({
+            'type': 'snapshot',
+            'product_id': WebsocketSourceTestCase.PRODUCT,
+            'bids': [['9.00', '1.0'], ['10.00', '2.0'], ['8.00', '4.0']],
+            'asks': [['12.00', '1.0'], ['11.00', '2.0']],
+        })
+
+        first = publisher.snapshot
+
+        source.handle_message(update)
+
+        second = publisher.snapshot
+
+        self.assertEqual(second.version, first.version + 1)
+        self.assertEqual(sorted(second.asks.levels.get_changes(
+                first.asks.levels)), [(11.5, 3.0)])
+        self.assertIs(second.bids.levels.chunks[0],
+                first.bids.levels.chunks[1])
+        self.assertEqual(source.get_order_book(
+                WebsocketSourceTestCase.PRODUCT), {
+            'sequence': 2,
+            'bids': [['9.00', '1.0', None], ['8.00', '4.0', None]],
+            'asks': [['11.00', '2.0', None], ['11.50', '3.0', None]],
+        })
+
+    def test_handle_message_with_l3_gap(self):
+        """
+        Test :meth:`WebsocketSource.handle_message`
+
+        Assert a gap in the `full` channel marks the book as needing a
+        snapshot, and messages from the gap on are applied after it.
+        """
+
+        l3_book = L3Book()
+        source = WebsocketSource([WebsocketSourceTestCase.PRODUCT],
+                l3_books={WebsocketSourceTestCase.PRODUCT: l3_book})
+        source.load_l3_snapshot(WebsocketSourceTestCase.PRODUCT,
+                WebsocketSourceTestCase.L3_SNAPSHOT)
+
+        with self.assertLogs(level='WARNING'):
+            source.handle_message(self._open(13, 'c'))
+
+        source.handle_message(self._open(14, 'd'))
+
+        self.assertTrue(l3_book.needs_snapshot)
+
+        source.load_l3_snapshot(WebsocketSourceTestCase.PRODUCT,
+                dict(WebsocketSourceTestCase.L3_SNAPSHOT, sequence=12))
+
+        self.assertFalse(l3_book.needs_snapshot)
+        self.assertEqual(l3_book.sequence, 14)
+        self.assertEqual(sorted(l3_book.orders), ['a', 'b', 'c', 'd'])
+
+
+class ReplaySourceTestCase(unittest.TestCase):
+    """
+    Test :class:`ReplaySource`
+
+    Methods:
+        - :meth:`ReplaySource.get_order_book`
+    """
+
+    PRODUCT = 'BTC-USD'
+
+    def test_get_order_book(self):
+        """
+        Test :meth:`ReplaySource.get_order_book`
+
+        Assert archived books are returned oldest first and the source is
+        finished once they are used up.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            archive = BookArchive(directory)
+
+            for sequence in range(3):
+                archive.append(ReplaySourceTestCase.PRODUCT, {
+                    'sequence': sequence,
+                    'bids': [['10.00', '1.0', 1]],
+                    'asks': [['11.00', '1.0', 1]],
+                }, timestamp=sequence)
+
+            archive.close()
+
+            source = ReplaySource(archive)
+
+            sequences = [source.get_order_book(ReplaySourceTestCase.PRODUCT)
+                    ['sequence'] for _ in range(3)]
+
+            self.assertFalse(source.finished)
+
+            with self.assertRaises(ConnectionError):
+                source.get_order_book(ReplaySourceTestCase.PRODUCT)
+
+        self.assertEqual(sequences, [0, 1, 2])
+        self.assertTrue(source.finished)
+        self.assertFalse(source.REALTIME)
+
+
+class SyntheticSourceTestCase(unittest.TestCase):
+    """
+    Test :class:`SyntheticSource`
+
+    Methods:
+        - :meth:`SyntheticSource.get_order_book`
+    """
+
+    @patch('utils.time.sleep')
+    def test_get_order_book_without_pacing(self, sleep):
+        """
+        Test :meth:`SyntheticSource.get_order_book`
+
+        Assert books are generated without the retry pacing sleep.
+        """
+
+        source = SyntheticSource(seed=1, depth=5)
+
+        for _ in range(3):
+            order_book = source.get_order_book('BTC-USD')
+
+        self.assertEqual(len(order_book['bids']), 5)
+        self.assertEqual(sleep.call_count, 0)
@@ -0,0 +1,162 @@
+from decimal import Decimal
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from requests.exceptions import ConnectionError
+
+from gdax_trader import GDAXTrader
+from order_batch import OrderBatch
+from simulated_client import SimulatedClient
+from utils import RateLimiter
+
+
+class OrderBatchTestCase(unittest.TestCase):
+    """
+    Test :class:`OrderBatch`
+
+    Methods:
+        - :meth:`OrderBatch.submit`
+        - :meth:`OrderBatch.send`
+        - :meth:`OrderBatch.map`
+        - :meth:`OrderBatch.get_summary`
+    """
+
+    def _get_trader(self, product, latency=0):
+        client = SimulatedClient(depth=5, latency=latency,
+                balances={'USD': '10000.00', 'BTC': '10', 'ETH': '10'})
+
+        trader = GDAXTrader(client=client)
+        trader.set_product(product)
+
+        return trader
+
+    def test_submit(self):
+        """
+        Test :meth:`OrderBatch.submit`
+
+        Assert actions are sent in parallel, within about the latency of one
+        request, and results are returned in the order actions were queued.
+        """
+
+        latency = 0.2
+        traders = [self._get_trader(product, latency=latency)
+                for product in ('BTC-USD', 'ETH-USD', 'LTC-USD')]
+
+        batch = OrderBatch(workers=3, rate_limiter=RateLimiter(rate=5,
+                burst=10))
+
+        batch.buy(traders[0], Decimal('100.00'), Decimal('1'), 'BTC-USD')
+        batch.sell(traders[1], Decimal('500.00'), Decimal('1'), 'ETH-USD')
+        batch.cancel_order(traders[2], 'missing')
+
+        self.assertEqual(len(batch), 3)
+
+        start = time.perf_counter()
+        results = batch.submit()
+        elapsed = time.perf_counter() - start
+
+        batch.close()
+
+        self.assertLess(elapsed, 2 * latency)
+        self.assertEqual(len(batch), 0)
+        self.assertEqual([result['action'] for result in results],
+                [OrderBatch.BUY, OrderBatch.SELL, OrderBatch.CANCEL])
+        self.assertEqual(results[0]['response']['side'], 'buy')
+        self.assertEqual(results[1]['response']['product_id'], 'ETH-USD')
+
+        for result in results:
+            self.assertGreaterEqual(result['latency'], latency)
+
+        summary = batch.get_summary()
+
+        self.assertEqual(summary[OrderBatch.BUY]['count'], 1)
+        self.assertEqual(summary[OrderBatch.CANCEL]['max'],
+                results[2]['latency'])
+
+    def test_submit_with_connection_error(self):
+        """
+        Test :meth:`OrderBatch.submit`
+
+        Assert failed actions are retried after waiting for the rate limiter,
+        and an action that keeps failing returns its error.
+        """
+
+        retried = self._get_trader('BTC-USD')
+        execution = MagicMock()
+        execution.buy.side_effect = [ConnectionError('reset'), {'id': 'order'}]
+        retried.set_execution(execution)
+
+        failed = self._get_trader('ETH-USD')
+        failed.set_execution(MagicMock())
+        failed.execution.cancel_order.side_effect = ConnectionError('reset')
+
+        rate_limiter = MagicMock()
+        batch = OrderBatch(rate_limiter=rate_limiter)
+
+        batch.buy(retried, Decimal('100.00'), Decimal('1'), 'BTC-USD')
+        batch.cancel_order(failed, 'order')
+
+        results = batch.submit()
+        batch.close()
+
+        self.assertEqual(results[0]['response'], {'id': 'order'})
+        self.assertIsInstance(results[1]['response'], ConnectionError)
+        self.assertEqual(failed.execution.cancel_order.call_count,
+                OrderBatch.MAX_RETRIES)
+        self.assertEqual(rate_limiter.acquire.call_count,
+                2 + OrderBatch.MAX_RETRIES)
+
+    def test_send(self):
+        """
+        Test :meth:`OrderBatch.send`
+
+        Assert a trader with the batch sends its orders through it, paced by
+        the rate limiter, and an action that keeps failing raises its error.
+        """
+
+        rate_limiter = MagicMock()
+        batch = OrderBatch(rate_limiter=rate_limiter)
+
+        trader = self._get_trader('BTC-USD')
+        trader.set_order_batch(batch)
+
+        order = trader.buy(Decimal('100.00'), Decimal('1'), 'BTC-USD')
+
+        self.assertEqual(order['side'], 'buy')
+        self.assertEqual(rate_limiter.acquire.call_count, 1)
+        self.assertEqual(batch.get_summary()[OrderBatch.BUY]['count'], 1)
+
+        trader.set_execution(MagicMock())
+        trader.execution.cancel_order.side_effect = ConnectionError('reset')
+
+        with self.assertLogs(level='WARNING'):
+            with self.assertRaises(ConnectionError):
+                trader.cancel_order(order['id'])
+
+        self.assertEqual(trader.execution.cancel_order.call_count,
+                OrderBatch.MAX_RETRIES)
+
+        batch.close()
+
+    def test_map(self):
+        """
+        Test :meth:`OrderBatch.map`
+
+        Assert items are processed at once and results keep their order.
+        """
+
+        batch = OrderBatch(workers=3)
+
+        def process(item):
+            time.sleep(0.1)
+            return item * 2
+
+        start = time.perf_counter()
+        results = batch.map(process, [1, 2, 3])
+        elapsed = time.perf_counter() - start
+
+        batch.close()
+
+        self.assertEqual(results, [2, 4, 6])
+        self.assertLess(elapsed, 0.25)
@@ -0,0 +1,63 @@
+import unittest
+
+from order_book import OrderBookSide
+
+
+class OrderBookSideTestCase(unittest.TestCase):
+    """
+    Test :class:`OrderBookSide`
+
+    Methods:
+        - :meth:`OrderBookSide.__getitem__`
+        - :meth:`OrderBookSide.prices`
+        - :meth:`OrderBookSide.sizes`
+        - :meth:`OrderBookSide.to_df`
+    """
+
+    LEVELS = [
+        ['10.00', '1.5', 2],
+        ['9.50', '0.25', 1],
+    ]
+
+    def test___getitem__(self):
+        """
+        Test :meth:`OrderBookSide.__getitem__`
+
+        Assert raw column values are returned and unknown columns raise a
+        `KeyError`.
+        """
+
+        side = OrderBookSide(OrderBookSideTestCase.LEVELS)
+
+        self.assertEqual(len(side), 2)
+        self.assertEqual(side['price'], ['10.00', '9.50'])
+        self.assertEqual(side['num-orders'], [2, 1])
+
+        with self.assertRaises(KeyError):
+            side['missing']
+
+    def test_prices_and_sizes(self):
+        """
+        Test :meth:`OrderBookSide.prices` and :meth:`OrderBookSide.sizes`
+
+        Assert numeric arrays are parsed from the raw levels.
+        """
+
+        side = OrderBookSide(OrderBookSideTestCase.LEVELS)
+
+        self.assertEqual(list(side.prices), [10.0, 9.5])
+        self.assertEqual(list(side.sizes), [1.5, 0.25])
+
+    def test_to_df(self):
+        """
+        Test :meth:`OrderBookSide.to_df`
+
+        Assert a DataFrame with the GDAX columns is returned.
+        """
+
+        side = OrderBookSide(OrderBookSideTestCase.LEVELS)
+
+        df = side.to_df()
+
+        self.assertEqual(list(df.columns), ['price', 'size', 'num-orders'])
+        self.assertEqual(list(df['price']), ['10.00', '9.50'])
@@ -0,0 +1,148 @@
+import unittest
+from unittest.mock import MagicMock
+
+from order_reconciler import OrderReconciler
+
+
+class OrderReconcilerTestCase(unittest.TestCase):
+    """
+    Test :class:`OrderReconciler`
+
+    Methods:
+        - :meth:`OrderReconciler.reconcile`
+    """
+
+    def _get_reconciler(self, open_orders, fills):
+        trader = MagicMock()
+        trader.get_orders.return_value = open_orders
+        trader.get_fills_page.return_value = fills
+        trader.FILL_PAGE_SIZE = 100
+
+        return OrderReconciler(trader)
+
+    def test_reconcile_unchanged(self):
+        """
+        Test :meth:`OrderReconciler.reconcile`
+
+        Assert nothing is dispatched when tracked orders are unchanged.
+        """
+
+        order = {'id': '1', 'filled_size': '0'}
+        reconciler = self._get_reconciler({'1': dict(order)}, [])
+
+        strategy = MagicMock()
+        reconciler.track(order, strategy)
+
+        self.assertEqual(reconciler.reconcile(), ([], []))
+        self.assertEqual(strategy.on_order_update.call_count, 0)
+        self.assertEqual(strategy.on_order_done.call_count, 0)
+
+    def test_reconcile_updated_and_done(self):
+        """
+        Test :meth:`OrderReconciler.reconcile`
+
+        Assert changed orders are updated, closed orders are done, and both
+        are dispatched to their owners with one request for each of orders
+        and fills.
+        """
+
+        first = MagicMock()
+        second = MagicMock()
+
+        reconciler = self._get_reconciler({
+            '1': {'id': '1', 'filled_size': '0'},
+            '2': {'id': '2', 'filled_size': '0'},
+        }, [{'trade_id': 1, 'order_id': 'earlier'}])
+        reconciler.track({'id': '1', 'filled_size': '0'}, first)
+        reconciler.track({'id': '2', 'filled_size': '0'}, second)
+
+        # The first fills only establish the cursor
+        self.assertEqual(reconciler.reconcile(), ([], []))
+        self.assertEqual(reconciler.fill_cursor, 1)
+
+        UPDATED_ORDER = {'id': '1', 'filled_size': '0.5'}
+        FILL = {'trade_id': 2, 'order_id': '2'}
+        reconciler.trader.get_orders.return_value = {'1': UPDATED_ORDER}
+        reconciler.trader.get_fills_page.return_value = [FILL,
+                {'trade_id': 1}]
+
+        updated, done = reconciler.reconcile()
+
+        self.assertEqual(updated, ['1'])
+        self.assertEqual(done, ['2'])
+        first.on_order_update.assert_called_with(UPDATED_ORDER, [])
+        second.on_order_done.assert_called_with('2', [FILL])
+        self.assertNotIn('2', reconciler.owners)
+        self.assertEqual(reconciler.fill_cursor, 2)
+        self.assertEqual(reconciler.trader.get_orders.call_count, 2)
+        self.assertEqual(reconciler.trader.get_fills_page.call_count, 2)
+        reconciler.trader.get_fills_page.assert_called_with(before=1)
+
+    def test_reconcile_within_interval(self):
+        """
+        Test :meth:`OrderReconciler.reconcile`
+
+        Assert no requests are made within `interval` of the last
+        reconciliation.
+        """
+
+        reconciler = self._get_reconciler({}, [])
+        reconciler.interval = 60
+        reconciler.track({'id': '1'}, MagicMock())
+
+        reconciler.reconcile()
+        reconciler.reconcile()
+
+        self.assertEqual(reconciler.trader.get_orders.call_count, 1)
+
+    def test_reconcile_without_tracked_orders(self):
+        """
+        Test :meth:`OrderReconciler.reconcile`
+
+        Assert no requests are made while no orders are tracked.
+        """
+
+        reconciler = self._get_reconciler({}, [])
+
+        self.assertEqual(reconciler.reconcile(), ([], []))
+        self.assertEqual(reconciler.trader.get_orders.call_count, 0)
+        self.assertEqual(reconciler.trader.get_fills_page.call_count, 0)
+
+    def test_reconcile_pages_fills(self):
+        """
+        Test :meth:`OrderReconciler.reconcile`
+
+        Assert full pages of fills are followed from the cursor until a page
+        is not full, and fills of orders tracked before the first request
+        are dispatched.
+        """
+
+        strategy = MagicMock()
+        order = {'id': '1', 'filled_size': '0'}
+
+        reconciler = self._get_reconciler({'1': dict(order)}, [])
+        reconciler.trader.FILL_PAGE_SIZE = 2
+        reconciler.track(order, strategy)
+
+        FIRST_FILL = {'trade_id': 5, 'order_id': '1'}
+        reconciler.trader.get_fills_page.return_value = [FIRST_FILL,
+                {'trade_id': 4, 'order_id': 'earlier'}]
+
+        reconciler.reconcile()
+
+        strategy.on_order_update.assert_called_with(order, [FIRST_FILL])
+
+        reconciler.trader.get_fills_page.reset_mock()
+        reconciler.trader.get_fills_page.side_effect = [
+            [{'trade_id': 7, 'order_id': '1'},
+                    {'trade_id': 6, 'order_id': '1'}],
+            [{'trade_id': 8, 'order_id': '1'}],
+        ]
+
+        reconciler.reconcile()
+
+        self.assertEqual([call[1]['before'] for call
+                in reconciler.trader.get_fills_page.call_args_list], [5, 7])
+        self.assertEqual(reconciler.fill_cursor, 8)
+        self.assertEqual([fill['trade_id'] for fill
+                in strategy.on_order_update.call_args[0][1]], [6, 7, 8])
@@ -0,0 +1,191 @@
+from decimal import Decimal
+import unittest
+
+from paper_execution import PaperExecution
+
+
+class PaperExecutionTestCase(unittest.TestCase):
+    """
+    Test :class:`PaperExecution`
+
+    Methods:
+        - :meth:`PaperExecution.buy`
+        - :meth:`PaperExecution.sell`
+        - :meth:`PaperExecution.cancel_order`
+        - :meth:`PaperExecution.update_book`
+        - :meth:`PaperExecution.update_trades`
+        - :meth:`PaperExecution.get_accounts`
+        - :meth:`PaperExecution.get_fills`
+    """
+
+    PRODUCT = 'BTC-USD'
+
+    ORDER_BOOK = {
+        'bids': [['99.00', '2', 1], ['98.00', '5', 3]],
+        'asks': [['101.00', '1', 1], ['102.00', '4', 2]],
+    }
+
+    def _get_execution(self):
+        execution = PaperExecution(balances={'USD': '1000', 'BTC': '2'})
+        execution.update_book(PaperExecutionTestCase.PRODUCT,
+                PaperExecutionTestCase.ORDER_BOOK)
+
+        return execution
+
+    def _get_balances(self, execution):
+        return {account['currency']: (Decimal(account['balance']),
+                Decimal(account['available']))
+                for account in execution.get_accounts()}
+
+    def test_buy(self):
+        """
+        Test :meth:`PaperExecution.buy`
+
+        Assert the order rests behind the size at its level and its funds are
+        held.
+        """
+
+        execution = self._get_execution()
+
+        order = execution.buy(price='99.00', size='1',
+                product_id=PaperExecutionTestCase.PRODUCT, post_only=True)
+
+        self.assertEqual(order['status'], 'open')
+        self.assertEqual(execution.queues['BTC-USD'].get_position(
+                order['id']), Decimal('2'))
+        self.assertEqual(self._get_balances(execution)['USD'],
+                (Decimal('1000'), Decimal('901')))
+
+    def test_buy_post_only_crossing_order(self):
+        """
+        Test :meth:`PaperExecution.buy`
+
+        Assert a post-only order that would take liquidity is rejected.
+        """
+
+        execution = self._get_execution()
+
+        order = execution.buy(price='101.00', size='1',
+                product_id=PaperExecutionTestCase.PRODUCT, post_only=True)
+
+        self.assertEqual(order['status'], 'rejected')
+        self.assertEqual(execution.get_orders(), [[]])
+
+    def test_sell_with_insufficient_funds(self):
+        """
+        Test :meth:`PaperExecution.sell`
+
+        Assert an error message is returned when the balance is too small.
+        """
+
+        execution = self._get_execution()
+
+        order = execution.sell(price='101.00', size='3',
+                product_id=PaperExecutionTestCase.PRODUCT, post_only=True)
+
+        self.assertIn('message', order)
+
+    def test_cancel_order(self):
+        """
+        Test :meth:`PaperExecution.cancel_order`
+
+        Assert held funds are released and the unfilled order is forgotten.
+        """
+
+        execution = self._get_execution()
+
+        order = execution.sell(price='101.00', size='1',
+                product_id=PaperExecutionTestCase.PRODUCT, post_only=True)
+
+        self.assertEqual(execution.cancel_order(order['id']), [order['id']])
+        self.assertIn('message', execution.get_order(order['id']))
+        self.assertEqual(self._get_balances(execution)['BTC'],
+                (Decimal('2'), Decimal('2')))
+
+    def test_update_book_crossed(self):
+        """
+        Test :meth:`PaperExecution.update_book`
+
+        Assert an order the book quotes through is filled and settled.
+        """
+
+        execution = self._get_execution()
+
+        order = execution.buy(price='99.00', size='1',
+                product_id=PaperExecutionTestCase.PRODUCT, post_only=True)
+
+        filled = execution.update_book(PaperExecutionTestCase.PRODUCT, {
+            'bids': [['98.00', '1', 1]],
+            'asks': [['99.00', '3', 1]],
+        })
+
+        self.assertEqual(filled, 1)
+        self.assertEqual(execution.get_order(order['id'])['status'], 'done')
+        self.assertEqual(self._get_balances(execution), {
+            'BTC': (Decimal('3'), Decimal('3')),
+            'USD': (Decimal('901'), Decimal('901')),
+        })
+
+    def test_update_book_queue_shrinks(self):
+        """
+        Test :meth:`PaperExecution.update_book`
+
+        Assert the queue ahead shrinks with its level but not when the level
+        grows.
+        """
+
+        execution = self._get_execution()
+
+        order = execution.buy(price='98.00', size='1',
+                product_id=PaperExecutionTestCase.PRODUCT, post_only=True)
+
+        execution.update_book(PaperExecutionTestCase.PRODUCT, {
+            'bids': [['99.00', '2', 1], ['98.00', '3', 2]],
+            'asks': [['101.00', '1', 1]],
+        })
+        self.assertEqual(execution.queues['BTC-USD'].get_position(
+                order['id']), Decimal('3'))
+
+        execution.update_book(PaperExecutionTestCase.PRODUCT, {
+            'bids': [['99.00', '2', 1], ['98.00', '8', 2]],
+            'asks': [['101.00', '1', 1]],
+        })
+        self.assertEqual(execution.queues['BTC-USD'].get_position(
+                order['id']), Decimal('3'))
+
+    def test_update_trades(self):
+        """
+        Test :meth:`PaperExecution.update_trades`
+
+        Assert trades at the order price consume the queue ahead before
+        partially filling the order, and fills are listed newest first.
+        """
+
+        execution = self._get_execution()
+
+        order = execution.buy(price='99.00', size='1',
+                product_id=PaperExecutionTestCase.PRODUCT, post_only=True)
+
+        filled = execution.update_trades(PaperExecutionTestCase.PRODUCT, [
+            {'side': 'buy', 'price': '99.00', 'size': '1.5'},
+            {'side': 'sell', 'price': '99.00', 'size': '10'},
+            {'side': 'buy', 'price': '99.00', 'size': '0.75'},
+        ])
+
+        self.assertEqual(filled, Decimal('0.25'))
+        self.assertEqual(execution.queues['BTC-USD'].get_position(
+                order['id']), Decimal('0'))
+        self.assertEqual(execution.get_order(order['id'])['status'], 'open')
+
+        filled = execution.update_trades(PaperExecutionTestCase.PRODUCT, [
+            {'side': 'buy', 'price': '98.50', 'size': '5'},
+        ])
+
+        self.assertEqual(filled, Decimal('0.75'))
+        self.assertEqual(execution.get_order(order['id'])['status'], 'done')
+
+        fills = execution.get_fills()[0]
+
+        self.assertEqual([fill['size'] for fill in fills], ['0.75', '0.25'])
+        self.assertEqual(execution.get_fills(before=fills[0]['trade_id']),
+                [[]])
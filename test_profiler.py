@@ -0,0 +1,128 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from profiler import SlowIterationProfiler
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+class SlowIterationProfilerTestCase(unittest.TestCase):
+    """
+    Test :class:`SlowIterationProfiler`
+
+    Methods:
+        - :meth:`SlowIterationProfiler.end`
+    """
+
+    def test_end_with_slow_iteration(self):
+        """
+        Test :meth:`SlowIterationProfiler.end`
+
+        Assert a slow iteration is saved as collapsed stacks that include the
+        slow function.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = SlowIterationProfiler(directory, threshold=0.05,
+                    interval=0.001)
+            profiler.start()
+
+            profiler.begin()
+            _busy(0.1)
+
+            with self.assertLogs(level='WARNING'):
+                path = profiler.end()
+
+            profiler.stop()
+
+            with open(path) as profile:
+                lines = profile.read().splitlines()
+
+        self.assertTrue(lines)
+        self.assertTrue(any('test_profiler.py:_busy' in line
+                for line in lines))
+
+        for line in lines:
+            stack, count = line.rsplit(' ', 1)
+            self.assertGreater(int(count), 0)
+
+    def test_end_with_worker_thread(self):
+        """
+        Test :meth:`SlowIterationProfiler.end`
+
+        Assert the stacks of other threads are sampled, each starting with
+        the name of its thread.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = SlowIterationProfiler(directory, threshold=0.05,
+                    interval=0.001)
+            profiler.start()
+
+            worker = threading.Thread(target=_busy, args=(0.1,),
+                    name='worker')
+
+            profiler.begin()
+            worker.start()
+            worker.join()
+
+            with self.assertLogs(level='WARNING'):
+                path = profiler.end()
+
+            profiler.stop()
+
+            with open(path) as profile:
+                lines = profile.read().splitlines()
+
+        self.assertTrue(any(line.startswith('worker;')
+                and 'test_profiler.py:_busy' in line for line in lines))
+
+    def test_end_with_fast_iteration(self):
+        """
+        Test :meth:`SlowIterationProfiler.end`
+
+        Assert an iteration within the threshold is not saved.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = SlowIterationProfiler(directory, threshold=10)
+            profiler.start()
+
+            profiler.begin()
+            self.assertIsNone(profiler.end())
+
+            profiler.stop()
+
+            self.assertEqual(os.listdir(directory), [])
+
+    def test_end_rotates_profiles(self):
+        """
+        Test :meth:`SlowIterationProfiler.end`
+
+        Assert only the newest `max_profiles` profiles are kept.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = SlowIterationProfiler(directory, threshold=0,
+                    max_profiles=2)
+            profiler.start()
+
+            with self.assertLogs(level='WARNING'):
+                paths = []
+
+                for _ in range(4):
+                    profiler.begin()
+                    paths.append(profiler.end())
+
+            profiler.stop()
+
+            self.assertEqual(profiler.profiles_written, 4)
+            self.assertEqual(sorted(os.listdir(directory)),
+                    sorted(os.path.basename(path) for path in paths[2:]))
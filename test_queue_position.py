@@ -0,0 +1,89 @@
+import unittest
+
+from queue_position import QueueEstimator
+
+
+class QueueEstimatorTestCase(unittest.TestCase):
+    """
+    Test :class:`QueueEstimator`
+
+    Methods:
+        - :meth:`QueueEstimator.add`
+        - :meth:`QueueEstimator.update_level`
+        - :meth:`QueueEstimator.add_trade`
+        - :meth:`QueueEstimator.get_position`
+    """
+
+    def test_add(self):
+        """
+        Test :meth:`QueueEstimator.add`
+
+        Assert the order queues behind the rest of its level, excluding its
+        own size when the level includes it.
+        """
+
+        live = QueueEstimator()
+        live.add('a', 'buy', 100.0, 2.0, 7.0)
+
+        paper = QueueEstimator(own_in_book=False)
+        paper.add('a', 'buy', 100.0, 2.0, 7.0)
+
+        self.assertEqual(live.get_position('a'), 5.0)
+        self.assertEqual(paper.get_position('a'), 7.0)
+        self.assertIsNone(paper.get_position('missing'))
+
+    def test_update_level(self):
+        """
+        Test :meth:`QueueEstimator.update_level`
+
+        Assert cancellations shrink the queue ahead by its share of the level
+        and additions join the back of the queue.
+        """
+
+        estimator = QueueEstimator(own_in_book=False)
+        estimator.add('a', 'buy', 100.0, 1.0, 10.0)
+
+        estimator.update_level('buy', 100.0, 14.0)
+        self.assertEqual(estimator.get_position('a'), 10.0)
+
+        # Half of the 14 queued at the level is ahead, so half of the
+        # cancelled size was ahead
+        estimator.update_level('buy', 100.0, 10.0)
+        self.assertAlmostEqual(estimator.get_position('a'),
+                10.0 - 4.0 * 10 / 14)
+
+        estimator.update_level('buy', 100.0, 0.0)
+        self.assertEqual(estimator.get_position('a'), 0.0)
+
+    def test_add_trade(self):
+        """
+        Test :meth:`QueueEstimator.add_trade`
+
+        Assert trades at the price consume the queue before filling orders in
+        placement order, traded size is not counted as cancelled, and trades
+        through the price fill the rest.
+        """
+
+        estimator = QueueEstimator(own_in_book=False)
+        estimator.add('a', 'sell', 100.0, 1.0, 3.0)
+        estimator.update_level('sell', 100.0, 5.0)
+        estimator.add('b', 'sell', 100.0, 1.0, 5.0)
+
+        self.assertEqual(estimator.get_position('b'), 6.0)
+
+        fills = estimator.add_trade('sell', 100.0, 3.5)
+
+        self.assertEqual(fills, {'a': 0.5})
+        self.assertEqual(estimator.get_position('a'), 0.0)
+        self.assertEqual(estimator.get_position('b'), 2.5)
+
+        estimator.update_level('sell', 100.0, 2.0)
+        self.assertEqual(estimator.get_position('b'), 2.5)
+
+        self.assertEqual(estimator.add_trade('buy', 100.0, 10.0), {})
+
+        fills = estimator.add_trade('sell', 101.0, 10.0)
+
+        self.assertEqual(fills, {'a': 0.5, 'b': 1.0})
+        self.assertEqual(estimator.orders, {})
+        self.assertEqual(estimator.levels, {})
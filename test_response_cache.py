@@ -0,0 +1,57 @@
+import unittest
+
+from response_cache import ResponseCache
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    """
+    Test :class:`ResponseCache`
+
+    Methods:
+        - :meth:`ResponseCache.book_changed`
+        - :meth:`ResponseCache.accounts_changed`
+    """
+
+    PRODUCT = 'BTC-USD'
+
+    def test_book_changed(self):
+        """
+        Test :meth:`ResponseCache.book_changed`
+
+        Assert books are compared by sequence number and books without one
+        are always changed.
+        """
+
+        cache = ResponseCache()
+
+        self.assertTrue(cache.book_changed(ResponseCacheTestCase.PRODUCT,
+                {'sequence': 1}))
+        self.assertFalse(cache.book_changed(ResponseCacheTestCase.PRODUCT,
+                {'sequence': 1}))
+        self.assertTrue(cache.book_changed('ETH-USD', {'sequence': 1}))
+        self.assertTrue(cache.book_changed(ResponseCacheTestCase.PRODUCT,
+                {'sequence': 2}))
+        self.assertTrue(cache.book_changed(ResponseCacheTestCase.PRODUCT,
+                {'bids': [], 'asks': []}))
+        self.assertTrue(cache.book_changed(ResponseCacheTestCase.PRODUCT,
+                {'bids': [], 'asks': []}))
+
+        self.assertEqual(cache.get_summary()[ResponseCache.BOOKS], 1)
+
+    def test_accounts_changed(self):
+        """
+        Test :meth:`ResponseCache.accounts_changed`
+
+        Assert accounts are compared by content.
+        """
+
+        cache = ResponseCache()
+
+        accounts = [{'currency': 'USD', 'balance': '100.00'}]
+
+        self.assertTrue(cache.accounts_changed(accounts))
+        self.assertFalse(cache.accounts_changed([dict(accounts[0])]))
+        self.assertTrue(cache.accounts_changed([{'currency': 'USD',
+                'balance': '99.00'}]))
+
+        self.assertEqual(cache.get_summary()[ResponseCache.ACCOUNTS], 1)
@@ -0,0 +1,73 @@
+import unittest
+
+from ring_buffer import RingBuffer
+
+
+class RingBufferTestCase(unittest.TestCase):
+    """
+    Test :class:`RingBuffer`
+
+    Methods:
+        - :meth:`RingBuffer.append`
+        - :meth:`RingBuffer.__getitem__`
+        - :meth:`RingBuffer.nbytes`
+    """
+
+    def test_append_within_capacity(self):
+        """
+        Test :meth:`RingBuffer.append`
+
+        Assert values are kept in insertion order.
+        """
+
+        buffer = RingBuffer(5)
+        buffer.extend([1, 2, 3])
+
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(list(buffer), [1.0, 2.0, 3.0])
+
+    def test_append_over_capacity(self):
+        """
+        Test :meth:`RingBuffer.append`
+
+        Assert the oldest values are overwritten once the buffer is full.
+        """
+
+        buffer = RingBuffer(3)
+        buffer.extend([1, 2, 3, 4, 5])
+
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(list(buffer), [3.0, 4.0, 5.0])
+
+    def test___getitem__(self):
+        """
+        Test :meth:`RingBuffer.__getitem__`
+
+        Assert indexing and slicing follow list semantics after wrapping.
+        """
+
+        buffer = RingBuffer(4)
+        values = [1, 2, 3, 4, 5, 6]
+        buffer.extend(values)
+
+        expected = [float(value) for value in values[-4:]]
+
+        self.assertEqual(buffer[0], expected[0])
+        self.assertEqual(buffer[-1], expected[-1])
+        self.assertEqual(buffer[-3:], expected[-3:])
+        self.assertEqual(buffer[1:3], expected[1:3])
+
+        with self.assertRaises(IndexError):
+            buffer[4]
+
+    def test_nbytes(self):
+        """
+        Test :meth:`RingBuffer.nbytes`
+
+        Assert storage size is fixed by the capacity and typecode.
+        """
+
+        buffer = RingBuffer(10, typecode='d')
+        buffer.extend(range(100))
+
+        self.assertEqual(buffer.nbytes, 80)
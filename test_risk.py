@@ -0,0 +1,130 @@
+import unittest
+
+from risk import RiskEngine
+
+
+class RiskEngineTestCase(unittest.TestCase):
+    """
+    Test :class:`RiskEngine`
+
+    Methods:
+        - :meth:`RiskEngine.update`
+        - :meth:`RiskEngine.check_order`
+        - :meth:`RiskEngine.record_order`
+        - :meth:`RiskEngine.reset`
+    """
+
+    PRODUCT = 'BTC-USD'
+
+    def _get_accounts(self, usd='1000', btc='1', usd_hold='0'):
+        return [
+            {'currency': 'USD', 'balance': usd, 'hold': usd_hold},
+            {'currency': 'BTC', 'balance': btc, 'hold': '0'},
+        ]
+
+    def test_check_order_notional(self):
+        """
+        Test :meth:`RiskEngine.check_order`
+
+        Assert orders worth more than the notional limit are rejected.
+        """
+
+        risk = RiskEngine(RiskEngineTestCase.PRODUCT, max_notional=500)
+        risk.update(self._get_accounts(), 100)
+
+        self.assertIsNone(risk.check_order(RiskEngine.BUY, 100, 5))
+        self.assertIsNotNone(risk.check_order(RiskEngine.SELL, 100, 6))
+
+    def test_check_order_position(self):
+        """
+        Test :meth:`RiskEngine.check_order`
+
+        Assert buys are rejected once held funds, pending orders and the
+        balance would exceed the position limit.
+        """
+
+        risk = RiskEngine(RiskEngineTestCase.PRODUCT, max_position=3)
+        risk.update(self._get_accounts(usd_hold='100'), 100)
+
+        # 1 held plus 1 open buy leaves room for 1
+        self.assertIsNone(risk.check_order(RiskEngine.BUY, 100, 1))
+        self.assertIsNotNone(risk.check_order(RiskEngine.BUY, 100, 1.5))
+        self.assertIsNone(risk.check_order(RiskEngine.SELL, 100, 1))
+
+        risk.record_order(RiskEngine.BUY, 100, 1)
+
+        self.assertIsNotNone(risk.check_order(RiskEngine.BUY, 100, 0.5))
+
+        # Fetched balances include the recorded order instead
+        risk.update(self._get_accounts(btc='0', usd_hold='200'), 100)
+
+        self.assertIsNotNone(risk.check_order(RiskEngine.BUY, 100, 1.5))
+        self.assertIsNone(risk.check_order(RiskEngine.BUY, 100, 1))
+
+    def test_check_order_rate(self):
+        """
+        Test :meth:`RiskEngine.check_order`
+
+        Assert orders beyond the rate limit are rejected until the window
+        has passed.
+        """
+
+        risk = RiskEngine(RiskEngineTestCase.PRODUCT, max_order_rate=2)
+
+        for now in (0, 1):
+            self.assertIsNone(risk.check_order(RiskEngine.BUY, 100, 1,
+                    now=now))
+            risk.record_order(RiskEngine.BUY, 100, 1, now=now)
+
+        self.assertIsNotNone(risk.check_order(RiskEngine.BUY, 100, 1, now=2))
+        self.assertIsNone(risk.check_order(RiskEngine.BUY, 100, 1,
+                now=RiskEngine.RATE_WINDOW))
+
+    def test_update_trips_kill_switch_on_loss(self):
+        """
+        Test :meth:`RiskEngine.update`
+
+        Assert losing more than the loss limit trips the kill switch and
+        rejects every order until it is reset.
+        """
+
+        risk = RiskEngine(RiskEngineTestCase.PRODUCT, max_loss=50)
+
+        self.assertFalse(risk.update(self._get_accounts(), 100))
+        self.assertFalse(risk.update(self._get_accounts(), 60))
+
+        with self.assertLogs(level='WARNING'):
+            self.assertTrue(risk.update(self._get_accounts(), 40))
+
+        self.assertFalse(risk.killed)
+        self.assertIsNotNone(risk.check_order(RiskEngine.SELL, 40, 0.1))
+
+        # The kill switch is reported until its cancel is confirmed
+        self.assertTrue(risk.update(self._get_accounts(), 100))
+
+        risk.confirm_kill()
+
+        self.assertTrue(risk.killed)
+        self.assertIsNotNone(risk.check_order(RiskEngine.SELL, 40, 0.1))
+
+        # The kill switch only trips once
+        self.assertFalse(risk.update(self._get_accounts(), 10))
+
+        risk.reset()
+        risk.update(self._get_accounts(), 10)
+
+        self.assertIsNone(risk.check_order(RiskEngine.SELL, 10, 0.1))
+
+    def test_update_trips_kill_switch_on_position(self):
+        """
+        Test :meth:`RiskEngine.update`
+
+        Assert a balance beyond the position limit trips the kill switch.
+        """
+
+        risk = RiskEngine(RiskEngineTestCase.PRODUCT, max_position=0.5)
+
+        with self.assertLogs(level='WARNING'):
+            self.assertTrue(risk.update(self._get_accounts(), None))
+
+        self.assertEqual(risk.kill_reason, 'position 1.0 exceeds 0.5')
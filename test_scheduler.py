@@ -0,0 +1,120 @@
+import unittest
+
+from order_book import OrderBookSide
+from scheduler import AdaptiveScheduler
+from utils import rate_limiter
+
+
+class AdaptiveSchedulerTestCase(unittest.TestCase):
+    """
+    Test :class:`AdaptiveScheduler`
+
+    Methods:
+        - :meth:`AdaptiveScheduler.__init__`
+        - :meth:`AdaptiveScheduler.update`
+        - :meth:`AdaptiveScheduler.measure`
+        - :meth:`AdaptiveScheduler.get_budget_interval`
+    """
+
+    def _get_book(self, bid='100.00', ask='101.00', bid_size='1',
+            ask_size='1'):
+        return (OrderBookSide([[bid, bid_size, 1]]),
+                OrderBookSide([[ask, ask_size, 1]]))
+
+    def test_update_backs_off_when_static(self):
+        """
+        Test :meth:`AdaptiveScheduler.update`
+
+        Assert the interval grows to the maximum while the book is static.
+        """
+
+        scheduler = AdaptiveScheduler(min_interval=1, max_interval=10)
+        scheduler.interval = 2
+
+        intervals = [scheduler.update(*self._get_book(), now=0)
+                for _ in range(10)]
+
+        self.assertEqual(intervals[0], 2.5)
+        self.assertEqual(intervals[-1], 10)
+        self.assertFalse(scheduler.activity)
+
+    def test_update_speeds_up_when_active(self):
+        """
+        Test :meth:`AdaptiveScheduler.update`
+
+        Assert mid price and imbalance changes shorten the interval down to
+        the minimum.
+        """
+
+        scheduler = AdaptiveScheduler(min_interval=2, max_interval=16)
+        scheduler.update(*self._get_book(), now=0)
+
+        self.assertEqual(scheduler.update(*self._get_book(bid='110.00',
+                ask='111.00'), now=0), 8)
+        self.assertTrue(scheduler.activity)
+
+        self.assertEqual(scheduler.update(*self._get_book(bid='110.00',
+                ask='111.00', bid_size='3'), now=0), 4)
+        self.assertTrue(scheduler.activity)
+
+        self.assertEqual(scheduler.update(*self._get_book(), now=0), 2)
+        self.assertEqual(scheduler.update(*self._get_book(bid='90.00',
+                ask='91.00'), now=0), 2)
+
+    def test___init__(self):
+        """
+        Test :meth:`AdaptiveScheduler.__init__`
+
+        Assert the request budget defaults to the rate of the shared rate
+        limiter.
+        """
+
+        self.assertEqual(AdaptiveScheduler().request_rate, rate_limiter.rate)
+        self.assertEqual(AdaptiveScheduler(request_rate=2).request_rate, 2)
+
+    def test_measure(self):
+        """
+        Test :meth:`AdaptiveScheduler.measure`
+
+        Assert books are compared with the previous book of the same key, so
+        several products can be measured before one interval is scheduled.
+        """
+
+        scheduler = AdaptiveScheduler(min_interval=2, max_interval=16)
+
+        self.assertFalse(scheduler.measure(*self._get_book(), key='BTC-USD'))
+        self.assertFalse(scheduler.measure(*self._get_book(bid='10.00',
+                ask='11.00'), key='ETH-USD'))
+        self.assertFalse(scheduler.measure(*self._get_book(), key='BTC-USD'))
+        self.assertTrue(scheduler.measure(*self._get_book(bid='12.00',
+                ask='13.00'), key='ETH-USD'))
+
+        self.assertEqual(scheduler.schedule(True, now=0), 8)
+        self.assertTrue(scheduler.activity)
+
+    def test_get_budget_interval(self):
+        """
+        Test :meth:`AdaptiveScheduler.get_budget_interval`
+
+        Assert order requests lengthen the shortest interval, until they
+        leave no budget and the maximum interval is used.
+        """
+
+        scheduler = AdaptiveScheduler(min_interval=0, max_interval=60,
+                request_rate=3, requests_per_iteration=2, utilisation=1)
+
+        self.assertAlmostEqual(scheduler.get_budget_interval(now=0), 2 / 3)
+
+        for _ in range(60):
+            scheduler.record_order(now=0)
+
+        self.assertAlmostEqual(scheduler.get_budget_interval(now=1), 1)
+
+        for _ in range(120):
+            scheduler.record_order(now=1)
+
+        self.assertEqual(scheduler.get_budget_interval(now=2), 60)
+
+        # Old order requests no longer count
+        self.assertAlmostEqual(scheduler.get_budget_interval(
+                now=1 + AdaptiveScheduler.RATE_WINDOW), 2 / 3)
@@ -0,0 +1,189 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from requests.exceptions import ConnectionError
+
+from market_data import SyntheticSource
+from shared_book import (SharedBookPublisher, SharedBookReader,
+        SharedBookSource, SharedBookWriter, get_path, VERSION)
+from simulated_client import SimulatedClient
+
+
+def _publish(directory, order_book):
+    writer = SharedBookWriter(get_path(directory, 'BTC-USD'), depth=5)
+    writer.write(order_book)
+    writer.close()
+
+
+class SharedBookSourceTestCase(unittest.TestCase):
+    """
+    Test :class:`SharedBookSource`
+
+    Methods:
+        - :meth:`SharedBookSource.get_order_book`
+        - :meth:`SharedBookReader.read`
+    """
+
+    ORDER_BOOK = {
+        'sequence': 42,
+        'bids': [['100.01', '1.5', 3], ['100.00', '0.25', 1]],
+        'asks': [['100.02', '2', 1]],
+    }
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = get_path(self.directory.name, 'BTC-USD')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_order_book(self):
+        """
+        Test :meth:`SharedBookSource.get_order_book`
+
+        Assert a book written in another process is read with its sequence,
+        prices and sizes.
+        """
+
+        process = multiprocessing.Process(target=_publish,
+                args=(self.directory.name, self.ORDER_BOOK))
+        process.start()
+        process.join()
+
+        source = SharedBookSource(directory=self.directory.name)
+        order_book = source.get_order_book('BTC-USD')
+        source.stop()
+
+        self.assertEqual(order_book['sequence'], 42)
+        self.assertEqual(order_book['bids'], [['100.01', '1.5', None],
+                ['100.0', '0.25', None]])
+        self.assertEqual(order_book['asks'], [['100.02', '2.0', None]])
+        self.assertEqual(list(order_book['bids'].prices), [100.01, 100.0])
+        self.assertEqual(list(order_book['asks'].sizes), [2.0])
+
+        with self.assertRaises(ValueError):
+            source.get_order_book('BTC-USD', level=3)
+
+    def test_get_order_book_keeps_depth(self):
+        """
+        Test :meth:`SharedBookSource.get_order_book`
+
+        Assert only the writer's depth is published and newer books replace
+        older ones.
+        """
+
+        client = SimulatedClient(depth=10)
+        writer = SharedBookWriter(self.path, depth=5)
+        source = SharedBookSource(directory=self.directory.name)
+
+        for _ in range(3):
+            expected = client.get_product_order_book('BTC-USD', level=2)
+            writer.write(expected)
+
+            order_book = source.get_order_book('BTC-USD')
+
+            self.assertEqual(len(order_book['bids']), 5)
+            self.assertEqual([float(price) for price, size, orders
+                    in order_book['asks']],
+                    [float(level[0]) for level in expected['asks'][:5]])
+
+        source.stop()
+        writer.close()
+
+    def test_get_order_book_unavailable(self):
+        """
+        Test :meth:`SharedBookSource.get_order_book`
+
+        Assert a `ConnectionError` is raised before a book is published and
+        when the published book is stale.
+        """
+
+        source = SharedBookSource(directory=self.directory.name, max_age=10)
+
+        with self.assertRaises(ConnectionError):
+            source.get_order_book('BTC-USD')
+
+        writer = SharedBookWriter(self.path)
+
+        with self.assertRaises(ConnectionError):
+            source.get_order_book('BTC-USD')
+
+        writer.write(self.ORDER_BOOK, timestamp=0)
+
+        with self.assertRaises(ConnectionError):
+            source.get_order_book('BTC-USD')
+
+        writer.write(self.ORDER_BOOK)
+
+        self.assertEqual(source.get_order_book('BTC-USD')['sequence'], 42)
+
+        source.stop()
+        writer.close()
+
+    def test_read_while_writing(self):
+        """
+        Test :meth:`SharedBookReader.read`
+
+        Assert a book is not read while the version is odd, and writers
+        resume from the version in the file.
+        """
+
+        writer = SharedBookWriter(self.path)
+        writer.write(self.ORDER_BOOK)
+        writer.close()
+
+        # Leave the book as if a writer stopped mid-write
+        with open(self.path, 'r+b') as shared_file:
+            shared_file.write(VERSION.pack(3))
+
+        reader = SharedBookReader(self.path)
+        reader.MAX_ATTEMPTS = 5
+
+        with self.assertRaises(ConnectionError):
+            reader.read()
+
+        writer = SharedBookWriter(self.path)
+        writer.write(self.ORDER_BOOK)
+
+        self.assertEqual(reader.read()[0], 42)
+
+        with open(self.path, 'rb') as shared_file:
+            self.assertEqual(VERSION.unpack(shared_file.read(8))[0], 6)
+
+        reader.close()
+        writer.close()
+
+
+class SharedBookPublisherTestCase(unittest.TestCase):
+    """
+    Test :class:`SharedBookPublisher`
+
+    Methods:
+        - :meth:`SharedBookPublisher.publish`
+    """
+
+    def test_publish(self):
+        """
+        Test :meth:`SharedBookPublisher.publish`
+
+        Assert a book is published for every product.
+        """
+
+        with tempfile.TemporaryDirectory() as directory:
+            publisher = SharedBookPublisher(SyntheticSource(),
+                    ['BTC-USD', 'ETH-USD'], directory=directory, depth=3)
+            publisher.start()
+
+            self.assertEqual(publisher.publish(), 2)
+
+            source = SharedBookSource(directory=directory)
+
+            for product in publisher.products:
+                self.assertTrue(os.path.exists(get_path(directory, product)))
+                self.assertEqual(len(source.get_order_book(product)['bids']),
+                        3)
+
+            source.stop()
+            publisher.stop()
@@ -0,0 +1,148 @@
+from decimal import Decimal
+from json.decoder import JSONDecodeError
+import unittest
+
+from requests.exceptions import ConnectionError
+
+from simulated_client import SimulatedClient
+
+
+class SimulatedClientTestCase(unittest.TestCase):
+    """
+    Test :class:`SimulatedClient`
+
+    Methods:
+        - :meth:`SimulatedClient.get_product_order_book`
+        - :meth:`SimulatedClient.get_accounts`
+        - :meth:`SimulatedClient.buy`
+        - :meth:`SimulatedClient.sell`
+        - :meth:`SimulatedClient.cancel_order`
+        - :meth:`SimulatedClient.get_order`
+        - :meth:`SimulatedClient.get_fills`
+    """
+
+    def test_get_product_order_book_is_deterministic(self):
+        """
+        Test :meth:`SimulatedClient.get_product_order_book`
+
+        Assert two clients with the same seed generate the same books.
+        """
+
+        first = SimulatedClient(seed=1)
+        second = SimulatedClient(seed=1)
+
+        for _ in range(10):
+            self.assertEqual(first.get_product_order_book('BTC-USD', level=2),
+                    second.get_product_order_book('BTC-USD', level=2))
+
+    def test_get_product_order_book_depth(self):
+        """
+        Test :meth:`SimulatedClient.get_product_order_book`
+
+        Assert level 2 books have the configured depth and do not cross.
+        """
+
+        DEPTH = 20
+        client = SimulatedClient(depth=DEPTH)
+
+        order_book = client.get_product_order_book('BTC-USD', level=2)
+
+        self.assertEqual(len(order_book['bids']), DEPTH)
+        self.assertEqual(len(order_book['asks']), DEPTH)
+        self.assertLess(Decimal(order_book['bids'][0][0]),
+                Decimal(order_book['asks'][0][0]))
+
+    def test_get_accounts_with_connection_error(self):
+        """
+        Test :meth:`SimulatedClient.get_accounts`
+
+        Assert a `ConnectionError` is raised when errors are injected.
+        """
+
+        client = SimulatedClient(error_rate=1)
+
+        with self.assertRaises(ConnectionError):
+            client.get_accounts()
+
+    def test_get_accounts_with_decode_error(self):
+        """
+        Test :meth:`SimulatedClient.get_accounts`
+
+        Assert a `JSONDecodeError` is raised when decode errors are injected.
+        """
+
+        client = SimulatedClient(decode_error_rate=1)
+
+        with self.assertRaises(JSONDecodeError):
+            client.get_accounts()
+
+    def test_buy_post_only_crossing_order(self):
+        """
+        Test :meth:`SimulatedClient.buy`
+
+        Assert a post-only order that crosses the book is rejected.
+        """
+
+        client = SimulatedClient()
+
+        order_book = client.get_product_order_book('BTC-USD', level=2)
+        best_ask = order_book['asks'][0][0]
+
+        order = client.buy(price=best_ask, size='0.01', product_id='BTC-USD',
+                post_only=True)
+
+        self.assertEqual(order['status'], 'rejected')
+
+    def test_buy_with_insufficient_funds(self):
+        """
+        Test :meth:`SimulatedClient.buy`
+
+        Assert an error message is returned.
+        """
+
+        client = SimulatedClient(balances={'USD': '1', 'BTC': '0'})
+
+        order = client.buy(price='100', size='1', product_id='BTC-USD')
+
+        self.assertIn('message', order)
+
+    def test_sell_fills_when_book_crosses(self):
+        """
+        Test :meth:`SimulatedClient.sell`
+
+        Assert a resting sell order is filled once the book moves through it
+        and the fill is reported.
+        """
+
+        client = SimulatedClient(volatility=0)
+
+        order = client.sell(price='1', size='0.5', product_id='BTC-USD')
+
+        client.get_product_order_book('BTC-USD', level=2)
+
+        order = client.get_order(order['id'])
+        fills = client.get_fills(order_id=order['id'])[0]
+
+        self.assertEqual(order['status'], 'done')
+        self.assertTrue(order['settled'])
+        self.assertEqual(len(fills), 1)
+        self.assertEqual(client.balances['BTC'], Decimal('0.5'))
+
+    def test_cancel_order(self):
+        """
+        Test :meth:`SimulatedClient.cancel_order`
+
+        Assert the held funds are released and the order is no longer found.
+        """
+
+        client = SimulatedClient(volatility=0)
+
+        order = client.buy(price='1', size='1', product_id='BTC-USD')
+
+        self.assertEqual(client.balances['USD'], Decimal('9999'))
+
+        response = client.cancel_order(order['id'])
+
+        self.assertEqual(response, [order['id']])
+        self.assertEqual(client.balances['USD'], Decimal('10000'))
+        self.assertIn('message', client.get_order(order['id']))
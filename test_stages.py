@@ -0,0 +1,298 @@
+import tempfile
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+from gdax_trader import GDAXTrader
+from response_cache import ResponseCache
+from simulated_client import SimulatedClient
+from stages import (BookArchiveStage, CheckpointStage, Iteration,
+        ResponseCacheStage, StatsStage)
+from stats_store import StatsStore
+
+
+class ResponseCacheStageTestCase(unittest.TestCase):
+    """
+    Test :class:`ResponseCacheStage`
+
+    Methods:
+        - :meth:`ResponseCacheStage.receive`
+    """
+
+    @patch('gdax_trader.GDAXTrader._get_client')
+    def test_receive(self, client):
+        """
+        Test :meth:`ResponseCacheStage.receive`
+
+        Assert an unchanged order book is not parsed again, and strategies
+        are only told the data is unchanged when the accounts are too.
+        """
+
+        trader = GDAXTrader()
+        trader.set_product('BTC-USD')
+
+        stage = ResponseCacheStage(ResponseCache())
+        trader.add_stage(stage)
+        trader._parse_order_book = MagicMock(
+                wraps=trader._parse_order_book)
+
+        strategy = MagicMock()
+        trader.add_strategy(strategy)
+
+        trader._get_accounts = MagicMock(return_value=[
+                {'currency': 'USD', 'balance': '100.00'}])
+        trader._get_order_book = MagicMock(return_value={
+            'sequence': 1,
+            'bids': [['10.00', '1.0', 1]],
+            'asks': [['11.00', '1.0', 1]],
+        })
+
+        for _ in range(2):
+            self.assertTrue(trader._run_iteration())
+
+        self.assertEqual(trader._parse_order_book.call_count, 1)
+        self.assertEqual(strategy.next.call_count, 1)
+        self.assertEqual(strategy.next_unchanged.call_count, 1)
+
+        trader._get_accounts.return_value = [
+                {'currency': 'USD', 'balance': '90.00'}]
+
+        self.assertTrue(trader._run_iteration())
+
+        self.assertEqual(trader._parse_order_book.call_count, 1)
+        self.assertEqual(strategy.next.call_count, 2)
+        self.assertEqual(stage.response_cache.get_summary(), {
+            ResponseCache.BOOKS: 2,
+            ResponseCache.ACCOUNTS: 1,
+            ResponseCache.ITERATIONS: 1,
+        })
+
+
+class CheckpointStageTestCase(unittest.TestCase):
+    """
+    Test :class:`CheckpointStage`
+
+    Methods:
+        - :meth:`CheckpointStage.start`
+        - :meth:`CheckpointStage.stop`
+    """
+
+    @patch('gdax_trader.GDAXTrader._get_client')
+    def test_start(self, client):
+        """
+        Test :meth:`CheckpointStage.start`
+
+        Assert strategy state is restored and orders are reconciled with a
+        single open orders request.
+        """
+
+        trader = GDAXTrader()
+        trader.set_product('BTC-USD')
+
+        first = MagicMock()
+        first.name = 'first'
+        second = MagicMock()
+        second.name = 'second'
+        trader.add_strategy(first)
+        trader.add_strategy(second)
+
+        STATE = {'order': {'id': '1'}}
+        checkpointer = MagicMock()
+        checkpointer.load.return_value = (time.time(), {
+            'product': 'BTC-USD',
+            'strategies': {'first': STATE},
+        })
+
+        OPEN_ORDERS = {'1': {'id': '1'}}
+        trader.get_orders = MagicMock(return_value=OPEN_ORDERS)
+
+        ready = []
+        CheckpointStage(checkpointer).start(trader, ready)
+
+        self.assertEqual(ready, [first])
+        first.set_state.assert_called_with(STATE)
+        first.reconcile_orders.assert_called_with(OPEN_ORDERS)
+        self.assertEqual(second.set_state.call_count, 0)
+        self.assertEqual(trader.get_orders.call_count, 1)
+        self.assertEqual(checkpointer.start.call_count, 1)
+
+    @patch('gdax_trader.GDAXTrader._get_client')
+    def test_start_with_stale_checkpoint(self, client):
+        """
+        Test :meth:`CheckpointStage.start`
+
+        Assert a checkpoint older than `MAX_AGE` is ignored.
+        """
+
+        trader = GDAXTrader()
+        trader.set_product('BTC-USD')
+
+        strategy = MagicMock()
+        strategy.name = 'first'
+        trader.add_strategy(strategy)
+
+        checkpointer = MagicMock()
+        checkpointer.load.return_value = (0, {
+            'product': 'BTC-USD',
+            'strategies': {'first': {}},
+        })
+
+        ready = []
+        CheckpointStage(checkpointer).start(trader, ready)
+
+        self.assertEqual(ready, [])
+        self.assertEqual(strategy.set_state.call_count, 0)
+
+    @patch('gdax_trader.GDAXTrader._get_client')
+    def test_stop(self, client):
+        """
+        Test :meth:`CheckpointStage.stop`
+
+        Assert the state of every strategy is submitted before the
+        checkpointer stops.
+        """
+
+        trader = GDAXTrader()
+        trader.set_product('BTC-USD')
+
+        strategy = MagicMock()
+        strategy.name = 'first'
+        strategy.get_state.return_value = {'position': 1}
+        trader.add_strategy(strategy)
+
+        checkpointer = MagicMock()
+        CheckpointStage(checkpointer).stop(trader)
+
+        checkpointer.submit.assert_called_with({
+            'product': 'BTC-USD',
+            'strategies': {'first': {'position': 1}},
+        })
+        self.assertEqual(checkpointer.stop.call_count, 1)
+
+
+class BookArchiveStageTestCase(unittest.TestCase):
+    """
+    Test :class:`BookArchiveStage`
+
+    Methods:
+        - :meth:`BookArchiveStage.start`
+        - :meth:`BookArchiveStage.process_book`
+    """
+
+    ORDER_BOOK = {
+        'bids': [['10.00', '1.0', 1]],
+        'asks': [['11.00', '1.0', 1]],
+    }
+
+    @patch('gdax_trader.GDAXTrader._get_client')
+    def test_start(self, client):
+        """
+        Test :meth:`BookArchiveStage.start`
+
+        Assert recent archived order books are passed to every strategy
+        that is not already prepared.
+        """
+
+        trader = GDAXTrader()
+        trader.set_product('BTC-USD')
+
+        book_archive = MagicMock()
+        book_archive.read.return_value = [(0, self.ORDER_BOOK),
+                (1, self.ORDER_BOOK)]
+
+        restored = MagicMock()
+        strategy = MagicMock()
+        trader.add_strategy(restored)
+        trader.add_strategy(strategy)
+
+        ready = [restored]
+        BookArchiveStage(book_archive).start(trader, ready)
+
+        order_books = strategy.warm_up.call_args[0][0]
+
+        self.assertEqual(len(order_books), 2)
+        self.assertEqual(list(order_books[0][0]['price']), ['10.00'])
+        self.assertEqual(restored.warm_up.call_count, 0)
+        self.assertEqual(ready, [restored, strategy])
+
+    @patch('gdax_trader.GDAXTrader._get_client')
+    def test_start_without_strategies(self, client):
+        """
+        Test :meth:`BookArchiveStage.start`
+
+        Assert the archive is not read when every strategy is prepared.
+        """
+
+        trader = GDAXTrader()
+
+        strategy = MagicMock()
+        trader.add_strategy(strategy)
+
+        book_archive = MagicMock()
+        BookArchiveStage(book_archive).start(trader, [strategy])
+
+        self.assertEqual(book_archive.read.call_count, 0)
+        self.assertEqual(strategy.warm_up.call_count, 0)
+
+    @patch('gdax_trader.GDAXTrader._get_client')
+    def test_process_book(self, client):
+        """
+        Test :meth:`BookArchiveStage.process_book`
+
+        Assert only changed order books are archived.
+        """
+
+        trader = GDAXTrader()
+        trader.set_product('BTC-USD')
+
+        book_archive = MagicMock()
+        stage = BookArchiveStage(book_archive)
+
+        iteration = Iteration([], self.ORDER_BOOK)
+        stage.process_book(trader, iteration)
+
+        iteration.book_changed = False
+        stage.process_book(trader, iteration)
+
+        book_archive.append.assert_called_once_with('BTC-USD',
+                self.ORDER_BOOK)
+
+
+class StatsStageTestCase(unittest.TestCase):
+    """
+    Test :class:`StatsStage`
+
+    Methods:
+        - :meth:`StatsStage.finish_iteration`
+    """
+
+    @patch('utils.time.sleep')
+    def test_finish_iteration(self, sleep):
+        """
+        Test :meth:`StatsStage.finish_iteration`
+
+        Assert book and strategy statistics are recorded every iteration.
+        """
+
+        trader = GDAXTrader(client=SimulatedClient(depth=5))
+        trader.set_product('BTC-USD')
+
+        strategy = MagicMock()
+        strategy.name = 'obi'
+        strategy.get_stats.return_value = {'obi': 0.25}
+        trader.add_strategy(strategy)
+
+        with tempfile.TemporaryDirectory() as directory:
+            stats_store = StatsStore(directory)
+            trader.add_stage(StatsStage(stats_store))
+
+            for _ in range(2):
+                self.assertTrue(trader._run_iteration())
+
+            result = stats_store.query('BTC-USD', 'obi')
+
+        self.assertEqual(len(result['time']), 2)
+        self.assertEqual(list(result['obi']), [0.25, 0.25])
+        self.assertTrue((result['best_bid'] < result['best_ask']).all())
+        self.assertTrue((result['spread'] > 0).all())
+        self.assertTrue((result['bid_depth'] > 0).all())
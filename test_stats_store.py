@@ -0,0 +1,145 @@
+import math
+import os
+import tempfile
+import unittest
+
+from stats_store import StatsStore
+
+
+class StatsStoreTestCase(unittest.TestCase):
+    """
+    Test :class:`StatsStore`
+
+    Methods:
+        - :meth:`StatsStore.append`
+        - :meth:`StatsStore.query`
+    """
+
+    # 2017-01-01T00:00:00Z
+    DAY = 1483228800
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = StatsStore(self.directory.name, chunk_size=3)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_append(self):
+        """
+        Test :meth:`StatsStore.append`
+
+        Assert rows are written in chunks to a directory per day, and a new
+        day writes the previous day's chunk.
+        """
+
+        day_directory = os.path.join(self.directory.name, 'BTC-USD', 'obi',
+                '2017-01-01')
+
+        for index in range(2):
+            self.store.append('BTC-USD', 'obi', {'obi': 0.5},
+                    timestamp=self.DAY + index)
+
+        self.assertFalse(os.path.exists(day_directory))
+
+        self.store.append('BTC-USD', 'obi', {'obi': 0.5},
+                timestamp=self.DAY + 2)
+
+        self.assertEqual(os.path.getsize(os.path.join(day_directory,
+                'obi.f8')), 3 * 8)
+
+        self.store.append('BTC-USD', 'obi', {'obi': 0.5},
+                timestamp=self.DAY + 3)
+        self.store.append('BTC-USD', 'obi', {'obi': 0.5},
+                timestamp=self.DAY + 86400)
+
+        self.assertEqual(os.path.getsize(os.path.join(day_directory,
+                'obi.f8')), 4 * 8)
+        self.assertEqual(self.store.get_names('BTC-USD'), ['obi'])
+
+    def test_query(self):
+        """
+        Test :meth:`StatsStore.query`
+
+        Assert rows across days are loaded in a time range, with missing
+        values as NaN and unknown values ignored.
+        """
+
+        for index in range(6):
+            self.store.append('BTC-USD', 'obi', {
+                'obi': index / 10,
+                'best_bid': '100.00',
+                'signal': None if index % 2 else 1,
+                'unknown': 1,
+            }, timestamp=self.DAY + index * 43200)
+
+        result = self.store.query('BTC-USD', 'obi', columns=['obi', 'signal'])
+
+        self.assertEqual(sorted(result), ['obi', 'signal', 'time'])
+        self.assertEqual(list(result['obi']), [0, 0.1, 0.2, 0.3, 0.4, 0.5])
+        self.assertEqual(result['signal'][0], 1)
+        self.assertTrue(math.isnan(result['signal'][1]))
+
+        result = self.store.query('BTC-USD', 'obi', start=self.DAY + 43200,
+                end=self.DAY + 4 * 43200)
+
+        self.assertEqual(list(result['time']), [self.DAY + index * 43200
+                for index in range(1, 4)])
+        self.assertEqual(list(result['best_bid']), [100, 100, 100])
+        self.assertTrue(math.isnan(result['spread'][0]))
+
+        self.assertEqual(len(self.store.query('ETH-USD', 'obi')['time']), 0)
+
+        with self.assertRaises(KeyError):
+            self.store.query('BTC-USD', 'obi', columns=['unknown'])
+
+    def test_query_with_interrupted_chunk(self):
+        """
+        Test :meth:`StatsStore.query`
+
+        Assert rows missing from some columns are not returned.
+        """
+
+        for index in range(3):
+            self.store.append('BTC-USD', 'obi', {'obi': 0.1},
+                    timestamp=self.DAY + index)
+
+        # Lose the last row of one column, as if interrupted while writing
+        path = os.path.join(self.directory.name, 'BTC-USD', 'obi',
+                '2017-01-01', 'mid.f8')
+        with open(path, 'r+b') as column_file:
+            column_file.truncate(2 * 8)
+
+        result = self.store.query('BTC-USD', 'obi')
+
+        self.assertEqual(len(result['time']), 2)
+        self.assertEqual(len(result['obi']), 2)
+
+    def test_append_after_interrupted_chunk(self):
+        """
+        Test :meth:`StatsStore.append`
+
+        Assert a store opening a day with torn columns cuts them to a common
+        row count before appending, so new rows stay aligned.
+        """
+
+        for index in range(3):
+            self.store.append('BTC-USD', 'obi', {'obi': index},
+                    timestamp=self.DAY + index)
+
+        path = os.path.join(self.directory.name, 'BTC-USD', 'obi',
+                '2017-01-01', 'mid.f8')
+        with open(path, 'r+b') as column_file:
+            column_file.truncate(2 * 8 + 3)
+
+        store = StatsStore(self.directory.name, chunk_size=3)
+
+        with self.assertLogs(level='WARNING'):
+            for index in range(3, 6):
+                store.append('BTC-USD', 'obi', {'obi': index, 'mid': index},
+                        timestamp=self.DAY + index)
+
+        result = store.query('BTC-USD', 'obi')
+
+        self.assertEqual(list(result['obi']), [0, 1, 3, 4, 5])
+        self.assertEqual(list(result['mid'][2:]), [3, 4, 5])
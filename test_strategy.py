@@ -8,6 +8,8 @@ class StrategyTestCase(unittest.TestCase):
 
     Methods:
         - :meth:`Strategy.get_currency_balance`
+        - :meth:`Strategy.history`
+        - :meth:`Strategy.memory_report`
     """
 
     def test_get_currency_balance_success(self):
@@ -82,3 +84,36 @@ class StrategyTestCase(unittest.TestCase):
         balance = strategy.get_currency_balance(TEST_CURRENCY)
 
         self.assertEqual(TEST_BALANCE, balance)
+
+    def test_history(self):
+        """
+        Test :meth:`Strategy.history`
+
+        Assert the history is bounded and registered with the strategy.
+        """
+
+        strategy = Strategy()
+
+        CAPACITY = 3
+        history = strategy.history('test', CAPACITY)
+        history.extend(range(10))
+
+        self.assertEqual(list(history), [7.0, 8.0, 9.0])
+        self.assertIs(strategy.histories['test'], history)
+
+    def test_memory_report(self):
+        """
+        Test :meth:`Strategy.memory_report`
+
+        Assert retained attributes are reported and iteration data is not.
+        """
+
+        strategy = Strategy()
+
+        strategy.values = strategy.history('values', 1000)
+        strategy.bid_orders = list(range(1000))
+
+        report = strategy.memory_report()
+
+        self.assertGreaterEqual(report['values'], 8000)
+        self.assertNotIn('bid_orders', report)
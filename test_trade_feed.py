@@ -0,0 +1,141 @@
+import unittest
+
+from trade_feed import RollingWindow, TradeFeed
+
+
+class RollingWindowTestCase(unittest.TestCase):
+    """
+    Test :class:`RollingWindow`
+
+    Methods:
+        - :meth:`RollingWindow.add`
+        - :meth:`RollingWindow.expire`
+    """
+
+    def test_add(self):
+        """
+        Test :meth:`RollingWindow.add`
+
+        Assert volume, aggressor imbalance and VWAP include every trade in
+        the window.
+        """
+
+        window = RollingWindow(10, buckets=10)
+
+        self.assertIsNone(window.vwap)
+        self.assertIsNone(window.imbalance)
+
+        window.add(100.0, 10.0, 1.0, True)
+        window.add(101.5, 20.0, 3.0, False)
+
+        self.assertEqual(window.volume, 4.0)
+        self.assertEqual(window.buy_volume, 1.0)
+        self.assertEqual(window.sell_volume, 3.0)
+        self.assertEqual(window.imbalance, -0.5)
+        self.assertEqual(window.vwap, 17.5)
+        self.assertEqual(window.count, 2)
+
+    def test_expire(self):
+        """
+        Test :meth:`RollingWindow.expire`
+
+        Assert trades leave the window once their bucket is older than the
+        window, and an idle window is emptied.
+        """
+
+        window = RollingWindow(10, buckets=10)
+
+        window.add(100.0, 10.0, 1.0, True)
+        window.add(105.0, 10.0, 2.0, True)
+
+        window.expire(109.5)
+        self.assertEqual(window.volume, 3.0)
+
+        window.expire(110.0)
+        self.assertEqual(window.volume, 2.0)
+
+        window.expire(1000.0)
+        self.assertEqual(window.volume, 0.0)
+        self.assertEqual(window.count, 0)
+        self.assertIsNone(window.vwap)
+
+    def test_memory_is_fixed(self):
+        """
+        Test :meth:`RollingWindow.add`
+
+        Assert the bucket storage does not grow with the number of trades.
+        """
+
+        window = RollingWindow(1, buckets=4)
+
+        for index in range(10000):
+            window.add(index * 0.01, 1.0, 1.0, index % 2 == 0)
+
+        self.assertEqual(len(window._volume), 4)
+        self.assertEqual(window.count, 100)
+        self.assertAlmostEqual(window.volume, 100.0)
+
+
+class TradeFeedTestCase(unittest.TestCase):
+    """
+    Test :class:`TradeFeed`
+
+    Methods:
+        - :meth:`TradeFeed.add_trades`
+        - :meth:`TradeFeed.get_summary`
+    """
+
+    TRADES = [
+        {'time': '2017-01-01T00:00:59.500000Z', 'trade_id': 3,
+                'price': '102.00', 'size': '1', 'side': 'sell'},
+        {'time': '2017-01-01T00:00:55.000000Z', 'trade_id': 2,
+                'price': '101.00', 'size': '2', 'side': 'buy'},
+        {'time': '2017-01-01T00:00:05Z', 'trade_id': 1,
+                'price': '100.00', 'size': '1', 'side': 'sell'},
+    ]
+
+    # 2017-01-01T00:01:00Z
+    NOW = 1483228860.0
+
+    def test_add_trades(self):
+        """
+        Test :meth:`TradeFeed.add_trades`
+
+        Assert trades are added oldest first and trades already seen or
+        invalid are skipped.
+        """
+
+        feed = TradeFeed()
+
+        added = feed.add_trades(TradeFeedTestCase.TRADES)
+
+        self.assertEqual([trade['trade_id'] for trade in added], [1, 2, 3])
+        self.assertEqual(feed.last_trade_id, 3)
+        self.assertEqual(feed.last_price, 102.0)
+
+        with self.assertLogs(level='WARNING'):
+            added = feed.add_trades(TradeFeedTestCase.TRADES + [
+                {'trade_id': 4, 'price': '1', 'size': '1', 'side': 'buy'},
+            ])
+
+        self.assertEqual(added, [])
+
+    def test_get_summary(self):
+        """
+        Test :meth:`TradeFeed.get_summary`
+
+        Assert each window only includes its recent trades, with maker
+        sides converted to aggressor sides.
+        """
+
+        feed = TradeFeed()
+        feed.add_trades(TradeFeedTestCase.TRADES)
+
+        summary = feed.get_summary(now=TradeFeedTestCase.NOW)
+
+        self.assertEqual(summary[1], {'volume': 1.0, 'imbalance': 1.0,
+                'vwap': 102.0})
+        self.assertEqual(summary[10]['volume'], 3.0)
+        self.assertAlmostEqual(summary[10]['imbalance'], -1 / 3)
+        self.assertAlmostEqual(summary[10]['vwap'], 304 / 3)
+        self.assertEqual(summary[60]['volume'], 4.0)
@@ -2,7 +2,7 @@ from requests.exceptions import ConnectionError
 import unittest
 from unittest.mock import patch, MagicMock
 
-from utils import connection_retry
+from utils import connection_retry, parse_timestamp, RateLimiter
 
 
 class UtilsTestCase(unittest.TestCase):
@@ -13,8 +13,9 @@ class UtilsTestCase(unittest.TestCase):
         - :func:`connection_retry`
     """
 
+    @patch('utils.rate_limiter')
     @patch('time.sleep')
-    def test_connection_retry_success(self, sleep):
+    def test_connection_retry_success(self, sleep, rate_limiter):
         """
         Test :func:`connection_retry`
 
@@ -35,15 +36,19 @@ class UtilsTestCase(unittest.TestCase):
         self.assertEqual(function.call_count, 1)
 
         self.assertEqual(test_results, results)
+        sleep.assert_not_called()
 
+    @patch('utils.rate_limiter')
     @patch('time.sleep')
-    def test_connection_retry_with_retry(self, sleep):
+    def test_connection_retry_with_retry(self, sleep, rate_limiter):
         """
         Test :func:`connection_retry`
 
         Assert the `ConnectionError` is logged.
         Assert the decorated function is called twice and the return value on
         the second call is retrieved.
+        Assert every attempt waits for the shared rate limiter, and only the
+        failed attempt backs off.
         """
 
         test_results = 'test'
@@ -60,6 +65,8 @@ class UtilsTestCase(unittest.TestCase):
             self.assertEqual(test_results, results)
 
         self.assertEqual(function.call_count, 2)
+        self.assertEqual(rate_limiter.acquire.call_count, 2)
+        sleep.assert_called_once_with(RATE_LIMIT)
 
     @patch('time.sleep')
     def test_connection_retry_exceed_retry(self, sleep):
@@ -82,3 +89,61 @@ class UtilsTestCase(unittest.TestCase):
             decorated_function()
 
         self.assertEqual(function.call_count, MAX_RETRIES)
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    """
+    Test :class:`RateLimiter`
+
+    Methods:
+        - :meth:`RateLimiter.acquire`
+    """
+
+    @patch('utils.time.sleep')
+    @patch('utils.time.monotonic', return_value=100)
+    def test_acquire(self, monotonic, sleep):
+        """
+        Test :meth:`RateLimiter.acquire`
+
+        Assert a burst is allowed without waiting, later requests are spaced
+        at the rate, and tokens refill over time.
+        """
+
+        rate_limiter = RateLimiter(rate=4, burst=2)
+
+        waits = [rate_limiter.acquire() for _ in range(4)]
+
+        self.assertEqual(waits, [0, 0, 0.25, 0.5])
+        self.assertEqual([call[0][0] for call in sleep.call_args_list],
+                [0.25, 0.5])
+
+        monotonic.return_value = 110
+
+        self.assertEqual(rate_limiter.acquire(), 0)
+
+
+class ParseTimestampTestCase(unittest.TestCase):
+    """
+    Test :func:`parse_timestamp`
+    """
+
+    def test_parse_timestamp(self):
+        """
+        Test :func:`parse_timestamp`
+
+        Assert timestamps with and without fractional seconds are parsed.
+        """
+
+        self.assertEqual(parse_timestamp('2017-01-01T00:00:00.500000Z'),
+                1483228800.5)
+        self.assertEqual(parse_timestamp('2017-01-01T00:00:00Z'), 1483228800)
+
+    def test_parse_timestamp_with_invalid_timestamp(self):
+        """
+        Test :func:`parse_timestamp`
+
+        Assert a `ValueError` is raised.
+        """
+
+        with self.assertRaises(ValueError):
+            parse_timestamp('yesterday')
@@ -0,0 +1,282 @@
+from array import array
+import logging
+import time
+
+from utils import parse_timestamp
+
+
+logger = logging.getLogger(__name__)
+
+
+class RollingWindow:
+    """
+    Trade totals over a trailing time window in fixed memory
+
+    The window is split into equal time buckets held in a ring, and running
+    totals are kept alongside them. Adding a trade updates one bucket and the
+    totals, and buckets that fall out of the window are subtracted as time
+    advances, so the cost per trade is constant and memory does not grow with
+    the trade rate. The window covers between `duration - bucket_duration`
+    and `duration` seconds of trades.
+
+    Attributes:
+        duration: The window length in seconds
+        buckets: The number of buckets the window is split into
+        bucket_duration: The length of each bucket in seconds
+        volume: Total size traded in the window
+        buy_volume: Size traded by buy aggressors in the window
+        notional: Total value traded in the window
+        count: Number of trades in the window
+    """
+
+    def __init__(self, duration, buckets=20):
+        if duration <= 0 or buckets < 1:
+            raise ValueError('RollingWindow duration and buckets must be '
+                    'positive')
+
+        self.duration = duration
+        self.buckets = buckets
+        self.bucket_duration = duration / buckets
+
+        self.volume = 0.0
+        self.buy_volume = 0.0
+        self.notional = 0.0
+        self.count = 0
+
+        self._volume = array('d', [0]) * buckets
+        self._buy_volume = array('d', [0]) * buckets
+        self._notional = array('d', [0]) * buckets
+        self._count = array('l', [0]) * buckets
+
+        # Absolute index of the most recent bucket
+        self._head = None
+
+    def _clear_bucket(self, index):
+        self.volume -= self._volume[index]
+        self.buy_volume -= self._buy_volume[index]
+        self.notional -= self._notional[index]
+        self.count -= self._count[index]
+
+        self._volume[index] = 0
+        self._buy_volume[index] = 0
+        self._notional[index] = 0
+        self._count[index] = 0
+
+    def expire(self, timestamp):
+        """
+        Advance the window to a time, dropping buckets that fall out of it
+
+        Times before the most recent bucket do not move the window.
+
+        :param timestamp: seconds since the epoch
+        """
+
+        bucket = int(timestamp // self.bucket_duration)
+
+        if self._head is None:
+            self._head = bucket
+            return
+
+        if bucket <= self._head:
+            return
+
+        if bucket - self._head >= self.buckets:
+            # The whole window expired, reset exactly instead of accumulating
+            # rounding errors
+            for index in range(self.buckets):
+                self._clear_bucket(index)
+
+            self.volume = self.buy_volume = self.notional = 0.0
+        else:
+            for absolute in range(self._head + 1, bucket + 1):
+                self._clear_bucket(absolute % self.buckets)
+
+        self._head = bucket
+
+    def add(self, timestamp, price, size, buy):
+        """
+        Add a trade to the window
+
+        Trades older than the most recent bucket are counted in it.
+
+        :param timestamp: the trade time in seconds since the epoch
+        :param price: the trade price
+        :param size: the trade size
+        :param buy: whether the aggressor bought
+        """
+
+        self.expire(timestamp)
+
+        index = self._head % self.buckets
+        notional = price * size
+
+        self._volume[index] += size
+        self._notional[index] += notional
+        self._count[index] += 1
+
+        self.volume += size
+        self.notional += notional
+        self.count += 1
+
+        if buy:
+            self._buy_volume[index] += size
+            self.buy_volume += size
+
+    @property
+    def sell_volume(self):
+        return max(self.volume - self.buy_volume, 0.0)
+
+    @property
+    def imbalance(self):
+        """
+        Aggressor imbalance of the window
+
+        :returns: buy minus sell aggressor volume over total volume, between
+            -1 and 1, or `None` if nothing traded
+        """
+
+        if self.count == 0 or self.volume <= 0:
+            return None
+
+        return (self.buy_volume - self.sell_volume) / self.volume
+
+    @property
+    def vwap(self):
+        """
+        Volume weighted average price of the window
+
+        :returns: the VWAP, or `None` if nothing traded
+        """
+
+        if self.count == 0 or self.volume <= 0:
+            return None
+
+        return self.notional / self.volume
+
+
+class TradeFeed:
+    """
+    Rolling trade statistics for a product
+
+    Trades are accepted in the format of the GDAX trades endpoint or of
+    websocket `match` messages. In both, `side` is the side of the maker
+    order, so the aggressor is on the opposite side. Trades at or before the
+    last trade ID seen are ignored, so overlapping polls can be added as is.
+
+    Attributes:
+        windows: :class:`RollingWindow` by duration in seconds
+        last_trade_id: ID of the most recent trade added, the polling cursor
+        last_price: Price of the most recent trade added
+        last_time: Time of the most recent trade added
+    """
+
+    # Window durations in seconds
+    WINDOWS = (1, 10, 60)
+
+    # Buckets each window is split into
+    BUCKETS = 20
+
+    def __init__(self, windows=WINDOWS, buckets=BUCKETS):
+        self.windows = {duration: RollingWindow(duration, buckets)
+                for duration in windows}
+
+        self.last_trade_id = None
+        self.last_price = None
+        self.last_time = None
+
+    def add_trade(self, trade):
+        """
+        Add a trade to every window
+
+        :param trade: the trade data
+        :returns: `True` if the trade was added, `False` if it was seen
+            before or is invalid
+        """
+
+        try:
+            trade_id = trade.get('trade_id')
+            timestamp = parse_timestamp(trade['time'])
+            price = float(trade['price'])
+            size = float(trade['size'])
+            buy = trade['side'] == 'sell'
+        except (KeyError, TypeError, ValueError, AttributeError) as error:
+            logger.warning('Invalid trade {}: {}'.format(trade, error))
+            return False
+
+        if trade_id is not None:
+            if (self.last_trade_id is not None
+                    and trade_id <= self.last_trade_id):
+                return False
+
+            self.last_trade_id = trade_id
+
+        for window in self.windows.values():
+            window.add(timestamp, price, size, buy)
+
+        self.last_price = price
+        self.last_time = timestamp
+
+        return True
+
+    def add_trades(self, trades):
+        """
+        Add trades in trade ID order
+
+        :param trades: trade data in any order, such as newest first as
+            returned by the GDAX trades endpoint
+        :returns: list of the trades that were added, oldest first
+        """
+
+        added = []
+
+        for trade in sorted(trades,
+                key=lambda trade: trade.get('trade_id', 0)):
+            if self.add_trade(trade):
+                added.append(trade)
+
+        return added
+
+    def get_window(self, duration, now=None):
+        """
+        Get a window advanced to the current time
+
+        :param duration: the window duration in seconds
+        :param now: the current time, defaults to the local clock
+        :returns: the :class:`RollingWindow`
+        :raises KeyError: there is no window with the duration
+        """
+
+        window = self.windows[duration]
+        window.expire(time.time() if now is None else now)
+
+        return window
+
+    def get_volume(self, duration, now=None):
+        return self.get_window(duration, now).volume
+
+    def get_imbalance(self, duration, now=None):
+        return self.get_window(duration, now).imbalance
+
+    def get_vwap(self, duration, now=None):
+        return self.get_window(duration, now).vwap
+
+    def get_summary(self, now=None):
+        """
+        Get the statistics of every window
+
+        :param now: the current time, defaults to the local clock
+        :returns: dict of `volume`, `imbalance` and `vwap` by window duration
+        """
+
+        summary = {}
+
+        for duration in self.windows:
+            window = self.get_window(duration, now)
+
+            summary[duration] = {
+                'volume': window.volume,
+                'imbalance': window.imbalance,
+                'vwap': window.vwap,
+            }
+
+        return summary
@@ -1,4 +1,9 @@
+from datetime import datetime, timezone
+import functools
 import logging
+import os
+import sys
+import threading
 import time
 
 from json.decoder import JSONDecodeError
@@ -12,14 +17,21 @@ def connection_retry(max_retries, rate_limit):
     """
     Decorator for retrying function when `ConnectionError` is raised
 
+    Every attempt first waits for the process-wide :data:`rate_limiter`, so
+    requests from every thread stay within the exchange rate limit, and a
+    failed attempt backs off before it is retried.
+
     :param max_retries: maximum number of function attempts
-    :param rate_limit: how quickly function calls can be made
+    :param rate_limit: seconds to wait before retrying a failed attempt
     :returns: data returned by function
     :raises ConnectionError: Error raised if every retry attempt fails
     """
 
     def connection_retry_decorator(function):
 
+        # The undecorated function stays available as `__wrapped__` for
+        # callers that pace their own retries
+        @functools.wraps(function)
         def wrapper(*args, **kwargs):
             data = None
             retry = 0
@@ -27,6 +39,8 @@ def connection_retry(max_retries, rate_limit):
             connect_error = False
 
             while not connect_success and retry < max_retries:
+                rate_limiter.acquire()
+
                 # Exit loop if function is successful
                 try:
                     data = function(*args, **kwargs)
@@ -39,7 +53,10 @@ def connection_retry(max_retries, rate_limit):
 
                 retry += 1
 
-                time.sleep(rate_limit)
+                # Pacing is left to the rate limiter, the pause only backs
+                # off from a failure
+                if not connect_success and retry < max_retries:
+                    time.sleep(rate_limit)
 
             # If all retry attempts failed, raise the exception
             if retry == max_retries and connect_error:
@@ -51,3 +68,99 @@ def connection_retry(max_retries, rate_limit):
 
     return connection_retry_decorator
 
+
+class RateLimiter:
+    """
+    Limit how quickly requests are made across threads with a token bucket
+
+    Up to `burst` requests can be made at once, after which requests are
+    spaced to `rate` per second. Threads reserve their slot before waiting,
+    so they are released in the order they asked.
+
+    Attributes:
+        rate: Requests allowed per second
+        burst: Requests allowed at once
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Wait until a request can be made
+
+        :returns: the seconds waited
+        """
+
+        with self._lock:
+            now = time.monotonic()
+
+            self._tokens = min(self.burst,
+                    self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+
+            wait = max(0, -self._tokens / self.rate)
+
+        if wait > 0:
+            time.sleep(wait)
+
+        return wait
+
+
+# GDAX private endpoint limit of 5 requests per second in bursts of up to 10,
+# shared by every order and data request in the process
+rate_limiter = RateLimiter(rate=5, burst=10)
+
+
+def parse_timestamp(timestamp):
+    """
+    Parse a GDAX timestamp
+
+    :param timestamp: timestamp string, such as `2017-01-01T01:00:00.000000Z`
+    :returns: seconds since the epoch
+    :raises ValueError: the timestamp is not in the GDAX format
+    """
+
+    # Whole second timestamps omit the fractional part
+    try:
+        parsed = datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S.%fZ')
+    except ValueError:
+        parsed = datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%SZ')
+
+    return parsed.replace(tzinfo=timezone.utc).timestamp()
+
+
+def get_rss():
+    """
+    Get the resident set size of the current process
+
+    :returns: the RSS in bytes, or `None` if it cannot be determined
+    """
+
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        pass
+    else:
+        return pages * os.sysconf('SC_PAGE_SIZE')
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    # Peak RSS is the closest measure available without procfs
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == 'darwin':
+        return max_rss
+
+    return max_rss * 1024